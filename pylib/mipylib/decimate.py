@@ -0,0 +1,254 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab level-of-detail decimation module
+# Note: Jython
+#-----------------------------------------------------
+from ucar.ma2 import Array, DataType
+import jarray
+import bisect
+import math
+import miparallel
+from miarray import MIArray
+from kdtree import asdoubles
+
+# Column number used when the pixel width is unknown (i.e. batch mode)
+defaultwidth = 1200
+
+def __ranges(n, size):
+    # Index ranges of the tasks, one range for serial evaluation
+    if not miparallel.isparallel(size):
+        return [(0, n)]
+    k = miparallel.get_num_threads() * 4
+    step = max(1, (n + k - 1) / k)
+    return [(s, min(s + step, n)) for s in range(0, n, step)]
+
+def __run(func, argslist):
+    if len(argslist) > 1:
+        return miparallel.invoke(func, argslist)
+    return [func(*a) for a in argslist]
+
+def ismonotonic(x):
+    """
+    Whether the values are in ascending order.
+
+    :param x: (*double[]*) The values.
+
+    :returns: (*boolean*) Ascending or not.
+    """
+    for i in range(1, len(x)):
+        if x[i] < x[i - 1]:
+            return False
+    return True
+
+def __extremes(x, y, start, end):
+    r = [-1, -1, -1, -1]
+    for i in range(start, end):
+        xi = x[i]
+        yi = y[i]
+        if math.isnan(xi) or math.isnan(yi):
+            continue
+        if r[0] < 0:
+            r = [i, i, i, i]
+            continue
+        if xi < x[r[0]]:
+            r[0] = i
+        elif xi > x[r[1]]:
+            r[1] = i
+        if yi < y[r[2]]:
+            r[2] = i
+        elif yi > y[r[3]]:
+            r[3] = i
+    return r
+
+def extremes(x, y):
+    """
+    Indices of the points with the minimum/maximum x and y values, NaN points are ignored.
+    Keeping them in a decimated series keeps its extent same as the full series.
+
+    :param x, y: (*double[]*) Point coordinates.
+
+    :returns: (*list*) Sorted unique indices.
+    """
+    n = len(x)
+    r = set()
+    for e in __run(__extremes, [(x, y) + s for s in __ranges(n, n)]):
+        for i in e:
+            if i >= 0:
+                r.add(i)
+    if len(r) > 4:
+        # Reduce the extremes of the tasks to the global ones
+        idx = list(r)
+        r = set([min(idx, key=lambda i: x[i]), max(idx, key=lambda i: x[i]),
+            min(idx, key=lambda i: y[i]), max(idx, key=lambda i: y[i])])
+    return sorted(r)
+
+def __m4columns(x, y, bounds, start, end):
+    # First, minimum, maximum and last points of each column, and the first NaN point
+    # of a column to keep the line break
+    r = []
+    for c in range(start, end):
+        lo = bounds[c]
+        hi = bounds[c + 1]
+        if lo >= hi:
+            continue
+        imin = -1
+        imax = -1
+        inan = -1
+        for i in range(lo, hi):
+            v = y[i]
+            if math.isnan(v):
+                if inan < 0:
+                    inan = i
+            elif imin < 0:
+                imin = i
+                imax = i
+            elif v < y[imin]:
+                imin = i
+            elif v > y[imax]:
+                imax = i
+        r.append(lo)
+        for i in sorted([imin, imax, inan]):
+            if i > lo and i < hi - 1:
+                r.append(i)
+        if hi - 1 > lo:
+            r.append(hi - 1)
+    return r
+
+def m4(x, y, xmin, xmax, width):
+    """
+    M4 decimation of a line series with ascending x values. The x range is divided into
+    pixel columns and only the first, minimum, maximum and last points of each column are
+    kept, so the rasterized line is same as the full series. The neighbour points out of
+    the range are kept to continue the line to the edges.
+
+    :param x, y: (*double[]*) Point coordinates.
+    :param xmin, xmax: (*float*) The x range.
+    :param width: (*int*) Pixel column number.
+
+    :returns: (*list*) Sorted indices of the kept points.
+    """
+    n = len(x)
+    lo = bisect.bisect_left(x, xmin)
+    hi = bisect.bisect_right(x, xmax)
+    width = max(1, int(width))
+    if hi - lo <= width * 4 or not xmax > xmin:
+        return range(max(0, lo - 1), min(n, hi + 1))
+    dx = float(xmax - xmin) / width
+    bounds = [lo]
+    for c in range(1, width):
+        bounds.append(min(max(bisect.bisect_left(x, xmin + c * dx, lo, hi), lo), hi))
+    bounds.append(hi)
+    r = []
+    if lo > 0:
+        r.append(lo - 1)
+    argslist = [(x, y, bounds) + s for s in __ranges(width, hi - lo)]
+    for cols in __run(__m4columns, argslist):
+        r.extend(cols)
+    if hi < n:
+        r.append(hi)
+    return r
+
+def __thincells(x, y, extent, width, height, start, end):
+    xmin, xmax, ymin, ymax = extent
+    sx = float(width) / (xmax - xmin)
+    sy = float(height) / (ymax - ymin)
+    cells = {}
+    for i in range(start, end):
+        xi = x[i]
+        yi = y[i]
+        if not (xi >= xmin and xi <= xmax and yi >= ymin and yi <= ymax):
+            continue
+        c = min(int((yi - ymin) * sy), height - 1) * width + min(int((xi - xmin) * sx), width - 1)
+        if not c in cells:
+            cells[c] = i
+    return cells
+
+def thin(x, y, extent, width, height):
+    """
+    Thin a point series to one point of each pixel cell in an extent, the points out of the
+    extent are dropped.
+
+    :param x, y: (*double[]*) Point coordinates.
+    :param extent: (*list*) ``[xmin, xmax, ymin, ymax]`` of the extent.
+    :param width, height: (*int*) Pixel column and row number.
+
+    :returns: (*list*) Sorted indices of the kept points.
+    """
+    n = len(x)
+    width = max(1, int(width))
+    height = max(1, int(height))
+    if not (extent[1] > extent[0] and extent[3] > extent[2]):
+        return range(n)
+    argslist = [(x, y, extent, width, height) + s for s in __ranges(n, n)]
+    r = {}
+    for cells in __run(__thincells, argslist):
+        for c, i in cells.iteritems():
+            if not c in r or i < r[c]:
+                r[c] = i
+    return sorted(r.values())
+
+def take(a, idx):
+    """
+    Get the values of the indices.
+
+    :param a: (*double[]*) The values.
+    :param idx: (*list*) The indices.
+
+    :returns: (*Array*) Double array of the values.
+    """
+    r = jarray.zeros(len(idx), 'd')
+    for k in range(len(idx)):
+        r[k] = a[idx[k]]
+    return Array.factory(DataType.DOUBLE, [len(idx)], r)
+
+# Level-of-detail series, the full data is kept and a decimated copy is made for the drawn
+# extent and pixel size
+class LODSeries():
+
+    # x, y: point coordinates (ucar Array)
+    # type: 'line' (M4 decimation, x must be ascending) or 'point' (thinning)
+    # legend: legend break of the line, or point legend breaks (one or one of each point)
+    def __init__(self, x, y, type='line', legend=None):
+        self.x = asdoubles(MIArray(x))
+        self.y = asdoubles(MIArray(y))
+        self.type = type
+        self.legend = legend
+        self.extremes = extremes(self.x, self.y)
+        self.key = None
+        self.graphic = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def decimate(self, extent, width, height):
+        """
+        Decimate the series for an extent, the extreme points are always kept.
+
+        :param extent: (*list*) ``[xmin, xmax, ymin, ymax]`` of the drawn extent, None for
+            the full extent.
+        :param width, height: (*int*) Pixel size of the drawn extent.
+
+        :returns: (*list*) Sorted indices of the kept points.
+        """
+        if extent is None:
+            x = [self.x[i] for i in self.extremes]
+            y = [self.y[i] for i in self.extremes]
+            if len(x) == 0:
+                return []
+            extent = [min(x), max(x), min(y), max(y)]
+        if width <= 0 or height <= 0:
+            width = defaultwidth
+            height = defaultwidth
+        if self.type == 'line':
+            idx = m4(self.x, self.y, extent[0], extent[1], width)
+        else:
+            idx = thin(self.x, self.y, extent, width, height)
+        self.key = (tuple(extent), width, height)
+        return sorted(set(idx).union(self.extremes))
+
+    def isvalid(self, extent, width, height):
+        """
+        Whether the current decimation is made for an extent and pixel size.
+        """
+        return self.key == (tuple(extent), width, height)
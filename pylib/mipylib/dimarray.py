@@ -10,7 +10,7 @@ from org.meteoinfo.data.meteodata import Dimension, DimensionType
 from org.meteoinfo.geoprocess.analysis import ResampleMethods
 from org.meteoinfo.layer import VectorLayer
 from org.meteoinfo.global import PointD
-from ucar.ma2 import Array, Range, MAMath
+from ucar.ma2 import Array, Range, MAMath, DataType
 import miarray
 import milayer
 from miarray import MIArray
@@ -18,9 +18,36 @@ from milayer import MILayer
 import math
 import datetime
 import miutil
+import kdtree
+import miprogress
 from java.lang import Double
+from java.util import List
+import jarray
 
 nan = Double.NaN
+# Default memory budget (bytes) of a chunk read by LazyDimArray
+chunkbytes = 64 * 1024 * 1024
+
+def coordarray(v):
+    """
+    Get the ucar Array of coordinates without copying the data of an array.
+
+    :param v: (*array_like*) Coordinates - MIArray, DimArray, ucar Array, Java primitive 
+        array, list, tuple or java.util.List.
+
+    :returns: (*Array*) The Array sharing the storage of an array, a new Array for a list.
+    """
+    if isinstance(v, (MIArray, DimArray)):
+        return v.asarray()
+    if isinstance(v, Array):
+        return v
+    if isinstance(v, (list, tuple)):
+        v = jarray.array(v, 'd')
+    elif isinstance(v, List):
+        return ArrayUtil.array(v)
+    dt = {'d':DataType.DOUBLE, 'f':DataType.FLOAT, 'i':DataType.INT, 'l':DataType.LONG,
+        'h':DataType.SHORT}[v.typecode]
+    return Array.factory(dt, [len(v)], v)
 
 # Dimension array
 class DimArray():
@@ -158,145 +185,108 @@ class DimArray():
                 dims.append(dim.extract(sidx, eidx, step))
                     
         #r = ArrayMath.section(self.array.array, origin, size, stride)
-        r = ArrayMath.section(self.array.array, ranges)
+        r = self.array.section(ranges, flips)
         if iszerodim:
-            return r.getObject(0)
-        else:
-            for i in flips:
-                r = r.flip(i)
-            rr = Array.factory(r.getDataType(), r.getShape());
-            MAMath.copy(rr, r);
-            array = MIArray(rr)
-            data = DimArray(array, dims, self.fill_value, self.proj)
+            return r.array.getObject(r.array.getIndex())
+        else:
+            data = DimArray(r, dims, self.fill_value, self.proj)
             return data
         
     def __setitem__(self, indices, value):
-        #print type(indices) 
-        if isinstance(indices, (MIArray, DimArray)):
-            ArrayMath.setValue(self.asarray(), indices.asarray(), value)
-            return None
-        
-        if not isinstance(indices, tuple):
-            inds = []
-            inds.append(indices)
-            indices = inds
-        
-        if self.rank == 0:
-            self.array.array.setObject(0, value)
-            return None
-        
-        if len(indices) != self.rank:
-            print 'indices must be ' + str(self.rank) + ' dimensions!'
-            return None
-
-        ranges = []
-        flips = []        
-        for i in range(0, self.rank):   
-            if isinstance(indices[i], int):
-                sidx = indices[i]
-                eidx = indices[i]
-                step = 1
-            else:
-                sidx = 0 if indices[i].start is None else indices[i].start
-                eidx = self.shape[i]-1 if indices[i].stop is None else indices[i].stop
-                step = 1 if indices[i].step is None else indices[i].step
-            if step < 0:
-                step = abs(step)
-                flips.append(i)
-            rr = Range(sidx, eidx, step)
-            ranges.append(rr)
-    
-        if isinstance(value, (MIArray, DimArray)):
-            value = value.asarray()
-        r = ArrayMath.setSection(self.array.array, ranges, value)
-        self.array.array = r
+        # Set through the MIArray, so a view writes to the storage shared with its source
+        if isinstance(indices, DimArray):
+            indices = indices.array
+        if isinstance(value, DimArray):
+            value = value.array
+        self.array[indices] = value
         
     def __add__(self, other):
-        r = None
         ArrayMath.fill_value = self.fill_value
-        if isinstance(other, DimArray):      
-            r = DimArray(self.array.__add__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__add__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__add__, other)
         
     def __radd__(self, other):
         return DimArray.__add__(self, other)
         
+    def __iadd__(self, other):
+        return self.__inplace(MIArray.__iadd__, other)
+        
     def __sub__(self, other):
-        r = None
-        if isinstance(other, DimArray): 
-            r = DimArray(self.array.__sub__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__sub__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__sub__, other)
         
     def __rsub__(self, other):
-        r = None
-        if isinstance(other, DimArray): 
-            r = DimArray(self.array.__rsub__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__rsub__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__rsub__, other)
+        
+    def __isub__(self, other):
+        return self.__inplace(MIArray.__isub__, other)
         
     def __mul__(self, other):
-        r = None
-        if isinstance(other, DimArray): 
-            r = DimArray(self.array.__mul__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__mul__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__mul__, other)
         
     def __rmul__(self, other):
         return DimArray.__mul__(self, other)
         
+    def __imul__(self, other):
+        return self.__inplace(MIArray.__imul__, other)
+        
     def __div__(self, other):
-        r = None
-        if isinstance(other, DimArray): 
-            r = DimArray(self.array.__div__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__div__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__div__, other)
         
     def __rdiv__(self, other):
-        r = None
-        if isinstance(other, DimArray): 
-            r = DimArray(self.array.__rdiv__(other.array), self.dims, self.fill_value, self.proj)
-        else:
-            r = DimArray(self.array.__rdiv__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__rdiv__, other)
+        
+    def __idiv__(self, other):
+        return self.__inplace(MIArray.__idiv__, other)
         
     def __pow__(self, other):
-        r = DimArray(self.array.__pow__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__pow__, other)
+        
+    def __rpow__(self, other):
+        return self.__binop(MIArray.__rpow__, other)
+        
+    def __ipow__(self, other):
+        return self.__inplace(MIArray.__ipow__, other)
         
     def __neg__(self):
         r = DimArray(self.array.__neg__(), self.dims, self.fill_value, self.proj)
         return r
         
     def __lt__(self, other):
-        r = DimArray(self.array.__lt__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__lt__, other)
         
     def __le__(self, other):
-        r = DimArray(self.array.__le__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__le__, other)
         
     def __eq__(self, other):
-        r = DimArray(self.array.__eq__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__eq__, other)
         
     def __ne__(self, other):
-        r = DimArray(self.array.__ne__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__ne__, other)
         
     def __gt__(self, other):
-        r = DimArray(self.array.__gt__(other), self.dims, self.fill_value, self.proj)
-        return r
+        return self.__binop(MIArray.__gt__, other)
         
     def __ge__(self, other):
-        r = DimArray(self.array.__ge__(other), self.dims, self.fill_value, self.proj)
-        return r   
+        return self.__binop(MIArray.__ge__, other)
+        
+    # The operands are broadcast, the dimensions of the result are taken from the operand
+    # with the same shape
+    def __binop(self, func, other):
+        if isinstance(other, DimArray):
+            r = func(self.array, other.array)
+        else:
+            r = func(self.array, other)
+        if list(r.shape) == list(self.shape):
+            return DimArray(r, self.dims, self.fill_value, self.proj)
+        elif isinstance(other, DimArray) and list(r.shape) == list(other.shape):
+            return DimArray(r, other.dims, other.fill_value, other.proj)
+        else:
+            return r
+            
+    def __inplace(self, func, other):
+        if isinstance(other, DimArray):
+            other = other.array
+        func(self.array, other)
+        return self
 
     def __and__(self, other):
         r = DimArray(self.array.__and__(other), self.dims, self.fill_value, self.proj)
@@ -363,13 +353,8 @@ class DimArray():
                 dims.append(dim.extract(sidx, eidx, step))
                     
         #r = ArrayMath.section(self.array.array, origin, size, stride)
-        r = ArrayMath.section(self.array.array, ranges)
-        for i in flips:
-            r = r.flip(i)
-        rr = Array.factory(r.getDataType(), r.getShape());
-        MAMath.copy(rr, r);
-        array = MIArray(rr)
-        data = DimArray(array, dims, self.fill_value, self.proj)
+        r = self.array.section(ranges, flips)
+        data = DimArray(r, dims, self.fill_value, self.proj)
         return data
     
     def getsize():
@@ -467,13 +452,13 @@ class DimArray():
     def asgriddata(self):
         xdata = self.dims[1].getDimValue()
         ydata = self.dims[0].getDimValue()
-        gdata = GridData(self.array.array, xdata, ydata, self.fill_value, self.proj)
+        gdata = GridData(self.array.asarray(), xdata, ydata, self.fill_value, self.proj)
         return PyGridData(gdata)
         
     def asgridarray(self):
         xdata = self.dims[1].getDimValue()
         ydata = self.dims[0].getDimValue()
-        gdata = GridArray(self.array.array, xdata, ydata, self.fill_value, self.proj)
+        gdata = GridArray(self.array.asarray(), xdata, ydata, self.fill_value, self.proj)
         return gdata
         
     def sqrt(self):
@@ -516,17 +501,109 @@ class DimArray():
         r = DimArray(self.array.log10(), self.dims, self.fill_value, self.proj)
         return r
         
-    def min(self):
-        return self.array.min()
+    def min(self, axis=None):
+        """
+        Minimum of the array or minimum along an axis, NaN values are skipped.
         
-    def max(self):
-        return self.array.max()
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the minimum of all elements is returned.
         
-    def sum(self):
-        return self.array.sum()
+        :returns: (*DimArray or number*) Minimum result.
+        """
+        return self.__reduced(self.array.min(axis=axis), axis)
         
-    def ave(self):
-        return self.array.ave()
+    def max(self, axis=None):
+        """
+        Maximum of the array or maximum along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the maximum of all elements is returned.
+        
+        :returns: (*DimArray or number*) Maximum result.
+        """
+        return self.__reduced(self.array.max(axis=axis), axis)
+        
+    def sum(self, axis=None):
+        """
+        Sum of the array elements or sum along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the sum of all elements is returned.
+        
+        :returns: (*DimArray or number*) Sum result.
+        """
+        return self.__reduced(self.array.sum(axis=axis), axis)
+        
+    def ave(self, axis=None):
+        return self.mean(axis)
+        
+    def mean(self, axis=None):
+        """
+        Arithmetic mean of the array or mean along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the mean of all elements is returned.
+        
+        :returns: (*DimArray or number*) Mean result.
+        """
+        return self.__reduced(self.array.mean(axis=axis), axis)
+        
+    def std(self, axis=None, ddof=0):
+        """
+        Standard deviation of the array or along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the standard deviation of all elements is returned.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+        
+        :returns: (*DimArray or number*) Standard deviation result.
+        """
+        return self.__reduced(self.array.std(axis, ddof), axis)
+        
+    def var(self, axis=None, ddof=0):
+        """
+        Variance of the array or along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the variance of all elements is returned.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+        
+        :returns: (*DimArray or number*) Variance result.
+        """
+        return self.__reduced(self.array.var(axis, ddof), axis)
+        
+    def argmin(self, axis=None):
+        """
+        Indices of the minimum values along an axis, NaN values are skipped.
+        
+        :param axis: (*int*) Axis along which to operate. Default is None, the index in
+            the flattened array is returned.
+        
+        :returns: (*DimArray or int*) Indices of the minimum values.
+        """
+        return self.__reduced(self.array.argmin(axis), axis)
+        
+    def argmax(self, axis=None):
+        """
+        Indices of the maximum values along an axis, NaN values are skipped.
+        
+        :param axis: (*int*) Axis along which to operate. Default is None, the index in
+            the flattened array is returned.
+        
+        :returns: (*DimArray or int*) Indices of the maximum values.
+        """
+        return self.__reduced(self.array.argmax(axis), axis)
+        
+    # Keep the dimensions of the axes which are not reduced
+    def __reduced(self, r, axis):
+        if not isinstance(r, MIArray):
+            return r
+        axes = miarray.reduceaxes(self.ndim, axis)
+        dims = []
+        for i in range(0, self.ndim):
+            if not i in axes:
+                dims.append(self.dims[i])
+        return DimArray(r, dims, self.fill_value, self.proj)
         
     def setdata(self, v, x=None, y=None, method='mean'):
         '''
@@ -571,10 +648,18 @@ class DimArray():
             return r
      
     def aslist(self):
-        return ArrayMath.asList(self.array.array)
+        return ArrayMath.asList(self.array.asarray())
         
     def asarray(self):
-        return self.array.array
+        return self.array.asarray()
+        
+    def copy(self):
+        """
+        Return a copy of the array.
+        
+        :returns: (*DimArray*) Copied array with its own backing storage.
+        """
+        return DimArray(self.array.copy(), self.dims, self.fill_value, self.proj)
         
     def reshape(self, *args):
         return self.array.reshape(*args)
@@ -601,12 +686,51 @@ class DimArray():
         return r
      
     def tostation(self, x, y):
-        gdata = self.asgriddata()
-        if isinstance(x, MIArray) or isinstance(x, DimArray):
-            r = gdata.data.toStation(x.aslist(), y.aslist())
-            return MIArray(ArrayUtil.array(r))
-        else:
-            return gdata.data.toStation(x, y)
+        """
+        Bilinear interpolation of the array to station points on its last two (y, x) 
+        dimensions by *GridData.toStation()* , the slices of the leading dimensions are 
+        interpolated in turn.
+        
+        :param x: (*array_like or float*) Station x coordinates.
+        :param y: (*array_like or float*) Station y coordinates.
+        
+        :returns: (*MIArray or float*) Station values with the leading dimensions of the array
+            and the stations as the last dimension. A float for a single station of a 2-D 
+            array.
+        """
+        scalar = isinstance(x, (int, long, float))
+        if isinstance(x, (MIArray, DimArray)):
+            x = x.aslist()
+        if isinstance(y, (MIArray, DimArray)):
+            y = y.aslist()
+        xdata = self.dims[self.ndim - 1].getDimValue()
+        ydata = self.dims[self.ndim - 2].getDimValue()
+        shape = list(self.shape[:-2])
+        nslice = 1
+        for n in shape:
+            nslice *= n
+        data = self.asarray()
+        if nslice > 1:
+            data = data.reshapeNoCopy(jarray.array([nslice] + list(self.shape[-2:]), 'i'))
+        r = None
+        for k in range(nslice):
+            sdata = data if nslice == 1 else data.slice(0, k).copy()
+            gdata = GridData(sdata, xdata, ydata, self.fill_value, self.proj)
+            v = gdata.toStation(x, y)
+            if scalar:
+                if r is None:
+                    r = jarray.zeros(nslice, 'd')
+                r[k] = v
+            else:
+                v = ArrayUtil.array(v)
+                if r is None:
+                    r = Array.factory(DataType.DOUBLE, jarray.array([nslice, v.getSize()], 'i'))
+                MAMath.copy(r.slice(0, k), v)
+        if scalar:
+            if len(shape) == 0:
+                return r[0]
+            return MIArray(Array.factory(DataType.DOUBLE, shape, r))
+        return MIArray(r.reshape(jarray.array(shape + [r.getShape()[1]], 'i')))
             
     def project(self, x=None, y=None, toproj=None, method='bilinear'):
         """
@@ -625,7 +749,7 @@ class DimArray():
             toproj = self.proj
         
         if x is None or y is None:
-            pr = ArrayUtil.reproject(self.array.array, xx, yy, self.proj, toproj)
+            pr = ArrayUtil.reproject(self.array.asarray(), xx, yy, self.proj, toproj)
             r = pr[0]
             x = pr[1]
             y = pr[2]
@@ -644,19 +768,19 @@ class DimArray():
         else:
             method = ResampleMethods.NearestNeighbor
         if isinstance(x, list):
-            r = ArrayUtil.reproject(self.array.array, xx, yy, x, y, self.proj, toproj, self.fill_value, method)
+            r = ArrayUtil.reproject(self.array.asarray(), xx, yy, x, y, self.proj, toproj, self.fill_value, method)
         elif isinstance(x, MIArray):
             if x.rank == 1:
-                r = ArrayUtil.reproject(self.array.array, xx, yy, x.aslist(), y.aslist(), self.proj, toproj, self.fill_value, method)
+                r = ArrayUtil.reproject(self.array.asarray(), xx, yy, x.aslist(), y.aslist(), self.proj, toproj, self.fill_value, method)
             else:
-                r = ArrayUtil.reproject(self.array.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
+                r = ArrayUtil.reproject(self.array.asarray(), xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
         else:
-            r = ArrayUtil.reproject(self.array.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
+            r = ArrayUtil.reproject(self.array.asarray(), xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
         #r = ArrayUtil.reproject(self.array.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
         return MIArray(r)
             
     def join(self, b, dimidx):
-        r = ArrayMath.join(self.array.array, b.array.array, dimidx)
+        r = ArrayMath.join(self.array.asarray(), b.asarray(), dimidx)
         dima = self.dimvalue(dimidx)
         dimb = b.dimvalue(dimidx)
         dimr = []
@@ -704,8 +828,355 @@ class DimArray():
                     gdata.saveAsMICAPS4File(fname, desc, date, hours, level, smooth, boldvalue)
                 else:
                     gdata.saveAsMICAPS4File(fname, desc, date, hours, level, smooth, boldvalue, proj)
-    
-       
+
+###############################################################
+# Lazy dimension array - records a section of a data file variable and
+# reads it chunk by chunk on demand
+class LazyDimArray():
+
+    # variable must be DimVariable
+    # origin, size and stride are the section of the variable (one item each variable dimension)
+    # dims are the dimensions of the section (without single element dimensions)
+    def __init__(self, variable, origin, size, stride, dims, chunkbytes=None, funcs=None):
+        self.variable = variable
+        self.origin = list(origin)
+        self.size = list(size)
+        self.stride = list(stride)
+        self.dims = dims
+        self.ndim = len(dims)
+        self.fill_value = variable.fill_value
+        self.proj = variable.proj
+        self.datatype = variable.datatype
+        self.chunkbytes = chunkbytes
+        self.funcs = [] if funcs is None else funcs
+        #Variable dimension index of each kept dimension
+        self.axes = []
+        for i in range(0, len(self.size)):
+            if self.size[i] > 1:
+                self.axes.append(i)
+        self.shape = []
+        for i in self.axes:
+            self.shape.append(self.__count(i))
+        self.rank = len(self.shape)
+        if self.rank > 0:
+            self.sizestr = str(self.shape[0])
+            if self.rank > 1:
+                for i in range(1, self.rank):
+                    self.sizestr = self.sizestr + '*%s' % self.shape[i]
+        else:
+            self.sizestr = '1'
+
+    def __len__(self):
+        len = 1
+        for l in self.shape:
+            len = len * l
+        return len
+
+    def __str__(self):
+        return 'LazyDimArray(' + self.variable.name + ', ' + self.sizestr + ')'
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __getitem__(self, indices):
+        r = self.section(indices)
+        if r.rank == 0:
+            return r.read().getObject(0)
+        else:
+            return r.read()
+
+    # Element number of a variable dimension in the section
+    def __count(self, idx):
+        return (self.size[idx] - 1) / abs(self.stride[idx]) + 1
+
+    # Origin and size of the variable dimension for the section elements [sidx, eidx)
+    def __subrange(self, idx, sidx, eidx):
+        step = abs(self.stride[idx])
+        if self.stride[idx] < 0:
+            n = self.__count(idx)
+            sidx, eidx = n - eidx, n - sidx
+        return self.origin[idx] + sidx * step, (eidx - sidx - 1) * step + 1
+
+    def __elemsize(self):
+        try:
+            return self.datatype.getSize()
+        except:
+            return 8
+
+    def getchunkbytes(self):
+        if self.chunkbytes is None:
+            return chunkbytes
+        else:
+            return self.chunkbytes
+
+    def chunklen(self, axis=0):
+        """
+        Get the element number along an axis of one chunk.
+
+        :param axis: (*int*) The axis the array is split along.
+
+        :returns: (*int*) Chunk length which keeps the chunk size in the chunk memory budget.
+        """
+        n = self.__elemsize()
+        for i in range(0, self.rank):
+            if i != axis:
+                n = n * self.shape[i]
+        return max(1, self.getchunkbytes() / n)
+
+    def section(self, indices):
+        """
+        Get a sub section of the array without reading data.
+
+        :param indices: (*tuple*) Integer or slice indices of each dimension.
+
+        :returns: (*LazyDimArray*) Lazy array of the sub section.
+        """
+        if not isinstance(indices, tuple):
+            indices = (indices,)
+        if len(indices) != self.ndim:
+            raise IndexError('indices must be ' + str(self.ndim) + ' dimensions!')
+        origin = list(self.origin)
+        size = list(self.size)
+        stride = list(self.stride)
+        dims = []
+        for i in range(0, self.ndim):
+            k = indices[i]
+            idx = self.axes[i]
+            if isinstance(k, int):
+                if k < 0:
+                    k = self.shape[i] + k
+                sidx = k
+                eidx = k
+                step = 1
+            elif isinstance(k, slice):
+                sidx = 0 if k.start is None else k.start
+                eidx = self.shape[i] - 1 if k.stop is None else k.stop - 1
+                step = 1 if k.step is None else k.step
+                if step <= 0:
+                    raise ValueError('Negative or zero step is not supported by lazy section!')
+                eidx = sidx + (eidx - sidx) / step * step
+            else:
+                raise TypeError('Unsupported index of lazy section: ' + str(k))
+            if sidx < 0 or eidx >= self.shape[i]:
+                raise IndexError()
+            origin[idx], size[idx] = self.__subrange(idx, sidx, eidx + 1)
+            stride[idx] = self.stride[idx] * step
+            if eidx > sidx:
+                dims.append(self.dims[i].extract(sidx, eidx, step))
+        return LazyDimArray(self.variable, origin, size, stride, dims, self.chunkbytes, self.funcs)
+
+    def readchunk(self, axis, sidx, eidx):
+        """
+        Read a chunk of the array.
+
+        :param axis: (*int*) The axis the array is split along.
+        :param sidx: (*int*) Start index of the chunk along the axis.
+        :param eidx: (*int*) End index (exclusive) of the chunk along the axis.
+
+        :returns: (*DimArray*) Chunk data.
+        """
+        origin = list(self.origin)
+        size = list(self.size)
+        if self.rank > 0:
+            idx = self.axes[axis]
+            origin[idx], size[idx] = self.__subrange(idx, sidx, eidx)
+        rr = self.variable.dataset.read(self.variable.name, origin, size, self.stride)
+        rshape = rr.getShape()
+        shape = []
+        for i in self.axes:
+            shape.append(rshape[i])
+        rr = rr.reshape(jarray.array(shape, 'i'))
+        ArrayMath.missingToNaN(rr, self.fill_value)
+        dims = list(self.dims)
+        if self.rank > 0 and (sidx > 0 or eidx < self.shape[axis]):
+            dims[axis] = self.dims[axis].extract(sidx, eidx - 1, 1)
+        data = DimArray(MIArray(rr), dims, self.fill_value, self.proj)
+        for func in self.funcs:
+            data = func(data)
+        return data
+
+    def chunks(self, axis=0):
+        """
+        Iterate the array chunk by chunk along an axis. The size of each chunk is bounded
+        by the chunk memory budget.
+
+        :param axis: (*int*) The axis the array is split along. Default is 0.
+
+        :returns: Generator of (start index along the axis, *DimArray* chunk) tuples.
+        """
+        n = self.chunklen(axis)
+        progress = miprogress.Progress(self.shape[axis], 'Reading ' + self.variable.name)
+        for sidx in range(0, self.shape[axis], n):
+            eidx = min(sidx + n, self.shape[axis])
+            chunk = self.readchunk(axis, sidx, eidx)
+            progress.step(eidx - sidx)
+            yield sidx, chunk
+
+    def read(self):
+        """
+        Read all data of the array. The data larger than the chunk memory budget is read
+        chunk by chunk, so the reading reports progress and can be cancelled.
+
+        :returns: (*DimArray*) Data array.
+        """
+        if self.rank == 0:
+            return self.readchunk(0, 0, 1).asarray()
+        if self.chunklen(0) >= self.shape[0]:
+            return self.readchunk(0, 0, self.shape[0])
+        r = None
+        for sidx, chunk in self.chunks():
+            rr = chunk.asarray()
+            if r is None:
+                r = Array.factory(rr.getDataType(), jarray.array(self.shape, 'i'))
+            ranges = [Range(sidx, sidx + rr.getShape()[0] - 1)]
+            for i in range(1, self.rank):
+                ranges.append(Range(0, self.shape[i] - 1))
+            MAMath.copy(r.sectionNoReduce(ranges), rr)
+        return DimArray(MIArray(r), self.dims, self.fill_value, self.proj)
+
+    def asarray(self):
+        return self.read().asarray()
+
+    # Reduce the array chunk by chunk, NaN values are skipped. The chunks are split
+    # along the first axis which is not reduced, so each chunk is reduced independently
+    def __reduce(self, axis, kind, ddof=0):
+        axes = miarray.reduceaxes(self.rank, axis)
+        dims = []
+        shape = []
+        for i in range(0, self.rank):
+            if not i in axes:
+                dims.append(self.dims[i])
+                shape.append(self.shape[i])
+        if len(dims) == 0:
+            return self.__reduceall(kind, ddof)
+        split = 0
+        for i in range(0, self.rank):
+            if not i in axes:
+                split = i
+                break
+        r = None
+        for sidx, chunk in self.chunks(split):
+            rr = miarray.axisreduce(chunk.array, axes, kind, ddof).asarray()
+            if r is None:
+                r = Array.factory(rr.getDataType(), jarray.array(shape, 'i'))
+            ranges = []
+            for i in range(0, len(shape)):
+                if i == 0:
+                    ranges.append(Range(sidx, sidx + rr.getShape()[i] - 1))
+                else:
+                    ranges.append(Range(0, shape[i] - 1))
+            MAMath.copy(r.sectionNoReduce(ranges), rr)
+        return DimArray(MIArray(r), dims, self.fill_value, self.proj)
+
+    # Reduce all elements chunk by chunk, the partial results of the chunks are merged
+    def __reduceall(self, kind, ddof=0):
+        if kind in ('mean', 'var', 'std'):
+            m = (0, 0.0, 0.0)
+            for sidx, chunk in self.chunks():
+                m = miarray.mergemoments(m, miarray.moments(chunk.array))
+            c, mean, m2 = m
+            if kind == 'mean':
+                return mean if c > 0 else nan
+            elif c - ddof <= 0:
+                return nan
+            elif kind == 'var':
+                return m2 / (c - ddof)
+            else:
+                return math.sqrt(m2 / (c - ddof))
+        elif kind in ('sum', 'count'):
+            r = 0
+            for sidx, chunk in self.chunks():
+                r += miarray.axisreduce(chunk.array, None, kind)
+            return r
+        else:
+            k = kind[-3:]
+            n = len(self) / self.shape[0] if self.rank > 0 else 1
+            r = nan
+            idx = -1
+            for sidx, chunk in self.chunks():
+                v = miarray.axisreduce(chunk.array, None, k)
+                if v == v and (idx < 0 or (k == 'min' and v < r) or (k == 'max' and v > r)):
+                    r = v
+                    idx = sidx * n + miarray.axisreduce(chunk.array, None, 'arg' + k)
+            return r if kind == k else idx
+
+    def sum(self, axis=None):
+        """
+        Sum of the array elements over given axes, NaN values are skipped. The data is 
+        read chunk by chunk.
+
+        :param axis: (*int or tuple*) Axis or axes along which the sum is performed. Default
+            is None, sum all of the elements.
+
+        :returns: (*DimArray or float*) Sum result.
+        """
+        return self.__reduce(axis, 'sum')
+
+    def mean(self, axis=None):
+        """
+        Compute the arithmetic mean along the specified axes, NaN values are skipped. The 
+        data is read chunk by chunk.
+
+        :param axis: (*int or tuple*) Axis or axes along which the means are computed. Default
+            is None, compute the mean of all elements.
+
+        :returns: (*DimArray or float*) Mean result.
+        """
+        return self.__reduce(axis, 'mean')
+
+    def ave(self, axis=None):
+        return self.mean(axis)
+
+    def min(self, axis=None):
+        return self.__reduce(axis, 'min')
+
+    def max(self, axis=None):
+        return self.__reduce(axis, 'max')
+
+    def std(self, axis=None, ddof=0):
+        """
+        Compute the standard deviation along the specified axes, NaN values are skipped. 
+        The partial moments of the chunks are merged, so the data is read only once.
+
+        :param axis: (*int or tuple*) Axis or axes along which the standard deviations are 
+            computed. Default is None, compute the standard deviation of all elements.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+
+        :returns: (*DimArray or float*) Standard deviation result.
+        """
+        return self.__reduce(axis, 'std', ddof)
+
+    def var(self, axis=None, ddof=0):
+        """
+        Compute the variance along the specified axes, NaN values are skipped. The partial
+        moments of the chunks are merged, so the data is read only once.
+
+        :param axis: (*int or tuple*) Axis or axes along which the variances are computed.
+            Default is None, compute the variance of all elements.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+
+        :returns: (*DimArray or float*) Variance result.
+        """
+        return self.__reduce(axis, 'var', ddof)
+
+    def argmin(self, axis=None):
+        return self.__reduce(axis, 'argmin')
+
+    def argmax(self, axis=None):
+        return self.__reduce(axis, 'argmax')
+
+    def maskout(self, mask):
+        """
+        Maskout the array by polygons. The maskout is performed lazily on each chunk.
+
+        :param mask: (*MILayer or polygons*) Maskout borders.
+
+        :returns: (*LazyDimArray*) Lazy maskouted array.
+        """
+        funcs = list(self.funcs)
+        funcs.append(lambda data: data.maskout(mask))
+        return LazyDimArray(self.variable, self.origin, self.size, self.stride, self.dims, self.chunkbytes, funcs)
+
 # The encapsulate class of GridData
 class PyGridData():
     
@@ -968,8 +1439,17 @@ class PyStationData():
     def griddata(self, xi=None, **kwargs):
         method = kwargs.pop('method', 'idw')
         fill_value = self.data.missingValue
-        x_s = MIArray(ArrayUtil.array(self.data.getXList()))
-        y_s = MIArray(ArrayUtil.array(self.data.getYList()))
+        n = self.data.getStNum()
+        x_s = jarray.zeros(n, 'd')
+        y_s = jarray.zeros(n, 'd')
+        v_s = jarray.zeros(n, 'd')
+        for i in range(n):
+            x_s[i] = self.data.getX(i)
+            y_s[i] = self.data.getY(i)
+            v = self.data.getValue(i)
+            v_s[i] = nan if v == fill_value else v
+        x_s = MIArray(Array.factory(DataType.DOUBLE, [n], x_s))
+        y_s = MIArray(Array.factory(DataType.DOUBLE, [n], y_s))
         if xi is None:            
             xn = int(math.sqrt(len(x_s)))
             yn = xn
@@ -978,6 +1458,20 @@ class PyStationData():
         else:
             x_g = xi[0]
             y_g = xi[1]
+        if kwargs.pop('kdtree', False) and method in ['idw', 'cressman', 'neareast']:
+            # Primitive coordinates and values, the grid array is wrapped without copying
+            if method == 'idw':
+                r = kdtree.idw(x_s, y_s, v_s, x_g, y_g, kwargs.pop('pointnum', 2), 
+                    kwargs.pop('radius', None), fill_value)
+            elif method == 'cressman':
+                radius = kwargs.pop('radius', [10, 7, 4, 2, 1])
+                if isinstance(radius, MIArray):
+                    radius = radius.aslist()
+                r = kdtree.cressman(x_s, y_s, v_s, x_g, y_g, radius, fill_value)
+            else:
+                r = kdtree.nearest(x_s, y_s, v_s, x_g, y_g, kwargs.pop('radius', kdtree.inf), 
+                    fill_value)
+            return PyGridData(GridData(r.asarray(), coordarray(x_g), coordarray(y_g), fill_value))
         if isinstance(x_s, MIArray):
             x_s = x_s.aslist()
         if isinstance(y_s, MIArray):
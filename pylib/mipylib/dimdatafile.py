@@ -4,9 +4,10 @@
 # Purpose: MeteoInfo Dataset module
 # Note: Jython
 #-----------------------------------------------------
-from org.meteoinfo.data.meteodata import MeteoDataInfo
-from ucar.ma2 import Section, DataType
+from org.meteoinfo.data.meteodata import MeteoDataInfo, Dimension, DimensionType
+from ucar.ma2 import Section, DataType, Array, Range, MAMath
 from ucar.nc2 import Attribute
+from ucar.nc2.write import Nc4Chunking, Nc4ChunkingStrategy
 import dimvariable
 from dimvariable import DimVariable
 import dimarray
@@ -15,19 +16,35 @@ import milayer
 from milayer import MILayer, MIXYListData
 import miarray
 from miarray import MIArray
+import micache
+import miparallel
 
 from datetime import datetime
 
 from java.util import Calendar
 from java.lang import Float
 import jarray
+import math
+import bisect
+import threading
 
 # Dimension dataset
 class DimDataFile():
     
     # dataset must be org.meteoinfo.data.meteodata.MeteoDataInfo
-    def __init__(self, dataset=None, ncfile=None, arldata=None, bufrdata=None):
+    # lazy: variable sections are read chunk by chunk on demand (LazyDimArray)
+    # chunkbytes: memory budget of a lazy chunk, None means dimarray.chunkbytes
+    # usecache: decoded data blocks are kept in the shared block cache (micache)
+    # chunking: NcChunking of a netCDF-4 file created for writing
+    # lock: serializes the data reading, the data readers are not thread-safe
+    def __init__(self, dataset=None, ncfile=None, arldata=None, bufrdata=None, lazy=False, chunkbytes=None):
         self.dataset = dataset
+        self.lazy = lazy
+        self.chunkbytes = chunkbytes
+        self.usecache = True
+        self.filename = None
+        self.chunking = None
+        self.lock = threading.RLock()
         if not dataset is None:
             self.filename = dataset.getFileName()
             self.nvar = dataset.getDataInfo().getVariableNum()
@@ -51,14 +68,6 @@ class DimDataFile():
             return 'None'
         return self.dataset.getInfoText()
         
-    def close(self):
-        if not self.dataset is None:
-            self.dataset.close()
-        elif not self.arldata is None:
-            self.arldata.closeDataFile()
-        elif not self.bufrdata is None:
-            self.bufrdata.closeDataFile()
-    
     def dimensions(self):
         return self.dataset.getDataInfo().getDimensions()
         
@@ -85,10 +94,58 @@ class DimDataFile():
         return self.dataset.getDataInfo().getVariableNames()
         
     def read(self, varname, origin=None, size=None, stride=None):
-        if origin is None:
-            return self.dataset.read(varname)
-        else:
-            return self.dataset.read(varname, origin, size, stride)
+        if not origin is None and stride is None:
+            stride = [1] * len(origin)
+        # Only the blocks of local files are cached
+        usecache = self.usecache and micache.islocal(self.filename)
+        if usecache:
+            # The file time and length are in the key, the blocks of a rewritten file
+            # are not used
+            key = (micache.filekey(self.filename),) + micache.filestamp(self.filename) + (varname,)
+            if not origin is None:
+                key += (tuple(origin), tuple(size), tuple(stride))
+            rr = micache.blockcache.get(key)
+            if not rr is None:
+                return rr.copy()
+        self.lock.acquire()
+        try:
+            if origin is None:
+                rr = self.dataset.read(varname)
+            else:
+                rr = self.dataset.read(varname, origin, size, stride)
+        finally:
+            self.lock.release()
+        if usecache and rr.getDataType().isNumeric() and \
+            rr.getSizeBytes() <= micache.blockcache.maxbytes:
+            micache.blockcache.put(key, rr.copy(), rr.getSizeBytes())
+        return rr
+        
+    def cache(self, maxbytes=None, enable=True):
+        """
+        Set the block cache of the data reading. Decoded data blocks are kept in a size 
+        bounded LRU cache shared by all data files, repeated reads of the same variable 
+        section cost a memory copy instead of a disk decode.
+        
+        :param maxbytes: (*int*) Maximum size of the shared cache in bytes. Default is None,
+            keep the current size.
+        :param enable: (*boolean*) Use the cache for this data file or not. Default is True.
+            Remote datasets are never cached.
+        
+        :returns: (*dict*) Cache statistics - items, nbytes, maxbytes, hits, misses and 
+            hitratio.
+        """
+        if not maxbytes is None:
+            micache.blockcache.resize(maxbytes)
+        self.usecache = enable
+        if not enable:
+            self.clearcache()
+        return micache.blockcache.info()
+        
+    def clearcache(self):
+        """
+        Remove the cached data blocks of this data file.
+        """
+        micache.invalidate(self.filename)
         
     def dump(self):
         print self.dataset.getInfoText()
@@ -215,27 +272,61 @@ class DimDataFile():
         else:
             return datatype
  
-    def addvar(self, varname, datatype, dims, group=None):
+    def addvar(self, varname, datatype, dims, group=None, **kwargs):
+        """
+        Add a variable to the netCDF file.
+        
+        :param varname: (*string*) Variable name.
+        :param datatype: (*string or DataType*) Data type.
+        :param dims: (*list*) Dimensions of the variable.
+        :param group: (*Group*) The group. Default is None, the root group.
+        :param chunksizes: (*list*) Chunk shape of the variable (netCDF-4).
+        :param chunking: (*string*) Chunk shape for the expected access pattern - 'map' or
+            'timeseries' (netCDF-4), used if *chunksizes* is not set. Default is the chunking
+            policy of the file.
+        :param deflate: (*int*) Deflate level 0 - 9 (netCDF-4). Default is the deflate level
+            of the file.
+        :param shuffle: (*boolean*) Use the shuffle filter or not (netCDF-4). Default is the 
+            shuffle setting of the file.
+        
+        :returns: (*DimVariable*) The variable.
+        """
         dt = self.__getdatatype(datatype)        
-        return DimVariable(ncvariable=self.ncfile.addVariable(group, varname, dt, dims))
+        var = DimVariable(ncvariable=self.ncfile.addVariable(group, varname, dt, dims))
+        if len(kwargs) > 0:
+            if self.chunking is None:
+                print 'Chunking and compression are only supported by netCDF-4 file!'
+            else:
+                self.chunking.setvar(var.ncvariable.getFullName(), **kwargs)
+        return var
         
     def create(self):
         self.ncfile.create()
         
     def write(self, variable, value, origin=None):
-        if isinstance(value, (DimArray, MIArray)):
-            value = value.asarray()
+        # The writer reads the elements through the array index, so a view is written 
+        # without a compact copy
+        if isinstance(value, DimArray):
+            value = value.array
+        if isinstance(value, MIArray):
+            value = value.array
         if origin is None:
             self.ncfile.write(variable.ncvariable, value)
         else:
             origin = jarray.array(origin, 'i')
             self.ncfile.write(variable.ncvariable, origin, value)
+        self.clearcache()
+        
     def flush(self):
         self.ncfile.flush()
         
     def close(self):
+        # The cached blocks of a written file are removed
+        self.clearcache()
         if not self.ncfile is None:
             self.ncfile.close()
+        elif not self.dataset is None:
+            self.dataset.close()
         elif not self.arldata is None:
             self.arldata.closeDataFile()
         elif not self.bufrdata is None:
@@ -278,6 +369,7 @@ class DimDataFile():
         cal.set(t.year, t.month - 1, t.day, t.hour, t.minute, t.second)
         t = cal.getTime()
         ksum = self.arldata.writeGridData(t, lidx, vname, fhour, grid, data.asarray())
+        self.clearcache()
         return ksum
         
     # Write Bufr data
@@ -320,4 +412,342 @@ class DimDataFile():
         return self.bufrdata.write(value, nbits)
         
     def write_end(self):
-        return self.bufrdata.writeEndSection()
\ No newline at end of file
+        return self.bufrdata.writeEndSection()
+# Multiple data files aggregated along a dimension as one virtual dataset
+class MFDimDataFile(DimDataFile):
+    
+    # fnames: member data file names in the aggregation order
+    # concat_dim: name of the aggregation dimension, 'time' matches the time dimension
+    # keepopen: keep the member files open after the first read or not
+    def __init__(self, fnames, concat_dim='time', keepopen=False):
+        self.fnames = fnames
+        self.concat_dim = concat_dim
+        self.keepopen = keepopen
+        #Member headers are scanned for the aggregation dimension only, data are read
+        #from a member when a section touches it
+        infos = miparallel.invoke(self.scanfile, [(fn,) for fn in fnames])
+        DimDataFile.__init__(self, infos[0][0])
+        self.members = [None] * len(fnames)
+        self.offsets = []
+        values = []
+        n = 0
+        for info in infos:
+            self.offsets.append(n)
+            n += len(info[1])
+            values.extend(info[1])
+        self.nconcat = n
+        dim = self.finddim0()
+        self.dim = Dimension(dim.getDimType())
+        self.dim.setShortName(dim.getShortName())
+        self.dim.setDimValues(values)
+        self.dim.setReverse(dim.isReverse())
+        
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            var = DimVariable(self.dataset.getDataInfo().getVariable(key), self)
+            var.dims = self.vardims(var.dims)
+            return var
+        return None
+        
+    def __str__(self):
+        return 'Aggregated %i files along %s (%i)\n' % (len(self.fnames), self.dim.getShortName(), 
+            self.nconcat) + self.dataset.getInfoText()
+        
+    def __repr__(self):
+        return self.__str__()
+        
+    def scanfile(self, fname):
+        """
+        Read the header of a member data file.
+        
+        :param fname: (*string*) The file name.
+        
+        :returns: (*tuple*) MeteoDataInfo and the values of the aggregation dimension.
+        """
+        meteodata = MeteoDataInfo()
+        meteodata.openData(fname, False)
+        dim = self.finddim0(meteodata)
+        if dim is None:
+            raise ValueError('Dimension %s is not found in %s' % (self.concat_dim, fname))
+        return meteodata, list(dim.getDimValue())
+        
+    def finddim0(self, meteodata=None):
+        """
+        Find the aggregation dimension in the dimensions of a member file.
+        
+        :param meteodata: (*MeteoDataInfo*) The member file. Default is None, the first file.
+        
+        :returns: (*Dimension*) The aggregation dimension.
+        """
+        if meteodata is None:
+            meteodata = self.dataset
+        for dim in meteodata.getDataInfo().getDimensions():
+            if self.isconcat(dim):
+                return dim
+        return None
+        
+    def isconcat(self, dim):
+        """
+        Whether a dimension is the aggregation dimension.
+        
+        :param dim: (*Dimension*) The dimension.
+        
+        :returns: (*boolean*) Is the aggregation dimension or not.
+        """
+        if dim.getShortName() == self.concat_dim:
+            return True
+        return self.concat_dim == 'time' and dim.getDimType() == DimensionType.T
+        
+    def vardims(self, dims):
+        """
+        Replace the aggregation dimension in the dimensions of a variable.
+        
+        :param dims: (*list*) Dimensions of the variable in the first file.
+        
+        :returns: (*list*) Dimensions of the aggregated variable.
+        """
+        r = []
+        for dim in dims:
+            if self.isconcat(dim):
+                r.append(self.dim)
+            else:
+                r.append(dim)
+        return r
+        
+    def dimensions(self):
+        return self.vardims(self.dataset.getDataInfo().getDimensions())
+        
+    def finddim(self, name):
+        for dim in self.dimensions():
+            if name == dim.getShortName():
+                return dim
+        return None
+        
+    def member(self, k):
+        """
+        Get a member data file, it is opened on the first access.
+        
+        :param k: (*int*) Member index.
+        
+        :returns: (*DimDataFile*) The member data file.
+        """
+        self.lock.acquire()
+        try:
+            if self.members[k] is None:
+                meteodata = MeteoDataInfo()
+                meteodata.openData(self.fnames[k], self.keepopen)
+                self.members[k] = DimDataFile(meteodata)
+                self.members[k].usecache = self.usecache
+            return self.members[k]
+        finally:
+            self.lock.release()
+        
+    def locate(self, idx):
+        """
+        Locate an index of the aggregation dimension in the member files.
+        
+        :param idx: (*int*) Index of the aggregation dimension.
+        
+        :returns: (*tuple*) Member index and the local index in the member.
+        """
+        if idx < 0:
+            idx = self.nconcat + idx
+        k = bisect.bisect_right(self.offsets, idx) - 1
+        return k, idx - self.offsets[k]
+        
+    def read(self, varname, origin=None, size=None, stride=None):
+        var = self.dataset.getDataInfo().getVariable(varname)
+        dims = var.getDimensions()
+        axis = -1
+        for i in range(0, len(dims)):
+            if self.isconcat(dims[i]):
+                axis = i
+                break
+        if axis < 0:
+            return self.member(0).read(varname, origin, size, stride)
+        if origin is None:
+            dims = self.vardims(dims)
+            origin = [0] * len(dims)
+            size = [dim.getLength() for dim in dims]
+            stride = [1] * len(dims)
+        else:
+            origin = list(origin)
+            size = list(size)
+            stride = list(stride)
+        
+        #Split the section along the aggregation dimension into member sections
+        step = abs(stride[axis])
+        sidx = origin[axis]
+        eidx = sidx + size[axis] - 1
+        parts = []
+        for k in range(0, len(self.fnames)):
+            off = self.offsets[k]
+            n = self.nconcat - off if k == len(self.fnames) - 1 else self.offsets[k + 1] - off
+            if off + n <= sidx or off > eidx:
+                continue
+            s = sidx if sidx >= off else sidx + (off - sidx + step - 1) / step * step
+            e = min(eidx, off + n - 1)
+            if s > e:
+                continue
+            e = s + (e - s) / step * step
+            morigin = list(origin)
+            msize = list(size)
+            morigin[axis] = s - off
+            msize[axis] = e - s + 1
+            parts.append(self.member(k).read(varname, morigin, msize, stride))
+        if stride[axis] < 0:
+            parts.reverse()
+        if len(parts) == 1:
+            return parts[0]
+        
+        shape = list(parts[0].getShape())
+        shape[axis] = 0
+        for part in parts:
+            shape[axis] += part.getShape()[axis]
+        r = Array.factory(parts[0].getDataType(), jarray.array(shape, 'i'))
+        n = 0
+        for part in parts:
+            ranges = []
+            for i in range(0, len(shape)):
+                if i == axis:
+                    ranges.append(Range(n, n + part.getShape()[i] - 1))
+                else:
+                    ranges.append(Range(0, shape[i] - 1))
+            MAMath.copy(r.sectionNoReduce(ranges), part)
+            n += part.getShape()[axis]
+        return r
+        
+    def timenum(self):
+        """
+        Get time dimension length
+        
+        :returns: (*int*) Time dimension length.
+        """
+        if self.concat_dim == 'time':
+            return self.nconcat
+        return DimDataFile.timenum(self)
+        
+    def gettime(self, idx):
+        if self.concat_dim == 'time':
+            k, idx = self.locate(idx)
+            return self.member(k).gettime(idx)
+        return DimDataFile.gettime(self, idx)
+        
+    def cache(self, maxbytes=None, enable=True):
+        for member in self.members:
+            if not member is None:
+                member.usecache = enable
+        return DimDataFile.cache(self, maxbytes, enable)
+        
+    def clearcache(self):
+        for member in self.members:
+            if not member is None:
+                member.clearcache()
+        
+    def close(self):
+        for member in self.members:
+            if not member is None:
+                member.close()
+        self.members = [None] * len(self.fnames)
+        self.dataset.close()
+    
+# Chunking and compression settings of the variables of a netCDF-4 file
+class NcChunking(Nc4Chunking):
+    
+    # chunking: default chunk policy of the variables - 'map', 'timeseries' or None (the 
+    # standard strategy of netCDF-Java)
+    # deflate: default deflate level, shuffle: default shuffle filter setting
+    def __init__(self, chunking=None, deflate=0, shuffle=False):
+        self.chunking = chunking
+        self.deflate = deflate
+        self.shuffle = shuffle
+        self.variables = {}
+        self.standard = Nc4ChunkingStrategy.factory(Nc4Chunking.Strategy.standard, deflate, shuffle)
+        
+    def setvar(self, name, chunksizes=None, chunking=None, deflate=None, shuffle=None):
+        """
+        Set the chunking and compression of a variable.
+        
+        :param name: (*string*) Full name of the variable.
+        :param chunksizes: (*list*) Chunk shape.
+        :param chunking: (*string*) Chunk policy - 'map' or 'timeseries'.
+        :param deflate: (*int*) Deflate level 0 - 9.
+        :param shuffle: (*boolean*) Use the shuffle filter or not.
+        """
+        self.variables[name] = dict(chunksizes=chunksizes, chunking=chunking, 
+            deflate=deflate, shuffle=shuffle)
+        
+    def __setting(self, v, key):
+        opts = self.variables.get(v.getFullName())
+        if opts is None:
+            return None
+        return opts[key]
+        
+    def isChunked(self, v):
+        if v.getRank() == 0:
+            return False
+        if not self.__setting(v, 'chunksizes') is None:
+            return True
+        if not self.__setting(v, 'chunking') is None or not self.chunking is None:
+            return True
+        return self.standard.isChunked(v)
+        
+    def computeChunking(self, v):
+        chunksizes = self.__setting(v, 'chunksizes')
+        if chunksizes is None:
+            chunking = self.__setting(v, 'chunking')
+            if chunking is None:
+                chunking = self.chunking
+            if chunking is None:
+                return self.standard.computeChunking(v)
+            chunksizes = chunkshape(list(v.getShape()), chunking, v.getElementSize())
+        return jarray.array(chunksizes, 'l')
+        
+    def getDeflateLevel(self, v):
+        deflate = self.__setting(v, 'deflate')
+        if deflate is None:
+            return self.deflate
+        return deflate
+        
+    def isShuffle(self, v):
+        shuffle = self.__setting(v, 'shuffle')
+        if shuffle is None:
+            return self.shuffle
+        return shuffle
+        
+def chunkshape(shape, chunking='map', elemsize=4, nbytes=1024 * 1024):
+    """
+    Get the chunk shape of a variable for the expected data access pattern.
+    
+    :param shape: (*list*) Variable shape, 0 for unlimited dimensions.
+    :param chunking: (*string*) Access pattern - 'map' (horizontal slices of the last two 
+        dimensions are read) or 'timeseries' (time series along the first dimension at 
+        given locations are read).
+    :param elemsize: (*int*) Element size in bytes.
+    :param nbytes: (*int*) Target chunk size in bytes. Default is 1 MB.
+    
+    :returns: (*list*) Chunk shape.
+    """
+    n = max(1, nbytes / elemsize)
+    rank = len(shape)
+    chunk = [1] * rank
+    if rank == 0:
+        return chunk
+    if chunking == 'timeseries':
+        #Unlimited dimension length is unknown, keep room for the other dimensions
+        l = shape[0] if shape[0] > 0 else 1024
+        chunk[0] = min(l, n)
+        m = max(1, n / chunk[0])
+        if rank == 2:
+            chunk[1] = min(shape[1], m)
+        elif rank > 2:
+            s = max(1, int(math.sqrt(m)))
+            chunk[-1] = min(shape[-1], s)
+            chunk[-2] = min(shape[-2], max(1, m / chunk[-1]))
+    else:
+        m = n
+        for i in range(rank - 1, max(rank - 3, -1), -1):
+            l = max(shape[i], 1)
+            chunk[i] = min(l, m)
+            m = max(1, m / chunk[i])
+    return chunk
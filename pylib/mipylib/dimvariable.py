@@ -10,7 +10,7 @@ from org.meteoinfo.global import PointD
 from org.meteoinfo.projection import KnownCoordinateSystems, Reproject
 from ucar.nc2 import Attribute
 import dimarray
-from dimarray import DimArray, PyGridData
+from dimarray import DimArray, PyGridData, LazyDimArray
 import miarray
 from miarray import MIArray
 
@@ -41,7 +41,7 @@ class DimVariable():
     def __len__(self):
         len = 1;
         if not self.variable is None:
-            for dim in self.variable.getDimensions():
+            for dim in self.dims:
                 len = len * dim.getLength()            
         return len
         
@@ -122,7 +122,7 @@ class DimVariable():
                 eidx = self.dimlen(i)-1 if k.stop is None else k.stop
                 step = 1 if k.step is None else k.step
             elif isinstance(k, (tuple, list)):
-                dim = self.variable.getDimension(i)
+                dim = self.dims[i]
                 sidx = dim.getValueIndex(k[0])
                 if len(k) == 1:
                     eidx = sidx
@@ -147,11 +147,18 @@ class DimVariable():
             n = eidx - sidx + 1
             size.append(n)                   
             if n > 1:
-                dim = self.variable.getDimension(i)
+                dim = self.dims[i]
                 if dim.isReverse():
                     step = -step
                 dims.append(dim.extract(sidx, eidx, step))
-            stride.append(step) 
+            stride.append(step)
+        if self.dataset.lazy and len(dims) > 0:
+            return LazyDimArray(self, origin, size, stride, dims, self.dataset.chunkbytes)
+        if len(dims) > 0:
+            # Large sections are read chunk by chunk with progress and cancellation
+            lazy = LazyDimArray(self, origin, size, stride, dims, self.dataset.chunkbytes)
+            if lazy.chunklen(0) < lazy.shape[0]:
+                return lazy.read()
         rr = self.dataset.read(self.name, origin, size, stride).reduce()
         if rr.getSize() == 1:
             return rr.getObject(0)
@@ -162,6 +169,24 @@ class DimVariable():
     
     def read(self):
         return MIArray(self.dataset.read(self.name))
+
+    def lazyarray(self):
+        """
+        Get the lazy array of the whole variable, the data is read when it is used.
+        
+        :returns: (*LazyDimArray*) Lazy array of the variable.
+        """
+        origin = [0] * self.ndim
+        size = [self.dimlen(i) for i in range(self.ndim)]
+        stride = []
+        dims = []
+        for i in range(self.ndim):
+            dim = self.dims[i]
+            step = -1 if dim.isReverse() else 1
+            stride.append(step)
+            if size[i] > 1:
+                dims.append(dim.extract(0, size[i] - 1, step))
+        return LazyDimArray(self, origin, size, stride, dims, self.dataset.chunkbytes)
     
     # get dimension length
     def dimlen(self, idx):
@@ -0,0 +1,311 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab KD-tree module
+# Note: Jython
+#-----------------------------------------------------
+from ucar.ma2 import Array, MAMath, DataType
+from java.lang import Double
+import jarray
+import heapq
+import math
+import miparallel
+import miprogress
+from miarray import MIArray
+
+nan = Double.NaN
+inf = Double.POSITIVE_INFINITY
+
+def asdoubles(a):
+    """
+    Get the flattened double values of an array without list conversion.
+
+    :param a: (*array_like*) The array.
+
+    :returns: (*double[]*) Double values.
+    """
+    if not hasattr(a, 'asarray'):
+        return jarray.array(a, 'd')
+    data = a.asarray()
+    if data.getDataType() != DataType.DOUBLE:
+        data = MAMath.convert(data, DataType.DOUBLE)
+    return data.copyTo1DJavaArray()
+
+# 2-D KD-tree of points
+class KDTree():
+
+    # x, y: point coordinates (array_like), points with NaN coordinates are ignored
+    def __init__(self, x, y):
+        self.x = asdoubles(x)
+        self.y = asdoubles(y)
+        idx = [i for i in range(len(self.x)) if not (math.isnan(self.x[i]) or math.isnan(self.y[i]))]
+        self.__build(idx, 0, len(idx), 0)
+        self.index = jarray.array(idx, 'i')
+
+    def __len__(self):
+        return len(self.index)
+
+    def __build(self, idx, lo, hi, depth):
+        # The median of a range is the node, the lower/upper halves are its subtrees
+        if hi - lo <= 1:
+            return
+        v = self.x if depth % 2 == 0 else self.y
+        idx[lo:hi] = sorted(idx[lo:hi], key=lambda i: v[i])
+        mid = (lo + hi) / 2
+        self.__build(idx, lo, mid, depth + 1)
+        self.__build(idx, mid + 1, hi, depth + 1)
+
+    def query(self, x, y, k=1, radius=inf):
+        """
+        Find the k nearest points of a location.
+
+        :param x, y: (*float*) The location.
+        :param k: (*int*) Number of the nearest points.
+        :param radius: (*float*) Maximum distance of the points.
+
+        :returns: (*list*) (distance, index) tuples of the points in ascending distance order.
+        """
+        heap = []
+        self.__knearest(heap, x, y, k, radius * radius, 0, len(self.index), 0)
+        r = [(math.sqrt(-d), i) for d, i in heap]
+        r.sort()
+        return r
+
+    def __knearest(self, heap, x, y, k, maxd, lo, hi, depth):
+        if lo >= hi:
+            return
+        mid = (lo + hi) / 2
+        i = self.index[mid]
+        dx = x - self.x[i]
+        dy = y - self.y[i]
+        d = dx * dx + dy * dy
+        if d <= maxd:
+            if len(heap) < k:
+                heapq.heappush(heap, (-d, i))
+            elif d < -heap[0][0]:
+                heapq.heapreplace(heap, (-d, i))
+        diff = dx if depth % 2 == 0 else dy
+        if diff < 0:
+            first, second = (lo, mid), (mid + 1, hi)
+        else:
+            first, second = (mid + 1, hi), (lo, mid)
+        self.__knearest(heap, x, y, k, maxd, first[0], first[1], depth + 1)
+        bound = maxd if len(heap) < k else min(maxd, -heap[0][0])
+        if diff * diff <= bound:
+            self.__knearest(heap, x, y, k, maxd, second[0], second[1], depth + 1)
+
+    def query_radius(self, x, y, radius):
+        """
+        Find the points within a distance of a location.
+
+        :param x, y: (*float*) The location.
+        :param radius: (*float*) The distance.
+
+        :returns: (*list*) (distance, index) tuples of the points.
+        """
+        r = []
+        self.__inradius(r, x, y, radius * radius, 0, len(self.index), 0)
+        return [(math.sqrt(d), i) for d, i in r]
+
+    def __inradius(self, r, x, y, maxd, lo, hi, depth):
+        if lo >= hi:
+            return
+        mid = (lo + hi) / 2
+        i = self.index[mid]
+        dx = x - self.x[i]
+        dy = y - self.y[i]
+        d = dx * dx + dy * dy
+        if d <= maxd:
+            r.append((d, i))
+        diff = dx if depth % 2 == 0 else dy
+        if diff <= 0 or diff * diff <= maxd:
+            self.__inradius(r, x, y, maxd, lo, mid, depth + 1)
+        if diff >= 0 or diff * diff <= maxd:
+            self.__inradius(r, x, y, maxd, mid + 1, hi, depth + 1)
+
+def __steprow(progress, func, args):
+    func(*args)
+    progress.step()
+
+def __gridrows(func, xg, yg, args, progress=None):
+    # Evaluate func(row, xg, yg, out, *args) of each grid row, in parallel for large grids
+    nx = len(xg)
+    ny = len(yg)
+    out = jarray.zeros(nx * ny, 'd')
+    if progress is None:
+        progress = miprogress.Progress(ny, 'Gridding')
+    argslist = [(progress, func, (j, xg, yg, out) + args) for j in range(ny)]
+    if miparallel.isparallel(nx * ny * 16):
+        miparallel.invoke(__steprow, argslist)
+    else:
+        for a in argslist:
+            __steprow(*a)
+    return MIArray(Array.factory(DataType.DOUBLE, [ny, nx], out))
+
+def __stations(x, y, values):
+    # Tree of the stations with valid values
+    v = asdoubles(values)
+    x = asdoubles(x)
+    y = asdoubles(y)
+    for i in range(len(v)):
+        if math.isnan(v[i]):
+            x[i] = nan
+    return KDTree(x, y), v
+
+def __idwrow(j, xg, yg, out, tree, v, pnum, radius, fill_value):
+    nx = len(xg)
+    for i in range(nx):
+        if radius is None:
+            r = tree.query(xg[i], yg[j], pnum)
+        else:
+            r = tree.query_radius(xg[i], yg[j], radius)
+        if len(r) == 0 or len(r) < pnum and not radius is None:
+            out[j * nx + i] = fill_value
+        elif r[0][0] == 0 and radius is None:
+            out[j * nx + i] = v[r[0][1]]
+        else:
+            s = 0.0
+            sw = 0.0
+            for d, k in r:
+                if d == 0:
+                    s = v[k]
+                    sw = 1.0
+                    break
+                w = 1.0 / (d * d)
+                s += w * v[k]
+                sw += w
+            out[j * nx + i] = s / sw
+
+def idw(x, y, values, xg, yg, pnum=2, radius=None, fill_value=nan):
+    """
+    Inverse distance weighted (power 2) interpolation from stations to a grid.
+
+    :param x, y: (*array_like*) Station coordinates.
+    :param values: (*array_like*) Station values, NaN values are ignored.
+    :param xg, yg: (*array_like*) 1-D grid coordinates.
+    :param pnum: (*int*) Number of the nearest stations. If *radius* is set, it is the
+        minimum number of the stations within the radius.
+    :param radius: (*float*) Search radius. Default is None, the *pnum* nearest stations
+        are used.
+    :param fill_value: (*float*) Value of the grid points without enough stations.
+
+    :returns: (*MIArray*) Interpolated grid array.
+    """
+    tree, v = __stations(x, y, values)
+    return __gridrows(__idwrow, asdoubles(xg), asdoubles(yg), (tree, v, pnum, radius, fill_value))
+
+def __nearestrow(j, xg, yg, out, tree, v, radius, fill_value):
+    nx = len(xg)
+    for i in range(nx):
+        r = tree.query(xg[i], yg[j], 1, radius)
+        if len(r) == 0:
+            out[j * nx + i] = fill_value
+        else:
+            out[j * nx + i] = v[r[0][1]]
+
+def nearest(x, y, values, xg, yg, radius=inf, fill_value=nan):
+    """
+    Nearest station interpolation from stations to a grid.
+
+    :param x, y: (*array_like*) Station coordinates.
+    :param values: (*array_like*) Station values, NaN values are ignored.
+    :param xg, yg: (*array_like*) 1-D grid coordinates.
+    :param radius: (*float*) Search radius.
+    :param fill_value: (*float*) Value of the grid points without station in the radius.
+
+    :returns: (*MIArray*) Interpolated grid array.
+    """
+    tree, v = __stations(x, y, values)
+    return __gridrows(__nearestrow, asdoubles(xg), asdoubles(yg), (tree, v, radius, fill_value))
+
+def __evenlyspaced(g):
+    # Whether the coordinates are evenly spaced
+    n = len(g)
+    if n < 3:
+        return True
+    step = (g[n - 1] - g[0]) / (n - 1)
+    for i in range(1, n):
+        if abs(g[i] - g[i - 1] - step) > abs(step) * 1e-6:
+            return False
+    return True
+
+def __bilinear(g, xg, yg, x, y):
+    # Bilinear value of an evenly spaced grid at a location, NaN outside the grid
+    nx = len(xg)
+    ny = len(yg)
+    fi = (x - xg[0]) / (xg[nx - 1] - xg[0]) * (nx - 1) if nx > 1 else 0
+    fj = (y - yg[0]) / (yg[ny - 1] - yg[0]) * (ny - 1) if ny > 1 else 0
+    if fi < 0 or fj < 0 or fi > nx - 1 or fj > ny - 1:
+        return nan
+    i = min(int(fi), max(nx - 2, 0))
+    j = min(int(fj), max(ny - 2, 0))
+    t = fi - i
+    u = fj - j
+    v = g[j * nx + i] * (1 - t) * (1 - u)
+    if t > 0:
+        v += g[j * nx + i + 1] * t * (1 - u)
+    if u > 0:
+        v += g[(j + 1) * nx + i] * (1 - t) * u
+    if t > 0 and u > 0:
+        v += g[(j + 1) * nx + i + 1] * t * u
+    return v
+
+def __cressmanrow(j, xg, yg, out, tree, diff, radius, grid):
+    nx = len(xg)
+    r2 = radius * radius
+    for i in range(nx):
+        s = 0.0
+        sw = 0.0
+        for d, k in tree.query_radius(xg[i], yg[j], radius):
+            if math.isnan(diff[k]):
+                continue
+            w = (r2 - d * d) / (r2 + d * d)
+            s += w * diff[k]
+            sw += w
+        out[j * nx + i] = grid[j * nx + i] + s / sw if sw > 0 else grid[j * nx + i]
+
+def cressman(x, y, values, xg, yg, radius=[10, 7, 4, 2, 1], fill_value=nan):
+    """
+    Cressman successive correction analysis from stations to a grid. The first guess is the
+    mean of the station values, each pass corrects the grid by the weighted station
+    differences within a radius.
+
+    :param x, y: (*array_like*) Station coordinates.
+    :param values: (*array_like*) Station values, NaN values are ignored.
+    :param xg, yg: (*array_like*) 1-D grid coordinates, must be evenly spaced.
+    :param radius: (*list*) Radii of the passes.
+    :param fill_value: (*float*) Value of the grid points without station in the first radius.
+
+    :returns: (*MIArray*) Analysis grid array.
+    """
+    xg = asdoubles(xg)
+    yg = asdoubles(yg)
+    if not (__evenlyspaced(xg) and __evenlyspaced(yg)):
+        raise ValueError('The grid coordinates of cressman must be evenly spaced')
+    tree, v = __stations(x, y, values)
+    nx = len(xg)
+    ny = len(yg)
+    n = len(tree)
+    if n == 0:
+        r = jarray.zeros(nx * ny, 'd')
+        for i in range(nx * ny):
+            r[i] = fill_value
+        return MIArray(Array.factory(DataType.DOUBLE, [ny, nx], r))
+    mean = sum([v[k] for k in tree.index]) / n
+    grid = jarray.zeros(nx * ny, 'd')
+    for i in range(nx * ny):
+        grid[i] = mean
+    diff = jarray.zeros(len(v), 'd')
+    progress = miprogress.Progress(ny * len(radius), 'Gridding')
+    for rad in radius:
+        for k in range(len(v)):
+            diff[k] = nan
+        for k in tree.index:
+            diff[k] = v[k] - __bilinear(grid, xg, yg, tree.x[k], tree.y[k])
+        grid = __gridrows(__cressmanrow, xg, yg, (tree, diff, rad, grid), progress).asarray().getStorage()
+    progress.done()
+    for j in range(ny):
+        for i in range(nx):
+            if len(tree.query(xg[i], yg[j], 1, radius[0])) == 0:
+                grid[j * nx + i] = fill_value
+    return MIArray(Array.factory(DataType.DOUBLE, [ny, nx], grid))
@@ -5,7 +5,15 @@
 # Note: Jython
 #-----------------------------------------------------
 
+import math
+import jarray
+from java.lang import Double
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from ucar.ma2 import Array, MAMath, DataType
 import minum as np
+import miparallel
+from miarray import MIArray
+from dimarray import DimArray
 
 P0 = 1000.          #reference pressure for potential temperature (hPa)
 R = 8.3144598       #molar gas constant (J / K / mol)
@@ -17,6 +25,14 @@ Cp_d = 1005         #Specific heat at constant pressure for dry air (J kg^-1)
 epsilon = Mw / Md
 kappa = 0.286
 degCtoK=273.15        # Temperature offset between K and C (deg C)
+nan = Double.NaN
+Rd_kg = Rd * 1000.  #Gas constant for dry air (J (K kg)^-1)
+maxstep = 10.       #Maximum pressure step of the moist adiabat integration (hPa)
+tablep = (1100., 10.)       #Pressure range of the moist adiabat table (hPa)
+tablet = (200., 335.)       #Temperature range of the moist adiabats at the table bottom (K)
+tabledt = 0.5       #Temperature step of the moist adiabats at the table bottom (K)
+tabledlnp = 0.015   #Log pressure step of the moist adiabat table levels
+__table = None
 
 def potential_temperature(pressure, temperature):
     """
@@ -77,7 +93,7 @@ def dry_lapse(pressure, temperature):
 
     return temperature * (pressure / pressure[0])**kappa
     
-def moist_lapse(pressure, temperature):
+def moist_lapse(pressure, temperature, ref_pressure=None):
     """
     Calculate the temperature at a level assuming liquid saturation processes
     operating from the starting point.
@@ -89,12 +105,16 @@ def moist_lapse(pressure, temperature):
     pressure : array_like
         The atmospheric pressure level(s) of interest
     temperature : array_like
-        The starting temperature
+        The starting temperature, scalar or array of the grid points
+    ref_pressure : float
+        The reference pressure of the starting temperature, default is the
+        first item in the `pressure` array
     Returns
     -------
     array_like
        The temperature corresponding to the the starting temperature and
-       pressure levels.
+       pressure levels, the pressure levels are the first dimension. All
+       the grid points are integrated in parallel for large grids.
     See Also
     --------
     dry_lapse : Calculate parcel temperature assuming dry adiabatic processes
@@ -105,20 +125,155 @@ def moist_lapse(pressure, temperature):
     equation:
     .. math:: \frac{dT}{dP} = \frac{1}{P} \frac{R_d T + L_v r_s}
                                 {C_{pd} + \frac{L_v^2 r_s \epsilon}{R_d T^2}}
-    This equation comes from [1]_.
+    This equation comes from [1]_. The pseudo-adiabats are integrated once at
+    log spaced pressure levels from 1100 to 10 hPa, the temperatures of the
+    adiabat through each starting point are interpolated from this table and
+    integrated outside it.
     References
     ----------
     .. [1] Bakhshaii, A. and R. Stull, 2013: Saturated Pseudoadiabats--A
            Noniterative Approximation. J. Appl. Meteor. Clim., 52, 5-15.
     """
 
-    def dt(t, p):
-        rs = saturation_mixing_ratio(p, t)
-        frac = ((Rd * t + Lv * rs) /
-                (Cp_d + (Lv * Lv * rs * epsilon / (Rd * t * t)))).to('kelvin')
-        return frac / p
-    return dt
-                                    
+    p = list(pressure.aslist()) if isinstance(pressure, (MIArray, DimArray)) else list(pressure)
+    if ref_pressure is None:
+        ref_pressure = p[0]
+    t0, shape = __points(temperature)
+    n = len(t0)
+    out = jarray.zeros(len(p) * n, 'd')
+    __moisttable()
+    __invoke(__moistlapsekernel, n, len(p), (p, ref_pressure, t0, out))
+    return __levelarray(out, p, shape, temperature)
+
+def __gradient(p, t):
+    # Moist adiabatic lapse rate dT/dp (K/hPa) of saturated air
+    es = 6.112 * math.exp(17.67 * (t - 273.15) / (t - 29.65))
+    rs = epsilon * es / (p - es)
+    return (Rd_kg * t + Lv * rs) / (Cp_d + Lv * Lv * rs * epsilon / (Rd_kg * t * t)) / p
+
+def __moistintegrate(p0, t0, p1):
+    # Temperature at p1 of a saturated parcel at p0 by 4th order Runge-Kutta integration
+    n = max(1, int(math.ceil(abs(p1 - p0) / maxstep)))
+    h = (p1 - p0) / n
+    t = t0
+    p = p0
+    for i in range(n):
+        k1 = __gradient(p, t)
+        k2 = __gradient(p + h / 2, t + h / 2 * k1)
+        k3 = __gradient(p + h / 2, t + h / 2 * k2)
+        k4 = __gradient(p + h, t + h * k3)
+        t += h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        p += h
+    return t
+
+def __moisttable():
+    # Moist adiabat table (log bottom pressure, level number, adiabat number, temperatures).
+    # The pseudo-adiabats are integrated once at log spaced pressure levels, they are labelled
+    # by their temperature at the bottom level and stored adiabat by adiabat.
+    global __table
+    if __table is None:
+        lnp0 = math.log(tablep[0])
+        nlev = int(math.ceil((lnp0 - math.log(tablep[1])) / tabledlnp)) + 1
+        p = [math.exp(lnp0 - k * tabledlnp) for k in range(nlev)]
+        nadiabat = int(round((tablet[1] - tablet[0]) / tabledt)) + 1
+        t = jarray.zeros(nadiabat * nlev, 'd')
+        for j in range(nadiabat):
+            tt = tablet[0] + j * tabledt
+            t[j * nlev] = tt
+            for k in range(1, nlev):
+                tt = __moistintegrate(p[k - 1], tt, p[k])
+                t[j * nlev + k] = tt
+        __table = (lnp0, nlev, nadiabat, t)
+    return __table
+
+def __adiabat(p, t):
+    # Label (adiabat index and weight) of the moist adiabat through a saturated point, None
+    # outside the table
+    lnp0, nlev, nadiabat, tab = __moisttable()
+    u = (lnp0 - math.log(p)) / tabledlnp
+    if not (u >= 0 and u <= nlev - 1):
+        return None
+    k = min(int(u), nlev - 2)
+    f = u - k
+    lo = 0
+    hi = nadiabat - 1
+    tlo = (1 - f) * tab[k] + f * tab[k + 1]
+    thi = (1 - f) * tab[hi * nlev + k] + f * tab[hi * nlev + k + 1]
+    if not (t >= tlo and t <= thi):
+        return None
+    # The adiabat temperatures increase with the label at any level
+    while hi - lo > 1:
+        mid = (lo + hi) / 2
+        tm = (1 - f) * tab[mid * nlev + k] + f * tab[mid * nlev + k + 1]
+        if tm <= t:
+            lo = mid
+            tlo = tm
+        else:
+            hi = mid
+            thi = tm
+    return lo, (t - tlo) / (thi - tlo)
+
+def __adiabattemp(a, p):
+    # Temperature of a labelled moist adiabat at a pressure by bilinear interpolation of the
+    # table in the label and log pressure, None outside the table
+    lnp0, nlev, nadiabat, tab = __moisttable()
+    u = (lnp0 - math.log(p)) / tabledlnp
+    if not (u >= 0 and u <= nlev - 1):
+        return None
+    k = min(int(u), nlev - 2)
+    f = u - k
+    j, w = a
+    i0 = j * nlev + k
+    i1 = i0 + nlev
+    return (1 - w) * ((1 - f) * tab[i0] + f * tab[i0 + 1]) + \
+        w * ((1 - f) * tab[i1] + f * tab[i1 + 1])
+
+def __moistprofile(p0, t0, p, out, i, n):
+    # Temperatures at the levels p of the moist adiabat through (p0, t0). The adiabat is
+    # located in the table once and its temperatures are interpolated at all the levels,
+    # the levels outside the table are integrated from the previous level.
+    a = __adiabat(p0, t0)
+    pp = p0
+    t = t0
+    for k in range(len(p)):
+        tt = None if a is None else __adiabattemp(a, p[k])
+        t = __moistintegrate(pp, t, p[k]) if tt is None else tt
+        pp = p[k]
+        out[k * n + i] = t
+
+def __moistlapsekernel(start, end, p, p0, t0, out):
+    n = len(t0)
+    for i in range(start, end):
+        __moistprofile(p0, t0[i], p, out, i, n)
+
+def __points(a):
+    # Flattened double values and shape of a scalar or array
+    if isinstance(a, (MIArray, DimArray)):
+        data = a.asarray()
+        if data.getDataType() != DataType.DOUBLE:
+            data = MAMath.convert(data, DataType.DOUBLE)
+        return data.copyTo1DJavaArray(), list(a.shape)
+    return jarray.array([a], 'd'), []
+
+def __invoke(kernel, n, nlev, args):
+    # Call kernel(start, end, *args) on point ranges, in parallel for large grids
+    if miparallel.isparallel(n * nlev * 16):
+        m = miparallel.get_num_threads() * 4
+        step = (n + m - 1) / m
+        miparallel.invoke(kernel, [(s, min(s + step, n)) + args for s in range(0, n, step)])
+    else:
+        kernel(0, n, *args)
+
+def __levelarray(out, p, shape, a):
+    # Array of the levels of the points, a DimArray with a pressure level dimension for a
+    # DimArray input
+    r = MIArray(Array.factory(DataType.DOUBLE, [len(p)] + shape, out))
+    if isinstance(a, DimArray):
+        zdim = Dimension(DimensionType.Z)
+        zdim.setDimValues(p)
+        return DimArray(r, [zdim] + list(a.dims), a.fill_value, a.proj)
+    return r
+
 def mixing_ratio(part_press, tot_press):
     """
     Calculates the mixing ratio of gas given its partial pressure
@@ -191,4 +346,360 @@ def equivalent_potential_temperature(pressure, temperature):
 
     pottemp = potential_temperature(pressure, temperature)
     smixr = saturation_mixing_ratio(pressure, temperature)
-    return pottemp * np.exp(Lv * smixr / (Cp_d * temperature))
\ No newline at end of file
+    return pottemp * np.exp(Lv * smixr / (Cp_d * temperature))
+
+def saturation_vapor_pressure(temperature):
+    """
+    Calculate the saturation water vapor (partial) pressure.
+    Parameters
+    ----------
+    temperature : array_like
+        The temperature (K)
+    Returns
+    -------
+    array_like
+        The saturation water vapor (partial) pressure (hPa)
+    Notes
+    -----
+    Instead of temperature, dewpoint may be used in order to calculate
+    the actual (ambient) water vapor (partial) pressure.
+    The formula used is that from [6] for T in degrees Celsius:
+    .. math:: 6.112 e^\frac{17.67T}{T + 243.5}
+    References
+    ----------
+    .. [6] Bolton, D., 1980: The Computation of Equivalent Potential
+           Temperature. Mon. Wea. Rev., 108, 1046-1053.
+    """
+
+    return np.evaluate('6.112 * exp(17.67 * (t - 273.15) / (t - 29.65))', {'t':temperature})
+
+def vapor_pressure(pressure, mixing):
+    """
+    Calculate water vapor (partial) pressure given total `pressure` and
+    water vapor `mixing` ratio.
+    Parameters
+    ----------
+    pressure : array_like
+        Total atmospheric pressure (hPa)
+    mixing : array_like
+        Dimensionless mass mixing ratio
+    Returns
+    -------
+    array_like
+        The ambient water vapor (partial) pressure (hPa)
+    """
+
+    return np.evaluate('p * w / (epsilon + w)', {'p':pressure, 'w':mixing, 'epsilon':epsilon})
+
+def dewpoint(e):
+    """
+    Calculate the ambient dewpoint given the vapor pressure.
+    Parameters
+    ----------
+    e : array_like
+        Water vapor partial pressure (hPa)
+    Returns
+    -------
+    array_like
+        Dew point temperature (K)
+    """
+
+    return np.evaluate('243.5 * log(e / 6.112) / (17.67 - log(e / 6.112)) + 273.15', {'e':e})
+
+def dewpoint_rh(temperature, rh):
+    """
+    Calculate the ambient dewpoint given air temperature and relative
+    humidity.
+    Parameters
+    ----------
+    temperature : array_like
+        Air temperature (K)
+    rh : array_like
+        Relative humidity expressed as a ratio in the range (0, 1]
+    Returns
+    -------
+    array_like
+        The dew point temperature (K)
+    """
+
+    return np.evaluate('243.5 * (log(rh) + a) / (17.67 - log(rh) - a) + 273.15',
+        {'rh':rh, 'a':np.evaluate('17.67 * (t - 273.15) / (t - 29.65)', {'t':temperature})})
+
+def relative_humidity_from_dewpoint(temperature, dewpt):
+    """
+    Calculate the relative humidity from the temperature and dewpoint.
+    Parameters
+    ----------
+    temperature : array_like
+        Air temperature (K)
+    dewpt : array_like
+        Dew point temperature (K)
+    Returns
+    -------
+    array_like
+        Relative humidity ratio
+    """
+
+    return np.evaluate('exp(17.67 * (td - 273.15) / (td - 29.65) - 17.67 * (t - 273.15) / (t - 29.65))',
+        {'t':temperature, 'td':dewpt})
+
+def virtual_temperature(temperature, mixing):
+    """
+    Calculate virtual temperature.
+    Parameters
+    ----------
+    temperature : array_like
+        The temperature (K)
+    mixing : array_like
+        Dimensionless mass mixing ratio
+    Returns
+    -------
+    array_like
+        The corresponding virtual temperature of the parcel (K)
+    """
+
+    return np.evaluate('t * (w + epsilon) / (epsilon * (1 + w))', {'t':temperature, 'w':mixing,
+        'epsilon':epsilon})
+
+def virtual_potential_temperature(pressure, temperature, mixing):
+    """
+    Calculate virtual potential temperature.
+    Parameters
+    ----------
+    pressure : array_like
+        Total atmospheric pressure (hPa)
+    temperature : array_like
+        The temperature (K)
+    mixing : array_like
+        Dimensionless mass mixing ratio
+    Returns
+    -------
+    array_like
+        The corresponding virtual potential temperature of the parcel (K)
+    """
+
+    return np.evaluate('t * (w + epsilon) / (epsilon * (1 + w)) * (P0 / p)**kappa', {'p':pressure,
+        't':temperature, 'w':mixing, 'epsilon':epsilon, 'P0':P0, 'kappa':kappa})
+
+def density(pressure, temperature, mixing):
+    """
+    Calculate density of air.
+    Parameters
+    ----------
+    pressure : array_like
+        Total atmospheric pressure (hPa)
+    temperature : array_like
+        The temperature (K)
+    mixing : array_like
+        Dimensionless mass mixing ratio
+    Returns
+    -------
+    array_like
+        The corresponding density of the parcel (kg m^-3)
+    """
+
+    return np.evaluate('p * 100 * epsilon * (1 + w) / (Rd_kg * t * (w + epsilon))', {'p':pressure,
+        't':temperature, 'w':mixing, 'epsilon':epsilon, 'Rd_kg':Rd_kg})
+
+def lcl(pressure, temperature, dewpt):
+    """
+    Calculate the lifted condensation level (LCL) using from the starting
+    point.
+    Parameters
+    ----------
+    pressure : array_like
+        The starting atmospheric pressure (hPa)
+    temperature : array_like
+        The starting temperature (K)
+    dewpt : array_like
+        The starting dew point (K)
+    Returns
+    -------
+    tuple
+        The LCL pressure (hPa) and temperature (K)
+    Notes
+    -----
+    The LCL temperature is from the formula (15) of [6]:
+    .. math:: T_{LCL} = \frac{1}{\frac{1}{T_d - 56} + \frac{ln(T/T_d)}{800}} + 56
+    """
+
+    tl = np.evaluate('1. / (1. / (td - 56) + log(t / td) / 800.) + 56', {'t':temperature, 'td':dewpt})
+    pl = np.evaluate('p * (tl / t)**(1. / kappa)', {'p':pressure, 't':temperature, 'tl':tl,
+        'kappa':kappa})
+    return pl, tl
+
+def __lcl(p, t, td):
+    # LCL pressure and temperature of a point
+    tl = 1. / (1. / (td - 56) + math.log(t / td) / 800.) + 56
+    return p * (tl / t)**(1. / kappa), tl
+
+def __parcel(p, t, td, out, i, n):
+    # Temperatures of the parcel lifted from p[0] at the levels p, dry adiabatic below the
+    # LCL and moist adiabatic above the LCL
+    pl, tl = __lcl(p[0], t, td)
+    a = __adiabat(pl, tl)
+    pp = pl
+    tp = tl
+    for k in range(len(p)):
+        if p[k] >= pl:
+            out[k * n + i] = t * (p[k] / p[0])**kappa
+        else:
+            tt = None if a is None else __adiabattemp(a, p[k])
+            tp = __moistintegrate(pp, tp, p[k]) if tt is None else tt
+            pp = p[k]
+            out[k * n + i] = tp
+    return pl
+
+def __descending(p):
+    # True for descending pressure levels, False for ascending levels
+    if len(p) < 2:
+        return True
+    desc = p[0] > p[1]
+    for k in range(len(p) - 1):
+        if p[k] == p[k + 1] or (p[k] > p[k + 1]) != desc:
+            raise ValueError('The pressure levels must be strictly descending or ascending')
+    return desc
+
+def __parcelkernel(start, end, p, t0, td0, out):
+    n = len(t0)
+    for i in range(start, end):
+        __parcel(p, t0[i], td0[i], out, i, n)
+
+def parcel_profile(pressure, temperature, dewpt):
+    """
+    Calculate the profile a parcel takes through the atmosphere.
+    The parcel starts at `temperature`, and `dewpt`, lifted up
+    dry adiabatically to the LCL, and then moist adiabatically from there.
+    `pressure` specifies the pressure levels for the profile.
+    Parameters
+    ----------
+    pressure : array_like
+        The atmospheric pressure levels (hPa), descending. The first entry
+        should be the starting point pressure.
+    temperature : array_like
+        The starting temperature (K), scalar or array of the grid points
+    dewpt : array_like
+        The starting dew point (K), same shape as `temperature`
+    Returns
+    -------
+    array_like
+        The parcel temperatures at the specified levels, the pressure levels
+        are the first dimension. All the grid points are computed in parallel
+        for large grids.
+    """
+
+    p = list(pressure.aslist()) if isinstance(pressure, (MIArray, DimArray)) else list(pressure)
+    if not __descending(p):
+        raise ValueError('The pressure levels must be descending from the starting point')
+    t0, shape = __points(temperature)
+    td0, shape = __points(dewpt)
+    n = len(t0)
+    out = jarray.zeros(len(p) * n, 'd')
+    __moisttable()
+    __invoke(__parcelkernel, n, len(p), (p, t0, td0, out))
+    return __levelarray(out, p, shape, temperature)
+
+def __capekernel(start, end, p, t, td, n, cape, cin):
+    nlev = len(p)
+    tp = jarray.zeros(nlev, 'd')
+    for i in range(start, end):
+        ok = True
+        for k in range(nlev):
+            if math.isnan(t[k * n + i]) or math.isnan(td[k * n + i]):
+                ok = False
+                break
+        if not ok:
+            cape[i] = nan
+            cin[i] = nan
+            continue
+        pl = __parcel(p, t[i], td[i], tp, 0, 1)
+        # Positive area above the level of free convection (LFC) and negative area below
+        lfc = False
+        pos = 0.0
+        neg = 0.0
+        for k in range(nlev - 1):
+            area = Rd_kg * ((tp[k] - t[k * n + i]) + (tp[k + 1] - t[(k + 1) * n + i])) / 2 * \
+                math.log(p[k] / p[k + 1])
+            if not lfc and area > 0 and p[k + 1] <= pl:
+                lfc = True
+            if lfc:
+                if area > 0:
+                    pos += area
+            elif area < 0:
+                neg += area
+        cape[i] = pos
+        cin[i] = neg if lfc else 0.0
+
+def cape_cin(pressure, temperature, dewpt, axis=None):
+    """
+    Calculate convective available potential energy (CAPE) and convective
+    inhibition (CIN) of the surface based parcel of pressure level cubes.
+    Parameters
+    ----------
+    pressure : array_like
+        The pressure levels (hPa), descending or ascending. The parcel starts
+        at the highest pressure level (the lowest level)
+    temperature : array_like
+        The temperature cube (K), i.e. [level, lat, lon] or [time, level, lat, lon]
+    dewpt : array_like
+        The dew point cube (K), same shape as `temperature`
+    axis : int
+        The level axis of the cubes, default is the Z dimension of a DimArray
+        or the first dimension
+    Returns
+    -------
+    tuple
+        CAPE (J kg^-1) and CIN (J kg^-1) arrays without the level dimension
+    Notes
+    -----
+    The parcel is lifted dry adiabatically to the LCL and moist adiabatically
+    above it. CAPE is the positive area above the level of free convection
+    (LFC) and CIN is the negative area below the LFC:
+    .. math:: R_d \int (T_{parcel} - T_{env}) d\ln p
+    Each grid point is computed in one fused pass over the levels and the grid
+    points are computed in parallel for large grids.
+    """
+
+    p = list(pressure.aslist()) if isinstance(pressure, (MIArray, DimArray)) else list(pressure)
+    if axis is None:
+        axis = 0
+        if isinstance(temperature, DimArray):
+            for i in range(len(temperature.dims)):
+                if temperature.dims[i].getDimType() == DimensionType.Z:
+                    axis = i
+    shape = list(temperature.shape)
+    nlev = shape[axis]
+    if nlev != len(p):
+        raise ValueError('The level number %i of the cube does not match the pressure levels %i' % (nlev, len(p)))
+    del shape[axis]
+    # The kernel lifts the parcel from the first level, reverse ascending levels
+    flip = not __descending(p)
+    if flip:
+        p.reverse()
+    t = __levelfirst(temperature, axis, flip)
+    td = __levelfirst(dewpt, axis, flip)
+    n = len(t) / nlev
+    cape = jarray.zeros(n, 'd')
+    cin = jarray.zeros(n, 'd')
+    __moisttable()
+    __invoke(__capekernel, n, nlev, (p, t, td, n, cape, cin))
+    cape = MIArray(Array.factory(DataType.DOUBLE, shape, cape))
+    cin = MIArray(Array.factory(DataType.DOUBLE, shape, cin))
+    if isinstance(temperature, DimArray):
+        dims = [temperature.dims[i] for i in range(len(temperature.dims)) if i != axis]
+        cape = DimArray(cape, dims, temperature.fill_value, temperature.proj)
+        cin = DimArray(cin, dims, temperature.fill_value, temperature.proj)
+    return cape, cin
+
+def __levelfirst(a, axis, flip=False):
+    # Flattened double values of a cube with the level axis moved to the first, the levels
+    # are reversed if flip is True
+    data = a.asarray()
+    if data.getDataType() != DataType.DOUBLE:
+        data = MAMath.convert(data, DataType.DOUBLE)
+    if axis != 0:
+        order = [axis] + [i for i in range(data.getRank()) if i != axis]
+        data = data.permute(order)
+    if flip:
+        data = data.flip(0)
+    return data.copyTo1DJavaArray()
\ No newline at end of file
@@ -4,26 +4,35 @@
 # Purpose: MeteoInfo Dataset module
 # Note: Jython
 #-----------------------------------------------------
-#import math
+import math
 from org.meteoinfo.projection import ProjectionInfo
 from org.meteoinfo.data import GridData, GridArray, ArrayMath, ArrayUtil
 from org.meteoinfo.data.meteodata import Dimension
-from ucar.ma2 import Array, Range, MAMath
+from ucar.ma2 import Array, Range, MAMath, DataType
 import jarray
 
 import milayer
 from milayer import MILayer
 import miutil
+import miparallel
+import miprogress
 
-from java.lang import Double
+from java.lang import Double, System
 import datetime
         
 # The encapsulate class of Array
 class MIArray():
     
     # array must be a ucar.ma2.Array object
-    def __init__(self, array):
+    # view: the array is a section view sharing the backing storage of another array, 
+    # the view always stays on the storage so writes through the view change the source
+    def __init__(self, array, view=False):
         self.array = array
+        self.view = view
+        if view:
+            self.offset, self.contiguous = layout(array)
+        else:
+            self.offset, self.contiguous = 0, True
         self.rank = array.getRank()
         self.shape = array.getShape()
         self.datatype = array.getDataType()
@@ -37,10 +46,10 @@ class MIArray():
         return int(self.array.getSize())         
         
     def __str__(self):
-        return ArrayUtil.convertToString(self.array)
+        return ArrayUtil.convertToString(self.asarray())
         
     def __repr__(self):
-        return ArrayUtil.convertToString(self.array)
+        return ArrayUtil.convertToString(self.asarray())
     
     def __getitem__(self, indices):
         #print type(indices)            
@@ -77,20 +86,45 @@ class MIArray():
                 raise IndexError()
             rr = Range(sidx, eidx, step)
             ranges.append(rr)
-        r = ArrayMath.section(self.array, ranges)
+        r = self.section(ranges, flips)
         if iszerodim:
-            return r.getObject(0)
+            return r.array.getObject(r.array.getIndex())
+        else:
+            return r
+            
+    def section(self, ranges, flips=[]):
+        """
+        Get a section of the array. The section is a view sharing the backing storage 
+        of the array, no data is copied.
+        
+        :param ranges: (*list of Range*) Range of each dimension.
+        :param flips: (*list of int*) Dimension indices to be flipped.
+        
+        :returns: (*MIArray*) Section array (rank reduced).
+        """
+        r = self.array.sectionNoReduce(ranges)
+        for i in flips:
+            r = r.flip(i)
+        r = r.reduce()
+        return MIArray(r, True)
+        
+    # Write a result array computed from asarray() back to the storage of the array, 
+    # so the views sharing the storage see the change
+    def __writeback(self, r):
+        if r is self.array:
+            return
+        if self.view or r.getDataType() == self.datatype:
+            MAMath.copy(self.array, r)
         else:
-            for i in flips:
-                r = r.flip(i)
-            rr = Array.factory(r.getDataType(), r.getShape());
-            MAMath.copy(rr, r);
-            return MIArray(rr)
+            self.array = r
+            self.datatype = r.getDataType()
         
     def __setitem__(self, indices, value):
         #print type(indices) 
         if isinstance(indices, MIArray):
-            ArrayMath.setValue(self.array, indices.array, value)
+            r = self.asarray()
+            ArrayMath.setValue(r, indices.asarray(), value)
+            self.__writeback(r)
             return None
         
         if not isinstance(indices, tuple):
@@ -99,7 +133,7 @@ class MIArray():
             indices = inds
         
         if self.rank == 0:
-            self.array.setObject(0, value)
+            self.array.setObject(self.array.getIndex(), value)
             return None
         
         if len(indices) != self.rank:
@@ -125,119 +159,90 @@ class MIArray():
 
         if isinstance(value, MIArray):
             value = value.asarray()
-        r = ArrayMath.setSection(self.array, ranges, value)
-        self.array = r
+        r = ArrayMath.setSection(self.asarray(), ranges, value)
+        self.__writeback(r)
     
     def __abs__(self):
-        return MIArray(ArrayMath.abs(self.array))
+        return unop(ArrayMath.abs, self)
     
     def __add__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.add(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.add(self.array, other))
-        return r
+        return binop(ArrayMath.add, self, other)
         
     def __radd__(self, other):
         return MIArray.__add__(self, other)
         
+    def __iadd__(self, other):
+        return self.__inplace(ArrayMath.add, other)
+        
     def __sub__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.sub(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.sub(self.array, other))
-        return r
+        return binop(ArrayMath.sub, self, other)
         
     def __rsub__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.sub(other.array, self.array))
-        else:
-            r = MIArray(ArrayMath.sub(other, self.array))
-        return r
-    
+        return binop(ArrayMath.sub, other, self)
+        
+    def __isub__(self, other):
+        return self.__inplace(ArrayMath.sub, other)
+        
     def __mul__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.mul(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.mul(self.array, other))
-        return r
+        return binop(ArrayMath.mul, self, other)
         
     def __rmul__(self, other):
         return MIArray.__mul__(self, other)
         
+    def __imul__(self, other):
+        return self.__inplace(ArrayMath.mul, other)
+        
     def __div__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.div(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.div(self.array, other))
-        return r
+        return binop(ArrayMath.div, self, other)
         
     def __rdiv__(self, other):
-        r = None
-        if isinstance(other, MIArray):      
-            r = MIArray(ArrayMath.div(other.array, self.array))
-        else:
-            r = MIArray(ArrayMath.div(other, self.array))
-        return r
+        return binop(ArrayMath.div, other, self)
+        
+    def __idiv__(self, other):
+        return self.__inplace(ArrayMath.div, other)
         
-    # other must be a numeric data
     def __pow__(self, other):
-        r = MIArray(ArrayMath.pow(self.array, other))
-        return r
+        return binop(ArrayMath.pow, self, other)
+        
+    def __rpow__(self, other):
+        return binop(ArrayMath.pow, other, self)
+        
+    def __ipow__(self, other):
+        return self.__inplace(ArrayMath.pow, other)
         
     def __neg__(self):
-        r = MIArray(ArrayMath.sub(0, self.array))
+        r = MIArray(ArrayMath.sub(0, self.asarray()))
         return r
         
     def __lt__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.lessThan(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.lessThan(self.array, other))
-        return r
+        return binop(ArrayMath.lessThan, self, other)
         
     def __le__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.lessThanOrEqual(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.lessThanOrEqual(self.array, other))
-        return r
+        return binop(ArrayMath.lessThanOrEqual, self, other)
         
     def __eq__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.equal(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.equal(self.array, other))
-        return r
+        return binop(ArrayMath.equal, self, other)
         
     def __ne__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.notEqual(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.notEqual(self.array, other))
-        return r
+        return binop(ArrayMath.notEqual, self, other)
         
     def __gt__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.greaterThan(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.greaterThan(self.array, other))
-        return r
+        return binop(ArrayMath.greaterThan, self, other)
         
     def __ge__(self, other):
-        if isinstance(other, MIArray):
-            r = MIArray(ArrayMath.greaterThanOrEqual(self.array, other.array))
-        else:
-            r = MIArray(ArrayMath.greaterThanOrEqual(self.array, other))
-        return r
+        return binop(ArrayMath.greaterThanOrEqual, self, other)
+        
+    # Apply the operation in place block by block, the result is written back to the
+    # storage of the array (shared with the source array for a view)
+    def __inplace(self, func, other):
+        shape = broadcast_shape(self, other)
+        if shape != list(self.shape):
+            raise ValueError('operands could not be broadcast to shape %s' % list(self.shape))
+        evalblocks(func, [self, other], self.array)
+        return self
         
     def __and__(self, other):
-        r = MIArray(ArrayMath.bitAnd(self.array, other))
+        r = MIArray(ArrayMath.bitAnd(self.asarray(), other))
         return r
     
     def getsize():
@@ -250,81 +255,190 @@ class MIArray():
     
     def astype(self, dtype):
         if dtype == 'int' or dtype is int:
-            r = MIArray(ArrayUtil.toInteger(self.array))
+            r = MIArray(ArrayUtil.toInteger(self.asarray()))
         elif dtype == 'float' or dtype is float:
-            r = MIArray(ArrayUtil.toFloat(self.array))
+            r = MIArray(ArrayUtil.toFloat(self.asarray()))
         else:
             r = self
         return r
         
-    def min(self, fill_value=None):
+    def min(self, fill_value=None, axis=None):
+        """
+        Minimum of the array or minimum along an axis, NaN values are skipped.
+        
+        :param fill_value: (*float*) Fill value, the elements equal to it are skipped.
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the minimum of all elements is returned.
+        
+        :returns: (*MIArray or number*) Minimum result.
+        """
+        if not axis is None:
+            return axisreduce(self, axis, 'min', fill_value=fill_value)
         if fill_value == None:
-            return ArrayMath.getMinimum(self.array)
+            return ArrayMath.getMinimum(self.asarray())
         else:
-            return ArrayMath.getMinimum(self.array, fill_value)
+            return ArrayMath.getMinimum(self.asarray(), fill_value)
+        
+    def max(self, fill_value=None, axis=None):
+        """
+        Maximum of the array or maximum along an axis, NaN values are skipped.
+        
+        :param fill_value: (*float*) Fill value, the elements equal to it are skipped.
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the maximum of all elements is returned.
         
-    def max(self, fill_value=None):
+        :returns: (*MIArray or number*) Maximum result.
+        """
+        if not axis is None:
+            return axisreduce(self, axis, 'max', fill_value=fill_value)
         if fill_value == None:
-            return ArrayMath.getMaximum(self.array)
+            return ArrayMath.getMaximum(self.asarray())
         else:
-            return ArrayMath.getMaximum(self.array, fill_value)
+            return ArrayMath.getMaximum(self.asarray(), fill_value)
         
     def getshape(self):
         return self.array.getShape()
         
-    def sum(self, fill_value=None):
+    def sum(self, fill_value=None, axis=None):
+        """
+        Sum of the array elements or sum along an axis, NaN values are skipped.
+        
+        :param fill_value: (*float*) Fill value, the elements equal to it are skipped.
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the sum of all elements is returned.
+        
+        :returns: (*MIArray or number*) Sum result.
+        """
+        if not axis is None:
+            return axisreduce(self, axis, 'sum', fill_value=fill_value)
         if fill_value == None:
-            return ArrayMath.sumDouble(self.array)
+            return ArrayMath.sumDouble(self.asarray())
         else:
-            return ArrayMath.sumDouble(self.array, fill_value)
+            return ArrayMath.sumDouble(self.asarray(), fill_value)
             
-    def ave(self, fill_value=None):
-        if fill_value == None:
-            return ArrayMath.aveDouble(self.array)
-        else:
-            return ArrayMath.aveDouble(self.array, fill_value)
+    def ave(self, fill_value=None, axis=None):
+        return self.mean(fill_value, axis)
             
-    def mean(self, fill_value=None):
+    def mean(self, fill_value=None, axis=None):
+        """
+        Arithmetic mean of the array or mean along an axis, NaN values are skipped.
+        
+        :param fill_value: (*float*) Fill value, the elements equal to it are skipped.
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the mean of all elements is returned.
+        
+        :returns: (*MIArray or number*) Mean result.
+        """
+        if not axis is None:
+            return axisreduce(self, axis, 'mean', fill_value=fill_value)
         if fill_value == None:
-            return ArrayMath.aveDouble(self.array)
+            return ArrayMath.aveDouble(self.asarray())
         else:
-            return ArrayMath.aveDouble(self.array, fill_value)
+            return ArrayMath.aveDouble(self.asarray(), fill_value)
+            
+    def std(self, axis=None, ddof=0):
+        """
+        Standard deviation of the array or along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the standard deviation of all elements is returned.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+        
+        :returns: (*MIArray or number*) Standard deviation result.
+        """
+        return axisreduce(self, axis, 'std', ddof)
+        
+    def var(self, axis=None, ddof=0):
+        """
+        Variance of the array or along an axis, NaN values are skipped.
+        
+        :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None,
+            the variance of all elements is returned.
+        :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``.
+        
+        :returns: (*MIArray or number*) Variance result.
+        """
+        return axisreduce(self, axis, 'var', ddof)
+        
+    def argmin(self, axis=None):
+        """
+        Indices of the minimum values along an axis, NaN values are skipped.
+        
+        :param axis: (*int*) Axis along which to operate. Default is None, the index in
+            the flattened array is returned.
+        
+        :returns: (*MIArray or int*) Indices of the minimum values, -1 if all values are NaN.
+        """
+        return axisreduce(self, axis, 'argmin')
+        
+    def argmax(self, axis=None):
+        """
+        Indices of the maximum values along an axis, NaN values are skipped.
+        
+        :param axis: (*int*) Axis along which to operate. Default is None, the index in
+            the flattened array is returned.
+        
+        :returns: (*MIArray or int*) Indices of the maximum values, -1 if all values are NaN.
+        """
+        return axisreduce(self, axis, 'argmax')
             
     def sqrt(self):
-        return MIArray(ArrayMath.sqrt(self.array))
+        return unop(ArrayMath.sqrt, self)
     
     def sin(self):
-        return MIArray(ArrayMath.sin(self.array))
+        return unop(ArrayMath.sin, self)
         
     def cos(self):
-        return MIArray(ArrayMath.cos(self.array))
+        return unop(ArrayMath.cos, self)
         
     def tan(self):
-        return MIArray(ArrayMath.tan(self.array))
+        return unop(ArrayMath.tan, self)
         
     def asin(self):
-        return MIArray(ArrayMath.asin(self.array))
+        return unop(ArrayMath.asin, self)
         
     def acos(self):
-        return MIArray(ArrayMath.acos(self.array))
+        return unop(ArrayMath.acos, self)
         
     def atan(self):
-        return MIArray(ArrayMath.atan(self.array))
+        return unop(ArrayMath.atan, self)
         
     def exp(self):
-        return MIArray(ArrayMath.exp(self.array))
+        return unop(ArrayMath.exp, self)
         
     def log(self):
-        return MIArray(ArrayMath.log(self.array))
+        return unop(ArrayMath.log, self)
         
     def log10(self):
-        return MIArray(ArrayMath.log10(self.array))
+        return unop(ArrayMath.log10, self)
             
     def aslist(self):
-        return ArrayMath.asList(self.array)
+        return ArrayMath.asList(self.asarray())
         
     def asarray(self):
-        return self.array
+        """
+        Get the compact array for the Java array functions, which access the elements by 
+        the index of the backing storage. A view from the start of the storage is used 
+        directly, other views are copied and the view itself keeps sharing the storage.
+        
+        :returns: (*Array*) Compact array.
+        """
+        if not self.view or (self.offset == 0 and self.contiguous):
+            return self.array
+        if self.contiguous:
+            # Bulk copy of the contiguous slab
+            r = Array.factory(self.datatype, self.shape)
+            System.arraycopy(self.array.getStorage(), self.offset, r.getStorage(), 0, r.getSize())
+            return r
+        return self.array.copy()
+        
+    def copy(self):
+        """
+        Return a copy of the array.
+        
+        :returns: (*MIArray*) Copied array with its own backing storage.
+        """
+        return MIArray(self.array.copy())
         
     def reshape(self, *args):
         if len(args) == 1:
@@ -349,7 +463,7 @@ class MIArray():
         return DimArray(self, dims, fill_value)
         
     def join(self, b, dimidx):
-        r = ArrayMath.join(self.array, b.array, dimidx)
+        r = ArrayMath.join(self.asarray(), b.asarray(), dimidx)
         return MIArray(r)
         
     def inpolygon(self, x, y, polygon):
@@ -360,15 +474,20 @@ class MIArray():
                 x_p = x_p.aslist()
             if isinstance(y_p, MIArray):
                 y_p = y_p.aslist()
-            return MIArray(ArrayMath.inPolygon(self.array, x.aslist(), y.aslist(), x_p, y_p))
+            return MIArray(ArrayMath.inPolygon(self.asarray(), x.aslist(), y.aslist(), x_p, y_p))
         else:
-            if isinstance(polygon, MILayer):
-                polygon = polygon.layer
-            return MIArray(ArrayMath.inPolygon(self.array, x.aslist(), y.aslist(), polygon))
+            xl = x.aslist()
+            yl = y.aslist()
+            if self.__isgrid(xl, yl):
+                m = milayer.maskgrid(polygon, xl, yl)
+                if not m is None:
+                    return MIArray(m.copy())
+            polygon = self.__borders(polygon)
+            return MIArray(ArrayMath.inPolygon(self.asarray(), xl, yl, polygon))
         
     def maskout(self, mask, x=None, y=None, fill_value=Double.NaN):
         if isinstance(mask, MIArray):
-            r = ArrayMath.maskout(self.array, mask.asarray(), fill_value)
+            r = ArrayMath.maskout(self.asarray(), mask.asarray(), fill_value)
             return MIArray(r)
         else:
             if isinstance(x, MIArray):
@@ -379,12 +498,33 @@ class MIArray():
                 yl = y.aslist()
             else:
                 yl = y
-            if isinstance(mask, MILayer):
-                mask = mask.layer
-            return MIArray(ArrayMath.maskout(self.array, xl, yl, mask, fill_value))
+            if self.__isgrid(xl, yl):
+                m = milayer.maskgrid(mask, xl, yl)
+                if not m is None:
+                    return MIArray(ArrayMath.maskout(self.asarray(), m, fill_value))
+            mask = self.__borders(mask)
+            return MIArray(ArrayMath.maskout(self.asarray(), xl, yl, mask, fill_value))
+            
+    # The polygon borders passed to the Java maskout functions, lists of layers are flattened
+    # into their polygon shapes
+    def __borders(self, mask):
+        if isinstance(mask, MILayer):
+            return mask.layer
+        if isinstance(mask, (list, tuple)):
+            shapes = milayer.polygonshapes(mask)
+            if not shapes is None:
+                return shapes
+        return mask
+            
+    # Whether the array is a 2-D grid of the 1-D x/y coordinates, which can be masked by
+    # the cached mask grid
+    def __isgrid(self, x, y):
+        if len(self.shape) != 2 or x is None or y is None:
+            return False
+        return self.shape[0] == len(y) and self.shape[1] == len(x) and len(x) * len(y) > 1
         
     def savegrid(self, x, y, fname, format='surfer', **kwargs):
-        gdata = GridArray(self.array, x.array, y.array, -9999.0)
+        gdata = GridArray(self.asarray(), x.asarray(), y.asarray(), -9999.0)
         if format == 'surfer':
             gdata.saveAsSurferASCIIFile(fname)
         elif format == 'bil':
@@ -406,4 +546,495 @@ class MIArray():
                 if proj.isLonLat():
                     gdata.saveAsMICAPS4File(fname, desc, date, hours, level, smooth, boldvalue)
                 else:
-                    gdata.saveAsMICAPS4File(fname, desc, date, hours, level, smooth, boldvalue, proj)
+                    gdata.saveAsMICAPS4File(fname, desc, date, hours, level, smooth, boldvalue, proj)
+
+def layout(a):
+    """
+    Get the layout of an array in its backing storage.
+    
+    :param a: (*Array*) The array (i.e. a section view).
+    
+    :returns: (*int*, *boolean*) Storage index of the first element, and whether the 
+        elements are contiguous in the storage in the index order.
+    """
+    rank = a.getRank()
+    shape = a.getShape()
+    idx = a.getIndex()
+    idx.set(jarray.zeros(rank, 'i'))
+    offset = idx.currentElement()
+    contiguous = True
+    n = 1
+    for i in range(rank - 1, -1, -1):
+        if shape[i] > 1:
+            idx.setDim(i, 1)
+            contiguous = contiguous and idx.currentElement() - offset == n
+            idx.setDim(i, 0)
+        n = n * shape[i]
+    return offset, contiguous
+
+# Maximum number of elements evaluated in one block
+blocksize = 64 * 1024
+
+def broadcast_shape(*args):
+    """
+    Get the shape of the result broadcasting the arrays against each other.
+    
+    :param args: (*MIArray, Array or number*) The operands, numbers are ignored.
+    
+    :returns: (*list*) Shape of the broadcast result.
+    """
+    shape = []
+    for a in args:
+        if isinstance(a, MIArray):
+            s = list(a.shape)
+        elif isinstance(a, Array):
+            s = list(a.getShape())
+        else:
+            continue
+        if len(s) > len(shape):
+            shape = [1] * (len(s) - len(shape)) + shape
+        n = len(shape) - len(s)
+        for i in range(0, len(s)):
+            if s[i] == shape[n + i] or s[i] == 1:
+                continue
+            elif shape[n + i] == 1:
+                shape[n + i] = s[i]
+            else:
+                raise ValueError('operands could not be broadcast together with shapes %s %s' % (shape, s))
+    return shape
+    
+def blockranges(shape, size=None):
+    """
+    Split an array shape into blocks along the leading dimensions, each block has at most 
+    *size* elements unless a single row of the last dimension is longer.
+    
+    :param shape: (*list*) The array shape.
+    :param size: (*int*) Maximum element number of a block. Default is *blocksize*.
+    
+    :returns: (*list*) Ranges of each block.
+    """
+    if size is None:
+        size = blocksize
+    rank = len(shape)
+    k = rank
+    n = 1
+    while k > 0 and n * shape[k - 1] <= size:
+        k -= 1
+        n = n * shape[k]
+    tail = []
+    for i in range(k, rank):
+        tail.append(Range(0, shape[i] - 1))
+    if k == 0:
+        return [tail]
+    axis = k - 1
+    step = max(1, size / n)
+    blocks = []
+    idx = [0] * axis
+    while True:
+        head = []
+        for i in range(0, axis):
+            head.append(Range(idx[i], idx[i]))
+        for s in range(0, shape[axis], step):
+            e = min(s + step, shape[axis]) - 1
+            blocks.append(head + [Range(s, e)] + tail)
+        i = axis - 1
+        while i >= 0:
+            idx[i] += 1
+            if idx[i] < shape[i]:
+                break
+            idx[i] = 0
+            i -= 1
+        if i < 0:
+            break
+    return blocks
+    
+def blockof(a, ranges, shape):
+    """
+    Get the block of an operand broadcast to the block shape.
+    
+    :param a: (*MIArray, Array or number*) The operand.
+    :param ranges: (*list of Range*) Ranges of the block in the broadcast result.
+    :param shape: (*list*) Shape of the block.
+    
+    :returns: (*Array or number*) Compact block array, or a number if the operand is a
+        number or has only one element in the block.
+    """
+    if isinstance(a, MIArray):
+        a = a.array
+    elif not isinstance(a, Array):
+        return a
+    s = a.getShape()
+    n = len(ranges) - len(s)
+    aranges = []
+    for i in range(0, len(s)):
+        if s[i] == 1:
+            aranges.append(Range(0, 0))
+        else:
+            aranges.append(ranges[n + i])
+    r = a.sectionNoReduce(aranges).copy()
+    if list(r.getShape()) == shape:
+        return r
+    n = 1
+    for l in shape:
+        n = n * l
+    if r.getSize() == n:
+        return r.reshape(jarray.array(shape, 'i'))
+    if r.getSize() == 1:
+        return r.getObject(0)
+    return ArrayUtil.broadcast(r, jarray.array(shape, 'i'))
+    
+def evalblocks(func, args, out=None):
+    """
+    Evaluate a function on the operands block by block with broadcasting, only block 
+    sized temporary arrays are created. The blocks are evaluated in parallel for large
+    arrays (see miparallel).
+    
+    :param func: (*function*) The function applied to the operand blocks, returns an 
+        Array of the block shape.
+    :param args: (*list*) The operands (MIArray, Array or number).
+    :param out: (*Array*) Output array with the broadcast shape. Default is None, a new
+        array is created.
+    
+    :returns: (*Array*) The output array.
+    """
+    shape = broadcast_shape(*args)
+    if len(shape) == 0 or 0 in shape:
+        r = func(*[a.asarray() if isinstance(a, MIArray) else a for a in args])
+        if out is None:
+            return r
+        MAMath.copy(out, r)
+        return out
+    blocks = blockranges(shape)
+    if out is None:
+        ranges = blocks.pop(0)
+        bshape = [rr.length() for rr in ranges]
+        r = func(*[blockof(a, ranges, bshape) for a in args])
+        out = Array.factory(r.getDataType(), jarray.array(shape, 'i'))
+        MAMath.copy(out.sectionNoReduce(ranges), r)
+    if len(blocks) > 1 and miparallel.isparallel(out.getSize()):
+        miparallel.invoke(evalblock, [(func, args, ranges, out) for ranges in blocks])
+    else:
+        for ranges in blocks:
+            evalblock(func, args, ranges, out)
+    return out
+    
+def evalblock(func, args, ranges, out):
+    """
+    Evaluate a function on one block of the operands and write the result to the block
+    of the output array.
+    
+    :param func: (*function*) The function applied to the operand blocks.
+    :param args: (*list*) The operands (MIArray, Array or number).
+    :param ranges: (*list of Range*) Ranges of the block.
+    :param out: (*Array*) Output array.
+    """
+    miprogress.checkcancel()
+    bshape = [rr.length() for rr in ranges]
+    r = func(*[blockof(a, ranges, bshape) for a in args])
+    MAMath.copy(out.sectionNoReduce(ranges), r)
+    
+def unop(func, a):
+    """
+    Apply an element-wise array function, large arrays are evaluated in parallel.
+    
+    :param func: (*function*) The ArrayMath function.
+    :param a: (*MIArray*) The operand.
+    
+    :returns: (*MIArray*) The result array.
+    """
+    if miparallel.isparallel(a.array.getSize()):
+        return MIArray(evalblocks(func, [a]))
+    return MIArray(func(a.asarray()))
+    
+def binop(func, a, b):
+    """
+    Apply a binary array function with broadcasting, large arrays are evaluated in 
+    parallel.
+    
+    :param func: (*function*) The ArrayMath function.
+    :param a: (*MIArray or number*) The first operand.
+    :param b: (*MIArray or number*) The second operand.
+    
+    :returns: (*MIArray*) The result array.
+    """
+    if isinstance(a, MIArray) and isinstance(b, MIArray):
+        if list(a.shape) != list(b.shape) or miparallel.isparallel(a.array.getSize()):
+            return MIArray(evalblocks(func, [a, b]))
+    elif isinstance(a, MIArray) and miparallel.isparallel(a.array.getSize()):
+        return MIArray(evalblocks(func, [a, b]))
+    elif isinstance(b, MIArray) and miparallel.isparallel(b.array.getSize()):
+        return MIArray(evalblocks(func, [a, b]))
+    if isinstance(a, MIArray):
+        a = a.asarray()
+    if isinstance(b, MIArray):
+        b = b.asarray()
+    return MIArray(func(a, b))
+    
+def reduceaxes(rank, axis):
+    """
+    Get the sorted list of reduced axes.
+    
+    :param rank: (*int*) Rank of the array.
+    :param axis: (*int, tuple or None*) Axis or axes, None means all axes.
+    
+    :returns: (*list*) Reduced axes.
+    """
+    if axis is None:
+        return range(0, rank)
+    if isinstance(axis, int):
+        axis = [axis]
+    axes = []
+    for i in axis:
+        if i < 0:
+            i = rank + i
+        if i < 0 or i >= rank:
+            raise ValueError('axis %s is out of bounds for array of dimension %i' % (i, rank))
+        if not i in axes:
+            axes.append(i)
+    axes.sort()
+    return axes
+    
+def axisreduce(a, axis, kind, ddof=0, fill_value=None):
+    """
+    Reduce an array along axes with the Java array kernels, NaN values are skipped. The
+    count, mean and mean squared deviation of each cell are computed along the reduced 
+    axis by ``ArrayMath.mean`` and combined to the variance and standard deviation. The 
+    sum, minimum and maximum are accumulated over the reduced elements, or computed for
+    each cell when there are fewer cells than reduced elements (see *cellsweep*).
+    
+    :param a: (*MIArray*) The array.
+    :param axis: (*int, tuple or None*) Axis or axes along which to reduce. None means 
+        all axes.
+    :param kind: (*string*) Reduction - 'sum', 'mean', 'min', 'max', 'var', 'std', 'argmin',
+        'argmax' or 'count' (number of non-NaN values).
+    :param ddof: (*int*) Delta degrees of freedom of 'var' and 'std'.
+    :param fill_value: (*float*) Fill value, the elements equal to it are skipped like NaN.
+    
+    :returns: (*MIArray or number*) Reduced array, a number if all axes are reduced.
+    """
+    if not fill_value is None:
+        r = MAMath.convert(a.asarray(), DataType.DOUBLE)
+        if r is a.array:
+            r = r.copy()
+        ArrayMath.setValue(r, ArrayMath.equal(r, fill_value), Double.NaN)
+        a = MIArray(r)
+    axes = reduceaxes(a.rank, axis)
+    if kind in ('argmin', 'argmax') and len(axes) > 1 and len(axes) < a.rank:
+        raise ValueError('%s only supports a single axis' % kind)
+    keep = []
+    shape = []
+    for i in range(0, a.rank):
+        if not i in axes:
+            keep.append(i)
+            shape.append(a.shape[i])
+    n = 1
+    for i in axes:
+        n = n * a.shape[i]
+    m = 1
+    for l in shape:
+        m = m * l
+    
+    miprogress.checkcancel()
+    if kind in ('sum', 'min', 'max', 'argmin', 'argmax'):
+        r = cellsweep(a, keep, axes, m, n, kind)
+    elif kind == 'mean' and len(axes) == 1 and len(shape) > 0:
+        r = ArrayMath.mean(a.asarray(), axes[0])
+    else:
+        # Cells are contiguous after moving the reduced axes to the end
+        count, mean, msd = cellmoments(celldata(a, keep + axes), m, n)
+        if kind == 'count':
+            r = count
+        elif kind == 'mean':
+            r = mean
+        else:
+            # Mean squared deviation to the variance with the delta degrees of freedom
+            df = ArrayMath.sub(count, ddof)
+            r = ArrayMath.div(ArrayMath.mul(msd, count), df)
+            ArrayMath.setValue(r, ArrayMath.lessThanOrEqual(df, 0), Double.NaN)
+            if kind == 'std':
+                r = ArrayMath.sqrt(r)
+    if len(shape) == 0:
+        return r.getObject(0)
+    return MIArray(r.reshape(jarray.array(shape, 'i')))
+    
+def cellmoments(data, m, n):
+    """
+    Get the count, mean and mean squared deviation of each cell with the Java array 
+    kernels, NaN values are skipped.
+    
+    :param data: (*double[]*) The data, cell *i* is ``data[i*n:(i+1)*n]``.
+    :param m: (*int*) Cell number.
+    :param n: (*int*) Element number of a cell.
+    
+    :returns: (*Array*, *Array*, *Array*) Count (int), mean and mean squared deviation of
+        the cells.
+    """
+    x = Array.factory(DataType.DOUBLE, jarray.array([m, n], 'i'), data)
+    mean = ArrayMath.mean(x, 1)
+    if n == 0:
+        return Array.factory(DataType.INT, jarray.array([m], 'i')), mean, mean
+    isnan = Array.factory(DataType.DOUBLE, x.getShape())
+    ArrayMath.setValue(isnan, ArrayMath.equal(x, Double.NaN), 1)
+    count = ArrayUtil.toInteger(ArrayMath.add(ArrayMath.mul(ArrayMath.sub(1, 
+        ArrayMath.mean(isnan, 1)), n), 0.5))
+    d = ArrayMath.sub(x, ArrayUtil.broadcast(mean.reshape(jarray.array([m, 1], 'i')), x.getShape()))
+    msd = ArrayMath.mean(ArrayMath.mul(d, d), 1)
+    return count, mean, msd
+    
+def cellsweep(a, keep, axes, m, n, kind):
+    """
+    Get the sum, minimum, maximum or the indices of the extremes of each cell with the 
+    Java array kernels, NaN values are skipped. The rows of the reduced elements are 
+    accumulated with ``ArrayMath.add/fmin/fmax`` if they are not more than the cells, 
+    otherwise each cell is reduced by ``ArrayMath.sumDouble/getMinimum/getMaximum``, so
+    the Python loop is the smaller one of the two.
+    
+    :param a: (*MIArray*) The array.
+    :param keep: (*list*) The kept axes.
+    :param axes: (*list*) The reduced axes.
+    :param m: (*int*) Cell number.
+    :param n: (*int*) Element number of a cell.
+    :param kind: (*string*) 'sum', 'min', 'max', 'argmin' or 'argmax'.
+    
+    :returns: (*Array*) Result of the cells.
+    """
+    isarg = kind.startswith('arg')
+    if isarg:
+        r = Array.factory(DataType.INT, jarray.array([m], 'i'))
+        MAMath.setDouble(r, -1)
+    else:
+        r = Array.factory(DataType.DOUBLE, jarray.array([m], 'i'))
+        if kind != 'sum':
+            MAMath.setDouble(r, Double.NaN)
+    if n == 0 or m == 0:
+        return r
+    if n <= m:
+        # Rows of the reduced elements, each row has one element of all cells
+        data = celldata(a, axes + keep)
+        if kind == 'sum':
+            v = r
+            for k in xrange(n):
+                if k % 64 == 0:
+                    miprogress.checkcancel()
+                row = rowof(data, k, m)
+                ArrayMath.setValue(row, ArrayMath.equal(row, Double.NaN), 0)
+                v = ArrayMath.add(v, row)
+            return v
+        func = ArrayMath.fmin if kind[-3:] == 'min' else ArrayMath.fmax
+        v = rowof(data, 0, m)
+        for k in xrange(1, n):
+            if k % 64 == 0:
+                miprogress.checkcancel()
+            v = func(v, rowof(data, k, m))
+        if not isarg:
+            return v
+        # The first row of each cell with the extreme value
+        for k in xrange(n - 1, -1, -1):
+            ArrayMath.setValue(r, ArrayMath.equal(rowof(data, k, m), v), k)
+        ArrayMath.setValue(r, ArrayMath.equal(v, Double.NaN), -1)
+        return r
+    data = celldata(a, keep + axes)
+    if kind == 'sum':
+        func = ArrayMath.sumDouble
+    elif kind[-3:] == 'min':
+        func = ArrayMath.getMinimum
+    else:
+        func = ArrayMath.getMaximum
+    for i in xrange(m):
+        if i % 64 == 0:
+            miprogress.checkcancel()
+        row = rowof(data, i, n)
+        v = func(row)
+        if isarg:
+            r.setInt(i, firstindex(row, func, v))
+        else:
+            r.setDouble(i, v)
+    return r
+    
+def rowof(data, k, n):
+    """
+    Get a row of contiguous data as a compact array.
+    
+    :param data: (*double[]*) The data.
+    :param k: (*int*) Row index.
+    :param n: (*int*) Row length.
+    
+    :returns: (*Array*) The row array.
+    """
+    r = jarray.zeros(n, 'd')
+    System.arraycopy(data, k * n, r, 0, n)
+    return Array.factory(DataType.DOUBLE, jarray.array([n], 'i'), r)
+    
+def firstindex(row, func, v):
+    """
+    Get the index of the first element equal to the extreme value of a row. The shortest
+    prefix with the extreme value is searched by bisection with the Java kernel, the
+    prefixes start at index 0 so they are used by the kernel without copying.
+    
+    :param row: (*Array*) Compact 1-D array.
+    :param func: (*function*) ``ArrayMath.getMinimum`` or ``ArrayMath.getMaximum``.
+    :param v: (*float*) The extreme value of the row.
+    
+    :returns: (*int*) The index, -1 if the value is not in the row (all values are NaN).
+    """
+    if v != v:
+        return -1
+    lo = 1
+    hi = int(row.getSize())
+    while lo < hi:
+        mid = (lo + hi) / 2
+        if func(row.section(jarray.array([0], 'i'), jarray.array([mid], 'i'))) == v:
+            hi = mid
+        else:
+            lo = mid + 1
+    if row.getDouble(lo - 1) == v:
+        return lo - 1
+    return -1
+                
+def celldata(a, perm):
+    """
+    Get the double data of an array with permuted axes in index order.
+    
+    :param a: (*MIArray*) The array.
+    :param perm: (*list*) The permuted axes.
+    
+    :returns: (*double[]*) The data.
+    """
+    if perm == range(0, a.rank) and not a.view and a.datatype == DataType.DOUBLE:
+        return a.array.getStorage()
+    p = a.array.permute(jarray.array(perm, 'i'))
+    b = Array.factory(DataType.DOUBLE, p.getShape())
+    MAMath.copyDouble(b, p)
+    return b.getStorage()
+                
+def moments(a):
+    """
+    Get the count, mean and sum of squared deviations of all elements of an array, NaN
+    values are skipped. The results of array parts can be merged by *mergemoments*.
+    
+    :param a: (*MIArray*) The array.
+    
+    :returns: (*tuple*) Count, mean and sum of squared deviations.
+    """
+    count, mean, msd = cellmoments(celldata(a, range(0, a.rank)), 1, int(a.array.getSize()))
+    c = count.getInt(0)
+    if c == 0:
+        return 0, 0.0, 0.0
+    return c, mean.getDouble(0), msd.getDouble(0) * c
+    
+def mergemoments(x, y):
+    """
+    Merge the moments of two data parts (Chan et al.).
+    
+    :param x: (*tuple*) Count, mean and sum of squared deviations of the first part.
+    :param y: (*tuple*) Count, mean and sum of squared deviations of the second part.
+    
+    :returns: (*tuple*) Merged count, mean and sum of squared deviations.
+    """
+    c = x[0] + y[0]
+    if c == 0:
+        return x
+    d = y[1] - x[1]
+    mean = x[1] + d * y[0] / c
+    m2 = x[2] + y[2] + d * d * x[0] * y[0] / c
+    return c, mean, m2
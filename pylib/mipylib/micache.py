@@ -0,0 +1,197 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab cache module
+# Note: Jython
+#-----------------------------------------------------
+from java.util import LinkedHashMap
+from java.io import File
+import os
+import threading
+
+# Size bounded cache with least recently used eviction
+class LRUCache():
+
+    # maxbytes: maximum total size (bytes) of the cached values, 0 disables the cache
+    def __init__(self, maxbytes=256 * 1024 * 1024):
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__map = LinkedHashMap(16, 0.75, True)
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return self.__map.size()
+
+    def __contains__(self, key):
+        return self.__map.containsKey(key)
+
+    def __str__(self):
+        return 'LRUCache: %i items, %i/%i bytes, %i hits, %i misses' % (len(self),
+            self.nbytes, self.maxbytes, self.hits, self.misses)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def get(self, key):
+        """
+        Get a cached value, the value becomes the most recently used one.
+
+        :param key: The key.
+
+        :returns: The cached value, None if the key is not cached.
+        """
+        self.__lock.acquire()
+        try:
+            v = self.__map.get(key)
+            if v is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return v[0]
+        finally:
+            self.__lock.release()
+
+    def put(self, key, value, nbytes):
+        """
+        Put a value into the cache, least recently used values are evicted to keep the
+        total size in the maximum size. A value larger than the maximum size is not cached.
+
+        :param key: The key.
+        :param value: The value.
+        :param nbytes: (*int*) Size of the value in bytes.
+        """
+        if nbytes > self.maxbytes:
+            return
+        self.__lock.acquire()
+        try:
+            old = self.__map.put(key, (value, nbytes))
+            if not old is None:
+                self.nbytes -= old[1]
+            self.nbytes += nbytes
+            self.__evict()
+        finally:
+            self.__lock.release()
+
+    def remove(self, key):
+        """
+        Remove a value from the cache.
+
+        :param key: The key.
+        """
+        self.__lock.acquire()
+        try:
+            old = self.__map.remove(key)
+            if not old is None:
+                self.nbytes -= old[1]
+        finally:
+            self.__lock.release()
+
+    def removeif(self, func):
+        """
+        Remove the values whose keys match a condition.
+
+        :param func: (*function*) Condition function of a key.
+        """
+        self.__lock.acquire()
+        try:
+            it = self.__map.entrySet().iterator()
+            while it.hasNext():
+                entry = it.next()
+                if func(entry.getKey()):
+                    self.nbytes -= entry.getValue()[1]
+                    it.remove()
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """
+        Remove all values and reset the hit/miss counters.
+        """
+        self.__lock.acquire()
+        try:
+            self.__map.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self.__lock.release()
+
+    def resize(self, maxbytes):
+        """
+        Set the maximum size of the cache, values are evicted if necessary.
+
+        :param maxbytes: (*int*) Maximum size in bytes, 0 disables the cache.
+        """
+        self.__lock.acquire()
+        try:
+            self.maxbytes = maxbytes
+            self.__evict()
+        finally:
+            self.__lock.release()
+
+    def __evict(self):
+        it = self.__map.values().iterator()
+        while self.nbytes > self.maxbytes and it.hasNext():
+            self.nbytes -= it.next()[1]
+            it.remove()
+
+    def info(self):
+        """
+        Get the cache statistics.
+
+        :returns: (*dict*) Item number, size, maximum size, hits, misses and hit ratio.
+        """
+        n = self.hits + self.misses
+        return dict(items=len(self), nbytes=self.nbytes, maxbytes=self.maxbytes,
+            hits=self.hits, misses=self.misses, hitratio=float(self.hits) / n if n > 0 else 0.0)
+
+# Shared cache of the data blocks read from data files, the keys start with the file key
+blockcache = LRUCache()
+
+def islocal(fn):
+    """
+    Whether a data file name is a local file. Remote datasets (i.e. OPeNDAP URLs) and data
+    without a file name have no modification time, their blocks are not cached.
+
+    :param fn: (*string*) File name.
+
+    :returns: (*boolean*) Local file or not.
+    """
+    return not fn is None and os.path.isfile(fn)
+
+def filekey(fn):
+    """
+    Get the key of a data file in the block cache.
+
+    :param fn: (*string*) File name.
+
+    :returns: (*string*) Normalized absolute path of the file, None if it is not a local file.
+    """
+    if not islocal(fn):
+        return None
+    return os.path.normcase(os.path.abspath(fn))
+
+def filestamp(fn):
+    """
+    Get the modification time and length of a data file. They are part of the block keys,
+    so the blocks of a file rewritten by another program are not used.
+
+    :param fn: (*string*) File name, must be a local file.
+
+    :returns: (*tuple*) Modification time (milliseconds) and length (bytes).
+    """
+    f = File(fn)
+    return f.lastModified(), f.length()
+
+def invalidate(fn):
+    """
+    Remove the cached blocks of a data file, the data writing functions call it.
+
+    :param fn: (*string*) File name.
+    """
+    key = filekey(fn)
+    if key is None:
+        return
+    blockcache.removeif(lambda k: k[0] == key)
@@ -6,25 +6,165 @@
 #-----------------------------------------------------
 
 import datetime
+import time
+import sys
+import threading
+import Queue
+import jarray
 import minum
 import miutil
 import miarray
+import miprogress
 from miarray import MIArray
 import dimarray
 from dimarray import DimArray
 from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from org.meteoinfo.data import ArrayMath
+from ucar.ma2 import DataType
+from java.lang import Float, Double
 
-def convert2nc(infn, outfn, version='netcdf3'):
+# Default memory budget (bytes) of a chunk copied by the data converters
+chunkbytes = 32 * 1024 * 1024
+
+def replacemissing(a, missing, fill_value):
+    """
+    Replace the missing values and NaN values of an array in place.
+    
+    :param a: (*Array*) The array of float or double data type.
+    :param missing: (*float*) The missing value.
+    :param fill_value: (*float*) The value to replace with.
+    """
+    if a.getDataType() == DataType.FLOAT:
+        missing = Float(missing).doubleValue()
+    elif a.getDataType() != DataType.DOUBLE:
+        return
+    ArrayMath.missingToNaN(a, missing)
+    ArrayMath.setValue(a, ArrayMath.equal(a, Double.NaN), fill_value)
+
+def __readblock(lazy, ranges):
+    # Read a block of a variable through its lazy array, the reversed dimensions are
+    # flipped as by the DimVariable indexing and the missing values are NaN
+    section = lazy.section(tuple([slice(ranges[i].first(), ranges[i].last() + 1) for i in lazy.axes]))
+    data = section.readchunk(0, 0, section.shape[0] if section.rank > 0 else 1).asarray()
+    return data.reshape(jarray.array([rr.length() for rr in ranges], 'i'))
+
+def __readchunks(f, variables, nbytes, queue, fill_value, stop, reverse):
+    try:
+        for var in variables:
+            name = str(var.name)
+            shape = list(var.ncvariable.getShape())
+            if 0 in shape:
+                continue
+            if len(shape) == 0:
+                queue.put((var, None, f.read(name)))
+                continue
+            n = max(1, nbytes / var.ncvariable.getElementSize())
+            lazy = f[name].lazyarray() if reverse else None
+            for ranges in miarray.blockranges(shape, n):
+                origin = [rr.first() for rr in ranges]
+                size = [rr.length() for rr in ranges]
+                if reverse:
+                    data = __readblock(lazy, ranges)
+                else:
+                    data = f.read(name, origin, size, [1] * len(shape))
+                if not fill_value is None:
+                    replacemissing(data, f[name].fill_value, fill_value)
+                if stop.isSet():
+                    return
+                queue.put((var, origin, data))
+        queue.put(None)
+    except:
+        queue.put((None, sys.exc_info(), None))
+        
+def copyvars(f, ncfile, variables, nbytes=None, fill_value=None, reverse=False):
+    """
+    Copy variable data from a data file to a netCDF file chunk by chunk. The chunks are read
+    by a background thread, so the reading of a chunk is overlapped with the writing of the 
+    previous chunk, and at most a few chunks are held in memory.
+    
+    :param f: (*DimDataFile*) Input data file.
+    :param ncfile: (*DimDataFile*) Output netCDF data file (created).
+    :param variables: (*list*) Output variables, the data are read from the input variables
+        with the same names.
+    :param nbytes: (*int*) Memory budget of a chunk in bytes. Default is None, *chunkbytes*
+        is used.
+    :param fill_value: (*float*) If it is not None, the missing values and NaN values are 
+        replaced by it during the copy.
+    :param reverse: (*boolean*) Read the data as the variable indexing does, the reversed 
+        dimensions are flipped to the order of their dimension values. Default is ``False`` ,
+        the data are copied in the file order.
+        
+    :returns: (*tuple*) Copied bytes and elapsed seconds.
+    """
+    if nbytes is None:
+        nbytes = chunkbytes
+    usecache = f.usecache
+    f.usecache = False
+    queue = Queue.Queue(2)
+    stop = threading.Event()
+    reader = threading.Thread(target=__readchunks, args=(f, variables, nbytes, queue, fill_value, stop, reverse))
+    reader.setDaemon(True)
+    n = 0
+    for var in variables:
+        size = 1
+        for l in var.ncvariable.getShape():
+            size *= l
+        n += size
+    progress = miprogress.Progress(n, 'Copying variables')
+    st = time.time()
+    reader.start()
+    total = 0
+    var = None
+    vbytes = 0
+    vst = st
+    try:
+        while True:
+            item = queue.get()
+            if item is None or not item[0] is var:
+                if not var is None:
+                    dt = max(time.time() - vst, 1e-6)
+                    print 'Variable: %s (%.1f MB, %.1f MB/s)' % (var.name, vbytes / 1048576., vbytes / 1048576. / dt)
+                if item is None:
+                    break
+                if item[0] is None:
+                    exc = item[1]
+                    raise exc[0], exc[1], exc[2]
+                var = item[0]
+                vbytes = 0
+                vst = time.time()
+            var, origin, data = item
+            ncfile.write(var, data, origin=origin)
+            vbytes += data.getSizeBytes()
+            total += data.getSizeBytes()
+            progress.step(data.getSize())
+    finally:
+        # Stop the reader blocked by a full queue after a failure or cancellation
+        stop.set()
+        try:
+            queue.get_nowait()
+        except Queue.Empty:
+            pass
+        f.usecache = usecache
+    return total, time.time() - st
+
+def convert2nc(infn, outfn, version='netcdf3', chunkbytes=None, **kwargs):
     """
-    Convert data file (Grib, HDF...) to netCDF data file.
+    Convert data file (Grib, HDF...) to netCDF data file. The data are streamed chunk by
+    chunk, so the memory use is bounded by the chunk size.
     
     :param infn: (*string*) Input data file name.
     :param outfn: (*string*) Output netCDF data file name.
+    :param version: (*string*) netCDF version - 'netcdf3' or 'netcdf4'.
+    :param chunkbytes: (*int*) Memory budget of a copied chunk in bytes. Default is None,
+        *miio.chunkbytes* is used.
+    :param chunking: (*string*) Chunk policy of the netCDF-4 variables - 'map' or 'timeseries'.
+    :param deflate: (*int*) Deflate level (0 - 9) of the netCDF-4 variables.
+    :param shuffle: (*boolean*) Use the shuffle filter for the netCDF-4 variables or not.
     """
     #Open input data file
     f = minum.addfile(infn)
     #New netCDF file
-    ncfile = minum.addfile(outfn, 'c', version=version)
+    ncfile = minum.addfile(outfn, 'c', version=version, **kwargs)
     #Add dimensions
     for dim in f.dimensions():
         ncfile.adddim(dim.getShortName(), dim.getLength())
@@ -42,21 +182,23 @@ def convert2nc(infn, outfn, version='netcdf3'):
     #Create netCDF file
     ncfile.create()
     #Write data
-    for var in variables:
-        print 'Variable: ' + var.name
-        data = f[str(var.name)].read()
-        ncfile.write(var, data)
+    nbytes, dt = copyvars(f, ncfile, variables, chunkbytes)
     #Close netCDF file
     ncfile.close()
-    print 'Convert finished!'
+    print 'Convert finished! %.1f MB in %.1f s (%.1f MB/s)' % (nbytes / 1048576., dt, nbytes / 1048576. / max(dt, 1e-6))
     
-def grads2nc(infn, outfn, big_endian=None):
+def grads2nc(infn, outfn, big_endian=None, chunkbytes=None):
     """
-    Convert GrADS data file to netCDF data file.
+    Convert GrADS data file to netCDF data file. The data are streamed chunk by chunk and 
+    the missing values are replaced by -9999.0 during the copy. The data are read as the
+    variable indexing does, so the reversed dimensions (i.e. ``yrev``) are written in the 
+    order of the dimension values.
     
     :param infn: (*string*) Input GrADS data file name.
     :param outfn: (*string*) Output netCDF data file name.
     :param big_endian: (*boolean*) Is GrADS data big_endian or not.
+    :param chunkbytes: (*int*) Memory budget of a copied chunk in bytes. Default is None,
+        *miio.chunkbytes* is used.
     """
     #Open GrADS file
     f = minum.addfile_grads(infn)
@@ -129,34 +271,16 @@ def grads2nc(infn, outfn, big_endian=None):
             ncfile.write(dimvar, minum.array(dim.getDimValue()))
 
     sst = datetime.datetime(1900,1,1)
+    hours = []
     for t in range(0, tnum):
         st = f.gettime(t)
-        print st.strftime('%Y-%m-%d %H:00')
-        hours = (st - sst).total_seconds() // 3600
-        origin = [t]
-        ncfile.write(tvar, minum.array([hours]), origin=origin)
-        for var in variables:
-            print 'Variable: ' + var.name
-            if var.ndim == 3:
-                data = f[str(var.name)][t,:,:]    
-                data[data==minum.nan] = -9999.0        
-                origin = [t, 0, 0]
-                shape = [1, ynum, xnum]
-                data = data.reshape(shape)
-                ncfile.write(var, data, origin=origin)
-            else:
-                znum = var.dims[1].getLength()
-                for z in range(0, znum):
-                    data = f[str(var.name)][t,z,:,:]
-                    data[data==minum.nan] = -9999.0
-                    origin = [t, z, 0, 0]
-                    shape = [1, 1, ynum, xnum]
-                    data = data.reshape(shape)
-                    ncfile.write(var, data, origin=origin)
+        hours.append((st - sst).total_seconds() // 3600)
+    ncfile.write(tvar, minum.array(hours))
+    nbytes, dt = copyvars(f, ncfile, variables, chunkbytes, -9999.0, True)
 
     #Close netCDF file
     ncfile.close()
-    print 'Convert finished!'
+    print 'Convert finished! %.1f MB in %.1f s (%.1f MB/s)' % (nbytes / 1048576., dt, nbytes / 1048576. / max(dt, 1e-6))
     
 def dimension(dimvalue, dimname='null', dimtype=None):
     """
@@ -183,7 +307,7 @@ def dimension(dimvalue, dimname='null', dimtype=None):
     dim.setShortName(dimname)
     return dim
     
-def ncwrite(fn, data, varname, dims=None, attrs=None):
+def ncwrite(fn, data, varname, dims=None, attrs=None, **kwargs):
     """
     Write a netCDF data file.
     
@@ -191,6 +315,13 @@ def ncwrite(fn, data, varname, dims=None, attrs=None):
     :param data: (*array_like*) A numeric array variable of any dimensionality.
     :param varname: (*string*) Variable name.
     :param dims: (*list of dimensions*) Dimension list.
+    :param version: (*string*) netCDF version - 'netcdf3' or 'netcdf4'. Default is 'netcdf3',
+        the following chunking and compression options need 'netcdf4'.
+    :param chunksizes: (*list*) Chunk shape of the data variable.
+    :param chunking: (*string*) Chunk shape for the expected access pattern - 'map' or 
+        'timeseries'.
+    :param deflate: (*int*) Deflate level 0 - 9.
+    :param shuffle: (*boolean*) Use the shuffle filter or not.
     """
     if dims is None:
         if isinstance(data, MIArray):
@@ -202,7 +333,9 @@ def ncwrite(fn, data, varname, dims=None, attrs=None):
         else:
             dims = data.dims
     #New netCDF file
-    ncfile = minum.addfile(fn, 'c')
+    version = kwargs.pop('version', 'netcdf3')
+    chunksizes = kwargs.pop('chunksizes', None)
+    ncfile = minum.addfile(fn, 'c', version=version, **kwargs)
     #Add dimensions
     ncdims = []
     for dim in dims:    
@@ -236,7 +369,10 @@ def ncwrite(fn, data, varname, dims=None, attrs=None):
             var.addattr('axis', 'null')
         dimvars.append(var)
     #Add variable
-    var = ncfile.addvar(varname, data.datatype, ncdims)
+    if chunksizes is None:
+        var = ncfile.addvar(varname, data.datatype, ncdims)
+    else:
+        var = ncfile.addvar(varname, data.datatype, ncdims, chunksizes=chunksizes)
     if attrs is None:    
         var.addattr('name', varname)
     else:
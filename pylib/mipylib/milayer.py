@@ -8,10 +8,214 @@ from org.meteoinfo.data import TableUtil, XYListDataset
 from org.meteoinfo.layer import LayerTypes, VectorLayer
 from org.meteoinfo.projection import ProjectionManage, KnownCoordinateSystems
 from org.meteoinfo.shape import PolygonShape, ShapeTypes
-from java.util import Date, Calendar
+from ucar.ma2 import Array, DataType
+from java.util import Date, Calendar, Arrays, ArrayList
 from java.awt import Font
 from datetime import datetime
+import bisect
+import math
+import jarray
 import miutil
+import micache
+
+# Cache of the rasterized polygon mask grids
+maskcache = micache.LRUCache(64 * 1024 * 1024)
+
+# Bounding box grid index of shapes
+class SpatialIndex():
+    
+    # shapes: shape list
+    # n: cell number of each side of the index grid, default is the square root of the shape number
+    def __init__(self, shapes, n=None):
+        self.shapes = list(shapes)
+        self.extents = []
+        for shape in self.shapes:
+            e = shape.getExtent()
+            self.extents.append((e.minX, e.maxX, e.minY, e.maxY))
+        if len(self.extents) == 0:
+            self.extent = (0, 0, 0, 0)
+        else:
+            self.extent = (min([e[0] for e in self.extents]), max([e[1] for e in self.extents]),
+                min([e[2] for e in self.extents]), max([e[3] for e in self.extents]))
+        if n is None:
+            n = int(math.sqrt(len(self.shapes))) + 1
+        self.n = n
+        self.dx = max(self.extent[1] - self.extent[0], 1e-10) / n
+        self.dy = max(self.extent[3] - self.extent[2], 1e-10) / n
+        self.cells = {}
+        for i in range(len(self.extents)):
+            e = self.extents[i]
+            for cell in self.__cells(e[0], e[1], e[2], e[3]):
+                self.cells.setdefault(cell, []).append(i)
+                
+    def __len__(self):
+        return len(self.shapes)
+                
+    def __cells(self, xmin, xmax, ymin, ymax):
+        i0 = max(0, int((xmin - self.extent[0]) / self.dx))
+        i1 = min(self.n - 1, int((xmax - self.extent[0]) / self.dx))
+        j0 = max(0, int((ymin - self.extent[2]) / self.dy))
+        j1 = min(self.n - 1, int((ymax - self.extent[2]) / self.dy))
+        cells = []
+        for j in range(j0, j1 + 1):
+            for i in range(i0, i1 + 1):
+                cells.append((i, j))
+        return cells
+                
+    def query(self, xmin, xmax, ymin, ymax):
+        """
+        Find the shapes whose extents intersect an extent.
+        
+        :param xmin, xmax, ymin, ymax: (*float*) The extent.
+        
+        :returns: (*list*) Indices of the found shapes in ascending order.
+        """
+        if xmin > self.extent[1] or xmax < self.extent[0] or ymin > self.extent[3] or ymax < self.extent[2]:
+            return []
+        r = set()
+        for cell in self.__cells(xmin, xmax, ymin, ymax):
+            for i in self.cells.get(cell, []):
+                e = self.extents[i]
+                if e[0] <= xmax and e[1] >= xmin and e[2] <= ymax and e[3] >= ymin:
+                    r.add(i)
+        return sorted(r)
+        
+    def findshapes(self, xmin, xmax, ymin, ymax):
+        """
+        Find the shapes whose extents intersect an extent.
+        
+        :param xmin, xmax, ymin, ymax: (*float*) The extent.
+        
+        :returns: (*list*) The found shapes.
+        """
+        return [self.shapes[i] for i in self.query(xmin, xmax, ymin, ymax)]
+        
+def __ascending(v):
+    v = list(v)
+    if len(v) > 1 and v[0] > v[-1]:
+        return v[::-1], True
+    return v, False
+    
+def __rastering(polygon, xs, ys, rows):
+    # Scanline crossings of the polygon rings (outline and holes) with the grid rows, the
+    # even-odd rule is applied to the crossings of each row
+    for pg in polygon.getPolygons():
+        lines = [pg.getOutLine()]
+        if pg.hasHole():
+            lines.extend(pg.getHoleLines())
+        for line in lines:
+            n = line.size()
+            for k in range(n):
+                p1 = line.get(k)
+                p2 = line.get((k + 1) % n)
+                if p1.Y == p2.Y:
+                    continue
+                if p1.Y < p2.Y:
+                    y1, y2 = p1.Y, p2.Y
+                else:
+                    y1, y2 = p2.Y, p1.Y
+                j0 = bisect.bisect_left(ys, y1)
+                j1 = bisect.bisect_left(ys, y2)
+                if j0 == j1:
+                    continue
+                r = (p2.X - p1.X) / (p2.Y - p1.Y)
+                for j in range(j0, j1):
+                    rows.setdefault(j, []).append(p1.X + (ys[j] - p1.Y) * r)
+    
+def rasterize(polygons, x, y):
+    """
+    Rasterize polygons on a grid - 1 for the grid points inside the polygons and -1 for 
+    outside. The polygon edges are scanned row by row with the even-odd rule, so the cost
+    is proportional to the vertex number and the grid size instead of their product.
+    
+    :param polygons: (*list*) The polygon shapes.
+    :param x: (*list*) X coordinates of the grid (1-D, monotonic).
+    :param y: (*list*) Y coordinates of the grid (1-D, monotonic).
+    
+    :returns: (*Array*) Mask grid of shape (len(y), len(x)).
+    """
+    xs, xrev = __ascending(x)
+    ys, yrev = __ascending(y)
+    nx = len(xs)
+    ny = len(ys)
+    mask = jarray.zeros(nx * ny, 'i')
+    Arrays.fill(mask, -1)
+    for polygon in polygons:
+        rows = {}
+        __rastering(polygon, xs, ys, rows)
+        for j in rows:
+            cs = sorted(rows[j])
+            row = (ny - 1 - j if yrev else j) * nx
+            for k in range(0, len(cs) - 1, 2):
+                i0 = bisect.bisect_left(xs, cs[k])
+                i1 = bisect.bisect_left(xs, cs[k + 1])
+                if i0 >= i1:
+                    continue
+                if xrev:
+                    i0, i1 = nx - i1, nx - i0
+                Arrays.fill(mask, row + i0, row + i1, 1)
+    return Array.factory(DataType.INT, [ny, nx], mask)
+    
+def __ispolygonlayer(layer):
+    shapes = layer.getShapes()
+    return len(shapes) == 0 or isinstance(shapes[0], PolygonShape)
+    
+def polygonshapes(mask):
+    """
+    Get the polygon shapes of maskout borders, the layers are flattened into their shapes.
+    
+    :param mask: (*MILayer, VectorLayer, PolygonShape or list*) The maskout borders.
+    
+    :returns: (*list*) The polygon shapes. None if the borders are not polygon shapes or
+        polygon layers.
+    """
+    if not isinstance(mask, (list, tuple, ArrayList)):
+        mask = [mask]
+    r = []
+    for m in mask:
+        if isinstance(m, MILayer):
+            m = m.layer
+        if isinstance(m, VectorLayer):
+            if not __ispolygonlayer(m):
+                return None
+            r.extend(m.getShapes())
+        elif isinstance(m, PolygonShape):
+            r.append(m)
+        else:
+            return None
+    return r
+    
+def maskgrid(mask, x, y):
+    """
+    Get the rasterized mask grid of polygons - 1 for the grid points inside the polygons and 
+    -1 for outside. The mask grids are cached by the polygons and the grid coordinates, so the
+    maskout of other data on the same grid is only an element-wise operation.
+    
+    :param mask: (*MILayer, VectorLayer, PolygonShape or list*) The polygons, a list may mix
+        polygon shapes and polygon layers.
+    :param x: (*list*) X coordinates of the grid (1-D, monotonic).
+    :param y: (*list*) Y coordinates of the grid (1-D, monotonic).
+    
+    :returns: (*Array*) Mask grid of shape (len(y), len(x)). It is shared by the cache and
+        must not be modified. None if the borders are not polygon shapes or polygon layers.
+    """
+    if isinstance(mask, VectorLayer):
+        mask = MILayer(mask)
+    if isinstance(mask, MILayer):
+        if not __ispolygonlayer(mask.layer):
+            return None
+        return mask.maskgrid(x, y)
+    mask = polygonshapes(mask)
+    if mask is None:
+        return None
+    x = tuple(x)
+    y = tuple(y)
+    key = (tuple(mask), x, y)
+    r = maskcache.get(key)
+    if r is None:
+        r = rasterize(mask, x, y)
+        maskcache.put(key, r, r.getSizeBytes())
+    return r
 
 class MILayer():
     def __init__(self, layer=None, shapetype=None):
@@ -31,6 +235,7 @@ class MILayer():
             self.layer = layer
             self.shapetype = layer.getShapeType()
             self.proj = layer.getProjInfo()
+        self.__index = None
     
     def __repr__(self):
         return self.layer.getLayerInfo()
@@ -130,10 +335,42 @@ class MILayer():
         if isinstance(clipobj, PolygonShape):
             clipobj = [clipobj]
         elif isinstance(clipobj, MILayer):
-            clipobj = clipobj.layer
+            e = self.layer.getExtent()
+            clipobj = clipobj.index().findshapes(e.minX, e.maxX, e.minY, e.maxY)
         r = self.layer.clip(clipobj)
         return MILayer(r)
         
+    def index(self):
+        """
+        Get the spatial index of the layer shapes. The index is built at the first call and 
+        rebuilt after the shapes are edited.
+        
+        :returns: (*SpatialIndex*) Spatial index.
+        """
+        if self.__index is None or len(self.__index) != self.shapenum():
+            self.__index = SpatialIndex(self.shapes())
+        return self.__index
+        
+    def maskgrid(self, x, y):
+        """
+        Get the rasterized mask grid of the layer polygons - 1 for the grid points inside the 
+        polygons and -1 for outside. Only the polygons intersecting the grid extent are rasterized.
+        
+        :param x: (*list*) X coordinates of the grid (1-D, monotonic).
+        :param y: (*list*) Y coordinates of the grid (1-D, monotonic).
+        
+        :returns: (*Array*) Mask grid of shape (len(y), len(x)), it must not be modified.
+        """
+        x = tuple(x)
+        y = tuple(y)
+        key = (self.layer, self.shapenum(), x, y)
+        r = maskcache.get(key)
+        if r is None:
+            polygons = self.index().findshapes(min(x), max(x), min(y), max(y))
+            r = rasterize(polygons, x, y)
+            maskcache.put(key, r, r.getSizeBytes())
+        return r
+        
     def clone(self):
         return MILayer(self.layer.clone())
     
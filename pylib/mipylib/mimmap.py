@@ -0,0 +1,248 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab memory-mapped binary file module
+# Note: Jython
+#-----------------------------------------------------
+from java.io import RandomAccessFile
+from java.nio import ByteOrder
+from java.nio.channels import FileChannel
+from ucar.ma2 import Array, MAMath, DataType
+import jarray
+import micache
+from miarray import MIArray
+
+# Data types of the binary data: (DataType, element bytes, jarray type code)
+datatypes = {'byte':(DataType.BYTE, 1, 'b'), 'short':(DataType.SHORT, 2, 'h'),
+    'int':(DataType.INT, 4, 'i'), 'integer':(DataType.INT, 4, 'i'), 'long':(DataType.LONG, 8, 'l'),
+    'float':(DataType.FLOAT, 4, 'f'), 'double':(DataType.DOUBLE, 8, 'd')}
+
+def typeof(datatype):
+    if datatype is None:
+        datatype = 'float'
+    datatype = datatype.lower()
+    if not datatype in datatypes:
+        raise ValueError('Unsupported binary data type: ' + datatype)
+    return datatypes[datatype]
+
+def __byteorder(byteorder):
+    if byteorder == 'big_endian':
+        return ByteOrder.BIG_ENDIAN
+    return ByteOrder.LITTLE_ENDIAN
+
+def __get(bb, code, n):
+    # Bulk copy n elements from a byte buffer
+    a = jarray.zeros(n, code)
+    if code == 'b':
+        bb.get(a)
+    elif code == 'h':
+        bb.asShortBuffer().get(a)
+    elif code == 'i':
+        bb.asIntBuffer().get(a)
+    elif code == 'l':
+        bb.asLongBuffer().get(a)
+    elif code == 'f':
+        bb.asFloatBuffer().get(a)
+    else:
+        bb.asDoubleBuffer().get(a)
+    return a
+
+def __put(bb, code, a):
+    # Bulk copy a java array to a byte buffer
+    if code == 'b':
+        bb.put(a)
+    elif code == 'h':
+        bb.asShortBuffer().put(a)
+    elif code == 'i':
+        bb.asIntBuffer().put(a)
+    elif code == 'l':
+        bb.asLongBuffer().put(a)
+    elif code == 'f':
+        bb.asFloatBuffer().put(a)
+    else:
+        bb.asDoubleBuffer().put(a)
+
+def readmapped(channel, offset, shape, datatype='float', byteorder='little_endian'):
+    """
+    Read an array from a byte range of a file channel by memory mapping, only the range is
+    mapped and copied.
+
+    :param channel: (*FileChannel*) The file channel.
+    :param offset: (*int*) Byte offset of the range.
+    :param shape: (*list*) Shape of the array.
+    :param datatype: (*string*) Data type string.
+    :param byteorder: (*string*) Byte order. ``little_endian`` or ``big_endian``.
+
+    :returns: (*MIArray*) Data array.
+    """
+    dt, size, code = typeof(datatype)
+    n = 1
+    for s in shape:
+        n *= s
+    bb = channel.map(FileChannel.MapMode.READ_ONLY, offset, n * size)
+    bb.order(__byteorder(byteorder))
+    return MIArray(Array.factory(dt, shape, __get(bb, code, n)))
+
+def writemapped(channel, offset, data, datatype='float', byteorder='little_endian'):
+    """
+    Write an array to a byte range of a file channel in place by memory mapping.
+
+    :param channel: (*FileChannel*) The file channel opened for writing.
+    :param offset: (*int*) Byte offset of the range.
+    :param data: (*array_like*) Data array.
+    :param datatype: (*string*) Data type string.
+    :param byteorder: (*string*) Byte order. ``little_endian`` or ``big_endian``.
+    """
+    dt, size, code = typeof(datatype)
+    a = data.asarray()
+    if a.getDataType() != dt:
+        a = MAMath.convert(a, dt)
+    n = a.getSize()
+    bb = channel.map(FileChannel.MapMode.READ_WRITE, offset, n * size)
+    bb.order(__byteorder(byteorder))
+    __put(bb, code, a.copyTo1DJavaArray())
+    bb.force()
+
+# Memory-mapped array of a flat binary file
+class MappedArray():
+
+    # fn: binary file name
+    # shape: shape of the data in the file, the leading dimension is the record dimension
+    # skip: header bytes of the file
+    # mode: 'r' read only or 'r+' read and update in place
+    def __init__(self, fn, shape, datatype=None, skip=0, byteorder='little_endian', mode='r'):
+        self.filename = fn
+        self.shape = list(shape)
+        self.datatype = 'float' if datatype is None else datatype
+        self.dtype, self.itemsize, code = typeof(self.datatype)
+        self.skip = skip
+        self.byteorder = byteorder
+        self.mode = mode
+        self.recshape = self.shape[1:]
+        self.recsize = 1
+        for s in self.recshape:
+            self.recsize *= s
+        self.recbytes = self.recsize * self.itemsize
+        self.closed = False
+        self.open()
+
+    def open(self):
+        self.file = RandomAccessFile(self.filename, 'rw' if self.mode == 'r+' else 'r')
+        self.channel = self.file.getChannel()
+
+    def getchannel(self):
+        """
+        Get the file channel. Cancelling an execution interrupts its thread, which closes
+        the channel in use (ClosedByInterruptException), a channel closed this way is
+        reopened.
+
+        :returns: (*FileChannel*) The file channel.
+        """
+        if self.closed:
+            raise ValueError('The file is closed: ' + self.filename)
+        if not self.channel.isOpen():
+            self.file.close()
+            self.open()
+        return self.channel
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __str__(self):
+        return 'MappedArray: %s %s %s' % (self.filename, self.datatype, self.shape)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __getitem__(self, indices):
+        if not isinstance(indices, tuple):
+            indices = (indices,)
+        rest = tuple(indices[1:]) + (slice(None),) * (len(self.recshape) - len(indices) + 1)
+        k = indices[0]
+        if isinstance(k, int):
+            r = self.record(k)
+            if len(indices) > 1:
+                r = r[rest]
+            return r
+        idx = range(*k.indices(self.shape[0]))
+        if len(idx) == 0:
+            return self.records(0, 0)
+        r = self.records(min(idx[0], idx[-1]), abs(idx[-1] - idx[0]) + 1)
+        step = idx[1] - idx[0] if len(idx) > 1 else 1
+        if step != 1 or len(indices) > 1:
+            r = r[(slice(None, None, step),) + rest]
+        return r
+
+    def __setitem__(self, k, data):
+        self.setrecord(k, data)
+
+    def offset(self, k):
+        """
+        Get the byte offset of a record.
+
+        :param k: (*int*) Record index, negative index counts from the end.
+
+        :returns: (*int*) Byte offset.
+        """
+        if k < 0:
+            k += self.shape[0]
+        if k < 0 or k >= self.shape[0]:
+            raise IndexError('Record index out of range: ' + str(k))
+        return self.skip + k * self.recbytes
+
+    def record(self, k):
+        """
+        Read a record, only the bytes of the record are mapped and copied.
+
+        :param k: (*int*) Record index.
+
+        :returns: (*MIArray*) Record data array.
+        """
+        return readmapped(self.getchannel(), self.offset(k), self.recshape, self.datatype, self.byteorder)
+
+    def records(self, k, n):
+        """
+        Read contiguous records.
+
+        :param k: (*int*) Start record index.
+        :param n: (*int*) Record number.
+
+        :returns: (*MIArray*) Data array of the records.
+        """
+        if n == 0:
+            return MIArray(Array.factory(self.dtype, [0] + self.recshape))
+        self.offset(k + n - 1)
+        return readmapped(self.getchannel(), self.offset(k), [n] + self.recshape, self.datatype, self.byteorder)
+
+    def read(self, offset, shape):
+        """
+        Read an array at a byte offset of the file.
+
+        :param offset: (*int*) Byte offset.
+        :param shape: (*list*) Shape of the array.
+
+        :returns: (*MIArray*) Data array.
+        """
+        return readmapped(self.getchannel(), offset, shape, self.datatype, self.byteorder)
+
+    def setrecord(self, k, data):
+        """
+        Update a record in place, the file must be opened with mode 'r+'.
+
+        :param k: (*int*) Record index.
+        :param data: (*array_like*) Record data array.
+        """
+        if self.mode != 'r+':
+            raise ValueError('The file is not opened for update: ' + self.filename)
+        if data.asarray().getSize() != self.recsize:
+            raise ValueError('The data size does not match the record size %i' % self.recsize)
+        writemapped(self.getchannel(), self.offset(k), data, self.datatype, self.byteorder)
+        micache.invalidate(self.filename)
+
+    def asarray(self):
+        return self.records(0, self.shape[0]).asarray()
+
+    def close(self):
+        self.closed = True
+        self.channel.close()
+        self.file.close()
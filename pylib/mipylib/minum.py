@@ -6,8 +6,12 @@
 #-----------------------------------------------------
 import os
 import sys
+import glob
+import ast
+import __builtin__
 import math
 import datetime
+import collections
 from org.meteoinfo.data import GridData, GridArray, StationData, DataMath, TableData, TimeTableData, ArrayMath, ArrayUtil, TableUtil, DataTypes
 from org.meteoinfo.data.meteodata import MeteoDataInfo, Dimension, DimensionType
 from org.meteoinfo.data.meteodata.netcdf import NetCDFDataInfo
@@ -22,7 +26,7 @@ from org.meteoinfo.global import PointD
 from org.meteoinfo.shape import ShapeUtil
 from org.meteoinfo.legend import BreakTypes
 from ucar.nc2 import NetcdfFileWriter
-from ucar.ma2 import Array
+from ucar.ma2 import Array, DataType, MAMath
 
 import dimdatafile
 import dimvariable
@@ -30,15 +34,26 @@ import dimarray
 import miarray
 import milayer
 import miutil
-from dimdatafile import DimDataFile
+import miparallel
+import micache
+import regrid
+import kdtree
+import mimmap
+import mitable
+from dimdatafile import DimDataFile, MFDimDataFile, NcChunking
 from dimvariable import DimVariable
-from dimarray import PyGridData, DimArray, PyStationData
+from dimarray import PyGridData, DimArray, PyStationData, LazyDimArray, coordarray
 from miarray import MIArray
 from milayer import MILayer
+from regrid import Regridder
+from mitable import PyColumnTable
 
 from java.awt import Color
-from java.lang import Math, Double
-from java.util import Calendar, ArrayList, Date
+from java.lang import Math, Double, InterruptedException
+from java.io import RandomAccessFile
+from java.util import ArrayList, Date
+from java.util.concurrent import Executors, ExecutorCompletionService
+from java.util.concurrent.atomic import AtomicBoolean
 
 # Global variables
 pi = Math.PI
@@ -64,6 +79,7 @@ class PyTableData():
         if data is None:
             self.data = TableData()
         self.timedata = isinstance(data, TimeTableData)
+        self.indexes = {}
         
     def __getitem__(self, key):
         if isinstance(key, (str, unicode)):     
@@ -71,20 +87,7 @@ class PyTableData():
             if coldata.getDataType().isNumeric():
                 return MIArray(ArrayUtil.array(coldata.getDataValues()))
             elif coldata.getDataType() == DataTypes.Date:
-                vv = coldata.getData()
-                r = []
-                cal = Calendar.getInstance()
-                for v in vv:
-                    cal.setTime(v)
-                    year = cal.get(Calendar.YEAR)
-                    month = cal.get(Calendar.MONTH) + 1
-                    day = cal.get(Calendar.DAY_OF_MONTH)
-                    hour = cal.get(Calendar.HOUR_OF_DAY)
-                    minute = cal.get(Calendar.MINUTE)
-                    second = cal.get(Calendar.SECOND)
-                    dt = datetime.datetime(year, month, day, hour, minute, second)
-                    r.append(dt)
-                return r
+                return miutil.pydates(coldata.getData())
             else:
                 return MIArray(ArrayUtil.array(coldata.getData()))
         else:
@@ -98,6 +101,7 @@ class PyTableData():
             self.data.setColumnData(key, value.aslist())
         else:
             self.data.setColumnData(key, value)
+        self.indexes.pop(key, None)
             
     def __repr__(self):
         return self.data.toString()
@@ -113,10 +117,12 @@ class PyTableData():
         
     def setcolname(self, col, colname):
         self.data.getDataTable().renameColumn(col, colname)
+        self.indexes = {}
         
     def setcolnames(self, colnames):
         for i in range(len(colnames)):
             self.data.getDataTable().renameColumn(i, colnames[i])
+        self.indexes = {}
     
     def coldata(self, key):
         if isinstance(key, str):
@@ -133,12 +139,14 @@ class PyTableData():
 
     def setvalue(self, row, col, value):
         self.data.setValue(row, col, value)
+        self.indexes = {}
     
     def addcoldata(self, colname, dtype, coldata):
         if isinstance(coldata, MIArray):
             self.data.addColumnData(colname, dtype, coldata.aslist())
         else:
             self.data.addColumnData(colname, dtype, coldata)
+        self.indexes.pop(colname, None)
 
     def addcol(self, colname, dtype, index=None):
         dtype = TableUtil.toDataTypes(dtype)
@@ -149,15 +157,18 @@ class PyTableData():
     
     def delcol(self, colname):
         self.data.removeColumn(colname)
+        self.indexes.pop(colname, None)
         
     def addrow(self, row=None):
         if row is None:
             self.data.addRow()
         else:
             self.data.addRow(row)
+        self.indexes = {}
             
     def addrows(self, rows):
         self.data.addRows(rows)
+        self.indexes = {}
         
     def getrow(self, index):
         return self.data.getRow(index)
@@ -172,13 +183,54 @@ class PyTableData():
         self.data = tdata;
         self.timedata = True
         
-    def join(self, other, colname, colname1=None):
-        if colname1 == None:
-            self.data.join(other.data, colname)
+    def join(self, other, colname, colname1=None, how=None):
+        """
+        Join another table.
+        
+        :param other: (*PyTableData or PyColumnTable*) The other table.
+        :param colname: (*string or list*) Key column names of this table.
+        :param colname1: (*string or list*) Key column names of the other table. Default is
+            None, same as *colname* .
+        :param how: (*string*) Join mode ['inner' | 'left' | 'outer']. Default is None, the 
+            other table is joined into this table in place. Otherwise the tables are joined 
+            by hashing the key columns of the other table and a new *PyColumnTable* is 
+            returned.
+            
+        :returns: (*PyColumnTable*) Joined table if *how* is set.
+        """
+        if how is None:
+            if not isinstance(other, PyTableData):
+                raise TypeError('Only a PyTableData can be joined in place, set how to join a ' + 
+                    type(other).__name__)
+            if colname1 == None:
+                self.data.join(other.data, colname)
+            else:
+                self.data.join(other.data, colname, colname1)
+            self.indexes = {}
         else:
-            self.data.join(other.data, colname, colname1)
-    def join(self, other, colname):
-        self.data.join(other.data, colname)
+            if isinstance(other, PyTableData):
+                other = other.tocolumntable()
+            return mitable.hashjoin(self.tocolumntable(), other, colname, colname1, how)
+            
+    def tocolumntable(self):
+        """
+        Convert to a columnar table, date columns are converted to local epoch milliseconds.
+        
+        :returns: (*PyColumnTable*) The columnar table.
+        """
+        table = PyColumnTable()
+        for name in self.colnames():
+            coldata = self.data.getColumnData(name)
+            dtype = coldata.getDataType()
+            if dtype == DataTypes.Date:
+                table.addcol(name, mitable.localepoch(coldata.getData()), 'D')
+            elif dtype == DataTypes.Integer:
+                table.addcol(name, coldata.getData(), 'i')
+            elif dtype.isNumeric():
+                table.addcol(name, kdtree.asdoubles(MIArray(ArrayUtil.array(coldata.getDataValues()))), 'f')
+            else:
+                table.addcol(name, coldata.getData(), 's')
+        return table
         
     def savefile(self, filename, delimiter=','):
         if delimiter == ',':
@@ -270,11 +322,103 @@ class PyTableData():
             ttd.setTimeColName('Date')
             return PyTableData(ttd)
             
+    def groupby(self, keys, timecol=None):
+        """
+        Group the rows by the calendar keys of a time column. The calendar keys are computed
+        once, and *agg()* of the grouping computes all statistics of all columns in one pass
+        of the rows.
+        
+        :param keys: (*string or list*) Calendar keys ('year', 'season', 'month', 'day' or
+            'hour'), i.e. ``['year','month']`` as *ave_month()* , ``'month'`` as 
+            *ave_monthofyear()* and ``'hour'`` as *ave_hourofday()* . With ``['year','season']``
+            December is in the DJF season of the next year.
+        :param timecol: (*string*) Time column name. Default is None, the first date column.
+        
+        :returns: (*GroupBy*) The grouping, i.e. ``table.groupby('year').agg({'T':['mean','max']})``
+            returns a *PyColumnTable* of the group keys and statistics.
+        """
+        names = self.colnames()
+        columns = {}
+        for name in names:
+            coldata = self.data.getColumnData(name)
+            if coldata.getDataType() == DataTypes.Date:
+                if timecol is None:
+                    timecol = name
+            elif coldata.getDataType().isNumeric():
+                columns[name] = kdtree.asdoubles(MIArray(ArrayUtil.array(coldata.getDataValues())))
+        if timecol is None:
+            print 'There is no time column!'
+            return None
+        ms = mitable.localepoch(self.data.getColumnData(timecol).getData())
+        return mitable.GroupBy(ms, columns, names, keys)
+            
     def assinglerow(self):
         return PyTableData(TableData(self.data.toSingleRowTable(self.data.getDataTable())))
         
+    def createindex(self, colname):
+        """
+        Create a sorted index of a numeric or string column. The index is kept with the table
+        until the table is modified, and *sql()* uses it for the equality and range 
+        predicates of the column.
+        
+        :param colname: (*string*) Column name.
+        
+        :returns: (*ColumnIndex*) The index.
+        """
+        coldata = self.data.getColumnData(colname)
+        if coldata.getDataType() == DataTypes.Date:
+            raise ValueError('Date column can not be indexed: ' + colname)
+        if coldata.getDataType().isNumeric():
+            values = kdtree.asdoubles(MIArray(ArrayUtil.array(coldata.getDataValues())))
+        else:
+            values = list(coldata.getData())
+        index = mitable.ColumnIndex(values)
+        self.indexes[colname] = index
+        return index
+        
+    def dropindex(self, colname=None):
+        """
+        Remove the index of a column.
+        
+        :param colname: (*string*) Column name. Default is None, all indexes are removed.
+        """
+        if colname is None:
+            self.indexes = {}
+        else:
+            self.indexes.pop(colname, None)
+        
     def sql(self, expression):
-        return PyTableData(self.data.sqlSelect(expression))
+        """
+        Select the rows by a SQL filter expression. The expressions of comparisons joined by 
+        ``AND`` on the indexed columns (i.e. ``"Stid = 54511 AND T > 25"``) are evaluated by 
+        index lookups, other expressions by *TableData.sqlSelect()* .
+        
+        :param expression: (*string*) The filter expression.
+        
+        :returns: (*PyTableData*) The selected rows.
+        """
+        predicates = None
+        if len(self.indexes) > 0:
+            predicates = mitable.parsefilter(expression)
+        if predicates is None or not any([col in self.indexes for col, op, v in predicates]):
+            return PyTableData(self.data.sqlSelect(expression))
+        names = list(self.colnames())
+        for col, op, v in predicates:
+            if not col in names or self.data.getColumnData(col).getDataType() == DataTypes.Date:
+                return PyTableData(self.data.sqlSelect(expression))
+        colvalues = {}
+        def value(col, row):
+            if not col in colvalues:
+                colvalues[col] = self.data.getColumnData(col).getData()
+            return colvalues[col][row]
+        rows = mitable.filterrows(self.rownum(), predicates, self.indexes, value)
+        # Keep the table class (i.e. TimeTableData) and the column types of the clone
+        r = self.data.clone()
+        rs = r.getRows()
+        selected = [rs.get(k) for k in rows]
+        rs.clear()
+        rs.addAll(selected)
+        return PyTableData(r)
     
     def clone(self):
         return PyTableData(self.data.clone())
@@ -311,6 +455,20 @@ def addfile(fname, access='r', dtype='netcdf', keepopen=False, **kwargs):
     :param fname: (*string*) The full or relative path of the data file to load.
     :param access: (*string*) The access right setting to the data file. Default is ``r``.
     :param dtype: (*string*) The data type of the data file. Default is ``netcdf``.
+    :param keepopen: (*boolean*) Keep the data file open or not. Default is ``False``.
+    :param lazy: (*boolean*) Read variable sections lazily chunk by chunk on demand. Default 
+        is ``False``.
+    :param chunkbytes: (*int*) Memory budget (bytes) of a lazy chunk. Default is None, using
+        the global chunk budget (see ``chunkbudget``).
+    :param version: (*string*) netCDF version of a created file - ``netcdf3`` or ``netcdf4``.
+        Default is ``netcdf3``.
+    :param chunking: (*string*) Default chunk policy of the variables of a created netCDF-4
+        file - ``map`` (horizontal slices are read) or ``timeseries`` (time series at given 
+        locations are read). Default is None, the netCDF-Java standard chunking.
+    :param deflate: (*int*) Default deflate level (0 - 9) of the variables of a created 
+        netCDF-4 file. Default is 0.
+    :param shuffle: (*boolean*) Use the shuffle filter for the variables of a created netCDF-4
+        file or not. Default is ``False``.
     
     :returns: (*DimDataFile*) Opened file object.
     """
@@ -320,25 +478,29 @@ def addfile(fname, access='r', dtype='netcdf', keepopen=False, **kwargs):
         if fname is None:
             return None
 
+        lazy = kwargs.pop('lazy', False)
+        chunkbytes = kwargs.pop('chunkbytes', None)
         if isweb:
-            return addfile_nc(fname, False)
-        
-        if not os.path.exists(fname):
-            print 'File not exist: ' + fname
-            return None
-        
-        fsufix = os.path.splitext(fname)[1].lower()
-        if fsufix == '.ctl':
-            return addfile_grads(fname, False)
-        elif fsufix == '.tif':
-            return addfile_geotiff(fname, False)
-        elif fsufix == '.awx':
-            return addfile_awx(fname, False)
-        
-        meteodata = MeteoDataInfo()
-        meteodata.openData(fname, keepopen)
-        __addmeteodata(meteodata)
-        datafile = DimDataFile(meteodata)
+            datafile = addfile_nc(fname, False)
+        else:
+            if not os.path.exists(fname):
+                print 'File not exist: ' + fname
+                return None
+            
+            fsufix = os.path.splitext(fname)[1].lower()
+            if fsufix == '.ctl':
+                datafile = addfile_grads(fname, False)
+            elif fsufix == '.tif':
+                datafile = addfile_geotiff(fname, False)
+            elif fsufix == '.awx':
+                datafile = addfile_awx(fname, False)
+            else:
+                meteodata = MeteoDataInfo()
+                meteodata.openData(fname, keepopen)
+                __addmeteodata(meteodata)
+                datafile = DimDataFile(meteodata)
+        datafile.lazy = lazy
+        datafile.chunkbytes = chunkbytes
         return datafile
     elif access == 'c':
         if dtype == 'arl':
@@ -359,14 +521,56 @@ def addfile(fname, access='r', dtype='netcdf', keepopen=False, **kwargs):
             version = kwargs.pop('version', 'netcdf3')
             if version == 'netcdf3':
                 version = NetcdfFileWriter.Version.netcdf3
+                ncfile = NetcdfFileWriter.createNew(version, fname)
+                datafile = DimDataFile(ncfile=ncfile)
             else:
                 version = NetcdfFileWriter.Version.netcdf4
-            ncfile = NetcdfFileWriter.createNew(version, fname)
-            datafile = DimDataFile(ncfile=ncfile)
+                chunking = kwargs.pop('chunking', None)
+                deflate = kwargs.pop('deflate', 0)
+                shuffle = kwargs.pop('shuffle', False)
+                chunking = NcChunking(chunking, deflate, shuffle)
+                ncfile = NetcdfFileWriter.createNew(version, fname, chunking)
+                datafile = DimDataFile(ncfile=ncfile)
+                datafile.chunking = chunking
+        # The cached blocks of the overwritten file are removed
+        datafile.filename = fname
+        datafile.clearcache()
         return datafile
     else:
         return None
     
+def addfiles(fnames, concat_dim='time', keepopen=False, **kwargs):
+    """
+    Opens multiple data files as one virtual dataset aggregated along a dimension. No data 
+    is copied, the member files are only read when a variable section touches them.
+    
+    :param fnames: (*string or list*) File name pattern with wildcards (i.e. 
+        ``'D:/data/*.nc'``) or the list of the file names. The files are aggregated in 
+        sorted file name order for a pattern.
+    :param concat_dim: (*string*) Name of the aggregation dimension. Default is ``time``, 
+        which matches the time dimension of the files.
+    :param keepopen: (*boolean*) Keep the member files open after reading or not. Default 
+        is ``False``.
+    :param lazy: (*boolean*) Read variable sections lazily chunk by chunk on demand. Default 
+        is ``False``.
+    :param chunkbytes: (*int*) Memory budget (bytes) of a lazy chunk.
+    
+    :returns: (*MFDimDataFile*) Aggregated dataset object.
+    """
+    if isinstance(fnames, basestring):
+        fnames = sorted(glob.glob(fnames.strip()))
+    if len(fnames) == 0:
+        print 'No file found!'
+        return None
+    for fn in fnames:
+        if not os.path.exists(fn):
+            print 'File not exist: ' + fn
+            return None
+    datafile = MFDimDataFile(fnames, concat_dim, keepopen)
+    datafile.lazy = kwargs.pop('lazy', False)
+    datafile.chunkbytes = kwargs.pop('chunkbytes', None)
+    return datafile
+    
 def addfile_grads(fname, getfn=True):
     if getfn:
         fname, isweb = __getfilename(fname)
@@ -480,6 +684,117 @@ def addfile_ascii_grid(fname, getfn=True):
     datafile = DimDataFile(meteodata)
     return datafile
 
+def chunkbudget(nbytes=None):
+    """
+    Get or set the global memory budget of a chunk read by lazy arrays.
+    
+    :param nbytes: (*int*) Chunk memory budget in bytes. Default is None, only return the
+        current budget.
+        
+    :returns: (*int*) The chunk memory budget in bytes.
+    """
+    if not nbytes is None:
+        dimarray.chunkbytes = int(nbytes)
+    return dimarray.chunkbytes
+
+def set_num_threads(n=None):
+    """
+    Set the number of threads used to evaluate element-wise functions and operators of 
+    large arrays in parallel. The results are identical to serial evaluation.
+    
+    :param n: (*int*) Number of threads, 1 means serial evaluation. Default is None, the 
+        number of available processors is used.
+    """
+    miparallel.set_num_threads(n)
+    
+def get_num_threads():
+    """
+    Get the number of threads used for parallel evaluation.
+    
+    :returns: (*int*) Number of threads.
+    """
+    return miparallel.get_num_threads()
+    
+def __mapslab(fn, var, indices, idx):
+    return idx, fn(var[indices])
+    
+def __parallelmap(fn, var, axis, workers, ordered, maxtasks):
+    n = var.dimlen(axis)
+    executor = Executors.newFixedThreadPool(workers)
+    try:
+        service = ExecutorCompletionService(executor)
+        cancelled = AtomicBoolean(False)
+        tasks = collections.OrderedDict()
+        idx = 0
+        while idx < n or len(tasks) > 0:
+            while idx < n and len(tasks) < maxtasks:
+                indices = [slice(None)] * var.ndim
+                indices[axis] = idx
+                task = miparallel.Task(__mapslab, (fn, var, tuple(indices), idx), None, cancelled)
+                tasks[service.submit(task)] = task
+                idx += 1
+            if ordered:
+                future = tasks.keys()[0]
+            else:
+                try:
+                    future = service.take()
+                except InterruptedException:
+                    raise KeyboardInterrupt('Execution cancelled')
+            yield miparallel.result(future, tasks.pop(future))
+    finally:
+        cancelled.set(True)
+        executor.shutdownNow()
+    
+def parallel_map(fn, var, axis='T', workers=None, ordered=True, write=None):
+    """
+    Apply a function to each slab of a variable along an axis in parallel. The slabs are read
+    and processed by a thread pool, at most twice the worker number of slabs are in flight, 
+    so the memory use is bounded however long the axis is. The data reading of a data file is
+    serialized by its read lock, so the data readers need not be thread-safe.
+    
+    :param fn: (*function*) The function applied to each slab (*DimArray*).
+    :param var: (*DimVariable*) The variable.
+    :param axis: (*int or string*) The axis index, dimension name or dimension type 
+        ('T', 'Z', 'Y' or 'X'). Default is 'T'.
+    :param workers: (*int*) Number of the worker threads. Default is None, the number of
+        threads of parallel evaluation is used.
+    :param ordered: (*boolean*) Return the results in the axis order or in the completion
+        order. Default is ``True`` .
+    :param write: (*function*) Optional, called as ``write(index, result)`` for each result 
+        in the caller thread, i.e. to write the result to an output file.
+        
+    :returns: Iterator of the (index, result) tuples, or the number of the results if *write*
+        is set.
+    """
+    if isinstance(axis, basestring):
+        dimtypes = dict(T=DimensionType.T, Z=DimensionType.Z, Y=DimensionType.Y, X=DimensionType.X)
+        for i in range(var.ndim):
+            dim = var.dims[i]
+            if dim.getShortName() == axis or (axis in dimtypes and dim.getDimType() == dimtypes[axis]):
+                axis = i
+                break
+        else:
+            raise ValueError('No dimension of the variable matches axis: ' + axis)
+    if workers is None:
+        workers = miparallel.get_num_threads()
+    workers = max(1, int(workers))
+    r = __parallelmap(fn, var, axis, workers, ordered, workers * 2)
+    if write is None:
+        return r
+    n = 0
+    for idx, result in r:
+        write(idx, result)
+        n += 1
+    return n
+    
+def __binop(func, x1, x2):
+    a = x1.array if isinstance(x1, DimArray) else x1
+    b = x2.array if isinstance(x2, DimArray) else x2
+    r = miarray.binop(func, a, b)
+    if isinstance(x1, DimArray) and list(r.shape) == list(x1.shape):
+        return DimArray(r, x1.dims, x1.fill_value, x1.proj)
+    return r
+    
 def __addmeteodata(meteodata):
     global c_meteodata, meteodatalist
     meteodatalist.append(meteodata)
@@ -521,12 +836,46 @@ def asciiread(filename, **kwargs):
     return MIArray(a)
         
 def readtable(filename, **kwargs):
+    """
+    Read a delimited text file as a table.
+    
+    :param filename: (*string*) File name.
+    :param delimiter: (*string*) Field delimiter. Default is None, white spaces.
+    :param format: (*string*) Column format string, i.e. ``'%s%i%f%{yyyy-MM-dd HH:mm}D'`` .
+    :param headerlines: (*int*) Number of the header lines skipped. Default is 0.
+    :param encoding: (*string*) File encoding. Default is ``UTF8`` .
+    :param readvarnames: (*boolean*) Read the column names from the first line or not. 
+        Default is ``True`` .
+    :param colnames: (*list*) Column names.
+    :param columnar: (*boolean*) Read as a columnar table (*PyColumnTable*) keeping a 
+        primitive array per column, date columns as epoch milliseconds. Default is ``False``.
+    :param chunksize: (*int*) Read the file chunk by chunk as columnar tables of the row 
+        number. Default is None.
+    
+    :returns: (*PyTableData*) The table. A *PyColumnTable* for *columnar*, or an iterator 
+        of *PyColumnTable* chunks for *chunksize*.
+    """
     delimiter = kwargs.pop('delimiter', None)
     format = kwargs.pop('format', None)
     headerlines = kwargs.pop('headerlines', 0)
     encoding = kwargs.pop('encoding', 'UTF8')
     readvarnames = kwargs.pop('readvarnames', True)
     readrownames = kwargs.pop('readrownames', False)
+    columnar = kwargs.pop('columnar', False)
+    chunksize = kwargs.pop('chunksize', None)
+    if columnar or not chunksize is None:
+        if not os.path.exists(filename):
+            print 'File not exist: ' + filename
+            return None
+        colnames = kwargs.pop('colnames', None)
+        reader = mitable.ColumnReader(filename, delimiter, headerlines, format, encoding,
+            readvarnames, colnames)
+        if not chunksize is None:
+            return reader.chunks(chunksize)
+        try:
+            return reader.read()
+        finally:
+            reader.close()
     tdata = TableUtil.readASCIIFile(filename, delimiter, headerlines, format, encoding)
     r = PyTableData(tdata)
     colnames = kwargs.pop('colnames', None)
@@ -804,16 +1153,10 @@ def pow(x1, x2):
         x1 = array(x1)
     if isinstance(x2, list):
         x2 = array(x2)
-    if isinstance(x1, (DimArray, MIArray)):
-        if isinstance(x2, (DimArray, MIArray)):
-            return MIArray(ArrayMath.pow(x1.asarray(), x2.asarray()))
-        else:
-            return MIArray(ArrayMath.pow(x1.asarray(), x2))
+    if isinstance(x1, (DimArray, MIArray)) or isinstance(x2, (DimArray, MIArray)):
+        return __binop(ArrayMath.pow, x1, x2)
     else:
-        if isinstance(x2, (DimArray, MIArray)):
-            return MIArray(ArrayMath.pow(x1, x2.asarray()))
-        else:
-            return math.pow(x1, x2)
+        return math.pow(x1, x2)
             
 def power(x1, x2):
     return pow(x1, x2)
@@ -964,7 +1307,7 @@ def atan2(x1, x2):
         array([-135.00000398439022, -45.000001328130075, 45.000001328130075, 135.00000398439022])
     """    
     if isinstance(x1, DimArray) or isinstance(x1, MIArray):
-        return MIArray(ArrayMath.atan2(x1.asarray(), x2.asarray()))
+        return __binop(ArrayMath.atan2, x1, x2)
     else:
         return math.atan2(x1, x2)
         
@@ -1039,6 +1382,8 @@ def mean(x, axis=None):
     Compute tha arithmetic mean
     
     :param x: (*array_like or list*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which the means are computed, NaN
+        values are skipped. Default is None, compute the mean of all elements.
     
     returns: (*array_like*) Mean result
     """
@@ -1060,20 +1405,124 @@ def mean(x, axis=None):
             return PyStationData(r)
         else:
             return None
+    elif isinstance(x, LazyDimArray):
+        return x.mean(axis=axis)
     else:
         if axis is None:
             r = ArrayMath.mean(x.asarray())
             return r
         else:
-            r = ArrayMath.mean(x.asarray(), axis)
-            if isinstance(x, MIArray):
-                return MIArray(r)
-            else:
-                dims = []
-                for i in range(0, x.ndim):
-                    if i != axis:
-                        dims.append(x.dims[i])
-                return DimArray(MIArray(r), dims, x.fill_value, x.proj)
+            return x.mean(axis=axis)
+                
+def sum(x, axis=None):
+    """
+    Sum of array elements over a given axis, NaN values are skipped. Other sequences are 
+    summed by the Python built-in ``sum``, so the function can replace it in scripts.
+    
+    :param x: (*array_like or sequence*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which the sum is performed. Default is
+        None, sum all of the elements. For a sequence it is the start value of the 
+        built-in ``sum``.
+        
+    :returns: (*array_like or number*) Sum result.
+    """
+    if isinstance(x, (MIArray, DimArray, LazyDimArray)):
+        return x.sum(axis=axis)
+    if axis is None:
+        return __builtin__.sum(x)
+    return __builtin__.sum(x, axis)
+    
+def amin(x, axis=None):
+    """
+    Minimum of an array or minimum along an axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None, the
+        minimum of all elements is returned.
+        
+    :returns: (*array_like or number*) Minimum result.
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.min(axis=axis)
+    
+def amax(x, axis=None):
+    """
+    Maximum of an array or maximum along an axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which to operate. Default is None, the
+        maximum of all elements is returned.
+        
+    :returns: (*array_like or number*) Maximum result.
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.max(axis=axis)
+    
+def std(x, axis=None, ddof=0):
+    """
+    Compute the standard deviation along the specified axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which the standard deviation is 
+        computed. Default is None, compute the standard deviation of all elements.
+    :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``. Default is 0.
+        
+    :returns: (*array_like or number*) Standard deviation result.
+    
+    Examples::
+    
+        >>> a = array([[1., 2.], [3., nan]])
+        >>> std(a, axis=0)
+        array([1.0, 0.0])
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.std(axis, ddof)
+    
+def var(x, axis=None, ddof=0):
+    """
+    Compute the variance along the specified axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int or tuple*) Axis or axes along which the variance is computed. Default
+        is None, compute the variance of all elements.
+    :param ddof: (*int*) Delta degrees of freedom, the divisor is ``N - ddof``. Default is 0.
+        
+    :returns: (*array_like or number*) Variance result.
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.var(axis, ddof)
+    
+def argmin(x, axis=None):
+    """
+    Returns the indices of the minimum values along an axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int*) Axis along which to operate. Default is None, the index is into the
+        flattened array.
+        
+    :returns: (*array_like or int*) Indices of the minimum values, -1 if all values are NaN.
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.argmin(axis)
+    
+def argmax(x, axis=None):
+    """
+    Returns the indices of the maximum values along an axis, NaN values are skipped.
+    
+    :param x: (*array_like*) Input values.
+    :param axis: (*int*) Axis along which to operate. Default is None, the index is into the
+        flattened array.
+        
+    :returns: (*array_like or int*) Indices of the maximum values, -1 if all values are NaN.
+    """
+    if isinstance(x, list):
+        x = array(x)
+    return x.argmax(axis)
                 
 def maximum(x1, x2):
     """
@@ -1093,11 +1542,8 @@ def maximum(x1, x2):
         x1 = array(x1)
     if isinstance(x2, list):
         x2 = array(x2)
-    if isinstance(x1, MIArray):
-        return MIArray(ArrayMath.maximum(x1.asarray(), x2.asarray()))
-    elif isinstance(x1, DimArray):
-        r = MIArray(ArrayMath.maximum(x1.asarray(), x2.asarray()))
-        return DimArray(r, x1.dims, x1.fill_value, x1.proj)
+    if isinstance(x1, (DimArray, MIArray)):
+        return __binop(ArrayMath.maximum, x1, x2)
     else:
         return max(x1, x2)
         
@@ -1120,11 +1566,8 @@ def fmax(x1, x2):
         x1 = array(x1)
     if isinstance(x2, list):
         x2 = array(x2)
-    if isinstance(x1, MIArray):
-        return MIArray(ArrayMath.fmax(x1.asarray(), x2.asarray()))
-    elif isinstance(x1, DimArray):
-        r = MIArray(ArrayMath.fmax(x1.asarray(), x2.asarray()))
-        return DimArray(r, x1.dims, x1.fill_value, x1.proj)
+    if isinstance(x1, (DimArray, MIArray)):
+        return __binop(ArrayMath.fmax, x1, x2)
     else:
         return max(x1, x2)
         
@@ -1146,11 +1589,8 @@ def minimum(x1, x2):
         x1 = array(x1)
     if isinstance(x2, list):
         x2 = array(x2)
-    if isinstance(x1, MIArray):
-        return MIArray(ArrayMath.minimum(x1.asarray(), x2.asarray()))
-    elif isinstance(x1, DimArray):
-        r = MIArray(ArrayMath.minimum(x1.asarray(), x2.asarray()))
-        return DimArray(r, x1.dims, x1.fill_value, x1.proj)
+    if isinstance(x1, (DimArray, MIArray)):
+        return __binop(ArrayMath.minimum, x1, x2)
     else:
         return min(x1, x2)
         
@@ -1173,11 +1613,8 @@ def fmin(x1, x2):
         x1 = array(x1)
     if isinstance(x2, list):
         x2 = array(x2)
-    if isinstance(x1, MIArray):
-        return MIArray(ArrayMath.fmin(x1.asarray(), x2.asarray()))
-    elif isinstance(x1, DimArray):
-        r = MIArray(ArrayMath.fmin(x1.asarray(), x2.asarray()))
-        return DimArray(r, x1.dims, x1.fill_value, x1.proj)
+    if isinstance(x1, (DimArray, MIArray)):
+        return __binop(ArrayMath.fmin, x1, x2)
     else:
         return min(x1, x2)
 
@@ -1278,6 +1715,115 @@ def broadcast_to(a, shape):
     r = ArrayUtil.broadcast(a.asarray(), shape)
     return MIArray(r)
     
+# Element-wise functions of this module which can be evaluated block by block
+elementwise = set(['abs', 'sqrt', 'pow', 'power', 'sin', 'cos', 'tan', 'asin', 'acos', 'atan',
+    'atan2', 'exp', 'log', 'log10', 'maximum', 'minimum', 'fmax', 'fmin'])
+    
+def __iselementwise(node, names):
+    # Whether the expression node only has operators, element-wise function calls, 
+    # numbers and the given variable names
+    if isinstance(node, ast.Expression):
+        return __iselementwise(node.body, names)
+    elif isinstance(node, ast.BinOp):
+        return __iselementwise(node.left, names) and __iselementwise(node.right, names)
+    elif isinstance(node, ast.UnaryOp):
+        return __iselementwise(node.operand, names)
+    elif isinstance(node, ast.Compare):
+        return len(node.comparators) == 1 and __iselementwise(node.left, names) and \
+            __iselementwise(node.comparators[0], names)
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or not node.func.id in elementwise:
+            return False
+        if len(node.keywords) > 0 or not node.starargs is None or not node.kwargs is None:
+            return False
+        for arg in node.args:
+            if not __iselementwise(arg, names):
+                return False
+        return True
+    elif isinstance(node, ast.Name):
+        return node.id in names
+    elif isinstance(node, ast.Num):
+        return True
+    return False
+    
+def evaluate(ex, local_dict=None):
+    """
+    Evaluate an array expression in a single pass.
+    
+    The array operands are broadcast against each other and the expression is evaluated 
+    on blocks of them, so only block sized temporary arrays are created instead of full
+    sized ones for each operation. An expression with other than operators and element-wise 
+    functions (i.e. ``mean``, indexing or attributes) is evaluated on the whole arrays.
+    
+    :param ex: (*string*) The expression, i.e. ``'a * b + c'``. The element-wise functions 
+        of this module (sqrt, exp, log, ...) can be used in the expression.
+    :param local_dict: (*dict*) The variables of the expression. Default is None, the 
+        variables of the caller are used.
+        
+    :returns: (*array_like*) The result of the expression.
+    
+    Examples::
+    
+        >>> a = array([[1., 2., 3.], [4., 5., 6.]])
+        >>> b = array([1., 2., 3.])
+        >>> evaluate('a * b + 1')
+        array([[2.0, 5.0, 10.0]
+              [5.0, 11.0, 19.0]])
+    """
+    code = compile(ex, '<expr>', 'eval')
+    if local_dict is None:
+        frame = sys._getframe(1)
+        local_dict = dict(frame.f_globals)
+        local_dict.update(frame.f_locals)
+    env = dict(globals())
+    env.update(local_dict)
+    names = []
+    args = []
+    dimdata = []
+    numbers = []
+    for name in code.co_names:
+        if not name in env:
+            continue
+        v = env[name]
+        if isinstance(v, (int, long, float)):
+            numbers.append(name)
+            continue
+        if isinstance(v, list):
+            v = array(v)
+        if isinstance(v, DimArray):
+            dimdata.append(v)
+            v = v.array
+        if isinstance(v, MIArray):
+            names.append(name)
+            args.append(v)
+    if len(args) == 0 or not __iselementwise(ast.parse(ex, mode='eval'), names + numbers):
+        return eval(code, env)
+    rank = len(miarray.broadcast_shape(*args))
+        
+    def func(*blocks):
+        d = {}
+        shape = [1] * rank
+        for name, b in zip(names, blocks):
+            if isinstance(b, Array):
+                shape = b.getShape()
+                b = MIArray(b)
+            d[name] = b
+        r = eval(code, env, d)
+        if isinstance(r, MIArray):
+            r = r.asarray()
+        elif not isinstance(r, Array):
+            # All the operands have a single element in the block
+            v = r
+            r = Array.factory(DataType.DOUBLE, shape)
+            MAMath.setDouble(r, v)
+        return r
+        
+    r = MIArray(miarray.evalblocks(func, args))
+    for v in dimdata:
+        if list(v.shape) == list(r.shape):
+            return DimArray(r, v.dims, v.fill_value, v.proj)
+    return r
+    
 def corrcoef(x, y):
     """
     Return Pearson product-moment correlation coefficients.
@@ -1551,12 +2097,25 @@ def asarray(data):
         return array(data).asarray()
 
 def asmiarray(data):
+    """
+    Convert to an MIArray, the storage of the arrays is shared without copying.
+    
+    :param data: (*array_like*) Array, DimArray, MIArray, GridArray, PyGridData or other 
+        array_like data.
+        
+    :returns: (*MIArray*) The array. The array of a GridArray is shared, a PyGridData is 
+        copied once as GridData keeps its values in a two dimensional Java array.
+    """
     if isinstance(data, Array):
         return MIArray(data)
     elif isinstance(data, DimArray):
         return data.array
     elif isinstance(data, MIArray):
         return data
+    elif isinstance(data, GridArray):
+        return MIArray(data.data)
+    elif isinstance(data, PyGridData):
+        return MIArray(data.data.getArray())
     else:
         return array(data)       
         
@@ -1571,12 +2130,12 @@ def asgriddata(data, x=None, y=None, fill_value=-9999.0):
                 x = arange(0, data.shape[1])
             if y is None:
                 y = arange(0, data.shape[0])
-            gdata = GridData(data.array, x.array, y.array, fill_value)
+            gdata = GridData(data.asarray(), coordarray(x), coordarray(y), fill_value)
             return PyGridData(gdata)
         else:
             return None
     else:
-        gdata = GridData(data.asarray(), x.asarray(), y.asarray(), fill_value)
+        gdata = GridData(data.asarray(), coordarray(x), coordarray(y), fill_value)
         return PyGridData(gdata)
         
 def asgridarray(data, x=None, y=None, fill_value=-9999.0):
@@ -1590,16 +2149,16 @@ def asgridarray(data, x=None, y=None, fill_value=-9999.0):
                 x = arange(0, data.shape[1])
             if y is None:
                 y = arange(0, data.shape[0])
-            gdata = GridArray(data.array, x.array, y.array, fill_value)
+            gdata = GridArray(data.asarray(), coordarray(x), coordarray(y), fill_value)
             return gdata
         else:
             return None
     else:
-        gdata = GridArray(data.asarray(), x.asarray(), y.asarray(), fill_value)
+        gdata = GridArray(data.asarray(), coordarray(x), coordarray(y), fill_value)
         return gdata
         
 def asstationdata(data, x, y, fill_value=-9999.0):
-    stdata = StationData(data.asarray(), x.asarray(), y.asarray(), fill_value)
+    stdata = StationData(data.asarray(), coordarray(x), coordarray(y), fill_value)
     return PyStationData(stdata)
         
 def shaperead(fn):   
@@ -1678,7 +2237,7 @@ def maskout(data, mask, x=None, y=None):
     """
     Maskout data by polygons - NaN values of elements outside polygons.
     
-    :param mask: (*list*) Polygon list as maskout borders.
+    :param mask: (*list*) Polygon list as maskout borders, may include polygon layers.
     :param data: (*array_like*) Array data for maskout.
     :param x: (*array_like*) X coordinate array.
     :param y: (*array_like*) Y coordinate array.
@@ -1687,6 +2246,8 @@ def maskout(data, mask, x=None, y=None):
     """
     if mask is None:
         return data
+    elif isinstance(data, LazyDimArray):
+        return data.maskout(mask)
     elif isinstance(mask, (MIArray, DimArray)):
         r = ArrayMath.maskout(data.asarray(), mask.asarray())
         return MIArray(r)
@@ -1696,7 +2257,14 @@ def maskout(data, mask, x=None, y=None):
         else:
             return None
     else:
-        if not isinstance(mask, (list, ArrayList)):
+        if len(x.shape) == 1 and len(y.shape) == 1 and list(data.shape) == [len(y), len(x)]:
+            m = milayer.maskgrid(mask, x.aslist(), y.aslist())
+            if not m is None:
+                return MIArray(ArrayMath.maskout(data.asarray(), m))
+        shapes = milayer.polygonshapes(mask)
+        if not shapes is None:
+            mask = shapes
+        elif not isinstance(mask, (list, ArrayList)):
             mask = [mask]
         r = ArrayMath.maskout(data.asarray(), x.asarray(), y.asarray(), mask)
         return MIArray(r)
@@ -1745,6 +2313,41 @@ def interp2d(*args, **kwargs):
     r = ArrayUtil.resample_Bilinear(z.asarray(), x.asarray(), y.asarray(), xq.asarray(), yq.asarray())
     return MIArray(r)
 
+def regridder(a, xq, yq, toproj=None, method='bilinear'):
+    """
+    Create a regridder of an array grid to a target grid. The interpolation weights are
+    computed once, then the regridder can be applied to any number of arrays on the same
+    source grid (i.e. ``r = regridder(a, x, y); b = r(a); c = r(c_src)`` ).
+    
+    :param a: (*DimArray*) The array on the source grid, the last two dimensions are y/x.
+    :param xq: (*array_like*) X coordinate array of the target grid (1-D) or points (2-D).
+    :param yq: (*array_like*) Y coordinate array of the target grid (1-D) or points (2-D).
+    :param toproj: (*ProjectionInfo*) Projection of the target coordinates. Default is None,
+        the projection of the array is used.
+    :param method: (*string*) Interpolation method. ['bilinear' | 'nearest'].
+    
+    :returns: (*Regridder*) The regridder, which can be saved by *save(fname)* and loaded by
+        *loadregridder(fname)* .
+    """
+    x = a.dimvalue(a.ndim - 1)
+    y = a.dimvalue(a.ndim - 2)
+    if toproj is None:
+        toproj = a.proj
+    return Regridder(x, y, xq, yq, a.proj, toproj, method)
+    
+def loadregridder(fname):
+    """
+    Load a regridder from a weights file.
+    
+    :param fname: (*string*) The weights file name.
+    
+    :returns: (*Regridder*) The regridder.
+    """
+    if not os.path.exists(fname):
+        print 'File not exist: ' + fname
+        return None
+    return regrid.load(fname)
+
 def interpn(points, values, xi):
     """
     Multidimensional interpolation on regular grids.
@@ -1773,6 +2376,27 @@ def interpn(points, values, xi):
     return r
     
 def griddata(points, values, xi=None, **kwargs):
+    """
+    Interpolate scattered data to grid data.
+    
+    :param points: (*list*) The list contains x and y coordinate arrays of the scattered data.
+    :param values: (*array_like*) Scattered data values.
+    :param xi: (*list*) The list contains x and y coordinate arrays (1-D) of the grid data.
+        Default is ``None``, 500 * 500 grid in the extent of the scattered data is used.
+    :param method: (*string*) The interpolation method. ['idw' | 'cressman' | 'neareast' | 
+        'inside' | 'inside_max' | 'inside_min' | 'inside_count' | 'surface'].
+    :param pointnum: (*int*) Only used for 'idw' method. The number of the nearest points.
+    :param radius: (*float*) Used for 'idw', 'cressman' and 'neareast' methods. The search 
+        radius, a radius list for 'cressman' method.
+    :param kdtree: (*boolean*) Search the neighbour points by a KD-tree and evaluate the grid
+        rows in parallel for 'idw', 'cressman' and 'neareast' methods. The grid coordinates 
+        of 'cressman' must be evenly spaced. Default is ``False`` , the *ArrayUtil* routines
+        are used.
+    :param convexhull: (*boolean*) Mask out the grid outside the convex hull of the points
+        or not. Default is ``False`` .
+    
+    :returns: (*array_like*) Interpolated grid data, x and y coordinate arrays.
+    """
     method = kwargs.pop('method', 'idw')
     fill_value = kwargs.pop('file_value', nan)
     x_s = points[0]
@@ -1785,6 +2409,10 @@ def griddata(points, values, xi=None, **kwargs):
     else:
         x_g = xi[0]
         y_g = xi[1]
+    usekdtree = kwargs.pop('kdtree', False) and len(x_g.shape) == 1 and len(y_g.shape) == 1
+    if usekdtree and method in ['idw', 'cressman', 'neareast', 'nearest']:
+        r = __kdgriddata(x_s, y_s, values, x_g, y_g, method, fill_value, **kwargs)
+        return __convexhull(r, x_s, y_s, x_g, y_g, **kwargs)
     if isinstance(values, MIArray) or isinstance(values, DimArray):
         values = values.asarray()    
     if method == 'idw':
@@ -1814,15 +2442,32 @@ def griddata(points, values, xi=None, **kwargs):
         r = ArrayUtil.interpolation_Surface(x_s.asarray(), y_s.asarray(), values, x_g.asarray(), y_g.asarray())
     else:
         return None
+    return __convexhull(MIArray(r), x_s, y_s, x_g, y_g, **kwargs)
     
+def __convexhull(r, x_s, y_s, x_g, y_g, **kwargs):
     convexhull = kwargs.pop('convexhull', False)
     if convexhull:
         polyshape = ArrayUtil.convexHull(x_s.asarray(), y_s.asarray())
         x_gg, y_gg = meshgrid(x_g, y_g)
-        r = maskout(MIArray(r), x=x_gg, y=y_gg, mask=polyshape)
+        r = maskout(r, x=x_gg, y=y_gg, mask=polyshape)
+        return r, x_g, y_g
+    else:
         return r, x_g, y_g
+        
+def __kdgriddata(x_s, y_s, values, x_g, y_g, method, fill_value, **kwargs):
+    # KD-tree neighbour search of the stations, evaluated in parallel by grid rows
+    if method == 'idw':
+        pnum = kwargs.pop('pointnum', 2)
+        radius = kwargs.pop('radius', None)
+        return kdtree.idw(x_s, y_s, values, x_g, y_g, pnum, radius, fill_value)
+    elif method == 'cressman':
+        radius = kwargs.pop('radius', [10, 7, 4, 2, 1])
+        if isinstance(radius, MIArray):
+            radius = radius.aslist()
+        return kdtree.cressman(x_s, y_s, values, x_g, y_g, radius, fill_value)
     else:
-        return MIArray(r), x_g, y_g
+        radius = kwargs.pop('radius', inf)
+        return kdtree.nearest(x_s, y_s, values, x_g, y_g, radius, fill_value)
 
 def projinfo(proj='longlat', **kwargs):
     """
@@ -1936,15 +2581,13 @@ def projectxy(lon, lat, xnum, ynum, dx, dy, toproj, fromproj=None, pos='lowerlef
     return xx, yy
     
 def addtimedim(infn, outfn, t, tunit='hours'):
-    cal = Calendar.getInstance()
-    cal.set(t.year, t.month - 1, t.day, t.hour, t.minute, t.second)
-    nt = cal.getTime()
+    nt = miutil.jdate(t)
     NetCDFDataInfo.addTimeDimension(infn, outfn, nt, tunit)
         
 def joinncfile(infns, outfn, tdimname):
     NetCDFDataInfo.joinDataFiles(infns, outfn, tdimname)
     
-def binread(fn, dim, datatype=None, skip=0, byteorder='little_endian'):
+def binread(fn, dim, datatype=None, skip=0, byteorder='little_endian', mmap=False, mode='r'):
     """
     Read data array from a binary file.
     
@@ -1952,13 +2595,23 @@ def binread(fn, dim, datatype=None, skip=0, byteorder='little_endian'):
     :param datatype: (*string*) Data type string.
     :param skip: (*int*) Skip bytes number.
     :param byteorder: (*string*) Byte order. ``little_endian`` or ``big_endian``.
+    :param mmap: (*boolean*) Memory-map the file instead of reading it all. The leading 
+        dimension is the record dimension, i.e. ``a = binread(fn, [nt, ny, nx], mmap=True);
+        b = a[10]`` only maps and copies the bytes of record 10. Default is ``False`` .
+    :param mode: (*string*) Only used for *mmap*. 'r' read only or 'r+' read and update 
+        records in place (i.e. ``a[10] = b`` ).
     
-    :returns: (*MIArray*) Data array
+    :returns: (*MIArray*) Data array, *MappedArray* for *mmap* .
     """
+    if mmap:
+        if not os.path.exists(fn):
+            print 'File not exist: ' + fn
+            return None
+        return mimmap.MappedArray(fn, dim, datatype, skip, byteorder, mode)
     r = ArrayUtil.readBinFile(fn, dim, datatype, skip, byteorder);
     return MIArray(r)
         
-def binwrite(fn, data, byteorder='little_endian', append=False):
+def binwrite(fn, data, byteorder='little_endian', append=False, offset=None, datatype=None):
     """
     Create a binary data file from an array variable.
     
@@ -1966,8 +2619,22 @@ def binwrite(fn, data, byteorder='little_endian', append=False):
     :param data: (*array_like*) A numeric array variable of any dimensionality.
     :param byteorder: (*string*) Byte order. ``little_endian`` or ``big_endian``.
     :param append: (*boolean*) Append to an existing file or not.
+    :param offset: (*int*) Optional, byte offset to write the data in place in an existing
+        file by memory mapping, i.e. to update one record. Default is ``None`` .
+    :param datatype: (*string*) Data type string of the in place writing. Default is None,
+        the data type of the array is used.
     """
-    ArrayUtil.saveBinFile(fn, data.asarray(), byteorder, append)    
+    if offset is None:
+        ArrayUtil.saveBinFile(fn, data.asarray(), byteorder, append)    
+    else:
+        if datatype is None:
+            datatype = str(data.asarray().getDataType()).lower()
+        f = RandomAccessFile(fn, 'rw')
+        try:
+            mimmap.writemapped(f.getChannel(), offset, data, datatype, byteorder)
+        finally:
+            f.close()
+    micache.invalidate(fn)
     
 # Get month abstract English name
 def monthname(m):  
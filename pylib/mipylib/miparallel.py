@@ -0,0 +1,146 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab parallel execution module
+# Note: Jython
+#-----------------------------------------------------
+import sys
+from java.lang import Runtime, Thread, InterruptedException
+from java.util.concurrent import Callable, ForkJoinPool, ExecutionException
+from java.util.concurrent.atomic import AtomicBoolean
+import miprogress
+
+# Number of threads used by parallel evaluation
+num_threads = Runtime.getRuntime().availableProcessors()
+# Minimum element number of an array to be evaluated in parallel
+threshold = 512 * 1024
+__pool = None
+
+class Task(Callable):
+
+    # func is called with args in a pool thread
+    # owner: the calling thread, the task is cancelled with it
+    # cancelled: shared cancellation flag (AtomicBoolean) of the tasks of a call, set when
+    #   a task fails or the calling thread is interrupted
+    def __init__(self, func, args, owner=None, cancelled=None):
+        self.func = func
+        self.args = args
+        self.owner = Thread.currentThread() if owner is None else owner
+        self.cancelled = AtomicBoolean(False) if cancelled is None else cancelled
+        self.error = None
+
+    def call(self):
+        # The cancellation checks of the task (miprogress.checkcancel) see the calling
+        # thread and the flag
+        miprogress.setowner(self.owner, self.cancelled)
+        try:
+            return self.func(*self.args)
+        except BaseException:
+            # Kept to re-raise the python exception in the calling thread
+            self.error = sys.exc_info()
+            raise
+        finally:
+            miprogress.setowner(None)
+
+def result(future, task):
+    """
+    Wait the result of a task. The python exception of the task is re-raised as it is,
+    not wrapped by ExecutionException, and the interruption of the waiting thread is
+    raised as KeyboardInterrupt.
+
+    :param future: (*Future*) The future of the task.
+    :param task: (*Task*) The task.
+
+    :returns: The result of the task.
+    """
+    try:
+        return future.get()
+    except ExecutionException, e:
+        if not task.error is None:
+            raise task.error[0], task.error[1], task.error[2]
+        raise e.getCause()
+    except InterruptedException:
+        raise KeyboardInterrupt('Execution cancelled')
+
+def set_num_threads(n=None):
+    """
+    Set the number of threads used by parallel evaluation.
+
+    :param n: (*int*) Number of threads, 1 means serial evaluation. Default is None, the
+        number of available processors is used.
+    """
+    global num_threads, __pool
+    if n is None:
+        n = Runtime.getRuntime().availableProcessors()
+    n = max(1, int(n))
+    if n != num_threads and not __pool is None:
+        __pool.shutdown()
+        __pool = None
+    num_threads = n
+
+def get_num_threads():
+    """
+    Get the number of threads used by parallel evaluation.
+
+    :returns: (*int*) Number of threads.
+    """
+    return num_threads
+
+def set_threshold(n):
+    """
+    Set the minimum element number of an array to be evaluated in parallel, smaller
+    arrays are evaluated serially.
+
+    :param n: (*int*) Element number.
+    """
+    global threshold
+    threshold = int(n)
+
+def isparallel(size):
+    """
+    Whether an array with the size should be evaluated in parallel.
+
+    :param size: (*int*) Element number of the array.
+
+    :returns: (*boolean*) Parallel or not.
+    """
+    return num_threads > 1 and size >= threshold
+
+def pool():
+    """
+    Get the fork/join pool of the worker threads.
+
+    :returns: (*ForkJoinPool*) The pool.
+    """
+    global __pool
+    if __pool is None:
+        __pool = ForkJoinPool(num_threads)
+    return __pool
+
+def invoke(func, argslist):
+    """
+    Call a function with each argument tuple in parallel and wait all calls to finish. If
+    a call fails or the calling thread is cancelled, the other calls are cancelled and the
+    error is raised.
+
+    :param func: (*function*) The function.
+    :param argslist: (*list*) Argument tuples of each call.
+
+    :returns: (*list*) Results in the order of *argslist*.
+    """
+    owner = Thread.currentThread()
+    cancelled = AtomicBoolean(False)
+    tasks = [Task(func, args, owner, cancelled) for args in argslist]
+    p = pool()
+    futures = [p.submit(task) for task in tasks]
+    done = False
+    try:
+        r = [result(futures[i], tasks[i]) for i in range(len(tasks))]
+        done = True
+        return r
+    finally:
+        if not done:
+            # The running tasks stop at their next cancellation check
+            cancelled.set(True)
+            for f in futures:
+                f.cancel(True)
@@ -6,8 +6,12 @@
 # Note: Jython
 #-----------------------------------------------------
 import os
+import sys
 import inspect
 import datetime
+import time
+import threading
+import Queue
 
 from org.meteoinfo.chart import ChartPanel, Location
 from org.meteoinfo.data import XYListDataset, XYErrorSeriesData, XYYSeriesData, GridData, ArrayUtil
@@ -28,18 +32,27 @@ from org.meteoinfo.map import MapView
 from org.meteoinfo.laboratory.gui import FrmMain
 from org.meteoinfo.projection import ProjectionInfo
 from org.meteoinfo.shape import Shape, ShapeTypes, Graphic, GraphicCollection
+from org.python.core import PySystemState
+from org.python.util import PythonInterpreter
 
-from javax.swing import WindowConstants
+from javax.swing import WindowConstants, SwingUtilities
 from java.awt import Color, Font
+from java.awt.event import MouseAdapter, ComponentListener
+from java.util import Arrays, ArrayList
 
 import dimarray
-from dimarray import DimArray, PyGridData, PyStationData
+from dimarray import DimArray, PyGridData, PyStationData, LazyDimArray
+from dimvariable import DimVariable
 import miarray
 from miarray import MIArray
 import minum
 import milayer
 from milayer import MILayer, MIXYListData
 import miutil
+import micache
+import miparallel
+import decimate
+import pyramid
 
 ## Global ##
 milapp1 = None
@@ -51,6 +64,12 @@ isholdon = True
 gca = None
 ismap = False
 maplayer = None
+# Contour geometry of (data, levels, smooth, type) keys, reused when only the style changes
+contourcache = micache.LRUCache(128 * 1024 * 1024)
+# Minimum point number of a series to be drawn with level-of-detail decimation
+lodthreshold = 100000
+# Minimum cell number of a raster to be drawn with pyramid tiles
+tilethreshold = 2048 * 2048
 #mapfn = os.path.join(inspect.getfile(inspect.currentframe()), '../../../map/country1.shp')
 mapfn = os.path.join(inspect.getfile(inspect.currentframe()), 'D:/Temp/map/country1.shp')
 mapfn = os.path.abspath(mapfn)
@@ -81,11 +100,7 @@ def __getplotdata(data):
         return data.asarray()
     elif isinstance(data, (list, tuple)):
         if isinstance(data[0], datetime.datetime):
-            dd = []
-            for d in data:
-                v = miutil.date2num(d)
-                dd.append(v)
-            return minum.array(dd).array
+            return minum.array(miutil.dates2nums(data)).array
         else:
             return minum.array(data).array
     else:
@@ -94,6 +109,194 @@ def __getplotdata(data):
 def draw_if_interactive():
     if isinteractive:
 		chartpanel.paintGraphics()
+
+# Redecimates the level-of-detail series and retiles the raster pyramids of a chart panel
+# after zooming, panning or resizing
+class LODListener(MouseAdapter, ComponentListener):
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.series = []
+
+    def mouseReleased(self, e):
+        self.refresh()
+
+    def mouseWheelMoved(self, e):
+        self.refresh()
+
+    def componentResized(self, e):
+        self.refresh()
+
+    def componentMoved(self, e):
+        pass
+
+    def componentShown(self, e):
+        pass
+
+    def componentHidden(self, e):
+        pass
+
+    def refresh(self):
+        # Update after the chart panel handled the event and changed the extent
+        SwingUtilities.invokeLater(self.update)
+
+    def update(self):
+        if updatelod(self.panel):
+            self.panel.paintGraphics()
+            self.panel.repaint()
+
+def __panelsize():
+    if chartpanel is None:
+        return 0, 0
+    return chartpanel.getWidth(), chartpanel.getHeight()
+    
+def __lodgraphic(s, idx):
+    x = decimate.take(s.x, idx)
+    y = decimate.take(s.y, idx)
+    if s.type == 'line':
+        return GraphicFactory.createLineString(x, y, s.legend)
+    pbs = s.legend
+    if len(pbs) > 1:
+        pbs = [pbs[i] for i in idx]
+    return GraphicFactory.createPoints(x, y, pbs)
+
+def __lodseries(x, y, legend, type, lod):
+    # Level-of-detail series of large data, None if the data is drawn in full
+    n = x.getSize()
+    if lod is None:
+        lod = n >= lodthreshold
+    if not lod or n == 0:
+        return None
+    if type == 'point' and len(legend) > 1 and len(legend) != n:
+        return None
+    s = decimate.LODSeries(x, y, type, legend)
+    if type == 'line' and not decimate.ismonotonic(s.x):
+        return None
+    width, height = __panelsize()
+    s.graphic = __lodgraphic(s, s.decimate(None, width, height))
+    return s
+
+def __tilegraphic(plot, s, extent, width, height):
+    # Image graphic, or raster layer of a map, of the visible pyramid tiles
+    data, x, y = s.render(extent, width, height)
+    gdata = minum.asgridarray(data, x, y, s.fill_value)
+    if isinstance(plot, MapPlot):
+        layer = DrawMeteoData.createRasterLayer(gdata, 'layer', s.legend)
+        if not s.proj is None:
+            layer.setProjInfo(s.proj)
+        return layer
+    return GraphicFactory.createImage(gdata, s.legend)
+    
+def __tileseries(data, x, y, fill_value, tiled, proj=None):
+    # Raster pyramid of large data, None if the data is drawn in full. The pyramid of a file
+    # variable or a lazy array reads only the drawn tiles from the file
+    if isinstance(data, DimVariable):
+        data = data.lazyarray()
+    if not isinstance(data, (MIArray, DimArray, LazyDimArray)) or len(data.shape) != 2:
+        return None
+    if tiled is None:
+        tiled = data.shape[0] * data.shape[1] >= tilethreshold
+    if not tiled:
+        return None
+    if x is None:
+        if isinstance(data, (DimArray, LazyDimArray)):
+            x = MIArray(dimarray.coordarray(data.dims[1].getDimValue()))
+            y = MIArray(dimarray.coordarray(data.dims[0].getDimValue()))
+            fill_value = data.fill_value
+        else:
+            x = minum.arange(0, data.shape[1])
+            y = minum.arange(0, data.shape[0])
+    return pyramid.RasterPyramid(data, x, y, fill_value, proj)
+    
+def __rasterdata(data):
+    # In-memory data of a raster drawn in full
+    if isinstance(data, DimVariable):
+        data = data.lazyarray()
+    if isinstance(data, LazyDimArray):
+        return data.read()
+    return data
+    
+def __lodextent(plot, s):
+    # Drawn extent of a series, None if the series is not clipped to the extent
+    if s.type == 'image' and isinstance(plot, MapPlot) and not s.proj is None and \
+        s.proj.toProj4String() != plot.getProjInfo().toProj4String():
+        return None
+    e = plot.getDrawExtent()
+    return [e.minX, e.maxX, e.minY, e.maxY]
+    
+def __lodreplace(plot, old, new):
+    # Replace a graphic of the axes or a layer of the map, False if it was removed
+    if isinstance(plot, MapPlot):
+        layers = plot.getMapView().getLayers()
+        k = layers.indexOf(old)
+        if k < 0:
+            return False
+        if not new is None:
+            extent = plot.getDrawExtent().clone()
+            plot.getMapView().removeLayer(old)
+            plot.addLayer(k, new)
+            plot.setDrawExtent(extent)
+        return True
+    graphics = plot.getGraphics().getGraphics()
+    k = graphics.indexOf(old)
+    if k < 0:
+        return False
+    if not new is None:
+        graphics.set(k, new)
+    return True
+    
+def __lodregister(plot, series):
+    # Keep the level-of-detail series to redecimate them with the chart panel
+    if len(series) == 0 or chartpanel is None:
+        return
+    listener = chartpanel.getClientProperty('lodlistener')
+    if listener is None:
+        listener = LODListener(chartpanel)
+        chartpanel.addMouseListener(listener)
+        chartpanel.addMouseWheelListener(listener)
+        chartpanel.addComponentListener(listener)
+        chartpanel.putClientProperty('lodlistener', listener)
+    for s in series:
+        listener.series.append((plot, s))
+
+def updatelod(panel=None):
+    """
+    Redecimate the level-of-detail series and retile the raster pyramids of a figure for
+    the current extents of their axes and the figure size. It is called automatically
+    after zooming, panning or resizing the figure.
+
+    :param panel: (*ChartPanel*) The figure. Default is None, the current figure.
+
+    :returns: (*boolean*) Whether any series is redecimated.
+    """
+    if panel is None:
+        panel = chartpanel
+    if panel is None:
+        return False
+    listener = panel.getClientProperty('lodlistener')
+    if listener is None:
+        return False
+    width = panel.getWidth()
+    height = panel.getHeight()
+    changed = False
+    series = []
+    for plot, s in listener.series:
+        if not __lodreplace(plot, s.graphic, None):
+            # The graphic was removed from the axes
+            continue
+        series.append((plot, s))
+        extent = __lodextent(plot, s)
+        if s.isvalid(extent, width, height):
+            continue
+        if s.type == 'image':
+            graphic = __tilegraphic(plot, s, extent, width, height)
+        else:
+            graphic = __lodgraphic(s, s.decimate(extent, width, height))
+        __lodreplace(plot, s.graphic, graphic)
+        s.graphic = graphic
+        changed = True
+    listener.series = series
+    return changed
         
 def plot(*args, **kwargs):
     """
@@ -103,6 +306,11 @@ def plot(*args, **kwargs):
     :param x: (*array_like*) Input x data.
     :param y: (*array_like*) Input y data.
     :param style: (*string*) Line style for plot.
+    :param lod: (*boolean*) Draw the lines with level-of-detail decimation, only the first,
+        minimum, maximum and last points of each pixel column of the current extent are
+        drawn and they are redecimated after zooming. The x data must be ascending.
+        Default is None, decimation is used for the lines with more than *lodthreshold*
+        points.
     
     :returns: Legend breaks of the lines.
     
@@ -145,6 +353,8 @@ def plot(*args, **kwargs):
     """
     global gca
     
+    lod = kwargs.pop('lod', None)
+    lodseries = []
     xdatalist = []
     ydatalist = []    
     styles = []
@@ -270,7 +480,12 @@ def plot(*args, **kwargs):
             label = kwargs.pop('label', 'S_' + str(i + 1))
             xdata = __getplotdata(xdatalist[i])
             ydata = __getplotdata(ydatalist[i])
-            graphic = GraphicFactory.createLineString(xdata, ydata, lines[i])
+            s = __lodseries(xdata, ydata, lines[i], 'line', lod)
+            if s is None:
+                graphic = GraphicFactory.createLineString(xdata, ydata, lines[i])
+            else:
+                graphic = s.graphic
+                lodseries.append(s)
             plot.addGraphic(graphic)
             #dataset.addSeries(label, xdata, ydata)
     plot.setAutoExtent()
@@ -284,6 +499,8 @@ def plot(*args, **kwargs):
         chart.clearPlots()
         chart.setPlot(plot)
     gca = plot
+    __lodregister(plot, lodseries)
+    updatelod()
     #chart.setAntiAlias(True)
     chartpanel.setChart(chart)
     draw_if_interactive()
@@ -1157,6 +1374,9 @@ def scatter(x, y, s=8, c='b', marker='o', cmap=None, norm=None, vmin=None, vmax=
     :param alpha: (*int*) The alpha blending value, between 0 (transparent) and 1 (opaque).
     :param marker: (*string*) Marker of the points.
     :param label: (*string*) Label of the points series.
+    :param lod: (*boolean*) Draw the points with level-of-detail decimation, only one point
+        of each pixel of the current extent is drawn and the points are redecimated after
+        zooming. Default is None, decimation is used for more than *lodthreshold* points.
     
     :returns: Points legend break.
     """
@@ -1164,6 +1384,7 @@ def scatter(x, y, s=8, c='b', marker='o', cmap=None, norm=None, vmin=None, vmax=
     
     #Add data series
     label = kwargs.pop('label', 'S_0')
+    lod = kwargs.pop('lod', None)
     xdata = __getplotdata(x)
     ydata = __getplotdata(y)
     
@@ -1201,7 +1422,11 @@ def scatter(x, y, s=8, c='b', marker='o', cmap=None, norm=None, vmin=None, vmax=
                 pbs.append(npb)
                 
     #Create graphics
-    graphics = GraphicFactory.createPoints(xdata, ydata, pbs)
+    s = __lodseries(xdata, ydata, pbs, 'point', lod)
+    if s is None:
+        graphics = GraphicFactory.createPoints(xdata, ydata, pbs)
+    else:
+        graphics = s.graphic
     if gca is None:
         plot = XY2DPlot()
     else:
@@ -1221,6 +1446,9 @@ def scatter(x, y, s=8, c='b', marker='o', cmap=None, norm=None, vmin=None, vmax=
         chart.setCurrentPlot(plot)
     chartpanel.setChart(chart)
     gca = plot
+    if not s is None:
+        __lodregister(plot, [s])
+        updatelod()
     draw_if_interactive()
     return pb 
     
@@ -2716,6 +2944,7 @@ def axis(limits):
         extent = Extent(xmin, xmax, ymin, ymax)
         gca.setDrawExtent(extent)
         gca.setExtent(extent.clone())
+        updatelod()
         draw_if_interactive()
     else:
         print 'The limits parameter must be a list with 4 elements: xmin, xmax, ymin, ymax!'
@@ -2799,6 +3028,7 @@ def xlim(xmin, xmax):
     extent.maxX = xmax
     plot.setDrawExtent(extent)
     plot.setExtent(extent.clone())
+    updatelod()
     draw_if_interactive()
             
 def ylim(ymin, ymax):
@@ -2818,6 +3048,7 @@ def ylim(ymin, ymax):
     extent.maxY = ymax
     plot.setDrawExtent(extent)
     plot.setExtent(extent.clone())
+    updatelod()
     draw_if_interactive()   
 
 def xreverse():
@@ -3158,6 +3389,10 @@ def imshow(*args, **kwargs):
         string, like ‘r’ or ‘red’, all levels will be plotted in this color. If a tuple of matplotlib 
         color args (string, float, rgb, etc), different levels will be plotted in different colors in 
         the order specified.
+    :param tiled: (*boolean*) Draw the image with the tiles of a raster pyramid, only the visible
+        tiles of the overview level matching the figure pixels are drawn and they are retiled
+        after zooming. Default is None, tiles are used for the arrays with more than
+        *tilethreshold* cells.
     
     :returns: (*RasterLayer*) RasterLayer created from array data.
     """
@@ -3167,9 +3402,12 @@ def imshow(*args, **kwargs):
     n = len(args)
     cmap = __getcolormap(**kwargs)
     fill_value = kwargs.pop('fill_value', -9999.0)
+    tiled = kwargs.pop('tiled', None)
     xaxistype = None
     if n <= 2:
-        gdata = minum.asgridarray(args[0])
+        a = args[0]
+        x = None
+        y = None
         if isinstance(args[0], DimArray):
             if args[0].islondim(1):
                 xaxistype = 'lon'
@@ -3182,8 +3420,15 @@ def imshow(*args, **kwargs):
         x = args[0]
         y = args[1]
         a = args[2]
-        gdata = minum.asgridarray(a, x, y, fill_value)
         args = args[3:]    
+    # The legend of a tiled raster is created from its coarsest overview level
+    s = __tileseries(a, x, y, fill_value, tiled)
+    if s is None:
+        a = __rasterdata(a)
+        gdata = minum.asgridarray(a) if x is None else minum.asgridarray(a, x, y, fill_value)
+    else:
+        ov, ox, oy = s.overview()
+        gdata = minum.asgridarray(ov, ox, oy, s.fill_value)
     if len(args) > 0:
         level_arg = args[0]
         if isinstance(level_arg, int):
@@ -3197,7 +3442,13 @@ def imshow(*args, **kwargs):
         ls = __getlegendscheme(args, gdata.min(), gdata.max(), **kwargs)
     ls = ls.convertTo(ShapeTypes.Image)
         
-    igraphic = GraphicFactory.createImage(gdata, ls)
+    if s is None:
+        igraphic = GraphicFactory.createImage(gdata, ls)
+    else:
+        s.legend = ls
+        width, height = __panelsize()
+        igraphic = __tilegraphic(None, s, None, width, height)
+        s.graphic = igraphic
     
     #Create bar plot
     if gca is None:
@@ -3223,6 +3474,9 @@ def imshow(*args, **kwargs):
         chart.setCurrentPlot(plot)
     chartpanel.setChart(chart)
     gca = plot
+    if not s is None:
+        __lodregister(plot, [s])
+        updatelod()
     draw_if_interactive()
     return ls
     
@@ -3294,6 +3548,7 @@ def contour(*args, **kwargs):
     cmap = __getcolormap(**kwargs)
     fill_value = kwargs.pop('fill_value', -9999.0)
     xaxistype = None
+    src = (args[:1] if n <= 2 else args[:3]) + (fill_value,)
     if n <= 2:
         gdata = minum.asgriddata(args[0])
         if isinstance(args[0], DimArray):
@@ -3325,7 +3580,7 @@ def contour(*args, **kwargs):
     __setlegendscheme(ls, **kwargs)
     
     smooth = kwargs.pop('smooth', True)
-    igraphic = GraphicFactory.createContourLines(gdata.data, ls, smooth)
+    igraphic = __contourgraphic(src, gdata, ls, smooth, 'contour')
     
     #Create plot
     if gca is None:
@@ -3433,6 +3688,7 @@ def contourf(*args, **kwargs):
     cmap = __getcolormap(**kwargs)
     fill_value = kwargs.pop('fill_value', -9999.0)
     xaxistype = None
+    src = (args[:1] if n <= 2 else args[:3]) + (fill_value,)
     if n <= 2:
         gdata = minum.asgriddata(args[0])
         if isinstance(args[0], DimArray):
@@ -3461,7 +3717,7 @@ def contourf(*args, **kwargs):
     else:    
         ls = LegendManage.createLegendScheme(gdata.min(), gdata.max(), cmap)
     smooth = kwargs.pop('smooth', True)
-    igraphic = GraphicFactory.createContourPolygons(gdata.data, ls, smooth)
+    igraphic = __contourgraphic(src, gdata, ls, smooth, 'contourf')
     
     #Create plot
     if gca is None:
@@ -4208,6 +4464,10 @@ def imshowm(*args, **kwargs):
     :param fill_color: (*color*) Fill_color. Default is None (white color).
     :param proj: (*ProjectionInfo*) Map projection of the data. Default is None.
     :param order: (*int*) Z-order of created layer for display.
+    :param tiled: (*boolean*) Draw the image with the tiles of a raster pyramid, only the visible
+        tiles of the overview level matching the figure pixels are drawn and they are retiled
+        after zooming. Default is None, tiles are used for the arrays with more than
+        *tilethreshold* cells.
     
     :returns: (*RasterLayer*) RasterLayer created from array data.
     """
@@ -4217,16 +4477,26 @@ def imshowm(*args, **kwargs):
     proj = kwargs.pop('proj', None)
     order = kwargs.pop('order', None)
     ls = kwargs.pop('symbolspec', None)
+    tiled = kwargs.pop('tiled', None)
     n = len(args) 
     if n <= 2:
-        gdata = minum.asgridarray(args[0])
+        a = args[0]
+        x = None
+        y = None
         args = args[1:]
     elif n <=4:
         x = args[0]
         y = args[1]
         a = args[2]
-        gdata = minum.asgridarray(a, x, y, fill_value)
         args = args[3:]
+    # The legend of a tiled raster is created from its coarsest overview level
+    s = __tileseries(a, x, y, fill_value, tiled, proj)
+    if s is None:
+        a = __rasterdata(a)
+        gdata = minum.asgridarray(a) if x is None else minum.asgridarray(a, x, y, fill_value)
+    else:
+        ov, ox, oy = s.overview()
+        gdata = minum.asgridarray(ov, ox, oy, s.fill_value)
     if len(args) > 0:
         if ls is None:
             level_arg = args[0]
@@ -4251,8 +4521,17 @@ def imshowm(*args, **kwargs):
             # cb.setColor(__getcolor(fill_color))
             # cb.setNoData(True)
             # ls.addLegendBreak(cb)
+    if not s is None:
+        s.legend = ls
+        width, height = __panelsize()
+        data, x, y = s.render(None, width, height)
+        gdata = minum.asgridarray(data, x, y, s.fill_value)
     layer = __plot_griddata_m(plot, gdata, ls, 'imshow', proj=proj, order=order)
     gdata = None
+    if not s is None:
+        s.graphic = layer
+        __lodregister(plot, [s])
+        updatelod()
     return MILayer(layer)
     
 def contourm(*args, **kwargs):  
@@ -4282,6 +4561,7 @@ def contourm(*args, **kwargs):
     proj = kwargs.pop('proj', None)
     order = kwargs.pop('order', None)
     n = len(args) 
+    src = (args[:1] if n <= 2 else args[:3]) + (fill_value,)
     if n <= 2:
         gdata = minum.asgriddata(args[0])
         args = args[1:]
@@ -4300,7 +4580,7 @@ def contourm(*args, **kwargs):
     else:
         plot = None
     smooth = kwargs.pop('smooth', True)
-    layer = __plot_griddata_m(plot, gdata, ls, 'contour', proj=proj, order=order, smooth=smooth)
+    layer = __plot_griddata_m(plot, gdata, ls, 'contour', proj=proj, order=order, smooth=smooth, src=src)
     select = kwargs.pop('select', True)
     if select:
         plot.setSelectedLayer(layer)
@@ -4335,6 +4615,7 @@ def contourfm(*args, **kwargs):
     proj = kwargs.pop('proj', None)
     order = kwargs.pop('order', None)
     n = len(args) 
+    src = (args[:1] if n <= 2 else args[:3]) + (fill_value,)
     if n <= 2:
         gdata = minum.asgriddata(args[0])
         args = args[1:]
@@ -4353,7 +4634,8 @@ def contourfm(*args, **kwargs):
     else:
         plot = None
     smooth = kwargs.pop('smooth', True)
-    layer = __plot_griddata_m(plot, gdata, ls, 'contourf', proj=proj, order=order, smooth=smooth)
+    layer = __plot_griddata_m(plot, gdata, ls, 'contourf', proj=proj, order=order, smooth=smooth, 
+        src=src + (interpolate,))
     select = kwargs.pop('select', True)
     if select:
         plot.setSelectedLayer(layer)
@@ -4748,12 +5030,158 @@ def streamplotm(*args, **kwargs):
     vdata = None
     return MILayer(layer)
         
-def __plot_griddata_m(plot, gdata, ls, type, proj=None, order=None, smooth=True):
-    #print 'GridData...'
+def __datakey(a):
+    # Content key of a plotted array or coordinates: shape and hash code of the values, and
+    # the values of an array to confirm a cache hit
+    if isinstance(a, (bool, int, long, float)):
+        return a, None
+    if isinstance(a, (list, tuple)):
+        return tuple(a), None
+    if not isinstance(a, (MIArray, DimArray)):
+        return None, None
+    data = a.asarray()
+    storage = data.getStorage()
+    if len(storage) != data.getSize():
+        storage = data.copyTo1DJavaArray()
+    key = (tuple(data.getShape()), Arrays.hashCode(storage))
+    if isinstance(a, DimArray):
+        key += (tuple(a.dims[a.ndim - 1].getDimValue()), tuple(a.dims[a.ndim - 2].getDimValue()))
+    return key, storage
+    
+def __levelkey(ls):
+    # Levels of a legend scheme
+    return tuple([(str(b.getStartValue()), str(b.getEndValue())) for b in ls.getLegendBreaks()])
+    
+def __contourkey(src, ls, smooth, type):
+    # Cache key and the array values of the plotted data
+    if src is None:
+        return None, None
+    keys = []
+    values = []
+    for a in src:
+        key, v = __datakey(a)
+        if key is None:
+            return None, None
+        keys.append(key)
+        if not v is None:
+            values.append(v)
+    return (tuple(keys), __levelkey(ls), smooth, type), values
+    
+def __cacheget(key, values):
+    # Cached contour geometry of a key, the hash code hit is confirmed by comparing the values
+    # of the plotted arrays
+    if key is None:
+        return None
+    r = contourcache.get(key)
+    if r is None:
+        return None
+    cvalues, geometry = r
+    for v, cv in zip(values, cvalues):
+        if not Arrays.equals(v, cv):
+            return None
+    return geometry
+    
+def __cacheput(key, values, geometry, gdata):
+    # Cache the contour geometry with copies of the values of the plotted arrays
+    cvalues = [Arrays.copyOf(v, len(v)) for v in values]
+    nbytes = gdata.data.getXNum() * gdata.data.getYNum() * 8
+    for v in values:
+        nbytes += len(v) * 8
+    contourcache.put(key, (cvalues, geometry), nbytes)
+    
+def __restyle(graphic, ls):
+    # New graphics of copies of the cached contour shapes with the legend breaks of the same
+    # levels, the shapes of the returned graphics may be projected in place
+    breaks = {}
+    for b in ls.getLegendBreaks():
+        breaks[(str(b.getStartValue()), str(b.getEndValue()))] = b
+    r = GraphicCollection()
+    for g in graphic.getGraphics():
+        lb = g.getLegend()
+        r.add(Graphic(g.getShape().clone(), breaks.get((str(lb.getStartValue()), str(lb.getEndValue())), lb)))
+    r.setLegendScheme(ls)
+    return r
+    
+def __copylayer(layer):
+    # Layer clone with its own copies of the shapes, the shapes of a layer are reprojected in
+    # place by setProjInfo() and addLayer()
+    r = layer.clone()
+    shapes = r.getShapes()
+    for i in range(shapes.size()):
+        shapes.set(i, shapes.get(i).clone())
+    return r
+    
+def __levelgroups(ls, n):
+    # Legend schemes of the level groups for parallel tracing. Each scheme is new with its own
+    # list of the breaks, the legend scheme of the plot is not modified.
+    breaks = list(ls.getLegendBreaks())
+    m = (len(breaks) + n - 1) / n
+    r = []
+    for i in range(0, len(breaks), m):
+        gls = LegendScheme(ls.getShapeType())
+        gls.setLegendType(ls.getLegendType())
+        gls.setFieldName(ls.getFieldName())
+        gls.setUndefValue(ls.getUndefValue())
+        gls.setMinValue(ls.getMinValue())
+        gls.setMaxValue(ls.getMaxValue())
+        gls.setLegendBreaks(ArrayList(breaks[i:i + m]))
+        r.append(gls)
+    return r
+    
+def __contourgraphic(src, gdata, ls, smooth, type):
+    # Contour line or polygon graphics. The geometry is cached by the data, levels and smooth
+    # option, so a restyle of the same data does not trace the contours again. The contour
+    # lines of large grids are traced in parallel by level groups.
+    key, values = __contourkey(src, ls, smooth, type)
+    graphic = __cacheget(key, values)
+    if not graphic is None:
+        return __restyle(graphic, ls)
+    if type == 'contour':
+        nlev = ls.getBreakNum()
+        size = gdata.data.getXNum() * gdata.data.getYNum()
+        if nlev > 1 and miparallel.isparallel(size * nlev):
+            groups = __levelgroups(ls, min(nlev, miparallel.get_num_threads()))
+            gs = miparallel.invoke(GraphicFactory.createContourLines, [(gdata.data, gls, smooth) for gls in groups])
+            graphic = GraphicCollection()
+            for g in gs:
+                for gg in g.getGraphics():
+                    graphic.add(gg)
+            graphic.setLegendScheme(ls)
+        else:
+            graphic = GraphicFactory.createContourLines(gdata.data, ls, smooth)
+    else:
+        graphic = GraphicFactory.createContourPolygons(gdata.data, ls, smooth)
+    if not key is None:
+        __cacheput(key, values, graphic, gdata)
+        graphic = __restyle(graphic, ls)
+    return graphic
+    
+def __contourlayer(src, gdata, ls, smooth, type):
+    # Contour map layer, a cached layer geometry is copied and styled by the legend scheme
+    key, values = __contourkey(src, ls, smooth, type)
+    layer = __cacheget(key, values)
+    if not layer is None:
+        layer = __copylayer(layer)
+        layer.setLegendScheme(ls)
+        return layer
     if type == 'contourf':
         layer = DrawMeteoData.createShadedLayer(gdata.data, ls, 'layer', 'data', smooth)
-    elif type == 'contour':
+    else:
         layer = DrawMeteoData.createContourLayer(gdata.data, ls, 'layer', 'data', smooth)
+    if not key is None:
+        __cacheput(key, values, __copylayer(layer), gdata)
+    return layer
+    
+def clear_contourcache():
+    """
+    Clear the cached contour geometry.
+    """
+    contourcache.clear()
+    
+def __plot_griddata_m(plot, gdata, ls, type, proj=None, order=None, smooth=True, src=None):
+    #print 'GridData...'
+    if type == 'contourf' or type == 'contour':
+        layer = __contourlayer(src, gdata, ls, smooth, type)
     elif type == 'imshow':
         layer = DrawMeteoData.createRasterLayer(gdata, 'layer', ls)      
     elif type == 'scatter':
@@ -4822,11 +5250,11 @@ def __plot_uvdata_m(plot, x, y, u, v, z, ls, type, isuv, proj=None, density=4):
     #print 'GridData...'
     zv = z
     if not z is None:
-        zv = z.array
+        zv = z.asarray()
     if type == 'quiver':
-        layer = DrawMeteoData.createVectorLayer(x.array, y.array, u.array, v.array, zv, ls, 'layer', isuv)
+        layer = DrawMeteoData.createVectorLayer(x.asarray(), y.asarray(), u.asarray(), v.asarray(), zv, ls, 'layer', isuv)
     elif type == 'barbs':
-        layer = DrawMeteoData.createBarbLayer(x.array, y.array, u.array, v.array, zv, ls, 'layer', isuv)
+        layer = DrawMeteoData.createBarbLayer(x.asarray(), y.asarray(), u.asarray(), v.asarray(), zv, ls, 'layer', isuv)
     
     if (proj != None):
         layer.setProjInfo(proj)
@@ -5310,7 +5738,7 @@ def gifanimation(filename, repeat=0, delay=1000):
     encoder.setRepeat(repeat)
     encoder.setDelay(delay)
     encoder.start(filename)
-    return encoder
+    return encoder
 
 def gifaddframe(animation):
     """
@@ -5327,5 +5755,106 @@ def giffinish(animation):
     """
     animation.finish()
         
+def __newinterp():
+    state = PySystemState()
+    for p in sys.path:
+        if not p in state.path:
+            state.path.append(p)
+    interp = PythonInterpreter(None, state)
+    #exec is a keyword of Python
+    run = getattr(interp, 'exec')
+    run('from milab import *')
+    run('mipylib.miplot.batchmode = True')
+    run('mipylib.miplot.isinteractive = False')
+    return interp, run
+    
+def __renderjobs(queue, results, progress):
+    interp = None
+    while True:
+        try:
+            i, code, fn, variables = queue.get_nowait()
+        except Queue.Empty:
+            break
+        try:
+            if interp is None:
+                interp, run = __newinterp()
+            run('mipylib.miplot.chartpanel = None')
+            run('mipylib.miplot.gca = None')
+            run('mipylib.miplot.maplayout = mipylib.miplot.MapLayout()')
+            for key in variables:
+                interp.set(key, variables[key])
+            run(code)
+            results[i] = None
+        except Exception:
+            results[i] = '%s: %s' % (fn, sys.exc_info()[1])
+            print 'Job %i failed - %s' % (i, results[i])
+        progress.append(i)
+    if not interp is None:
+        interp.cleanup()
+        
+def render_batch(jobs, script=None, workers=None):
+    """
+    Render independent figures in parallel in batch mode. Each worker thread runs the jobs 
+    in its own Jython interpreter, so the figure state (*chartpanel*, *gca*, *maplayout*...) 
+    of a worker is not shared with the other workers or the current interpreter. A worker 
+    interpreter is reused for its following jobs, the figure state is reset before each job.
+    
+    :param jobs: (*list*) The jobs. Each job is a script file name or a tuple of the script
+        file name and a variable dictionary if *script* is None, otherwise it is a variable 
+        dictionary for *script*. The variables are defined in the interpreter before the
+        script runs, i.e. ``{'varname':'T', 'level':500, 'outfile':'D:/T_500.png'}`` .
+    :param script: (*string*) Optional, script file name run by all the jobs. Default is 
+        ``None`` .
+    :param workers: (*int*) Optional, number of worker threads. Default is None, the number 
+        of threads of parallel evaluation is used.
+        
+    :returns: (*list*) Error messages of the jobs in the job order, None for a succeeded job.
+        IOError is raised before any job runs if a script file does not exist.
+    """
+    if workers is None:
+        workers = minum.get_num_threads()
+    workers = max(1, min(int(workers), len(jobs)))
+    codes = {}
+    queue = Queue.Queue()
+    for i in range(len(jobs)):
+        job = jobs[i]
+        if not script is None:
+            fn = script
+            variables = job
+        elif isinstance(job, (tuple, list)):
+            fn = job[0]
+            variables = job[1]
+        else:
+            fn = job
+            variables = {}
+        if not codes.has_key(fn):
+            if not os.path.exists(fn):
+                raise IOError('File not exist: ' + fn)
+            f = open(fn)
+            codes[fn] = f.read()
+            f.close()
+        queue.put((i, codes[fn], fn, variables))
+        
+    results = [None] * len(jobs)
+    progress = []
+    threads = []
+    st = time.time()
+    for i in range(workers):
+        t = threading.Thread(target=__renderjobs, args=(queue, results, progress))
+        t.setDaemon(True)
+        t.start()
+        threads.append(t)
+    n = 0
+    while n < len(jobs):
+        time.sleep(0.5)
+        if len(progress) > n:
+            n = len(progress)
+            print 'Rendered %i/%i (%.1f s)' % (n, len(jobs), time.time() - st)
+        if len(progress) < len(jobs) and not True in [t.isAlive() for t in threads]:
+            break
+    for t in threads:
+        t.join()
+    return results
+    
 def clear():
     milapp1.delVariables()
\ No newline at end of file
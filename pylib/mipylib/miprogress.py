@@ -0,0 +1,109 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab progress and cancellation module
+# Note: Jython
+#-----------------------------------------------------
+from java.lang import Thread, ThreadLocal
+from java.util.concurrent.atomic import AtomicLong
+
+# Hooks set by the GUI console: progresshook(percent, message) shows the progress and
+# cancelhook() returns True after the execution is cancelled
+progresshook = None
+cancelhook = None
+# The calling thread and cancellation flag of the parallel task run by a pool thread
+__owner = ThreadLocal()
+
+def sethooks(progress=None, cancelled=None):
+    """
+    Set the progress and cancellation hooks.
+
+    :param progress: (*function*) Called with the percent (*int*) and the message (*string*)
+        of the progress. Default is None, the progress is not reported.
+    :param cancelled: (*function*) Returns True if the current execution is cancelled.
+        Default is None, only the interruption of the thread cancels the execution.
+    """
+    global progresshook, cancelhook
+    progresshook = progress
+    cancelhook = cancelled
+
+def setowner(thread, cancelled=None):
+    """
+    Set the calling thread of the parallel task run by the current pool thread, the task
+    is cancelled with the calling thread.
+
+    :param thread: (*Thread*) The calling thread, None after the task is finished.
+    :param cancelled: (*AtomicBoolean*) Cancellation flag of the tasks of the call.
+    """
+    if thread is None:
+        __owner.remove()
+    else:
+        __owner.set((thread, cancelled))
+
+def iscancelled():
+    """
+    Whether the current execution is cancelled, by the cancellation hook or the
+    interruption of the current thread. In a pool thread running a parallel task, the
+    task is also cancelled by the interruption of its calling thread and by the failure
+    or cancellation of the other tasks of the call.
+
+    :returns: (*boolean*) Cancelled or not.
+    """
+    if Thread.currentThread().isInterrupted():
+        return True
+    owner = __owner.get()
+    if not owner is None:
+        thread, cancelled = owner
+        if thread.isInterrupted() or (not cancelled is None and cancelled.get()):
+            return True
+    return not cancelhook is None and cancelhook()
+
+def checkcancel():
+    """
+    Raise KeyboardInterrupt if the current execution is cancelled. Long running loops call
+    it between their steps.
+    """
+    if iscancelled():
+        Thread.interrupted()
+        raise KeyboardInterrupt('Execution cancelled')
+
+def report(percent, message=None):
+    """
+    Report the progress to the progress hook.
+
+    :param percent: (*int*) Percent of the finished work.
+    :param message: (*string*) Message of the work.
+    """
+    if not progresshook is None:
+        progresshook(int(percent), message)
+
+# Progress of a work with known amount, the steps can be made in several threads
+class Progress():
+
+    # total: total amount of the work (i.e. steps or bytes)
+    # message: message shown with the progress
+    def __init__(self, total, message=None):
+        self.total = max(1, total)
+        self.message = message
+        self.count = AtomicLong(0)
+        self.percent = 0
+        report(0, message)
+
+    def step(self, n=1):
+        """
+        Advance the progress, KeyboardInterrupt is raised if the execution is cancelled.
+
+        :param n: (*int*) Amount of the finished work.
+        """
+        checkcancel()
+        p = int(self.count.addAndGet(n) * 100 / self.total)
+        if p != self.percent:
+            self.percent = p
+            report(p, self.message)
+
+    def done(self):
+        """
+        Finish the progress.
+        """
+        self.percent = 100
+        report(100, self.message)
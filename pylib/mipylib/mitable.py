@@ -0,0 +1,1016 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab columnar table module
+# Note: Jython
+#-----------------------------------------------------
+from java.io import BufferedReader, InputStreamReader, FileInputStream, BufferedWriter, OutputStreamWriter, FileOutputStream
+from java.lang import System, Double, Long
+from java.text import SimpleDateFormat, ParseException
+from java.util import TimeZone, Date
+from ucar.ma2 import Array, DataType
+import jarray
+import bisect
+import re
+import math
+import datetime
+import miutil
+import miparallel
+from miarray import MIArray
+
+nan = Double.NaN
+# Row number of a parsed block
+blockrows = 64 * 1024
+# Maximum cached date strings of a date column
+datecachesize = 100000
+epoch = datetime.datetime(1970, 1, 1)
+# Radix of the calendar keys of the table grouping
+keyradix = {'year':10000, 'season':10, 'month':100, 'day':100, 'hour':100}
+# Aggregation statistics
+statistics = ['mean', 'sum', 'count', 'min', 'max', 'std']
+# Epoch milliseconds of the missing dates
+missingdate = Long.MIN_VALUE
+# Group code of the rows with missing dates, the rows are not in any group
+missingcode = -1L
+# Join modes
+joinmodes = ['inner', 'left', 'outer']
+
+def todatetime(ms):
+    """
+    Convert epoch milliseconds to a datetime by arithmetic.
+
+    :param ms: (*long*) Milliseconds since 1970-01-01 00:00:00.
+
+    :returns: (*datetime*) The datetime, None for the missing date.
+    """
+    if ms == missingdate:
+        return None
+    return epoch + datetime.timedelta(milliseconds=ms)
+
+def toepoch(dt):
+    """
+    Convert a datetime to epoch milliseconds by arithmetic.
+
+    :param dt: (*datetime*) The datetime.
+
+    :returns: (*long*) Milliseconds since 1970-01-01 00:00:00.
+    """
+    d = dt - epoch
+    return (d.days * 86400L + d.seconds) * 1000L + d.microseconds / 1000
+
+def localepoch(dates):
+    """
+    Convert java dates to local epoch milliseconds, the same wall clock time as the python
+    dates of *miutil.pydates()* .
+
+    :param dates: (*list*) Java dates.
+
+    :returns: (*long[]*) Local milliseconds since 1970-01-01 00:00:00.
+    """
+    tz = TimeZone.getDefault()
+    r = jarray.zeros(len(dates), 'l')
+    for i in range(len(dates)):
+        t = dates[i].getTime()
+        r[i] = t + tz.getOffset(t)
+    return r
+
+def parseformat(format):
+    """
+    Parse a column format string such as ``'%s%f%i%{yyyy-MM-dd HH:mm}D'`` .
+
+    :param format: (*string*) The format string.
+
+    :returns: (*list*) Column types ('s', 'f', 'i' or 'D') and date patterns.
+    """
+    r = []
+    for pattern, t in re.findall(r'%(?:\{([^}]*)\})?([a-zA-Z])', format):
+        r.append((t if t in 'sfiD' else 'f', pattern))
+    return r
+
+def catarrays(blocks, code):
+    # Concatenate the data blocks of a column, code is the jarray type code, None for list
+    n = 0
+    for b in blocks:
+        n += len(b)
+    if code is None:
+        r = []
+        for b in blocks:
+            r.extend(b)
+        return r
+    r = jarray.zeros(n, code)
+    n = 0
+    for b in blocks:
+        System.arraycopy(b, 0, r, n, len(b))
+        n += len(b)
+    return r
+
+# Table with a primitive array per column - double[] for float columns, long[] for integer
+# columns and epoch milliseconds of date columns, list for string columns
+class PyColumnTable():
+
+    # names: column names
+    # types: column types ('f', 'i', 'D' or 's')
+    # columns: column data
+    # patterns: date patterns of the date columns
+    def __init__(self, names=None, types=None, columns=None, patterns=None):
+        self.names = [] if names is None else list(names)
+        self.types = [] if types is None else list(types)
+        self.columns = [] if columns is None else list(columns)
+        self.patterns = [None] * len(self.names) if patterns is None else list(patterns)
+        self.indexes = {}
+
+    def __len__(self):
+        return self.rownum()
+
+    def __getitem__(self, key):
+        if isinstance(key, basestring):
+            i = self.colindex(key)
+            t = self.types[i]
+            if t == 'f':
+                return MIArray(Array.factory(DataType.DOUBLE, [len(self.columns[i])], self.columns[i]))
+            elif t == 'i':
+                return MIArray(Array.factory(DataType.LONG, [len(self.columns[i])], self.columns[i]))
+            elif t == 'D':
+                return [todatetime(v) for v in self.columns[i]]
+            else:
+                return self.columns[i]
+        elif isinstance(key, tuple):
+            return self.getvalue(key[0], key[1])
+        elif isinstance(key, int):
+            return self.getrow(key)
+        elif isinstance(key, slice):
+            return self.take(range(*key.indices(self.rownum())))
+        else:
+            return self.take(key)
+
+    def __setitem__(self, key, value):
+        if key in self.names:
+            self.delcol(key)
+        self.addcol(key, value)
+
+    def __repr__(self):
+        return self.tostring(10)
+
+    def __iter__(self):
+        for i in range(self.rownum()):
+            yield self.getrow(i)
+
+    def tostring(self, n=None):
+        """
+        Get the table text of the first rows.
+
+        :param n: (*int*) Row number. Default is None, all rows.
+
+        :returns: (*string*) The table text.
+        """
+        nrow = self.rownum()
+        if n is None or n > nrow:
+            n = nrow
+        lines = ['\t'.join(self.names)]
+        for i in range(n):
+            lines.append('\t'.join([str(v) for v in self.getrow(i)]))
+        if n < nrow:
+            lines.append('... (%i rows)' % nrow)
+        return '\n'.join(lines)
+
+    def rownum(self):
+        if len(self.columns) == 0:
+            return 0
+        return len(self.columns[0])
+
+    def colnum(self):
+        return len(self.names)
+
+    def colnames(self):
+        return list(self.names)
+
+    def colindex(self, colname):
+        if isinstance(colname, int):
+            return colname
+        if not colname in self.names:
+            raise KeyError('No column: ' + colname)
+        return self.names.index(colname)
+
+    def coltype(self, colname):
+        return self.types[self.colindex(colname)]
+
+    def setcolname(self, col, colname):
+        self.names[self.colindex(col)] = colname
+        self.indexes = {}
+
+    def setcolnames(self, colnames):
+        for i in range(len(colnames)):
+            self.names[i] = colnames[i]
+        self.indexes = {}
+
+    def coldata(self, key):
+        """
+        Get the raw data of a column - double[], long[] (epoch milliseconds for a date
+        column) or list.
+
+        :param key: (*string or int*) Column name or index.
+
+        :returns: The column data.
+        """
+        return self.columns[self.colindex(key)]
+
+    def getvalue(self, row, col):
+        i = self.colindex(col)
+        v = self.columns[i][row]
+        if self.types[i] == 'D':
+            return todatetime(v)
+        return v
+
+    def getrow(self, index):
+        return [self.getvalue(index, i) for i in range(len(self.names))]
+
+    def addcol(self, colname, data, dtype=None):
+        """
+        Add a column.
+
+        :param colname: (*string*) Column name.
+        :param data: (*array_like*) Column data - MIArray, list of numbers, datetimes or
+            strings.
+        :param dtype: (*string*) Column type ('f', 'i', 'D' or 's'). Default is None, the
+            type is decided by the data.
+        """
+        if isinstance(data, MIArray):
+            a = data.asarray()
+            if dtype is None:
+                dtype = 'f' if a.getDataType() in [DataType.DOUBLE, DataType.FLOAT] else 'i'
+            code = 'd' if dtype == 'f' else 'l'
+            if a.getDataType() == (DataType.DOUBLE if dtype == 'f' else DataType.LONG):
+                data = a.copyTo1DJavaArray()
+            else:
+                data = jarray.array([a.getDouble(i) if dtype == 'f' else a.getLong(i) for i in range(a.getSize())], code)
+        else:
+            data = list(data)
+            if dtype is None:
+                if len(data) > 0 and isinstance(data[0], datetime.datetime):
+                    dtype = 'D'
+                elif len(data) > 0 and isinstance(data[0], basestring):
+                    dtype = 's'
+                elif len(data) > 0 and isinstance(data[0], (int, long)):
+                    dtype = 'i'
+                else:
+                    dtype = 'f'
+            if dtype == 'D':
+                data = jarray.array([toepoch(v) for v in data], 'l')
+            elif dtype == 'f':
+                data = jarray.array(data, 'd')
+            elif dtype == 'i':
+                data = jarray.array(data, 'l')
+        if self.colnum() > 0 and len(data) != self.rownum():
+            raise ValueError('Column length %i does not match the row number %i' % (len(data), self.rownum()))
+        self.names.append(colname)
+        self.types.append(dtype)
+        self.columns.append(data)
+        self.patterns.append(None)
+
+    def delcol(self, colname):
+        i = self.colindex(colname)
+        self.indexes.pop(self.names[i], None)
+        for v in [self.names, self.types, self.columns, self.patterns]:
+            del v[i]
+
+    def createindex(self, colname):
+        """
+        Create a sorted index of a column, which is kept with the table and used by the
+        equality and range predicates of *sql()* .
+
+        :param colname: (*string*) Column name.
+
+        :returns: (*ColumnIndex*) The index.
+        """
+        colname = self.names[self.colindex(colname)]
+        index = ColumnIndex(self.columns[self.colindex(colname)])
+        self.indexes[colname] = index
+        return index
+
+    def dropindex(self, colname=None):
+        """
+        Remove the index of a column.
+
+        :param colname: (*string*) Column name. Default is None, all indexes are removed.
+        """
+        if colname is None:
+            self.indexes = {}
+        else:
+            self.indexes.pop(colname, None)
+
+    def sql(self, expression):
+        """
+        Select the rows by a filter expression of comparisons joined by ``AND`` , such as
+        ``"Stid = 54511 AND T >= 25"`` . The predicates of the indexed columns are evaluated
+        by index lookups, the others by scanning the selected rows.
+
+        :param expression: (*string*) The filter expression.
+
+        :returns: (*PyColumnTable*) The selected rows.
+        """
+        predicates = parsefilter(expression)
+        if predicates is None:
+            raise ValueError('Unsupported filter expression: ' + expression)
+        for k in range(len(predicates)):
+            col, op, v = predicates[k]
+            i = self.colindex(col)
+            if self.types[i] == 'D' and isinstance(v, basestring):
+                v = toepoch(miutil.strs2dates([v], '%Y-%m-%d %H:%M:%S' if len(v) > 10 else '%Y-%m-%d')[0])
+            predicates[k] = (self.names[i], op, v)
+        value = lambda col, row: self.columns[self.colindex(col)][row]
+        return self.take(filterrows(self.rownum(), predicates, self.indexes, value))
+
+    def join(self, other, on, right_on=None, how='inner'):
+        """
+        Join another table by hashing the key columns of the other table.
+
+        :param other: (*PyColumnTable*) The other table.
+        :param on: (*string or list*) Key column names of this table.
+        :param right_on: (*string or list*) Key column names of the other table. Default is
+            None, same as *on* .
+        :param how: (*string*) Join mode ['inner' | 'left' | 'outer'].
+
+        :returns: (*PyColumnTable*) Joined table.
+        """
+        return hashjoin(self, other, on, right_on, how)
+
+    def take(self, indices):
+        """
+        Get the rows of indices as a new table.
+
+        :param indices: (*list*) Row indices.
+
+        :returns: (*PyColumnTable*) The new table.
+        """
+        if isinstance(indices, MIArray):
+            indices = indices.aslist()
+        columns = []
+        for i in range(len(self.names)):
+            c = self.columns[i]
+            v = [c[k] for k in indices]
+            if self.types[i] == 'f':
+                v = jarray.array(v, 'd')
+            elif self.types[i] in 'iD':
+                v = jarray.array(v, 'l')
+            columns.append(v)
+        return PyColumnTable(self.names, self.types, columns, self.patterns)
+
+    def head(self, n=5):
+        return self.take(range(min(n, self.rownum())))
+
+    def clone(self):
+        return self.take(range(self.rownum()))
+
+    def groupby(self, keys, timecol=None):
+        """
+        Group the rows by the calendar keys of a time column.
+
+        :param keys: (*string or list*) Calendar keys ('year', 'season', 'month', 'day' or
+            'hour'), i.e. ``['year','month']`` for monthly groups and ``'month'`` for the
+            groups of month of year. The seasons are 1 (MAM), 2 (JJA), 3 (SON) and 4 (DJF),
+            with ``['year','season']`` December is in the DJF season of the next year.
+        :param timecol: (*string*) Time column name. Default is None, the first date column.
+
+        :returns: (*GroupBy*) The grouping, call its *agg()* to aggregate the columns.
+        """
+        if timecol is None:
+            if not 'D' in self.types:
+                raise ValueError('There is no date column')
+            timecol = self.types.index('D')
+        columns = {}
+        for i in range(len(self.names)):
+            if self.types[i] == 'f':
+                columns[self.names[i]] = self.columns[i]
+            elif self.types[i] == 'i':
+                columns[self.names[i]] = jarray.array(self.columns[i], 'd')
+        return GroupBy(self.columns[self.colindex(timecol)], columns, self.names, keys)
+
+    def savefile(self, filename, delimiter=',', encoding='UTF8'):
+        """
+        Save the table as a delimited text file.
+
+        :param filename: (*string*) File name.
+        :param delimiter: (*string*) Delimiter. Default is ``,`` .
+        :param encoding: (*string*) Encoding. Default is ``UTF8`` .
+        """
+        formats = []
+        for i in range(len(self.names)):
+            if self.types[i] == 'D':
+                df = SimpleDateFormat(self.patterns[i] or 'yyyy-MM-dd HH:mm:ss')
+                df.setTimeZone(TimeZone.getTimeZone('UTC'))
+                formats.append(df)
+            else:
+                formats.append(None)
+        w = BufferedWriter(OutputStreamWriter(FileOutputStream(filename), encoding))
+        try:
+            w.write(delimiter.join(self.names))
+            w.newLine()
+            for k in range(self.rownum()):
+                vs = []
+                for i in range(len(self.names)):
+                    v = self.columns[i][k]
+                    if not formats[i] is None:
+                        v = '' if v == missingdate else formats[i].format(Date(v))
+                    vs.append(str(v))
+                w.write(delimiter.join(vs))
+                w.newLine()
+        finally:
+            w.close()
+
+def takecolumn(data, dtype, indices):
+    """
+    Get the values of row indices from a column, the index -1 means a missing value.
+
+    :param data: Column data.
+    :param dtype: (*string*) Column type ('f', 'i', 'D' or 's').
+    :param indices: (*list*) Row indices.
+
+    :returns: Column type and data. An integer column with missing values becomes a float
+        column.
+    """
+    if dtype == 's':
+        return dtype, [None if k < 0 else data[k] for k in indices]
+    if dtype == 'i' and -1 in indices:
+        dtype = 'f'
+    missing = {'f':nan, 'i':0, 'D':missingdate}[dtype]
+    return dtype, jarray.array([missing if k < 0 else data[k] for k in indices], 'd' if dtype == 'f' else 'l')
+
+def hashjoin(left, right, on, right_on=None, how='inner'):
+    """
+    Join two tables by a hash table of the key values of the right table, the left table
+    is scanned once.
+
+    :param left, right: (*PyColumnTable*) The tables.
+    :param on: (*string or list*) Key column names of the left table.
+    :param right_on: (*string or list*) Key column names of the right table. Default is
+        None, same as *on* .
+    :param how: (*string*) Join mode ['inner' | 'left' | 'outer'].
+
+    :returns: (*PyColumnTable*) Joined table of the left columns and the non-key right
+        columns, duplicated right column names get a ``_r`` suffix.
+    """
+    if not how in joinmodes:
+        raise ValueError('Unsupported join mode: ' + str(how))
+    if isinstance(on, basestring):
+        on = [on]
+    if right_on is None:
+        right_on = on
+    elif isinstance(right_on, basestring):
+        right_on = [right_on]
+    if len(on) != len(right_on):
+        raise ValueError('The key column numbers of the tables are different')
+    lkeys = [left.coldata(c) for c in on]
+    rkeys = [right.coldata(c) for c in right_on]
+    hashes = {}
+    nr = right.rownum()
+    for k in range(nr):
+        key = rkeys[0][k] if len(rkeys) == 1 else tuple([c[k] for c in rkeys])
+        rows = hashes.get(key)
+        if rows is None:
+            hashes[key] = [k]
+        else:
+            rows.append(k)
+    li = []
+    ri = []
+    matched = jarray.zeros(nr, 'z')
+    for k in range(left.rownum()):
+        key = lkeys[0][k] if len(lkeys) == 1 else tuple([c[k] for c in lkeys])
+        rows = hashes.get(key)
+        if rows is None:
+            if how != 'inner':
+                li.append(k)
+                ri.append(-1)
+        else:
+            for r in rows:
+                li.append(k)
+                ri.append(r)
+                matched[r] = True
+    if how == 'outer':
+        for r in range(nr):
+            if not matched[r]:
+                li.append(-1)
+                ri.append(r)
+    table = PyColumnTable()
+    for i in range(left.colnum()):
+        name = left.names[i]
+        dtype, data = takecolumn(left.columns[i], left.types[i], li)
+        if how == 'outer' and name in on:
+            # Key values of the right rows without left rows
+            rdata = rkeys[on.index(name)]
+            for k in range(len(li)):
+                if li[k] < 0:
+                    data[k] = rdata[ri[k]]
+        table.addcol(name, data, dtype)
+        table.patterns[-1] = left.patterns[i]
+    for i in range(right.colnum()):
+        name = right.names[i]
+        if name in right_on:
+            continue
+        dtype, data = takecolumn(right.columns[i], right.types[i], ri)
+        table.addcol(name + '_r' if name in table.names else name, data, dtype)
+        table.patterns[-1] = right.patterns[i]
+    return table
+
+def parsefilter(expression):
+    """
+    Parse a filter expression of comparisons joined by ``AND`` .
+
+    :param expression: (*string*) The filter expression, such as ``"Year = 2000 AND T > 25"`` .
+
+    :returns: (*list*) Predicates (column name, operator, value), None if the expression is
+        not supported.
+    """
+    r = []
+    for term in re.split(r'(?i)\s+and\s+', expression.strip()):
+        m = re.match(r"""^\[?(\w+)\]?\s*(==|=|<>|!=|>=|<=|>|<)\s*('[^']*'|"[^"]*"|[-+.\w]+)$""", term.strip())
+        if m is None:
+            return None
+        col, op, v = m.groups()
+        if v[0] in '\'"':
+            v = v[1:-1]
+        else:
+            try:
+                v = float(v)
+            except ValueError:
+                return None
+        r.append((col, {'==':'=', '!=':'<>'}.get(op, op), v))
+    return r
+
+def compare(a, op, b):
+    if op == '=':
+        return a == b
+    elif op == '<>':
+        return a != b
+    elif op == '>':
+        return a > b
+    elif op == '>=':
+        return a >= b
+    elif op == '<':
+        return a < b
+    else:
+        return a <= b
+
+def filterrows(n, predicates, indexes, value):
+    """
+    Get the row indices satisfying all predicates.
+
+    :param n: (*int*) Row number.
+    :param predicates: (*list*) Predicates (column name, operator, value).
+    :param indexes: (*dict*) Column indexes of the column names.
+    :param value: (*function*) Cell value function of column name and row index.
+
+    :returns: (*list*) Ascending row indices.
+    """
+    rows = None
+    rest = []
+    for col, op, v in predicates:
+        if col in indexes:
+            r = set(indexes[col].lookup(op, v))
+            rows = r if rows is None else rows & r
+        else:
+            rest.append((col, op, v))
+    rows = range(n) if rows is None else sorted(rows)
+    for col, op, v in rest:
+        rows = [k for k in rows if compare(value(col, k), op, v)]
+    return rows
+
+# Sorted index of a column
+class ColumnIndex():
+
+    # values: column values, the NaN and None values are not indexed
+    def __init__(self, values):
+        order = [i for i in range(len(values)) if not values[i] is None and values[i] == values[i]]
+        order.sort(key=lambda i: values[i])
+        self.values = [values[i] for i in order]
+        self.order = jarray.array(order, 'i')
+
+    def __len__(self):
+        return len(self.order)
+
+    def __repr__(self):
+        return 'ColumnIndex: %i values' % len(self.order)
+
+    def lookup(self, op, v):
+        """
+        Find the rows of a comparison by binary search.
+
+        :param op: (*string*) Operator ('=', '<>', '>', '>=', '<' or '<=').
+        :param v: The value.
+
+        :returns: (*list*) Row indices.
+        """
+        n = len(self.values)
+        lo = bisect.bisect_left(self.values, v)
+        hi = bisect.bisect_right(self.values, v)
+        if op == '=':
+            return self.order[lo:hi]
+        elif op == '<>':
+            return list(self.order[:lo]) + list(self.order[hi:])
+        elif op == '>':
+            return self.order[hi:n]
+        elif op == '>=':
+            return self.order[lo:n]
+        elif op == '<':
+            return self.order[:lo]
+        else:
+            return self.order[:hi]
+
+def concat(tables):
+    """
+    Concatenate tables of the same columns.
+
+    :param tables: (*list*) The tables.
+
+    :returns: (*PyColumnTable*) Concatenated table.
+    """
+    t = tables[0]
+    columns = []
+    for i in range(len(t.names)):
+        code = {'f':'d', 'i':'l', 'D':'l'}.get(t.types[i])
+        columns.append(catarrays([tb.columns[i] for tb in tables], code))
+    return PyColumnTable(t.names, t.types, columns, t.patterns)
+
+# Delimited text file reader parsing column by column with a typed parser of each column
+class ColumnReader():
+
+    # delimiter: None means white spaces
+    # format: column format string, None means float columns if the first row values are
+    #   numbers otherwise string columns
+    def __init__(self, filename, delimiter=None, headerlines=0, format=None, encoding='UTF8',
+        readvarnames=True, colnames=None):
+        self.reader = BufferedReader(InputStreamReader(FileInputStream(filename), encoding))
+        self.delimiter = delimiter
+        self.pending = None
+        for i in range(headerlines):
+            self.reader.readLine()
+        names = None
+        if readvarnames:
+            line = self.nextline()
+            if not line is None:
+                names = [s.strip().strip('"') for s in self.split(line)]
+        self.pending = self.nextline()
+        first = [] if self.pending is None else self.split(self.pending)
+        if names is None:
+            names = ['Col%i' % (i + 1) for i in range(len(first))]
+        if not colnames is None:
+            names = list(colnames)
+        self.names = names
+        if format is None:
+            self.types = []
+            for i in range(len(names)):
+                try:
+                    float(first[i])
+                    self.types.append(('f', None))
+                except:
+                    self.types.append(('s', None))
+        else:
+            self.types = parseformat(format)
+            self.types.extend([('s', None)] * (len(names) - len(self.types)))
+        self.datecaches = [{} for i in range(len(names))]
+        self.dateformats = []
+        for t, pattern in self.types:
+            if t == 'D':
+                df = SimpleDateFormat(pattern)
+                df.setTimeZone(TimeZone.getTimeZone('UTC'))
+                self.dateformats.append(df)
+            else:
+                self.dateformats.append(None)
+
+    def nextline(self):
+        if not self.pending is None:
+            line = self.pending
+            self.pending = None
+            return line
+        line = self.reader.readLine()
+        while not line is None and line.strip() == '':
+            line = self.reader.readLine()
+        return line
+
+    def split(self, line):
+        if self.delimiter is None:
+            return line.split()
+        return line.split(self.delimiter)
+
+    def parse(self, i, tokens):
+        """
+        Parse the string tokens of a column with the typed parser of the column. The invalid
+        or empty tokens are NaN in float columns, 0 in integer columns and *missingdate* in
+        date columns.
+
+        :param i: (*int*) Column index.
+        :param tokens: (*list*) String tokens.
+
+        :returns: Column data.
+        """
+        t = self.types[i][0]
+        n = len(tokens)
+        if t == 'f':
+            r = jarray.zeros(n, 'd')
+            for k in range(n):
+                try:
+                    r[k] = float(tokens[k])
+                except ValueError:
+                    r[k] = nan
+        elif t == 'i':
+            r = jarray.zeros(n, 'l')
+            for k in range(n):
+                try:
+                    r[k] = long(tokens[k])
+                except ValueError:
+                    r[k] = 0
+        elif t == 'D':
+            r = jarray.zeros(n, 'l')
+            cache = self.datecaches[i]
+            df = self.dateformats[i]
+            for k in range(n):
+                s = tokens[k]
+                v = cache.get(s)
+                if v is None:
+                    if len(cache) >= datecachesize:
+                        cache.clear()
+                    try:
+                        v = df.parse(s.strip().strip('"')).getTime()
+                    except ParseException:
+                        v = missingdate
+                    cache[s] = v
+                r[k] = v
+        else:
+            r = [s.strip('"') for s in tokens]
+        return r
+
+    def read(self, n=None):
+        """
+        Read rows.
+
+        :param n: (*int*) Maximum row number. Default is None, all the remaining rows.
+
+        :returns: (*PyColumnTable*) Table of the rows. None at the end of the file if *n* is
+            set, otherwise an empty table.
+        """
+        ncol = len(self.names)
+        blocks = [[] for i in range(ncol)]
+        count = 0
+        while n is None or count < n:
+            m = blockrows if n is None else min(blockrows, n - count)
+            tokens = [[] for i in range(ncol)]
+            k = 0
+            while k < m:
+                line = self.nextline()
+                if line is None:
+                    break
+                vs = self.split(line)
+                if len(vs) < ncol:
+                    vs.extend([''] * (ncol - len(vs)))
+                for i in range(ncol):
+                    tokens[i].append(vs[i])
+                k += 1
+            if k == 0:
+                break
+            for i in range(ncol):
+                blocks[i].append(self.parse(i, tokens[i]))
+            count += k
+            if k < m:
+                break
+        if count == 0 and not n is None:
+            return None
+        columns = []
+        for i in range(ncol):
+            if len(blocks[i]) == 1:
+                columns.append(blocks[i][0])
+            else:
+                code = {'f':'d', 'i':'l', 'D':'l'}.get(self.types[i][0])
+                columns.append(catarrays(blocks[i], code))
+        return PyColumnTable(self.names, [t[0] for t in self.types], columns,
+            [t[1] for t in self.types])
+
+    def chunks(self, chunksize):
+        """
+        Iterate the table chunks.
+
+        :param chunksize: (*int*) Row number of a chunk.
+
+        :returns: Iterator of the table chunks (*PyColumnTable*).
+        """
+        try:
+            while True:
+                t = self.read(chunksize)
+                if t is None:
+                    break
+                yield t
+        finally:
+            self.close()
+
+    def close(self):
+        self.reader.close()
+
+def keycodes(ms, keys, codes, start, end):
+    """
+    Compute the group codes of a row range from the epoch milliseconds of the time column,
+    the calendar fields of each day are computed once.
+
+    :param ms: (*long[]*) Epoch milliseconds of the time column.
+    :param keys: (*list*) Calendar keys ('year', 'season', 'month', 'day' or 'hour').
+        The seasons are 1 (MAM), 2 (JJA), 3 (SON) and 4 (DJF). December is counted in the
+        DJF season of the next year when the keys include both 'year' and 'season'.
+    :param codes: (*long[]*) Output group codes, *missingcode* for the missing dates.
+    :param start, end: (*int*) The row range.
+    """
+    days = {}
+    winter = 'season' in keys
+    for k in range(start, end):
+        if ms[k] == missingdate:
+            codes[k] = missingcode
+            continue
+        d = ms[k] // 86400000
+        fields = days.get(d)
+        if fields is None:
+            y, m, dd = miutil.civildate(int(d))
+            if winter and m == 12:
+                y += 1
+            fields = {'year':y, 'season':(m + 9) % 12 / 3 + 1, 'month':m, 'day':dd}
+            days[d] = fields
+        code = 0L
+        for key in keys:
+            if key == 'hour':
+                code = code * 100 + (ms[k] - d * 86400000) / 3600000
+            else:
+                code = code * keyradix[key] + fields[key]
+        codes[k] = code
+
+def accumulate(groups, ngroup, columns, start, end):
+    """
+    Accumulate the count, sum, sum of squares, minimum and maximum of the column values
+    of each group in a row range, NaN values are skipped.
+
+    :param groups: (*int[]*) Group index of each row, -1 for the rows not in any group.
+    :param ngroup: (*int*) Group number.
+    :param columns: (*list*) Column data (double[]).
+    :param start, end: (*int*) The row range.
+
+    :returns: (*list*) Accumulators (count, sum, sum of squares, minimum, maximum) of each
+        column.
+    """
+    r = []
+    for c in columns:
+        count = jarray.zeros(ngroup, 'i')
+        sums = jarray.zeros(ngroup, 'd')
+        sqsums = jarray.zeros(ngroup, 'd')
+        mins = jarray.array([Double.POSITIVE_INFINITY] * ngroup, 'd')
+        maxs = jarray.array([Double.NEGATIVE_INFINITY] * ngroup, 'd')
+        for k in range(start, end):
+            v = c[k]
+            g = groups[k]
+            if v != v or g < 0:
+                continue
+            count[g] += 1
+            sums[g] += v
+            sqsums[g] += v * v
+            if v < mins[g]:
+                mins[g] = v
+            if v > maxs[g]:
+                maxs[g] = v
+        r.append((count, sums, sqsums, mins, maxs))
+    return r
+
+def mergeacc(a, b):
+    # Merge the accumulators of two row ranges into a
+    for (count, sums, sqsums, mins, maxs), (count1, sums1, sqsums1, mins1, maxs1) in zip(a, b):
+        for g in range(len(count)):
+            count[g] += count1[g]
+            sums[g] += sums1[g]
+            sqsums[g] += sqsums1[g]
+            mins[g] = min(mins[g], mins1[g])
+            maxs[g] = max(maxs[g], maxs1[g])
+    return a
+
+def statistic(stat, acc, shift):
+    # Statistic values of the groups from the accumulators of shifted values
+    count, sums, sqsums, mins, maxs = acc
+    n = len(count)
+    r = jarray.zeros(n, 'd')
+    for g in range(n):
+        c = count[g]
+        if stat == 'count':
+            r[g] = c
+        elif c == 0 or stat == 'std' and c < 2:
+            r[g] = nan
+        elif stat == 'mean':
+            r[g] = sums[g] / c + shift
+        elif stat == 'sum':
+            r[g] = sums[g] + c * shift
+        elif stat == 'min':
+            r[g] = mins[g] + shift
+        elif stat == 'max':
+            r[g] = maxs[g] + shift
+        else:
+            r[g] = math.sqrt(max(0.0, (sqsums[g] - sums[g] * sums[g] / c) / (c - 1)))
+    return r
+
+# Grouping of the table rows by the calendar keys of a time column
+class GroupBy():
+
+    # ms: epoch milliseconds of the time column (long[])
+    # columns: dictionary of the numeric column data (double[]), names: column order
+    # keys: calendar keys ('year', 'season', 'month', 'day' or 'hour')
+    def __init__(self, ms, columns, names, keys):
+        if isinstance(keys, basestring):
+            keys = [keys]
+        for key in keys:
+            if not key in keyradix:
+                raise ValueError('Unsupported grouping key: ' + str(key))
+        self.keys = list(keys)
+        self.columns = columns
+        self.names = [name for name in names if name in columns]
+        n = len(ms)
+        codes = jarray.zeros(n, 'l')
+        self.ranges = rowranges(n)
+        if len(self.ranges) > 1:
+            miparallel.invoke(keycodes, [(ms, self.keys, codes, s, e) for s, e in self.ranges])
+        else:
+            keycodes(ms, self.keys, codes, 0, n)
+        # The rows with missing dates are dropped from the groups
+        self.codes = sorted(set(codes) - set([missingcode]))
+        index = dict(zip(self.codes, range(len(self.codes))))
+        index[missingcode] = -1
+        self.groups = jarray.array([index[c] for c in codes], 'i')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return 'GroupBy: %s, %i groups' % (self.keys, len(self.codes))
+
+    def keyvalues(self):
+        """
+        Get the calendar key values of the groups.
+
+        :returns: (*list*) Key value arrays (long[]) in the order of the keys.
+        """
+        r = [jarray.zeros(len(self.codes), 'l') for key in self.keys]
+        for g in range(len(self.codes)):
+            code = self.codes[g]
+            for i in range(len(self.keys) - 1, -1, -1):
+                radix = keyradix[self.keys[i]]
+                r[i][g] = code % radix
+                code /= radix
+        return r
+
+    def agg(self, stats='mean'):
+        """
+        Aggregate the columns of each group, all columns and statistics are computed in
+        one pass of the rows.
+
+        :param stats: (*string, list or dict*) Statistics ('mean', 'sum', 'count', 'min',
+            'max' or 'std') of all columns, or dictionary of the statistics of each column
+            such as ``{'t':['mean','max'], 'rain':'sum'}`` .
+
+        :returns: (*PyColumnTable*) The table of the key columns and statistic columns. The
+            statistic columns are named by the columns for a single statistic or
+            ``<column>_<statistic>`` for a statistic list.
+        """
+        if not isinstance(stats, dict):
+            stats = dict([(name, stats) for name in self.names])
+        names = [name for name in self.names if name in stats]
+        for name in stats:
+            if not name in self.columns:
+                raise KeyError('No numeric column: ' + name)
+        for name in names:
+            ss = stats[name]
+            for stat in ([ss] if isinstance(ss, basestring) else ss):
+                if not stat in statistics:
+                    raise ValueError('Unsupported statistic: ' + str(stat))
+        # Shift the values by the first valid value of each column for the accuracy of std
+        columns = []
+        shifts = []
+        for name in names:
+            c = self.columns[name]
+            shift = 0.0
+            for v in c:
+                if v == v:
+                    shift = v
+                    break
+            columns.append(jarray.array([v - shift for v in c], 'd'))
+            shifts.append(shift)
+        ngroup = len(self.codes)
+        if len(self.ranges) > 1:
+            rs = miparallel.invoke(accumulate, [(self.groups, ngroup, columns, s, e) for s, e in self.ranges])
+            acc = reduce(mergeacc, rs)
+        else:
+            acc = accumulate(self.groups, ngroup, columns, 0, len(self.groups))
+        table = PyColumnTable(self.keys, ['i'] * len(self.keys), self.keyvalues())
+        for i in range(len(names)):
+            ss = stats[names[i]]
+            if isinstance(ss, basestring):
+                table.addcol(names[i], statistic(ss, acc[i], shifts[i]), 'f')
+            else:
+                for stat in ss:
+                    table.addcol(names[i] + '_' + stat, statistic(stat, acc[i], shifts[i]), 'f')
+        return table
+
+def rowranges(n):
+    # Row ranges of the threads
+    if not miparallel.isparallel(n * 8):
+        return [(0, n)]
+    m = miparallel.get_num_threads()
+    step = (n + m - 1) / m
+    return [(s, min(s + step, n)) for s in range(0, n, step)]
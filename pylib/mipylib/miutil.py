@@ -7,10 +7,22 @@
 
 from org.meteoinfo.global import PointD
 from org.meteoinfo.global.util import DateUtil
+from org.meteoinfo.data import ArrayMath
 from org.meteoinfo.shape import PointShape, PolylineShape, PolygonShape, ShapeUtil
-from java.util import Calendar, Locale
+from java.util import Calendar, Locale, TimeZone
 from java.text import SimpleDateFormat
+from ucar.ma2 import Array, MAMath, DataType
+import jarray
 import datetime
+import re
+
+# Base date of the OLE automation date numbers
+oabase = datetime.datetime(1899, 12, 30)
+# Base date of the epoch numbers
+epochbase = datetime.datetime(1970, 1, 1)
+# OLE automation date number of the epoch base date
+oaepoch = 25569
+msperday = 86400000
 
 def pydate(t):    
     """
@@ -20,16 +32,25 @@ def pydate(t):
     
     :returns: Python date
     """
-    cal = Calendar.getInstance()
-    cal.setTime(t)
-    year = cal.get(Calendar.YEAR)
-    month = cal.get(Calendar.MONTH) + 1
-    day = cal.get(Calendar.DAY_OF_MONTH)
-    hour = cal.get(Calendar.HOUR_OF_DAY)
-    minute = cal.get(Calendar.MINUTE)
-    second = cal.get(Calendar.SECOND)
-    dt = datetime.datetime(year, month, day, hour, minute, second)
-    return dt
+    ms = t.getTime()
+    ms += TimeZone.getDefault().getOffset(ms)
+    return epochbase + datetime.timedelta(milliseconds=ms - ms % 1000)
+    
+def pydates(tt):
+    """
+    Convert java dates to python dates.
+    
+    :param tt: (*list*) Java dates.
+    
+    :returns: (*list*) Python dates.
+    """
+    tz = TimeZone.getDefault()
+    r = []
+    for t in tt:
+        ms = t.getTime()
+        ms += tz.getOffset(ms)
+        r.append(epochbase + datetime.timedelta(milliseconds=ms - ms % 1000))
+    return r
     
 def jdate(t):
     """
@@ -40,6 +61,7 @@ def jdate(t):
     :returns: Java date
     """
     cal = Calendar.getInstance()
+    cal.set(Calendar.MILLISECOND, 0)
     if isinstance(t, list):
         r = []
         for tt in t:
@@ -52,15 +74,14 @@ def jdate(t):
     
 def date2num(t):
     """
-    Convert python date to numerical value.
+    Convert python date to numerical value (OLE automation date, days since 1899-12-30).
     
     :param t: Python date.
     
     :returns: Numerical value
     """
-    tt = jdate(t)
-    v = DateUtil.toOADate(tt)
-    return v
+    d = t - oabase
+    return d.days + (d.seconds + d.microseconds * 1e-6) / 86400.
     
 def dates2nums(dates):
     """
@@ -70,11 +91,7 @@ def dates2nums(dates):
     
     :returns: (*list*) Numerical values
     """
-    values = []
-    for t in dates:
-        tt = jdate(t)
-        values.append(DateUtil.toOADate(tt))
-    return values
+    return [date2num(t) for t in dates]
     
 def num2date(v):
     """
@@ -84,8 +101,7 @@ def num2date(v):
     
     :returns: Python date
     """
-    t = DateUtil.fromOADate(v)
-    return pydate(t)
+    return oabase + datetime.timedelta(milliseconds=round(v * msperday))
     
 def nums2dates(values):
     """
@@ -95,11 +111,186 @@ def nums2dates(values):
     
     :returns: Python dates
     """
-    tt = []
-    for v in values:
-        t = DateUtil.fromOADate(v)
-        tt.append(pydate(t))
-    return tt
+    if hasattr(values, 'asarray'):
+        a = values.asarray()
+        values = [a.getDouble(i) for i in range(a.getSize())]
+    return [num2date(v) for v in values]
+    
+def __doubles(a):
+    # Double array of an array
+    if hasattr(a, 'asarray'):
+        a = a.asarray()
+    elif not isinstance(a, Array):
+        a = Array.factory(DataType.DOUBLE, [len(a)], jarray.array(a, 'd'))
+    return MAMath.convert(a, DataType.DOUBLE)
+    
+def __trunc(a):
+    # Values truncated toward zero by the long conversion
+    return MAMath.convert(MAMath.convert(a, DataType.LONG), DataType.DOUBLE)
+    
+def __floordiv(a, n):
+    # Integer division of an array of non-negative integer values
+    return __trunc(ArrayMath.div(a, n))
+    
+def __roundms(a):
+    # Milliseconds of numerical date values since the epoch, rounded half away from zero
+    ms = ArrayMath.mul(ArrayMath.sub(a, oaepoch), msperday)
+    half = Array.factory(DataType.DOUBLE, ms.getShape())
+    ArrayMath.setValue(half, ArrayMath.greaterThanOrEqual(ms, 0), 0.5)
+    ArrayMath.setValue(half, ArrayMath.lessThan(ms, 0), -0.5)
+    return __trunc(ArrayMath.add(ms, half))
+    
+def num2epoch(a):
+    """
+    Convert numerical date values to epoch milliseconds (since 1970-01-01 00:00:00) by 
+    arithmetic of the array kernels.
+    
+    :param a: (*array_like*) Numerical date values.
+    
+    :returns: (*MIArray*) Epoch milliseconds (long).
+    """
+    from miarray import MIArray
+    return MIArray(MAMath.convert(__roundms(__doubles(a)), DataType.LONG))
+    
+def epoch2num(a, units='ms'):
+    """
+    Convert epoch numbers to numerical date values by arithmetic of the array kernels.
+    
+    :param a: (*array_like*) Epoch numbers.
+    :param units: (*string*) Units of the epoch numbers ['ms' | 's' | 'h' | 'd']. Default is 
+        ``ms`` .
+    
+    :returns: (*MIArray*) Numerical date values.
+    """
+    from miarray import MIArray
+    scale = dict(ms=msperday, s=86400., h=24., d=1.)[units]
+    return MIArray(ArrayMath.add(ArrayMath.div(__doubles(a), scale), oaepoch))
+    
+def civildate(days):
+    """
+    Get the date fields of a day number by arithmetic (proleptic Gregorian calendar).
+    
+    :param days: (*int*) Days since 1970-01-01.
+    
+    :returns: (*tuple*) Year, month and day.
+    """
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    year = yoe + era * 400 + (1 if month <= 2 else 0)
+    return year, month, day
+    
+def datefields(a):
+    """
+    Get the date fields of numerical date values by arithmetic of the array kernels, the 
+    *civildate* algorithm is applied to the whole array. The dates must be after 
+    0000-03-01.
+    
+    :param a: (*array_like*) Numerical date values.
+    
+    :returns: (*tuple*) Year, month, day, hour, minute and second arrays (*MIArray*).
+    """
+    from miarray import MIArray
+    # Milliseconds since 0000-03-01, so all the values are non-negative
+    ms = ArrayMath.add(__roundms(__doubles(a)), 719468. * msperday)
+    z = __floordiv(ms, msperday)
+    s = __floordiv(ArrayMath.sub(ms, ArrayMath.mul(z, msperday)), 1000)
+    era = __floordiv(z, 146097)
+    doe = ArrayMath.sub(z, ArrayMath.mul(era, 146097))
+    yoe = ArrayMath.sub(doe, __floordiv(doe, 1460))
+    yoe = ArrayMath.add(yoe, __floordiv(doe, 36524))
+    yoe = __floordiv(ArrayMath.sub(yoe, __floordiv(doe, 146096)), 365)
+    doy = ArrayMath.add(ArrayMath.mul(yoe, 365), __floordiv(yoe, 4))
+    doy = ArrayMath.sub(doe, ArrayMath.sub(doy, __floordiv(yoe, 100)))
+    mp = __floordiv(ArrayMath.add(ArrayMath.mul(doy, 5), 2), 153)
+    day = ArrayMath.sub(doy, __floordiv(ArrayMath.add(ArrayMath.mul(mp, 153), 2), 5))
+    day = ArrayMath.add(day, 1)
+    # January and February (mp >= 10) are in the next year
+    jf = __floordiv(mp, 10)
+    month = ArrayMath.sub(ArrayMath.add(mp, 3), ArrayMath.mul(jf, 12))
+    year = ArrayMath.add(ArrayMath.add(yoe, ArrayMath.mul(era, 400)), jf)
+    hour = __floordiv(s, 3600)
+    minute = __floordiv(ArrayMath.sub(s, ArrayMath.mul(hour, 3600)), 60)
+    second = ArrayMath.sub(s, ArrayMath.mul(__floordiv(s, 60), 60))
+    return tuple([MIArray(MAMath.convert(f, DataType.INT)) for f in 
+        [year, month, day, hour, minute, second]])
+    
+# Slices of the date fields of the common strftime formats
+__formats = {'%Y-%m-%d %H:%M:%S':((0,4),(5,7),(8,10),(11,13),(14,16),(17,19)),
+    '%Y-%m-%d %H:%M':((0,4),(5,7),(8,10),(11,13),(14,16)),
+    '%Y-%m-%d':((0,4),(5,7),(8,10)),
+    '%Y/%m/%d %H:%M:%S':((0,4),(5,7),(8,10),(11,13),(14,16),(17,19)),
+    '%Y/%m/%d':((0,4),(5,7),(8,10)),
+    '%Y%m%d%H%M%S':((0,4),(4,6),(6,8),(8,10),(10,12),(12,14)),
+    '%Y%m%d%H%M':((0,4),(4,6),(6,8),(8,10),(10,12)),
+    '%Y%m%d%H':((0,4),(4,6),(6,8),(8,10)),
+    '%Y%m%d':((0,4),(4,6),(6,8))}
+    
+def __template(format):
+    # Fixed width template of a format, e.g. 'YYYY-mm-dd' of '%Y-%m-%d'
+    return re.sub(r'%([a-zA-Z])', lambda m: 'YYYY' if m.group(1) == 'Y' else m.group(1) * 2, format)
+    
+def __fixedfields(s, template, slices):
+    # Date fields of a string in the fixed positions of a template, None if the string does
+    # not match the template exactly
+    if len(s) != len(template):
+        return None
+    fields = []
+    for i, j in slices:
+        v = s[i:j]
+        if not v.isdigit():
+            return None
+        fields.append(int(v))
+    for i in range(len(template)):
+        c = template[i]
+        if not c.isalpha() and s[i] != c:
+            return None
+    return fields
+    
+def strs2dates(strs, format='%Y-%m-%d %H:%M:%S'):
+    """
+    Parse date strings. The common formats are parsed by fixed position fields, other
+    formats and the strings not matching the fixed positions by *datetime.strptime* , the 
+    repeated strings are parsed once.
+    
+    :param strs: (*list*) Date strings.
+    :param format: (*string*) strftime format of the strings.
+    
+    :returns: (*list*) Python dates.
+    """
+    slices = __formats.get(format)
+    template = None if slices is None else __template(format)
+    cache = {}
+    r = []
+    for s in strs:
+        t = cache.get(s)
+        if t is None:
+            fields = None if slices is None else __fixedfields(s, template, slices)
+            if fields is None:
+                t = datetime.datetime.strptime(s, format)
+            else:
+                t = datetime.datetime(*fields)
+            cache[s] = t
+        r.append(t)
+    return r
+    
+def strs2nums(strs, format='%Y-%m-%d %H:%M:%S'):
+    """
+    Parse date strings to numerical date values.
+    
+    :param strs: (*list*) Date strings.
+    :param format: (*string*) strftime format of the strings.
+    
+    :returns: (*MIArray*) Numerical date values.
+    """
+    r = jarray.array([date2num(t) for t in strs2dates(strs, format)], 'd')
+    from miarray import MIArray
+    return MIArray(Array.factory(DataType.DOUBLE, [len(r)], r))
     
 def dateformat(t, format, language=None):
     """
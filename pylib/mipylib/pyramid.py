@@ -0,0 +1,215 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab tiled raster pyramid module
+# Note: Jython
+#-----------------------------------------------------
+from org.meteoinfo.data import ArrayMath
+from ucar.ma2 import Array, DataType, Range
+from java.lang import System, Double
+import jarray
+import bisect
+import itertools
+import micache
+import miparallel
+from miarray import MIArray
+from dimarray import DimArray, LazyDimArray
+from kdtree import asdoubles
+
+# Cell number of the tile edges
+tilesize = 256
+# Pixel size used when the figure size is unknown (i.e. batch mode)
+defaultsize = 1200
+# Tiles of all the pyramids, keyed by (pyramid id, level, tile column, tile row)
+tilecache = micache.LRUCache(256 * 1024 * 1024)
+pyramidids = itertools.count()
+
+def span(v, vmin, vmax):
+    """
+    Index range of the coordinates in a value range, one neighbour coordinate is included
+    on each side.
+
+    :param v: (*double[]*) Ascending or descending coordinates.
+    :param vmin, vmax: (*float*) The value range.
+
+    :returns: (*int*, *int*) Start and end (exclusive) indices.
+    """
+    n = len(v)
+    if n > 1 and v[0] > v[n - 1]:
+        r = v[::-1]
+        a = bisect.bisect_left(r, vmin)
+        b = bisect.bisect_right(r, vmax)
+        return max(0, n - b - 1), min(n, n - a + 1)
+    a = bisect.bisect_left(v, vmin)
+    b = bisect.bisect_right(v, vmax)
+    return max(0, a - 1), min(n, b + 1)
+
+# Raster with decimated overview levels, the raster is drawn with the tiles of the level
+# matching the pixel size in the visible extent
+class RasterPyramid():
+
+    # data: 2-D raster array (MIArray, DimArray or LazyDimArray). The overview levels are 
+    #   strided sections of the raster and the tiles are read from them when they are drawn, 
+    #   so a LazyDimArray raster is never read in full
+    # x, y: 1-D x/y coordinates of the raster
+    # fill_value: missing value of the raster
+    # proj: projection of the raster coordinates
+    # legend: legend scheme of the raster image
+    def __init__(self, data, x, y, fill_value=-9999.0, proj=None, legend=None):
+        if len(data.shape) != 2:
+            raise ValueError('The raster array must be 2-D')
+        self.uid = pyramidids.next()
+        self.lazy = isinstance(data, LazyDimArray)
+        if isinstance(data, DimArray):
+            data = data.array
+        self.data = data
+        self.fill_value = fill_value
+        self.proj = proj
+        self.legend = legend
+        self.type = 'image'
+        # Overviews are every other cell of the previous level, so the values are exact
+        self.shapes = [list(data.shape)]
+        self.x = [asdoubles(x)]
+        self.y = [asdoubles(y)]
+        while max(self.shapes[-1]) > tilesize:
+            ny, nx = self.shapes[-1]
+            self.shapes.append([(ny + 1) / 2, (nx + 1) / 2])
+            self.x.append(self.x[-1][::2])
+            self.y.append(self.y[-1][::2])
+        self.key = None
+        self.graphic = None
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __str__(self):
+        return 'RasterPyramid: %s, %i levels' % (self.shapes[0], len(self.shapes))
+
+    def __repr__(self):
+        return self.__str__()
+
+    def tiles(self, extent, width, height):
+        """
+        Get the level and the visible tile range for an extent and pixel size. The coarsest
+        level with at least one cell of each pixel is used.
+
+        :param extent: (*list*) ``[xmin, xmax, ymin, ymax]`` of the drawn extent, None for
+            the full extent.
+        :param width, height: (*int*) Pixel size of the drawn extent.
+
+        :returns: (*tuple*) Level, start/end tile columns and start/end tile rows.
+        """
+        if width <= 0 or height <= 0:
+            width = defaultsize
+            height = defaultsize
+        k = 0
+        if extent is None:
+            ny, nx = self.shapes[0]
+            i0, i1, j0, j1 = 0, nx, 0, ny
+        else:
+            i0, i1 = span(self.x[0], extent[0], extent[1])
+            j0, j1 = span(self.y[0], extent[2], extent[3])
+            if i0 >= i1 or j0 >= j1:
+                # Out of the raster, the smallest level is kept for the extent
+                k = len(self.shapes) - 1
+                ny, nx = self.shapes[k]
+                i0, i1, j0, j1 = 0, nx, 0, ny
+        while k < len(self.shapes) - 1 and (i1 - i0) / 2 >= width and (j1 - j0) / 2 >= height:
+            k += 1
+            i0 /= 2
+            j0 /= 2
+            i1 = (i1 + 1) / 2
+            j1 = (j1 + 1) / 2
+        return (k, i0 / tilesize, (i1 - 1) / tilesize + 1, j0 / tilesize, (j1 - 1) / tilesize + 1)
+
+    def tile(self, k, ti, tj):
+        """
+        Get the data of a tile, the tile is read from the cache or the strided section of
+        the raster. Only the cells of the tile are read from a LazyDimArray raster.
+
+        :param k: (*int*) Level.
+        :param ti, tj: (*int*) Tile column and row.
+
+        :returns: (*double[]*) Tile data in row order.
+        """
+        key = (self.uid, k, ti, tj)
+        t = tilecache.get(key)
+        if t is None:
+            ny, nx = self.shapes[k]
+            i0 = ti * tilesize
+            j0 = tj * tilesize
+            i1 = min(i0 + tilesize, nx)
+            j1 = min(j0 + tilesize, ny)
+            step = 2 ** k
+            if self.lazy:
+                r = self.data.section((slice(j0 * step, (j1 - 1) * step + 1, step), 
+                    slice(i0 * step, (i1 - 1) * step + 1, step))).read()
+                if isinstance(r, Array):
+                    r = MIArray(r)
+                # The missing values are NaN in the data read from the file
+                a = r.asarray()
+                ArrayMath.setValue(a, ArrayMath.equal(a, Double.NaN), self.fill_value)
+            else:
+                r = self.data.section([Range(j0 * step, (j1 - 1) * step, step),
+                    Range(i0 * step, (i1 - 1) * step, step)])
+            t = asdoubles(r)
+            tilecache.put(key, t, len(t) * 8)
+        return t
+
+    def overview(self):
+        """
+        Get the coarsest overview level, which is a single tile. It is used to create the 
+        legend of the raster without reading the full raster.
+
+        :returns: (*MIArray*, *double[]*, *double[]*) Overview array and its x/y coordinates.
+        """
+        k = len(self.shapes) - 1
+        t = self.tile(k, 0, 0)
+        return MIArray(Array.factory(DataType.DOUBLE, self.shapes[k], t)), self.x[k], self.y[k]
+
+    def render(self, extent, width, height):
+        """
+        Mosaic the visible tiles of an extent. Only the tiles of the matching level in the
+        extent are read, so the mosaic size is bounded by the pixel size.
+
+        :param extent: (*list*) ``[xmin, xmax, ymin, ymax]`` of the drawn extent, None for
+            the full extent.
+        :param width, height: (*int*) Pixel size of the drawn extent.
+
+        :returns: (*MIArray*, *double[]*, *double[]*) Mosaic array and its x/y coordinates.
+        """
+        key = self.tiles(extent, width, height)
+        k, ti0, ti1, tj0, tj1 = key
+        ny, nx = self.shapes[k]
+        c0 = ti0 * tilesize
+        c1 = min(nx, ti1 * tilesize)
+        r0 = tj0 * tilesize
+        r1 = min(ny, tj1 * tilesize)
+        w = c1 - c0
+        tiles = [(k, ti, tj) for tj in range(tj0, tj1) for ti in range(ti0, ti1)]
+        if len(tiles) > 1 and miparallel.isparallel(len(tiles) * tilesize * tilesize):
+            data = miparallel.invoke(self.tile, tiles)
+        else:
+            data = [self.tile(*t) for t in tiles]
+        out = jarray.zeros((r1 - r0) * w, 'd')
+        for (k, ti, tj), t in zip(tiles, data):
+            tw = min(tilesize, nx - ti * tilesize)
+            off = (tj * tilesize - r0) * w + ti * tilesize - c0
+            for r in range(len(t) / tw):
+                System.arraycopy(t, r * tw, out, off + r * w, tw)
+        self.key = key
+        a = MIArray(Array.factory(DataType.DOUBLE, [r1 - r0, w], out))
+        return a, self.x[k][c0:c1], self.y[k][r0:r1]
+
+    def isvalid(self, extent, width, height):
+        """
+        Whether the current mosaic has the same tiles as an extent and pixel size.
+        """
+        return self.key == self.tiles(extent, width, height)
+
+    def close(self):
+        """
+        Remove the tiles of the pyramid from the tile cache.
+        """
+        uid = self.uid
+        tilecache.removeif(lambda key: key[0] == uid)
@@ -0,0 +1,283 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: MeteoInfoLab regridding module
+# Note: Jython
+#-----------------------------------------------------
+from org.meteoinfo.projection import ProjectionInfo
+from org.meteoinfo.data import ArrayUtil
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from ucar.ma2 import Array, MAMath, DataType
+from java.io import ObjectOutputStream, ObjectInputStream, FileOutputStream, FileInputStream, BufferedOutputStream, BufferedInputStream
+from java.lang import Double, Float
+import jarray
+import bisect
+import miparallel
+from miarray import MIArray
+from dimarray import DimArray
+
+nan = Double.NaN
+# Number of the stored weights of each target point
+nweights = {'bilinear':4, 'nearest':1}
+
+# Regridder with precomputed sparse interpolation weights
+class Regridder():
+
+    # x, y: source x/y coordinates (1-D)
+    # xq, yq: target x/y coordinates, 1-D grid coordinates or 2-D point coordinates
+    # fromproj, toproj: source and target projections, None means same projection
+    # method: 'bilinear' or 'nearest'
+    def __init__(self, x=None, y=None, xq=None, yq=None, fromproj=None, toproj=None, method='bilinear'):
+        self.method = method
+        self.fromproj = fromproj
+        self.toproj = toproj
+        if x is None:
+            return
+        if not method in nweights:
+            raise ValueError('Unsupported regridding method: ' + str(method))
+        x = aslist(x)
+        y = aslist(y)
+        self.srcshape = [len(y), len(x)]
+        if isinstance(xq, (MIArray, DimArray)) and xq.rank == 2:
+            self.shape = list(xq.shape)
+            self.xq = None
+            self.yq = None
+            px = xq.asarray()
+            py = yq.asarray()
+        else:
+            self.xq = aslist(xq)
+            self.yq = aslist(yq)
+            self.shape = [len(self.yq), len(self.xq)]
+            px = Array.factory(DataType.DOUBLE, self.shape)
+            py = Array.factory(DataType.DOUBLE, self.shape)
+            n = len(self.xq)
+            for j in range(len(self.yq)):
+                for i in range(n):
+                    px.setDouble(j * n + i, self.xq[i])
+                    py.setDouble(j * n + i, self.yq[j])
+        if not fromproj is None and not toproj is None and \
+            fromproj.toProj4String() != toproj.toProj4String():
+            r = ArrayUtil.reproject(px, py, toproj, fromproj)
+            px = r[0]
+            py = r[1]
+        self.index, self.weight = weights(x, y, px, py, method)
+
+    def __str__(self):
+        return 'Regridder: %s, %s -> %s, %i weights' % (self.method, self.srcshape, self.shape,
+            len(self.weight))
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __call__(self, a, fill_value=None):
+        return self.regrid(a, fill_value)
+
+    def regrid(self, a, fill_value=None):
+        """
+        Regrid an array with the precomputed weights. The last two dimensions of the array
+        are the source y/x dimensions, all the leading dimensions (i.e. time and level) are
+        regridded in one call. The missing source points are skipped and the remaining
+        weights of a target point are renormalized.
+
+        :param a: (*array_like*) The source array.
+        :param fill_value: (*float*) The missing value of the source array besides NaN. The
+            fill value of a DimArray is used by default.
+
+        :returns: (*array_like*) Regridded array. A DimArray is returned for a DimArray source
+            and 1-D target coordinates.
+        """
+        shape = list(a.shape)
+        if shape[-2:] != self.srcshape:
+            raise ValueError('The array shape %s does not match the source grid %s' % (shape, self.srcshape))
+        if fill_value is None and isinstance(a, DimArray):
+            fill_value = a.fill_value
+        data = a.asarray()
+        if not fill_value is None and data.getDataType() == DataType.FLOAT:
+            fill_value = Float(fill_value).doubleValue()
+        if data.getDataType() != DataType.DOUBLE:
+            data = MAMath.convert(data, DataType.DOUBLE)
+        src = data.copyTo1DJavaArray()
+        nslice = 1
+        for n in shape[:-2]:
+            nslice *= n
+        npoint = self.shape[0] * self.shape[1]
+        out = jarray.zeros(nslice * npoint, 'd')
+        step = self.shape[1] * max(1, miparallel.threshold / (self.shape[1] * 4 * 4))
+        args = []
+        for k in range(nslice):
+            for s in range(0, npoint, step):
+                args.append((src, out, k, s, min(s + step, npoint), fill_value))
+        if miparallel.isparallel(nslice * npoint * 4):
+            miparallel.invoke(self.apply, args)
+        else:
+            for arg in args:
+                self.apply(*arg)
+        r = MIArray(Array.factory(DataType.DOUBLE, shape[:-2] + self.shape, out))
+        if isinstance(a, DimArray) and not self.xq is None:
+            dims = list(a.dims)[:-2]
+            ydim = Dimension(DimensionType.Y)
+            ydim.setDimValues(self.yq)
+            dims.append(ydim)
+            xdim = Dimension(DimensionType.X)
+            xdim.setDimValues(self.xq)
+            dims.append(xdim)
+            proj = a.proj if self.toproj is None else self.toproj
+            return DimArray(r, dims, a.fill_value, proj)
+        return r
+
+    def apply(self, src, out, k, start, end, fill_value=None):
+        """
+        Apply the weights of a target point range on a source slice. The NaN and missing
+        source values are skipped, the result is divided by the sum of the valid weights.
+        A target point without valid source values is NaN.
+
+        :param src: (*double[]*) Source data of all slices.
+        :param out: (*double[]*) Output data of all slices.
+        :param k: (*int*) Slice index.
+        :param start, end: (*int*) Target point range.
+        :param fill_value: (*float*) Missing value of the source data besides NaN.
+        """
+        m = nweights[self.method]
+        soff = k * self.srcshape[0] * self.srcshape[1]
+        ooff = k * self.shape[0] * self.shape[1]
+        index = self.index
+        weight = self.weight
+        for i in range(start, end):
+            v = nan
+            if index[i * m] >= 0:
+                s = 0.0
+                ws = 0.0
+                for j in range(i * m, i * m + m):
+                    w = weight[j]
+                    if w != 0:
+                        x = src[soff + index[j]]
+                        if x != x or x == fill_value:
+                            continue
+                        s += w * x
+                        ws += w
+                if ws > 0:
+                    v = s / ws
+            out[ooff + i] = v
+
+    def save(self, fname):
+        """
+        Save the weights to a file.
+
+        :param fname: (*string*) File name.
+        """
+        out = ObjectOutputStream(BufferedOutputStream(FileOutputStream(fname)))
+        try:
+            out.writeObject('Regridder')
+            out.writeObject(self.method)
+            out.writeObject(projstr(self.fromproj))
+            out.writeObject(projstr(self.toproj))
+            out.writeObject(jarray.array(self.srcshape, 'i'))
+            out.writeObject(jarray.array(self.shape, 'i'))
+            if self.xq is None:
+                out.writeObject(None)
+                out.writeObject(None)
+            else:
+                out.writeObject(jarray.array(self.xq, 'd'))
+                out.writeObject(jarray.array(self.yq, 'd'))
+            out.writeObject(self.index)
+            out.writeObject(self.weight)
+        finally:
+            out.close()
+
+def aslist(a):
+    if isinstance(a, (MIArray, DimArray)):
+        return list(a.aslist())
+    return list(a)
+
+def projstr(proj):
+    if proj is None:
+        return None
+    return proj.toProj4String()
+
+def __locate(v, x):
+    # Cell index and position of a value in ascending coordinates, -1 if outside
+    n = len(v)
+    i = bisect.bisect_right(v, x) - 1
+    if i == n - 1 and x == v[-1]:
+        i = n - 2
+    if i < 0 or i >= n - 1:
+        return -1, 0
+    return i, (x - v[i]) / (v[i + 1] - v[i])
+
+def weights(x, y, px, py, method='bilinear'):
+    """
+    Compute the sparse interpolation weights of target points on a source grid.
+
+    :param x: (*list*) Source x coordinates (1-D, monotonic).
+    :param y: (*list*) Source y coordinates (1-D, monotonic).
+    :param px: (*Array*) Target point x coordinates in the source projection.
+    :param py: (*Array*) Target point y coordinates in the source projection.
+    :param method: (*string*) 'bilinear' or 'nearest'.
+
+    :returns: (*int[]*, *double[]*) Flattened source indices and weights, fixed number of
+        weights for each target point. The indices of the target points outside the source
+        grid are -1.
+    """
+    nx = len(x)
+    xrev = nx > 1 and x[0] > x[-1]
+    if xrev:
+        x = x[::-1]
+    yrev = len(y) > 1 and y[0] > y[-1]
+    if yrev:
+        y = y[::-1]
+    ny = len(y)
+    m = nweights[method]
+    n = px.getSize()
+    index = jarray.zeros(n * m, 'i')
+    weight = jarray.zeros(n * m, 'd')
+    for k in range(n):
+        i, t = __locate(x, px.getDouble(k))
+        j, u = __locate(y, py.getDouble(k))
+        if i < 0 or j < 0:
+            for l in range(k * m, k * m + m):
+                index[l] = -1
+            continue
+        if method == 'nearest':
+            cells = [(j + int(u >= 0.5), i + int(t >= 0.5), 1.0)]
+        else:
+            cells = [(j, i, (1 - t) * (1 - u)), (j, i + 1, t * (1 - u)),
+                (j + 1, i, (1 - t) * u), (j + 1, i + 1, t * u)]
+        l = k * m
+        for jj, ii, w in cells:
+            if xrev:
+                ii = nx - 1 - ii
+            if yrev:
+                jj = ny - 1 - jj
+            index[l] = jj * nx + ii
+            weight[l] = w
+            l += 1
+    return index, weight
+
+def load(fname):
+    """
+    Load a regridder from a weights file saved by *Regridder.save()* .
+
+    :param fname: (*string*) File name.
+
+    :returns: (*Regridder*) The regridder.
+    """
+    inp = ObjectInputStream(BufferedInputStream(FileInputStream(fname)))
+    try:
+        if inp.readObject() != 'Regridder':
+            raise ValueError('Not a regridding weights file: ' + fname)
+        r = Regridder(method=inp.readObject())
+        proj = inp.readObject()
+        r.fromproj = None if proj is None else ProjectionInfo(proj)
+        proj = inp.readObject()
+        r.toproj = None if proj is None else ProjectionInfo(proj)
+        r.srcshape = list(inp.readObject())
+        r.shape = list(inp.readObject())
+        xq = inp.readObject()
+        yq = inp.readObject()
+        r.xq = None if xq is None else list(xq)
+        r.yq = None if yq is None else list(yq)
+        r.index = inp.readObject()
+        r.weight = inp.readObject()
+    finally:
+        inp.close()
+    return r
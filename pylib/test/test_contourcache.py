@@ -0,0 +1,108 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the cached contour geometry and the parallel level groups
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import unittest
+from java.lang import System
+System.setProperty('java.awt.headless', 'true')
+from org.meteoinfo.chart.plot import GraphicFactory
+from org.meteoinfo.global.colors import ColorUtil
+from org.meteoinfo.legend import LegendManage
+from org.meteoinfo.shape import ShapeTypes
+from mipylib import minum
+from mipylib import miplot
+
+contourgraphic = miplot.__contourgraphic
+levelgroups = miplot.__levelgroups
+restyle = miplot.__restyle
+copylayer = miplot.__copylayer
+contourkey = miplot.__contourkey
+
+def breakkeys(ls):
+    return [(b.getStartValue(), b.getEndValue()) for b in ls.getLegendBreaks()]
+
+class ContourCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        miplot.clear_contourcache()
+        x = minum.arange(0, 20)
+        y = minum.arange(0, 15)
+        self.a = minum.array([[float((i - 7) ** 2 + (j - 10) ** 2) for j in range(20)] for i in range(15)])
+        self.gdata = minum.asgriddata(self.a, x, y, -9999.0)
+        self.cmap = ColorUtil.getColorMap('matlab_jet')
+
+    def tearDown(self):
+        miplot.clear_contourcache()
+
+    def scheme(self, levels=None):
+        if levels is None:
+            levels = [10., 30., 50., 70., 90.]
+        ls = LegendManage.createLegendScheme(self.gdata.min(), self.gdata.max(), levels, self.cmap)
+        return ls.convertTo(ShapeTypes.Polyline)
+
+    def test_levelgroups(self):
+        ls = self.scheme()
+        keys = breakkeys(ls)
+        groups = levelgroups(ls, 2)
+        # The plot legend scheme keeps all its breaks
+        self.assertEqual(breakkeys(ls), keys)
+        self.assertEqual(sum([breakkeys(g) for g in groups], []), keys)
+        for g in groups:
+            self.assertEqual(g.getShapeType(), ls.getShapeType())
+            self.assertFalse(g.getLegendBreaks() is ls.getLegendBreaks())
+
+    def test_key(self):
+        ls = self.scheme()
+        key, values = contourkey([self.a], ls, True, 'contour')
+        self.assertEqual(contourkey([self.a], self.scheme(), True, 'contour')[0], key)
+        self.assertNotEqual(contourkey([self.a], ls, False, 'contour')[0], key)
+        self.assertNotEqual(contourkey([self.a], self.scheme([20., 40.]), True, 'contour')[0], key)
+        self.assertNotEqual(contourkey([self.a + 1], ls, True, 'contour')[0], key)
+        self.assertEqual(contourkey([[1, 2]], ls, True, 'contour'), (None, None))
+
+    def test_cache_hit(self):
+        ls = self.scheme()
+        g = contourgraphic([self.a], self.gdata, ls, True, 'contour')
+        self.assertEqual(len(miplot.contourcache), 1)
+        n = g.getGraphics().size()
+        self.assertTrue(n > 0)
+        # A restyle of the same data and levels reuses the cached geometry
+        ls2 = self.scheme()
+        g2 = contourgraphic([self.a], self.gdata, ls2, True, 'contour')
+        self.assertEqual(len(miplot.contourcache), 1)
+        self.assertEqual(g2.getGraphics().size(), n)
+        self.assertTrue(g2.getLegendScheme() is ls2)
+        lbs = list(ls2.getLegendBreaks())
+        for i in range(n):
+            self.assertTrue(g2.getGraphics().get(i).getLegend() in lbs)
+            self.assertFalse(g2.getGraphics().get(i).getShape() is g.getGraphics().get(i).getShape())
+        # Changed data misses the cache
+        contourgraphic([self.a + 1], minum.asgriddata(self.a + 1, minum.arange(0, 20), 
+            minum.arange(0, 15), -9999.0), ls2, True, 'contour')
+        self.assertEqual(len(miplot.contourcache), 2)
+
+    def test_restyle(self):
+        ls = self.scheme()
+        graphic = GraphicFactory.createContourLines(self.gdata.data, ls, True)
+        ls2 = self.scheme()
+        r = restyle(graphic, ls2)
+        self.assertEqual(r.getGraphics().size(), graphic.getGraphics().size())
+        self.assertTrue(r.getLegendScheme() is ls2)
+        for i in range(r.getGraphics().size()):
+            lb = r.getGraphics().get(i).getLegend()
+            self.assertTrue(lb in list(ls2.getLegendBreaks()))
+            self.assertEqual(lb.getStartValue(), graphic.getGraphics().get(i).getLegend().getStartValue())
+
+    def test_copylayer(self):
+        ls = self.scheme()
+        layer = miplot.DrawMeteoData.createContourLayer(self.gdata.data, ls, 'layer', 'data', True)
+        r = copylayer(layer)
+        self.assertEqual(r.getShapeNum(), layer.getShapeNum())
+        for i in range(r.getShapeNum()):
+            self.assertFalse(r.getShapes().get(i) is layer.getShapes().get(i))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the level-of-detail decimation
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import jarray
+import math
+import random
+import unittest
+from mipylib import minum
+from mipylib import miparallel
+from mipylib import decimate
+from mipylib.decimate import LODSeries
+
+nan = float('nan')
+
+class DecimateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.num_threads = miparallel.get_num_threads()
+        self.threshold = miparallel.threshold
+        rnd = random.Random(1)
+        self.n = 10000
+        self.x = jarray.array([float(i) for i in range(self.n)], 'd')
+        self.y = jarray.array([math.sin(i / 300.) + rnd.gauss(0, 0.2) for i in range(self.n)], 'd')
+
+    def tearDown(self):
+        miparallel.set_num_threads(self.num_threads)
+        miparallel.set_threshold(self.threshold)
+
+    def parallel(self):
+        miparallel.set_num_threads(4)
+        miparallel.set_threshold(1)
+
+    def check_m4(self, y, r):
+        # Columns of 200 points, the first, minimum, maximum and last points are kept
+        self.assertEqual(r, sorted(set(r)))
+        self.assertTrue(len(r) <= 4 * 50 + 50)
+        kept = set(r)
+        for c in range(50):
+            col = [i for i in range(c * 200, c * 200 + 200) if not math.isnan(y[i])]
+            self.assertTrue(c * 200 in kept)
+            self.assertTrue(c * 200 + 199 in kept)
+            self.assertTrue(min(col, key=lambda i: y[i]) in kept)
+            self.assertTrue(max(col, key=lambda i: y[i]) in kept)
+
+    def test_m4(self):
+        r = decimate.m4(self.x, self.y, 0., 10000., 50)
+        self.check_m4(self.y, r)
+        self.parallel()
+        self.assertEqual(decimate.m4(self.x, self.y, 0., 10000., 50), r)
+
+    def test_m4_extent(self):
+        r = decimate.m4(self.x, self.y, 0., 10000., 50)
+        ys = [self.y[i] for i in r]
+        self.assertEqual(min(ys), min(self.y))
+        self.assertEqual(max(ys), max(self.y))
+        self.assertEqual((r[0], r[-1]), (0, self.n - 1))
+        # The neighbour points out of the range continue the line to the edges
+        r = decimate.m4(self.x, self.y, 1000., 2000., 10)
+        self.assertEqual((r[0], r[-1]), (999, 2001))
+        # Short ranges are not decimated
+        self.assertEqual(decimate.m4(self.x, self.y, 1000., 1030., 10), range(999, 1032))
+
+    def test_m4_nan(self):
+        y = jarray.array(self.y, 'd')
+        for i in (1234, 1235, 1300):
+            y[i] = nan
+        r = decimate.m4(self.x, y, 0., 10000., 50)
+        self.check_m4(y, r)
+        # The first NaN point of a column keeps the line break
+        self.assertTrue(1234 in r)
+        # A column of NaN values only keeps its end points
+        y = jarray.array(self.y, 'd')
+        for i in range(400, 600):
+            y[i] = nan
+        r = decimate.m4(self.x, y, 0., 10000., 50)
+        self.assertEqual([i for i in r if i >= 400 and i < 600], [400, 599])
+
+    def test_thin(self):
+        x = jarray.array([0.5, 0.6, 1.5, 9.9, 10., 12., -1., 5.], 'd')
+        y = jarray.array([0.5, 0.7, 0.5, 9.9, 10., 5., 5., 12.], 'd')
+        # One point (the first) of each 2 x 2 cell, the points out of the extent are dropped
+        self.assertEqual(decimate.thin(x, y, [0., 10., 0., 10.], 5, 5), [0, 3])
+        self.assertEqual(decimate.thin(x, y, [0., 10., 0., 10.], 10, 10), [0, 2, 3])
+        self.assertEqual(decimate.thin(x, y, [0., 0., 0., 10.], 5, 5), range(8))
+        self.parallel()
+        self.assertEqual(decimate.thin(x, y, [0., 10., 0., 10.], 10, 10), [0, 2, 3])
+
+    def test_extremes(self):
+        x = jarray.array([3., nan, 1., 5., 2., 4.], 'd')
+        y = jarray.array([0., -9., 2., 1., -1., nan], 'd')
+        self.assertEqual(decimate.extremes(x, y), [2, 3, 4])
+        r = decimate.extremes(self.x, self.y)
+        self.parallel()
+        self.assertEqual(decimate.extremes(self.x, self.y), r)
+        ys = [self.y[i] for i in r]
+        self.assertEqual((min(ys), max(ys)), (min(self.y), max(self.y)))
+        self.assertTrue(0 in r and self.n - 1 in r)
+
+    def test_lodseries(self):
+        s = LODSeries(minum.array(list(self.x)).asarray(), minum.array(list(self.y)).asarray())
+        self.assertEqual(len(s), self.n)
+        idx = s.decimate(None, 0, 0)
+        self.assertTrue(len(idx) < self.n)
+        for i in s.extremes:
+            self.assertTrue(i in idx)
+        extent = [0., self.n - 1., min(self.y), max(self.y)]
+        self.assertTrue(s.isvalid(extent, decimate.defaultwidth, decimate.defaultwidth))
+        idx = s.decimate([2000., 3000., -1., 1.], 100, 80)
+        self.assertTrue(s.isvalid([2000., 3000., -1., 1.], 100, 80))
+        self.assertFalse(s.isvalid([2000., 3000., -1., 1.], 200, 80))
+        self.assertTrue(1999 in idx and 3001 in idx)
+        for i in s.extremes:
+            self.assertTrue(i in idx)
+        self.assertEqual(list(decimate.take(s.y, idx).copyTo1DJavaArray()), [self.y[i] for i in idx])
+
+    def test_lodseries_points(self):
+        x = [0.5, 0.6, 1.5, 9.9, 10., 12.]
+        y = [0.5, 0.7, 0.5, 9.9, 10., 5.]
+        s = LODSeries(minum.array(x).asarray(), minum.array(y).asarray(), 'point')
+        # The extreme points out of the extent are kept
+        self.assertEqual(s.decimate([0., 10., 0., 10.], 5, 5), [0, 3, 4, 5])
+
+if __name__ == '__main__':
+    unittest.main()
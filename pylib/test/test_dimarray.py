@@ -0,0 +1,68 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the DimArray station interpolation and coordinate arrays
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import unittest
+from java.util import ArrayList
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from mipylib import minum
+from mipylib.dimarray import DimArray, coordarray
+
+def dimension(dtype, values):
+    dim = Dimension(dtype)
+    dim.setDimValues(values)
+    return dim
+
+def same(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+class ToStationTest(unittest.TestCase):
+
+    def setUp(self):
+        dims = [dimension(DimensionType.T, [0., 1.]), dimension(DimensionType.Y, [0., 1.]),
+            dimension(DimensionType.X, [0., 1.])]
+        a = minum.array([1., 2., 3., 4., 10., 20., 30., 40.]).reshape(2, 2, 2)
+        self.data = DimArray(a, dims)
+
+    def test_leading_dims(self):
+        r = self.data.tostation([0.5, 0.25], [0.5, 0.5])
+        self.assertEqual(r.shape, [2, 2])
+        self.assertAlmostEqual(r[0, 0], 2.5)
+        self.assertAlmostEqual(r[0, 1], 2.25)
+        self.assertAlmostEqual(r[1, 0], 25.)
+        r = self.data.tostation(0.5, 0.5)
+        self.assertEqual(r.aslist(), [2.5, 25.])
+
+    def test_missing(self):
+        # Same results as GridData.toStation of each 2-D slice, also with missing neighbours
+        self.data[0, 1, 1] = minum.nan
+        self.data[1, 0, 0] = self.data.fill_value
+        x = [0.5, 0.25, 0., 2.]
+        y = [0.5, 0.75, 0., 0.5]
+        r = self.data.tostation(x, y)
+        for t in range(2):
+            gdata = self.data[t].asgriddata().data
+            expected = list(gdata.toStation(x, y))
+            values = r[t].aslist()
+            for i in range(len(x)):
+                self.assertTrue(same(values[i], expected[i]))
+                self.assertTrue(same(self.data[t].tostation(x[i], y[i]), 
+                    gdata.toStation(x[i], y[i])))
+
+class CoordArrayTest(unittest.TestCase):
+
+    def test_inputs(self):
+        a = minum.arange(3.0)
+        self.assertTrue(coordarray(a).equals(a.asarray()))
+        values = ArrayList()
+        for v in [1., 2., 3.]:
+            values.add(v)
+        self.assertEqual(coordarray(values).getDouble(2), 3.)
+        self.assertEqual(coordarray([1., 2.]).getSize(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
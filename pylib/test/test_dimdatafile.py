@@ -0,0 +1,89 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the data file block cache
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from mipylib import minum
+from mipylib import miio
+from mipylib import micache
+
+class BlockCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'cache.nc')
+        self.maxbytes = micache.blockcache.maxbytes
+        micache.blockcache.clear()
+
+    def tearDown(self):
+        micache.blockcache.resize(self.maxbytes)
+        micache.blockcache.clear()
+        shutil.rmtree(self.dir, True)
+
+    def test_hit(self):
+        miio.ncwrite(self.fn, minum.arange(12.0).reshape(3, 4), 'v')
+        f = minum.addfile(self.fn)
+        a = f['v'][:, :]
+        b = f['v'][:, :]
+        f.close()
+        self.assertEqual(a.aslist(), b.aslist())
+        self.assertTrue(micache.blockcache.hits > 0)
+
+    def test_rewritten_file(self):
+        miio.ncwrite(self.fn, minum.zeros([3, 4]), 'v')
+        f = minum.addfile(self.fn)
+        self.assertEqual(f['v'][:, :].sum(), 0.0)
+        f.close()
+        # Same name, shape and size, only the values differ
+        miio.ncwrite(self.fn, minum.ones([3, 4]), 'v')
+        f = minum.addfile(self.fn)
+        self.assertEqual(f['v'][:, :].sum(), 12.0)
+        f.close()
+
+    def test_written_blocks_removed(self):
+        miio.ncwrite(self.fn, minum.zeros([3, 4]), 'v')
+        f = minum.addfile(self.fn)
+        f['v'][:, :]
+        self.assertTrue(len(micache.blockcache) > 0)
+        f.close()
+        self.assertEqual(len(micache.blockcache), 0)
+        f = minum.addfile(self.fn)
+        f['v'][:, :]
+        # Update the last value of the data in place
+        minum.binwrite(self.fn, minum.ones([1]), offset=os.path.getsize(self.fn) - 8, 
+            datatype='double', byteorder='big_endian')
+        self.assertEqual(len(micache.blockcache), 0)
+        f.close()
+
+    def test_default_stride(self):
+        miio.ncwrite(self.fn, minum.arange(12.0).reshape(3, 4), 'v')
+        f = minum.addfile(self.fn)
+        r = f.read('v', [1, 0], [1, 2])
+        f.close()
+        self.assertEqual([r.getDouble(0), r.getDouble(1)], [4.0, 5.0])
+
+    def test_large_block_not_cached(self):
+        miio.ncwrite(self.fn, minum.zeros([3, 4]), 'v')
+        f = minum.addfile(self.fn)
+        f.cache(maxbytes=16)
+        f['v'][:, :]
+        f.close()
+        self.assertEqual(len(micache.blockcache), 0)
+
+    def test_not_local(self):
+        self.assertFalse(micache.islocal(None))
+        self.assertFalse(micache.islocal('http://localhost/thredds/dodsC/data.nc'))
+        self.assertEqual(micache.filekey(None), None)
+        self.assertEqual(micache.filekey('dods://localhost/data.nc'), None)
+        micache.invalidate(None)
+        miio.ncwrite(self.fn, minum.zeros([3, 4]), 'v')
+        self.assertTrue(micache.islocal(self.fn))
+
+if __name__ == '__main__':
+    unittest.main()
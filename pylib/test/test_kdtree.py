@@ -0,0 +1,82 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the KD-tree gridding against the ArrayUtil routines
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import random
+import unittest
+from org.meteoinfo.data import ArrayUtil
+from mipylib import minum
+from mipylib import kdtree
+from mipylib.miarray import MIArray
+
+class KDTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(7)
+        n = 60
+        self.x = minum.array([rnd.uniform(0, 20) for i in range(n)])
+        self.y = minum.array([rnd.uniform(0, 10) for i in range(n)])
+        self.v = minum.array([rnd.uniform(-5, 5) for i in range(n)])
+        # Irregular grid
+        self.xg = minum.array([0., 0.5, 2., 3.5, 7., 8., 12., 15.5, 19., 20.])
+        self.yg = minum.array([0., 1., 1.5, 4., 6.5, 9., 10.])
+
+    def assertGridEqual(self, a, b):
+        a = a.aslist()
+        b = b.aslist()
+        self.assertEqual(len(a), len(b))
+        for u, w in zip(a, b):
+            if math.isnan(w):
+                self.assertTrue(math.isnan(u))
+            else:
+                self.assertAlmostEqual(u, w, places=6)
+
+    def java(self, func, *args):
+        return MIArray(func(self.x.aslist(), self.y.aslist(), self.v.asarray(),
+            self.xg.aslist(), self.yg.aslist(), *args))
+
+    def test_query(self):
+        tree = kdtree.KDTree(self.x, self.y)
+        x = self.x.aslist()
+        y = self.y.aslist()
+        for px, py in [(3., 4.), (19.5, 0.5), (10., 10.)]:
+            d = sorted([(math.hypot(px - x[i], py - y[i]), i) for i in range(len(x))])
+            r = tree.query(px, py, 4)
+            self.assertEqual([i for dd, i in r], [i for dd, i in d[:4]])
+            r = tree.query_radius(px, py, 3.)
+            self.assertEqual(sorted([i for dd, i in r]), sorted([i for dd, i in d if dd <= 3.]))
+
+    def test_idw(self):
+        r = kdtree.idw(self.x, self.y, self.v, self.xg, self.yg, 4)
+        self.assertGridEqual(r, self.java(ArrayUtil.interpolation_IDW_Neighbor, 4))
+        r = kdtree.idw(self.x, self.y, self.v, self.xg, self.yg, 2, 2.5)
+        self.assertGridEqual(r, self.java(ArrayUtil.interpolation_IDW_Radius, 2, 2.5))
+
+    def test_nearest(self):
+        r = kdtree.nearest(self.x, self.y, self.v, self.xg, self.yg, 3.)
+        self.assertGridEqual(r, self.java(ArrayUtil.interpolation_Nearest, 3.))
+
+    def test_cressman(self):
+        self.xg = minum.linspace(0, 20, 11)
+        self.yg = minum.linspace(0, 10, 6)
+        radius = [10, 7, 4, 2, 1]
+        r = kdtree.cressman(self.x, self.y, self.v, self.xg, self.yg, radius)
+        self.assertGridEqual(r, self.java(ArrayUtil.cressman, radius))
+
+    def test_cressman_uneven(self):
+        self.assertRaises(ValueError, kdtree.cressman, self.x, self.y, self.v, self.xg, self.yg)
+
+    def test_griddata(self):
+        # The ArrayUtil routines are the default
+        a, xg, yg = minum.griddata([self.x, self.y], self.v, [self.xg, self.yg], method='neareast', 
+            radius=3.)
+        b, xg, yg = minum.griddata([self.x, self.y], self.v, [self.xg, self.yg], method='neareast', 
+            radius=3., kdtree=True)
+        self.assertGridEqual(b, a)
+
+if __name__ == '__main__':
+    unittest.main()
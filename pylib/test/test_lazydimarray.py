@@ -0,0 +1,84 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the lazy chunked arrays
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import math
+import shutil
+import tempfile
+import unittest
+from mipylib import minum
+from mipylib import miio
+from mipylib.dimarray import LazyDimArray
+
+def values(a):
+    # Flattened values of an array or a number
+    if isinstance(a, (int, long, float)):
+        return [a]
+    r = a.asarray()
+    return [r.getDouble(i) for i in range(r.getSize())]
+
+class LazyDimArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'lazy.nc')
+        a = minum.rand(6, 5, 4) * 10
+        a[1, 2, 3] = minum.nan
+        a[4, 0, 0] = minum.nan
+        miio.ncwrite(self.fn, a, 'v')
+        self.eager = minum.addfile(self.fn)
+        # Chunks of one time step, so every reduction merges several chunks
+        self.lazy = minum.addfile(self.fn, lazy=True, chunkbytes=5 * 4 * 8)
+
+    def tearDown(self):
+        self.eager.close()
+        self.lazy.close()
+        shutil.rmtree(self.dir, True)
+
+    def assertValuesEqual(self, a, b):
+        a = values(a)
+        b = values(b)
+        self.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            if math.isnan(y):
+                self.assertTrue(math.isnan(x))
+            else:
+                self.assertAlmostEqual(x, y, places=6)
+
+    def test_islazy(self):
+        v = self.lazy['v'][:, :, :]
+        self.assertTrue(isinstance(v, LazyDimArray))
+        self.assertEqual(v.shape, [6, 5, 4])
+        self.assertTrue(v.chunklen(0) < v.shape[0])
+
+    def test_read(self):
+        self.assertValuesEqual(self.lazy['v'][:, :, :].read(), self.eager['v'][:, :, :])
+        self.assertValuesEqual(self.lazy['v'][1:5:2, :, 1].read(), self.eager['v'][1:5:2, :, 1])
+
+    def test_reductions(self):
+        lazy = self.lazy['v'][:, :, :]
+        eager = self.eager['v'][:, :, :]
+        for axis in (None, 0, 1, 2, (1, 2)):
+            for kind in ('sum', 'mean', 'min', 'max'):
+                self.assertValuesEqual(getattr(lazy, kind)(axis), getattr(eager, kind)(axis))
+            for ddof in (0, 1):
+                self.assertValuesEqual(lazy.std(axis, ddof), eager.std(axis, ddof))
+                self.assertValuesEqual(lazy.var(axis, ddof), eager.var(axis, ddof))
+        for axis in (None, 0, 2):
+            self.assertValuesEqual(lazy.argmin(axis), eager.argmin(axis))
+            self.assertValuesEqual(lazy.argmax(axis), eager.argmax(axis))
+
+    def test_section(self):
+        v = self.lazy['v'][:, :, :]
+        self.assertValuesEqual(v.section((slice(1, 6, 2), 3, slice(None))).read(),
+            self.eager['v'][1:6:2, 3, :])
+        self.assertRaises(ValueError, v.section, (slice(None, None, -1), 0, 0))
+        self.assertRaises(IndexError, v.section, (0, 0))
+        self.assertRaises(IndexError, v.section, (6, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
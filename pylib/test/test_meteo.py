@@ -0,0 +1,109 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the moist adiabat table of the thermodynamic functions
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import unittest
+from mipylib import minum
+from mipylib import meteo
+
+# Direct Runge-Kutta integration of the moist adiabats
+integrate = meteo.__moistintegrate
+lclpoint = meteo.__lcl
+
+class MoistLapseTest(unittest.TestCase):
+
+    def test_table(self):
+        # The interpolated adiabats agree with the direct integration
+        p = [1000., 925., 850., 700., 500., 300., 200., 100.]
+        for t0 in (250., 273.15, 293., 303.):
+            r = meteo.moist_lapse(p, minum.array([t0]))
+            for k in range(len(p)):
+                self.assertAlmostEqual(r[k, 0], integrate(p[0], t0, p[k]), delta=0.01)
+
+    def test_outside_table(self):
+        # The levels outside the table are integrated
+        p = [1000., 20., 5.]
+        r = meteo.moist_lapse(p, minum.array([293.]))
+        self.assertAlmostEqual(r[2, 0], integrate(20., r[1, 0], 5.), places=6)
+        r = meteo.moist_lapse([1000., 500.], minum.array([350.]))
+        self.assertAlmostEqual(r[1, 0], integrate(1000., 350., 500.), places=6)
+
+    def test_parcel_profile(self):
+        p = minum.array([1000., 900., 800., 700., 500.])
+        r = meteo.parcel_profile(p, minum.array([303.]), minum.array([295.]))
+        self.assertAlmostEqual(r[0, 0], 303.)
+        pl, tl = lclpoint(1000., 303., 295.)
+        self.assertAlmostEqual(r[4, 0], integrate(pl, tl, 500.), delta=0.01)
+
+    def test_parcel_ascending(self):
+        self.assertRaises(ValueError, meteo.parcel_profile, [500., 700., 1000.],
+            minum.array([303.]), minum.array([295.]))
+
+class CapeCinTest(unittest.TestCase):
+
+    def setUp(self):
+        self.p = [1000., 925., 850., 700., 500., 300., 200.]
+        self.t = [303., 299., 296., 286., 266., 236., 219.]
+        self.td = [295., 292., 282., 262., 242., 212., 200.]
+
+    def reference(self, t, td):
+        # Trapezoid areas of the parcel profile above and below the LFC
+        p = self.p
+        tp = meteo.parcel_profile(p, minum.array([t[0]]), minum.array([td[0]]))
+        pl = lclpoint(p[0], t[0], td[0])[0]
+        pos = neg = 0.
+        lfc = False
+        for k in range(len(p) - 1):
+            area = meteo.Rd_kg * ((tp[k, 0] - t[k]) + (tp[k + 1, 0] - t[k + 1])) / 2 * \
+                math.log(p[k] / p[k + 1])
+            lfc = lfc or (area > 0 and p[k + 1] <= pl)
+            if lfc and area > 0:
+                pos += area
+            elif not lfc and area < 0:
+                neg += area
+        return pos, neg if lfc else 0.
+
+    def test_unstable(self):
+        cape, cin = meteo.cape_cin(self.p, minum.array(self.t), minum.array(self.td))
+        pos, neg = self.reference(self.t, self.td)
+        self.assertTrue(pos > 0)
+        self.assertAlmostEqual(cape[0], pos, places=6)
+        self.assertAlmostEqual(cin[0], neg, places=6)
+
+    def test_stable(self):
+        # Inversion, the parcel is colder than the environment at all levels
+        t = [273., 280., 285., 290., 295., 300., 305.]
+        cape, cin = meteo.cape_cin(self.p, minum.array(t), minum.array([t[0] - 10] * 7))
+        self.assertEqual(cape[0], 0.)
+        self.assertEqual(cin[0], 0.)
+
+    def test_ascending(self):
+        # The levels ordered from the top give the same result as from the surface
+        cape, cin = meteo.cape_cin(self.p, minum.array(self.t), minum.array(self.td))
+        rcape, rcin = meteo.cape_cin(self.p[::-1], minum.array(self.t[::-1]),
+            minum.array(self.td[::-1]))
+        self.assertAlmostEqual(rcape[0], cape[0], places=9)
+        self.assertAlmostEqual(rcin[0], cin[0], places=9)
+
+    def test_axis(self):
+        # Two grid points, the levels on the second axis
+        t = minum.array([self.t, [x - 5 for x in self.t]])
+        td = minum.array([self.td, [x - 5 for x in self.td]])
+        cape, cin = meteo.cape_cin(self.p, t, td, axis=1)
+        self.assertEqual(list(cape.shape), [2])
+        for i in range(2):
+            pos, neg = self.reference([x - 5 * i for x in self.t], [x - 5 * i for x in self.td])
+            self.assertAlmostEqual(cape[i], pos, places=6)
+            self.assertAlmostEqual(cin[i], neg, places=6)
+
+    def test_unordered(self):
+        p = [1000., 850., 925., 700., 500., 300., 200.]
+        self.assertRaises(ValueError, meteo.cape_cin, p, minum.array(self.t),
+            minum.array(self.td))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the multi-file aggregated dataset
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from mipylib import minum
+from mipylib import miio
+from mipylib import miutil
+
+def values(a):
+    # Flattened values of a DimArray or an ucar Array
+    if hasattr(a, 'asarray'):
+        a = a.asarray()
+    return list(a.copyTo1DJavaArray())
+
+class MFDimDataFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        t0 = datetime.datetime(2016, 1, 1)
+        times = miutil.dates2nums([t0 + datetime.timedelta(hours=6 * i) for i in range(7)])
+        # Descending latitudes, the Y dimension of the files is reversed
+        lat = miio.dimension([40., 30., 20.], 'lat', 'Y')
+        lon = miio.dimension([100., 101., 102., 103.], 'lon', 'X')
+        data = minum.arange(7 * 3 * 4.).reshape(7, 3, 4)
+        self.fn = os.path.join(self.dir, 'all.nc')
+        miio.ncwrite(self.fn, data, 'v', [miio.dimension(times, 'time', 'T'), lat, lon])
+        # Members of 3, 1 and 3 time steps
+        self.fnames = []
+        for k, (s, e) in enumerate([(0, 3), (3, 4), (4, 7)]):
+            fn = os.path.join(self.dir, 'm%i.nc' % k)
+            miio.ncwrite(fn, data[s:e, :, :], 'v', [miio.dimension(times[s:e], 'time', 'T'), 
+                lat, lon])
+            self.fnames.append(fn)
+        self.single = minum.addfile(self.fn)
+        self.mf = minum.addfiles(self.fnames)
+
+    def tearDown(self):
+        self.single.close()
+        self.mf.close()
+        shutil.rmtree(self.dir, True)
+
+    def test_header(self):
+        # Only the headers are scanned, the members are opened on the first read
+        self.assertEqual(self.mf.offsets, [0, 3, 4])
+        self.assertEqual(self.mf.nconcat, 7)
+        self.assertEqual(self.mf.timenum(), 7)
+        self.assertEqual(self.mf.members, [None, None, None])
+        self.assertEqual(list(self.mf.finddim('time').getDimValue()), 
+            list(self.single.finddim('time').getDimValue()))
+        self.assertEqual(self.mf['v'].dims[0].getLength(), 7)
+        meteodata, v = self.mf.scanfile(self.fnames[1])
+        self.assertEqual(len(v), 1)
+        meteodata.close()
+        self.assertRaises(ValueError, minum.addfiles, self.fnames, 'level')
+
+    def test_locate(self):
+        self.assertEqual(self.mf.locate(0), (0, 0))
+        self.assertEqual(self.mf.locate(2), (0, 2))
+        self.assertEqual(self.mf.locate(3), (1, 0))
+        self.assertEqual(self.mf.locate(4), (2, 0))
+        self.assertEqual(self.mf.locate(6), (2, 2))
+        self.assertEqual(self.mf.locate(-1), (2, 2))
+        self.assertEqual(self.mf.gettime(5), self.single.gettime(5))
+
+    def test_member_read(self):
+        # A section in one member only opens that member
+        self.assertEqual(values(self.mf['v'][3, :, :]), values(self.single['v'][3, :, :]))
+        self.assertEqual([m is None for m in self.mf.members], [True, False, True])
+
+    def test_split_read(self):
+        sv = self.single['v']
+        mv = self.mf['v']
+        for key in [(slice(None), slice(None), slice(None)),
+            (slice(2, 5), slice(None), slice(None)),
+            (slice(0, 6, 2), slice(None), 1),
+            (slice(1, 6, 3), slice(0, 1), slice(1, 3)),
+            (slice(2, 4), 2, slice(None))]:
+            self.assertEqual(values(mv[key]), values(sv[key]))
+
+    def test_stride(self):
+        # Positive and negative strides on the aggregation and the other dimensions
+        for origin, size, stride in [([0, 0, 0], [7, 3, 4], [2, 1, 1]),
+            ([1, 0, 0], [6, 3, 4], [3, -1, 1]),
+            ([0, 0, 0], [7, 3, 4], [-1, 1, 1]),
+            ([1, 0, 1], [5, 3, 3], [-2, -1, 2]),
+            ([2, 1, 0], [3, 2, 4], [-1, 1, -1])]:
+            self.assertEqual(values(self.mf.read('v', origin, size, stride)),
+                values(self.single.read('v', origin, size, stride)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the MIArray views, reductions and evaluation
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import unittest
+from mipylib import minum
+from mipylib.miarray import MIArray, layout
+
+class ViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.a = minum.arange(12.0).reshape(4, 3)
+
+    def test_layout(self):
+        self.assertEqual(layout(self.a[0].array), (0, True))
+        self.assertEqual(layout(self.a[2].array), (6, True))
+        self.assertEqual(layout(self.a[1:3, :].array), (3, True))
+        self.assertEqual(layout(self.a[:, 1].array)[1], False)
+
+    def test_values(self):
+        b = self.a[2]
+        self.assertEqual(b.aslist(), [6.0, 7.0, 8.0])
+        self.assertEqual(b.sum(), 21.0)
+        self.assertEqual((b * 2).aslist(), [12.0, 14.0, 16.0])
+        self.assertEqual(self.a[:, 1].aslist(), [1.0, 4.0, 7.0, 10.0])
+        self.assertEqual(self.a[::-1, 0].aslist(), [9.0, 6.0, 3.0, 0.0])
+
+    def test_setitem_writes_through(self):
+        for t in range(4):
+            b = self.a[t]
+            b[1] = -1.0
+            self.assertEqual(self.a[t, 1], -1.0)
+        c = self.a[:, 2]
+        c[3] = -2.0
+        self.assertEqual(self.a[3, 2], -2.0)
+        d = self.a[::-1, 0]
+        d[0] = -3.0
+        self.assertEqual(self.a[3, 0], -3.0)
+
+    def test_inplace_writes_through(self):
+        b = self.a[1]
+        b += 1
+        self.assertEqual(self.a[1].aslist(), [4.0, 5.0, 6.0])
+        self.assertEqual(self.a[0].aslist(), [0.0, 1.0, 2.0])
+
+    def test_view_sees_source(self):
+        b = self.a[3]
+        self.a[3, 0] = 100.0
+        self.assertEqual(b[0], 100.0)
+        self.assertEqual(b.sum(), 121.0)
+
+    def test_copy(self):
+        b = self.a[1].copy()
+        b[0] = -1.0
+        self.assertEqual(self.a[1, 0], 3.0)
+
+class ReduceTest(unittest.TestCase):
+
+    def setUp(self):
+        nan = minum.nan
+        self.a = minum.array([1., nan, 3., 4., 5., nan]).reshape(2, 3)
+
+    def assertListAlmostEqual(self, a, b):
+        self.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            self.assertAlmostEqual(x, y)
+
+    def test_axis(self):
+        a = self.a
+        self.assertListAlmostEqual(a.sum(axis=0).aslist(), [5., 5., 3.])
+        self.assertListAlmostEqual(a.sum(axis=1).aslist(), [4., 9.])
+        self.assertListAlmostEqual(a.mean(axis=1).aslist(), [2., 4.5])
+        self.assertAlmostEqual(a.mean(axis=(0, 1)), 3.25)
+        self.assertListAlmostEqual(a.min(axis=0).aslist(), [1., 5., 3.])
+        self.assertListAlmostEqual(a.max(axis=1).aslist(), [3., 5.])
+        self.assertEqual(a.argmin(1).aslist(), [0, 0])
+        self.assertEqual(a.argmax(0).aslist(), [1, 1, 0])
+        self.assertListAlmostEqual(a.std(1).aslist(), [1., 0.5])
+        self.assertListAlmostEqual(a.var(1, ddof=1).aslist(), [2., 0.5])
+        self.assertAlmostEqual(a.var(), 2.1875)
+        self.assertEqual(a.argmax(), 4)
+
+    def test_long_cells(self):
+        # More reduced elements than cells, each cell is reduced by the Java kernels
+        b = minum.arange(200.0).reshape(2, 100)
+        b[0, 7] = minum.nan
+        self.assertListAlmostEqual(b.sum(axis=1).aslist(), [4950. - 7, 14950.])
+        self.assertListAlmostEqual(b.min(axis=1).aslist(), [0., 100.])
+        self.assertEqual(b.argmax(1).aslist(), [99, 99])
+        self.assertEqual(b.argmin(1).aslist(), [0, 0])
+
+    def test_fill_value(self):
+        # The fill value stays the first positional parameter
+        a = minum.array([1., -9999., 3., 4.]).reshape(2, 2)
+        self.assertEqual(a.min(-9999.), 1.)
+        self.assertEqual(a.max(-9999.), 4.)
+        self.assertEqual(a.sum(-9999.), 8.)
+        self.assertAlmostEqual(a.mean(-9999.), 8. / 3)
+        self.assertListAlmostEqual(a.sum(-9999., 0).aslist(), [4., 4.])
+        self.assertListAlmostEqual(a.mean(-9999., axis=1).aslist(), [1., 3.5])
+        self.assertListAlmostEqual(a.min(fill_value=-9999., axis=0).aslist(), [1., 4.])
+        self.assertEqual(a[0, 1], -9999.)
+
+    def test_builtin_sum(self):
+        r = minum.sum([1, 2, 3])
+        self.assertEqual(r, 6)
+        self.assertTrue(isinstance(r, int))
+        self.assertEqual(minum.sum([[1], [2]], []), [1, 2])
+        self.assertEqual(minum.sum((0.5, 0.5), 1), 2.0)
+
+class EvaluateTest(unittest.TestCase):
+
+    def test_elementwise(self):
+        a = minum.arange(6.0).reshape(2, 3)
+        b = minum.array([1., 2., 3.])
+        r = minum.evaluate('sqrt(a * b) + 1', {'a': a, 'b': b})
+        self.assertEqual(r.shape, [2, 3])
+        self.assertAlmostEqual(r[1, 2], 15 ** 0.5 + 1)
+
+    def test_whole_array(self):
+        # Reductions are evaluated on the whole arrays, not block by block
+        a = minum.arange(6.0)
+        r = minum.evaluate('a - mean(a)', {'a': a})
+        self.assertEqual(r.aslist(), [-2.5, -1.5, -0.5, 0.5, 1.5, 2.5])
+        self.assertEqual(minum.evaluate('a[2] * 2', {'a': a}), 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
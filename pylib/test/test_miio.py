@@ -0,0 +1,100 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the chunked data file converters
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from mipylib import minum
+from mipylib import miio
+
+ctl = '''DSET ^grads.dat
+TITLE test
+UNDEF -9999.0
+OPTIONS yrev little_endian
+XDEF 4 LINEAR 100 1
+YDEF 3 LINEAR 20 10
+ZDEF 1 LEVELS 1000
+TDEF 2 LINEAR 00Z01JAN2016 6hr
+VARS 1
+t 0 99 temperature
+ENDVARS
+'''
+
+def values(a):
+    # Flattened values of a DimArray or an ucar Array, NaN as None
+    if hasattr(a, 'asarray'):
+        a = a.asarray()
+    return [None if math.isnan(v) else v for v in a.copyTo1DJavaArray()]
+
+class ConvertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.dir, 'src.nc')
+        self.out = os.path.join(self.dir, 'out.nc')
+        a = minum.arange(5 * 3 * 4.).reshape(5, 3, 4)
+        a[2, 1, 1] = minum.nan
+        miio.ncwrite(self.src, a, 'v')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, True)
+
+    def test_copyvars(self):
+        f = minum.addfile(self.src)
+        ncfile = minum.addfile(self.out, 'c')
+        dims = [ncfile.adddim(dim.getShortName(), dim.getLength()) for dim in f.dimensions()]
+        var = ncfile.addvar('v', 'double', dims)
+        ncfile.create()
+        # Blocks of one row
+        nbytes, dt = miio.copyvars(f, ncfile, [var], 4 * 8, -9999.0)
+        ncfile.close()
+        self.assertEqual(nbytes, 5 * 3 * 4 * 8)
+        expected = [-9999.0 if v is None else v for v in values(f.read('v'))]
+        f.close()
+        f = minum.addfile(self.out)
+        self.assertEqual(values(f.read('v')), expected)
+        f.close()
+
+    def test_convert2nc(self):
+        miio.convert2nc(self.src, self.out, chunkbytes=3 * 4 * 8)
+        f = minum.addfile(self.src)
+        g = minum.addfile(self.out)
+        self.assertEqual(g.varnames(), f.varnames())
+        for name in f.varnames():
+            self.assertEqual(values(g.read(name)), values(f.read(name)))
+        f.close()
+        g.close()
+
+    def test_grads2nc(self):
+        # The rows of the GrADS file are from the north, the Y dimension is reversed
+        fn = os.path.join(self.dir, 'grads.ctl')
+        f = open(fn, 'w')
+        f.write(ctl)
+        f.close()
+        data = [t * 100. + y * 10. + x for t in range(2) for y in range(3) for x in range(4)]
+        data[5] = -9999.0
+        f = open(os.path.join(self.dir, 'grads.dat'), 'wb')
+        f.write(struct.pack('<%if' % len(data), *data))
+        f.close()
+        # Blocks of two rows, a block does not cover the whole Y dimension
+        miio.grads2nc(fn, self.out, chunkbytes=2 * 4 * 4)
+        f = minum.addfile_grads(fn)
+        v = f['t']
+        expected = [-9999.0 if x is None else x for x in values(v[(slice(None),) * v.ndim])]
+        g = minum.addfile(self.out)
+        self.assertEqual(values(g.read('t')), expected)
+        self.assertEqual(values(g.read('Y')), [20., 30., 40.])
+        # The southern row is the last row of the file
+        self.assertEqual(values(g.read('t'))[:4], [20., 21., 22., 23.])
+        g.close()
+        f.close()
+
+if __name__ == '__main__':
+    unittest.main()
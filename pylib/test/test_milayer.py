@@ -0,0 +1,53 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the polygon maskout on grids
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import unittest
+from mipylib import minum
+from mipylib import milayer
+from mipylib.milayer import MILayer
+
+def square(x0, x1, y0, y1):
+    layer = MILayer(shapetype='polygon')
+    layer.addshape([x0, x1, x1, x0, x0], [y0, y0, y1, y1, y0])
+    return layer
+
+class MaskoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.x = minum.array([0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5])
+        self.y = minum.array([0.5, 1.5])
+        self.data = minum.ones([2, 7])
+        self.left = square(0, 2, 0, 2)
+        self.right = square(4, 6, 0, 2)
+
+    def inside(self, r):
+        return [not math.isnan(r[0, i]) for i in range(7)]
+
+    def test_layer(self):
+        r = minum.maskout(self.data, self.left, self.x, self.y)
+        self.assertEqual(self.inside(r), [True, True, False, False, False, False, False])
+
+    def test_layer_list(self):
+        expected = [True, True, False, False, True, True, False]
+        r = minum.maskout(self.data, [self.left, self.right], self.x, self.y)
+        self.assertEqual(self.inside(r), expected)
+        r = minum.maskout(self.data, [self.left.layer, self.right.shapes()[0]], self.x, self.y)
+        self.assertEqual(self.inside(r), expected)
+        r = self.data.maskout([self.left, self.right], self.x, self.y)
+        self.assertEqual(self.inside(r), expected)
+
+    def test_polygonshapes(self):
+        shapes = milayer.polygonshapes([self.left, self.right])
+        self.assertEqual(len(shapes), 2)
+        points = MILayer(shapetype='point')
+        points.addshape(1.0, 1.0)
+        self.assertTrue(milayer.polygonshapes([self.left, points]) is None)
+        self.assertTrue(milayer.maskgrid(points, self.x.aslist(), self.y.aslist()) is None)
+
+if __name__ == '__main__':
+    unittest.main()
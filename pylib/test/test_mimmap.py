@@ -0,0 +1,49 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the memory-mapped binary file arrays
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from java.lang import Thread
+from java.nio.channels import ClosedByInterruptException
+from mipylib import minum
+from mipylib import mimmap
+
+class MappedArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'mmap.bin')
+        minum.binwrite(self.fn, minum.arange(12.0).reshape(3, 4))
+        self.m = mimmap.MappedArray(self.fn, [3, 4], 'double', mode='r+')
+
+    def tearDown(self):
+        self.m.close()
+        Thread.interrupted()
+        shutil.rmtree(self.dir, True)
+
+    def test_read_write(self):
+        self.assertEqual(self.m[1].aslist(), [4.0, 5.0, 6.0, 7.0])
+        self.m[2] = minum.zeros([4])
+        self.assertEqual(self.m[2].aslist(), [0.0, 0.0, 0.0, 0.0])
+
+    def test_reopen_after_interrupt(self):
+        # Cancellation interrupts the executing thread, which closes the channel in use
+        Thread.currentThread().interrupt()
+        self.assertRaises(ClosedByInterruptException, self.m.record, 0)
+        Thread.interrupted()
+        self.assertEqual(self.m[0].aslist(), [0.0, 1.0, 2.0, 3.0])
+        self.m[0] = minum.ones([4])
+        self.assertEqual(self.m[0].aslist(), [1.0, 1.0, 1.0, 1.0])
+
+    def test_closed(self):
+        self.m.close()
+        self.assertRaises(ValueError, self.m.record, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the parallel evaluation
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import time
+import unittest
+from java.lang import Thread
+from mipylib import minum
+from mipylib import miparallel
+from mipylib import miprogress
+
+def fail(i):
+    if i == 0:
+        raise ValueError('task %i failed' % i)
+    return i
+
+def cancelled(i):
+    miprogress.checkcancel()
+    return i
+
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.num_threads = miparallel.get_num_threads()
+        self.threshold = miparallel.threshold
+
+    def tearDown(self):
+        miparallel.set_num_threads(self.num_threads)
+        miparallel.set_threshold(self.threshold)
+        miprogress.sethooks()
+        Thread.interrupted()
+
+    def evaluate(self, a, b):
+        return [(a.sin() * b + a ** 2).aslist(), (a / (b + 1)).exp().aslist(),
+            minum.atan2(a, b).aslist(), (a - 0.5).aslist()]
+
+    def test_identical(self):
+        a = minum.rand(60, 70)
+        b = minum.rand(70)
+        miparallel.set_num_threads(1)
+        serial = self.evaluate(a, b)
+        miparallel.set_num_threads(4)
+        miparallel.set_threshold(16)
+        parallel = self.evaluate(a, b)
+        # Same kernels on each element, so the results are bit-identical
+        self.assertEqual(serial, parallel)
+
+    def test_threshold(self):
+        miparallel.set_num_threads(4)
+        miparallel.set_threshold(100)
+        self.assertFalse(miparallel.isparallel(99))
+        self.assertTrue(miparallel.isparallel(100))
+        miparallel.set_num_threads(1)
+        self.assertFalse(miparallel.isparallel(100))
+
+    def test_invoke(self):
+        miparallel.set_num_threads(4)
+        self.assertEqual(miparallel.invoke(lambda x, y: x * y, [(i, 2) for i in range(10)]),
+            [i * 2 for i in range(10)])
+
+    def test_error(self):
+        # The python exception of a task is raised, not an ExecutionException
+        miparallel.set_num_threads(4)
+        self.assertRaises(ValueError, miparallel.invoke, fail, [(i,) for i in range(4)])
+
+    def test_cancel(self):
+        miparallel.set_num_threads(4)
+        miprogress.sethooks(cancelled=lambda: True)
+        self.assertRaises(KeyboardInterrupt, miparallel.invoke, cancelled, [(i,) for i in range(4)])
+
+    def test_cancel_owner(self):
+        # The tasks are cancelled with their interrupted calling thread
+        miparallel.set_num_threads(4)
+        Thread.currentThread().interrupt()
+        self.assertRaises(KeyboardInterrupt, miparallel.invoke, cancelled, [(i,) for i in range(4)])
+
+    def test_cancel_others(self):
+        # A failed task cancels the running tasks of the call
+        miparallel.set_num_threads(4)
+        stopped = []
+        def work(i):
+            if i == 0:
+                time.sleep(0.1)
+                raise ValueError('task failed')
+            try:
+                for k in range(500):
+                    miprogress.checkcancel()
+                    time.sleep(0.01)
+            except KeyboardInterrupt:
+                stopped.append(i)
+                raise
+        self.assertRaises(ValueError, miparallel.invoke, work, [(i,) for i in range(4)])
+        for k in range(200):
+            if len(stopped) == 3:
+                break
+            time.sleep(0.01)
+        self.assertEqual(sorted(stopped), [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
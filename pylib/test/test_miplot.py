@@ -0,0 +1,58 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Smoke tests of the batch rendering
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from java.lang import System
+System.setProperty('java.awt.headless', 'true')
+from mipylib import miplot
+
+script = '''plot([1, 2, 3], [value, value + 1, value])
+title('Job %i' % value)
+savefig(outfile, 80, 60)
+'''
+
+class RenderBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.script = os.path.join(self.dir, 'job.py')
+        f = open(self.script, 'w')
+        f.write(script)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def outfile(self, i):
+        return os.path.join(self.dir, 'job%i.png' % i)
+
+    def test_png(self):
+        jobs = [dict(value=i, outfile=self.outfile(i)) for i in (1, 2)]
+        self.assertEqual(miplot.render_batch(jobs, self.script, workers=2), [None, None])
+        for i in (1, 2):
+            f = open(self.outfile(i), 'rb')
+            self.assertEqual(f.read(4), '\x89PNG')
+            f.close()
+
+    def test_failed_job(self):
+        # A failed job reports its error, the other jobs are rendered
+        jobs = [dict(value=1, outfile=self.outfile(1)), dict(outfile=self.outfile(2))]
+        r = miplot.render_batch(jobs, self.script, workers=1)
+        self.assertEqual(r[0], None)
+        self.assertTrue(r[1].startswith(self.script))
+        self.assertTrue(os.path.exists(self.outfile(1)))
+        self.assertFalse(os.path.exists(self.outfile(2)))
+
+    def test_missing_script(self):
+        jobs = [self.script, os.path.join(self.dir, 'missing.py')]
+        self.assertRaises(IOError, miplot.render_batch, jobs)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the typed column parsers
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import math
+import shutil
+import tempfile
+import jarray
+import unittest
+from mipylib import minum
+from mipylib import mitable
+
+class ColumnReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'table.csv')
+        f = open(self.fn, 'w')
+        f.write('name,v,n,d\n')
+        f.write('a,1.5,2,2016-01-02\n')
+        f.write('b,,x,\n')
+        f.write('\n')
+        f.write('c,bad,3,garbage\n')
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, True)
+
+    def read(self, n=None):
+        reader = mitable.ColumnReader(self.fn, ',', 0, '%s%f%i%{yyyy-MM-dd}D')
+        try:
+            return reader.read(n)
+        finally:
+            reader.close()
+
+    def test_columns(self):
+        t = self.read()
+        self.assertEqual(t.names, ['name', 'v', 'n', 'd'])
+        self.assertEqual(list(t.columns[0]), ['a', 'b', 'c'])
+        v = t.columns[1]
+        self.assertEqual(v[0], 1.5)
+        self.assertTrue(math.isnan(v[1]) and math.isnan(v[2]))
+
+    def test_invalid_tokens(self):
+        # Invalid integers are 0, invalid dates are missingdate
+        t = self.read()
+        self.assertEqual(list(t.columns[2]), [2, 0, 3])
+        d = t.columns[3]
+        self.assertEqual(d[0], 1451692800000L)
+        self.assertEqual(d[1], mitable.missingdate)
+        self.assertEqual(d[2], mitable.missingdate)
+
+    def test_chunks(self):
+        t = self.read(2)
+        self.assertEqual(len(t), 2)
+        self.assertEqual(list(t.columns[2]), [2, 0])
+
+class GroupByTest(unittest.TestCase):
+
+    def setUp(self):
+        # 2015-12-15, 2016-01-15 and 2016-03-15
+        self.ms = jarray.array([1450137600000L, 1452816000000L, 1458000000000L], 'l')
+        self.columns = {'v':jarray.array([1., 2., 3.], 'd')}
+
+    def test_winter_year(self):
+        # December is in the DJF season of the next year
+        g = mitable.GroupBy(self.ms, self.columns, ['v'], ['year', 'season'])
+        self.assertEqual(len(g), 2)
+        years, seasons = g.keyvalues()
+        self.assertEqual(list(years), [2016, 2016])
+        self.assertEqual(list(seasons), [1, 4])
+
+    def test_missing_date(self):
+        # The row of an invalid date field is not in any group
+        ms = jarray.array(list(self.ms) + [mitable.missingdate], 'l')
+        columns = {'v':jarray.array([1., 2., 3., 100.], 'd')}
+        g = mitable.GroupBy(ms, columns, ['v'], ['year'])
+        self.assertEqual(len(g), 2)
+        t = g.agg(['count', 'sum'])
+        self.assertEqual(list(t.coldata('year')), [2015, 2016])
+        self.assertEqual(list(t.coldata('v_count')), [1., 2.])
+        self.assertEqual(list(t.coldata('v_sum')), [1., 5.])
+
+    def test_invalid_date_row(self):
+        dir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(dir, 'table.csv')
+            f = open(fn, 'w')
+            f.write('d,v\n2016-01-02,1\ngarbage,5\n2016-02-03,2\n')
+            f.close()
+            t = minum.readtable(fn, delimiter=',', format='%{yyyy-MM-dd}D%f', columnar=True)
+            r = t.groupby('month').agg('sum')
+            self.assertEqual(list(r.coldata('month')), [1, 2])
+            self.assertEqual(list(r.coldata('v')), [1., 2.])
+        finally:
+            shutil.rmtree(dir, True)
+
+    def test_month_year(self):
+        g = mitable.GroupBy(self.ms, self.columns, ['v'], ['year', 'month'])
+        years, months = g.keyvalues()
+        self.assertEqual(list(years), [2015, 2016, 2016])
+        self.assertEqual(list(months), [12, 1, 3])
+
+class HashJoinTest(unittest.TestCase):
+
+    def setUp(self):
+        self.left = mitable.PyColumnTable()
+        self.left.addcol('id', [1, 2, 3])
+        self.left.addcol('v', [10., 20., 30.])
+        self.right = mitable.PyColumnTable()
+        self.right.addcol('id', [2, 3, 3, 4])
+        self.right.addcol('v', [200., 300., 301., 400.])
+        self.right.addcol('n', [5, 6, 7, 8])
+
+    def test_inner(self):
+        t = mitable.hashjoin(self.left, self.right, 'id')
+        self.assertEqual(t.names, ['id', 'v', 'v_r', 'n'])
+        self.assertEqual(list(t.coldata('id')), [2, 3, 3])
+        self.assertEqual(list(t.coldata('v')), [20., 30., 30.])
+        self.assertEqual(list(t.coldata('v_r')), [200., 300., 301.])
+        self.assertEqual(t.coltype('n'), 'i')
+
+    def test_left(self):
+        t = mitable.hashjoin(self.left, self.right, 'id', how='left')
+        self.assertEqual(list(t.coldata('id')), [1, 2, 3, 3])
+        # Integer column with missing keys is promoted to float
+        self.assertEqual(t.coltype('n'), 'f')
+        n = t.coldata('n')
+        self.assertTrue(math.isnan(n[0]))
+        self.assertEqual(list(n[1:]), [5., 6., 7.])
+
+    def test_outer(self):
+        t = mitable.hashjoin(self.left, self.right, 'id', how='outer')
+        self.assertEqual(list(t.coldata('id')), [1, 2, 3, 3, 4])
+        v = t.coldata('v')
+        self.assertTrue(math.isnan(v[4]))
+        self.assertEqual(list(t.coldata('v_r'))[1:], [200., 300., 301., 400.])
+
+    def test_multikey(self):
+        a = mitable.PyColumnTable()
+        a.addcol('stid', ['a', 'a', 'b'])
+        a.addcol('year', [2000, 2001, 2000])
+        b = mitable.PyColumnTable()
+        b.addcol('id', ['a', 'b'])
+        b.addcol('yr', [2001, 2000])
+        b.addcol('t', [1.5, 2.5])
+        t = mitable.hashjoin(a, b, ['stid', 'year'], ['id', 'yr'])
+        self.assertEqual(t.names, ['stid', 'year', 't'])
+        self.assertEqual(t.coldata('stid'), ['a', 'b'])
+        self.assertEqual(list(t.coldata('t')), [1.5, 2.5])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, mitable.hashjoin, self.left, self.right, 'id', how='cross')
+        self.assertRaises(ValueError, mitable.hashjoin, self.left, self.right, ['id', 'v'], 'id')
+
+class ColumnIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = mitable.ColumnIndex([3., 1., float('nan'), 2., 1.])
+
+    def lookup(self, op, v):
+        return sorted(self.index.lookup(op, v))
+
+    def test_lookup(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.lookup('=', 1.), [1, 4])
+        self.assertEqual(self.lookup('<>', 1.), [0, 3])
+        self.assertEqual(self.lookup('>', 1.), [0, 3])
+        self.assertEqual(self.lookup('>=', 2.), [0, 3])
+        self.assertEqual(self.lookup('<', 2.), [1, 4])
+        self.assertEqual(self.lookup('<=', 2.), [1, 3, 4])
+        self.assertEqual(self.lookup('=', 5.), [])
+
+    def test_sql(self):
+        t = mitable.PyColumnTable()
+        t.addcol('Stid', [54511., 54511., 58362.])
+        t.addcol('T', [20., 26., 30.])
+        t.createindex('Stid')
+        r = t.sql('Stid = 54511 AND T > 25')
+        self.assertEqual(list(r.coldata('T')), [26.])
+        # Replaced and renamed columns drop their indexes
+        t['Stid'] = [58362., 54511., 54511.]
+        self.assertEqual(list(t.sql('Stid = 54511').coldata('T')), [26., 30.])
+        t.createindex('T')
+        t.setcolname('T', 'Stid2')
+        self.assertEqual(len(t.indexes), 0)
+
+class PyTableDataIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'table.csv')
+        f = open(self.fn, 'w')
+        f.write('Stid,T,P\n')
+        f.write('54511,20,1000\n')
+        f.write('54511,26,1001\n')
+        f.write('58362,30,1002\n')
+        f.close()
+        self.t = minum.readtable(self.fn, delimiter=',', format='%i%f%f')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, True)
+
+    def test_sql(self):
+        t = self.t
+        t.createindex('Stid')
+        self.assertEqual(t.sql('Stid = 54511 AND T > 25').rownum(), 1)
+        self.assertEqual(t.sql('Stid = 54511').rownum(), 2)
+
+    def test_setitem_drops_index(self):
+        t = self.t
+        t.createindex('Stid')
+        t['Stid'] = [58362, 58362, 54511]
+        r = t.sql('Stid = 54511')
+        self.assertEqual(r.rownum(), 1)
+        self.assertEqual(r.getvalue(0, 1), 30)
+
+    def test_rename_drops_index(self):
+        t = self.t
+        t.createindex('P')
+        t.setcolname('P', 'Stid')
+        self.assertEqual(len(t.indexes), 0)
+        t.createindex('T')
+        t.setcolnames(['Stid', 'P', 'T'])
+        self.assertEqual(len(t.indexes), 0)
+
+if __name__ == '__main__':
+    unittest.main()
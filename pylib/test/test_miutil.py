@@ -0,0 +1,76 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the date conversions
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import datetime
+import unittest
+from java.util import TimeZone
+from mipylib import miutil
+
+class DateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tz = TimeZone.getDefault()
+        self.dates = [datetime.datetime(1969, 12, 31, 23, 59, 59), datetime.datetime(1970, 1, 1),
+            datetime.datetime(1900, 3, 1, 6), datetime.datetime(2000, 2, 29, 12, 30, 15),
+            datetime.datetime(2016, 12, 31, 23, 0, 1)]
+
+    def tearDown(self):
+        TimeZone.setDefault(self.tz)
+
+    def test_civildate(self):
+        self.assertEqual(miutil.civildate(0), (1970, 1, 1))
+        self.assertEqual(miutil.civildate(-1), (1969, 12, 31))
+        self.assertEqual(miutil.civildate(11016), (2000, 2, 29))
+        self.assertEqual(miutil.civildate(-25508), (1900, 3, 1))
+        for days in range(-800, 800, 7):
+            d = miutil.epochbase + datetime.timedelta(days=days)
+            self.assertEqual(miutil.civildate(days), (d.year, d.month, d.day))
+
+    def test_round_trip(self):
+        for t in self.dates:
+            self.assertEqual(miutil.num2date(miutil.date2num(t)), t)
+        self.assertEqual(miutil.date2num(datetime.datetime(1899, 12, 31, 12)), 1.5)
+
+    def test_arrays(self):
+        nums = miutil.dates2nums(self.dates)
+        ms = miutil.num2epoch(nums)
+        self.assertEqual(ms.aslist(), [-1000L, 0L, -2203869600000L,
+            951827415000L, 1483225201000L])
+        back = miutil.epoch2num(ms).aslist()
+        for u, v in zip(back, nums):
+            self.assertAlmostEqual(u, v, places=9)
+        fields = [f.aslist() for f in miutil.datefields(nums)]
+        for i in range(len(self.dates)):
+            t = self.dates[i]
+            self.assertEqual([f[i] for f in fields], [t.year, t.month, t.day, t.hour, t.minute, t.second])
+        self.assertEqual(miutil.epoch2num([1.], 'd').aslist(), [miutil.oaepoch + 1.])
+
+    def test_pydate_dst(self):
+        TimeZone.setDefault(TimeZone.getTimeZone('America/New_York'))
+        for t in [datetime.datetime(2016, 1, 15, 12), datetime.datetime(2016, 7, 1, 12),
+            datetime.datetime(2016, 3, 13, 3, 30), datetime.datetime(2016, 11, 6, 0, 30)]:
+            self.assertEqual(miutil.pydate(miutil.jdate(t)), t)
+            self.assertEqual(miutil.pydates([miutil.jdate(t)]), [t])
+
+    def test_strs2dates(self):
+        self.assertEqual(miutil.strs2dates(['2016-01-02', '2016-01-02'], '%Y-%m-%d'),
+            [datetime.datetime(2016, 1, 2)] * 2)
+        self.assertEqual(miutil.strs2dates(['2016010203'], '%Y%m%d%H'),
+            [datetime.datetime(2016, 1, 2, 3)])
+        self.assertEqual(miutil.strs2dates(['2016/01/02'], '%Y/%m/%d'),
+            [datetime.datetime(2016, 1, 2)])
+        # The strings not matching the fixed positions are parsed by strptime
+        self.assertEqual(miutil.strs2dates(['2016-1-2'], '%Y-%m-%d'),
+            [datetime.datetime(2016, 1, 2)])
+        self.assertRaises(ValueError, miutil.strs2dates, ['2016-01-02xyz'], '%Y-%m-%d')
+        self.assertRaises(ValueError, miutil.strs2dates, ['2016x01x02'], '%Y-%m-%d')
+        self.assertRaises(ValueError, miutil.strs2dates, ['2016-01-0a'], '%Y-%m-%d')
+        self.assertEqual(miutil.strs2dates(['02.01.2016'], '%d.%m.%Y'),
+            [datetime.datetime(2016, 1, 2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the netCDF-4 chunking and compression settings
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from ucar.ma2 import DataType
+from ucar.nc2 import NetcdfFileWriter
+from mipylib.dimdatafile import NcChunking, chunkshape
+
+class ChunkShapeTest(unittest.TestCase):
+
+    def test_map(self):
+        # Whole horizontal slices, the unlimited time dimension has chunks of one step
+        self.assertEqual(chunkshape([0, 180, 360]), [1, 180, 360])
+        self.assertEqual(chunkshape([12, 17, 180, 360], 'map', 8), [1, 1, 180, 360])
+        # The target size limits the rows of a slice
+        self.assertEqual(chunkshape([10, 20, 30], 'map', 8, 800), [1, 3, 30])
+        self.assertEqual(chunkshape([500]), [500])
+
+    def test_timeseries(self):
+        # Long time series of small horizontal tiles
+        self.assertEqual(chunkshape([0, 180, 360], 'timeseries'), [1024, 16, 16])
+        self.assertEqual(chunkshape([100, 50], 'timeseries'), [100, 50])
+        self.assertEqual(chunkshape([8760, 10, 10], 'timeseries', 8), [8760, 4, 3])
+
+    def test_scalar(self):
+        self.assertEqual(chunkshape([]), [])
+
+class NcChunkingTest(unittest.TestCase):
+
+    def setUp(self):
+        # Variables of a file definition, the file is not created
+        self.dir = tempfile.mkdtemp()
+        w = NetcdfFileWriter.createNew(NetcdfFileWriter.Version.netcdf3, 
+            os.path.join(self.dir, 'chunk.nc'))
+        t = w.addUnlimitedDimension('time')
+        y = w.addDimension(None, 'lat', 180)
+        x = w.addDimension(None, 'lon', 360)
+        self.v = w.addVariable(None, 'v', DataType.FLOAT, [t, y, x])
+        self.u = w.addVariable(None, 'u', DataType.FLOAT, [t, y, x])
+        self.s = w.addVariable(None, 's', DataType.INT, [])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, True)
+
+    def test_default(self):
+        c = NcChunking('map', 2, True)
+        self.assertTrue(c.isChunked(self.v))
+        self.assertEqual(list(c.computeChunking(self.v)), [1, 180, 360])
+        self.assertEqual(c.getDeflateLevel(self.v), 2)
+        self.assertTrue(c.isShuffle(self.v))
+        self.assertFalse(c.isChunked(self.s))
+
+    def test_variable(self):
+        c = NcChunking('map', 2, True)
+        c.setvar('v', chunksizes=[10, 18, 36], deflate=5, shuffle=False)
+        c.setvar('u', chunking='timeseries')
+        self.assertEqual(list(c.computeChunking(self.v)), [10, 18, 36])
+        self.assertEqual(c.getDeflateLevel(self.v), 5)
+        self.assertFalse(c.isShuffle(self.v))
+        # The unset options of a variable are the defaults
+        self.assertEqual(list(c.computeChunking(self.u)), [1024, 16, 16])
+        self.assertEqual(c.getDeflateLevel(self.u), 2)
+        self.assertTrue(c.isShuffle(self.u))
+
+    def test_standard(self):
+        # Without a policy the netCDF-Java standard strategy is used
+        c = NcChunking()
+        c.setvar('u', chunking='map')
+        self.assertEqual(list(c.computeChunking(self.u)), [1, 180, 360])
+        self.assertEqual(c.isChunked(self.v), c.standard.isChunked(self.v))
+        self.assertEqual(list(c.computeChunking(self.v)), list(c.standard.computeChunking(self.v)))
+        self.assertEqual(c.getDeflateLevel(self.v), 0)
+        self.assertFalse(c.isShuffle(self.v))
+
+if __name__ == '__main__':
+    unittest.main()
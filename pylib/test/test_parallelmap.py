@@ -0,0 +1,89 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the parallel map over the slabs of a variable
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from java.lang import Thread
+from java.util.concurrent.atomic import AtomicInteger
+from mipylib import minum
+from mipylib import miio
+
+class ParallelMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'map.nc')
+        self.n = 12
+        miio.ncwrite(self.fn, minum.arange(self.n * 2 * 3.).reshape(self.n, 2, 3), 'v')
+        self.f = minum.addfile(self.fn)
+        self.var = self.f['v']
+        # Sum of the 6 values of a slab
+        self.sums = [36. * i + 15. for i in range(self.n)]
+
+    def tearDown(self):
+        self.f.close()
+        shutil.rmtree(self.dir, True)
+
+    def test_ordered(self):
+        def fn(a):
+            # Later slabs finish first
+            time.sleep(0.01 * (a[0, 0] % 4))
+            return a.sum()
+        r = list(minum.parallel_map(fn, self.var, axis=0, workers=4))
+        self.assertEqual(r, zip(range(self.n), self.sums))
+        r = list(minum.parallel_map(fn, self.var, axis='dim0', workers=4, ordered=False))
+        self.assertEqual(sorted(r), zip(range(self.n), self.sums))
+
+    def test_backpressure(self):
+        started = AtomicInteger(0)
+        def fn(a):
+            started.incrementAndGet()
+            return a.sum()
+        workers = 2
+        consumed = 0
+        for idx, r in minum.parallel_map(fn, self.var, axis=0, workers=workers):
+            consumed += 1
+            # A slow consumer, the workers do not run ahead more than twice their number
+            time.sleep(0.05)
+            self.assertTrue(started.get() <= consumed + 2 * workers)
+        self.assertEqual(started.get(), self.n)
+
+    def test_error(self):
+        started = AtomicInteger(0)
+        def fn(a):
+            started.incrementAndGet()
+            if a[0, 0] == 18.:
+                raise ValueError('slab 3 failed')
+            return a.sum()
+        try:
+            list(minum.parallel_map(fn, self.var, axis=0, workers=2))
+            self.fail('ValueError is not raised')
+        except ValueError, e:
+            self.assertEqual(str(e), 'slab 3 failed')
+        # The slabs after the failed one are not all read
+        self.assertTrue(started.get() < self.n)
+
+    def test_write(self):
+        out = {}
+        threads = set()
+        def write(idx, r):
+            out[idx] = r
+            threads.add(Thread.currentThread())
+        n = minum.parallel_map(lambda a: a.sum(), self.var, axis=0, workers=3, write=write)
+        self.assertEqual(n, self.n)
+        self.assertEqual([out[i] for i in range(self.n)], self.sums)
+        # The results are written in the caller thread
+        self.assertEqual(threads, set([Thread.currentThread()]))
+
+    def test_axis(self):
+        self.assertRaises(ValueError, minum.parallel_map, lambda a: a, self.var, 'T')
+
+if __name__ == '__main__':
+    unittest.main()
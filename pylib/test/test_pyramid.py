@@ -0,0 +1,61 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the tiled raster pyramids
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from mipylib import minum
+from mipylib import miio
+from mipylib import pyramid
+from mipylib.pyramid import RasterPyramid
+
+class RasterPyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.a = minum.arange(600 * 520.0).reshape(600, 520)
+        self.x = minum.arange(520.0)
+        self.y = minum.arange(600.0)
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'raster.nc')
+        pyramid.tilecache.clear()
+
+    def tearDown(self):
+        pyramid.tilecache.clear()
+        shutil.rmtree(self.dir, True)
+
+    def test_levels(self):
+        s = RasterPyramid(self.a, self.x, self.y)
+        self.assertEqual(s.shapes, [[600, 520], [300, 260], [150, 130]])
+        t = s.tile(1, 1, 0)
+        # First cell of the tile is row 0, column 512 of the raster
+        self.assertEqual(t[0], 512.0)
+        self.assertEqual(t[1], 514.0)
+        self.assertEqual(len(t), 256 * 4)
+        ov, x, y = s.overview()
+        self.assertEqual(ov.shape, [150, 130])
+        self.assertEqual(ov[1, 1], 4 * 520 + 4.0)
+        self.assertEqual(list(x[:2]), [0.0, 4.0])
+
+    def test_lazy(self):
+        # The tiles of a file variable are read from the file
+        b = self.a.copy()
+        b[0, 0] = minum.nan
+        miio.ncwrite(self.fn, b, 'v')
+        f = minum.addfile(self.fn)
+        try:
+            v = f['v']
+            s = RasterPyramid(v.lazyarray(), self.x, self.y, -9999.0)
+            m = RasterPyramid(self.a, self.x, self.y)
+            for k, ti, tj in [(0, 1, 2), (1, 1, 0), (2, 0, 0)]:
+                self.assertEqual(list(s.tile(k, ti, tj))[1:], list(m.tile(k, ti, tj))[1:])
+            self.assertEqual(s.tile(0, 0, 0)[0], -9999.0)
+        finally:
+            f.close()
+
+if __name__ == '__main__':
+    unittest.main()
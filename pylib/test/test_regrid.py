@@ -0,0 +1,34 @@
+#-----------------------------------------------------
+# Author: agent
+# Date: 2026-10-18
+# Purpose: Tests of the regridding with precomputed weights
+# Note: Jython, run in the pylib folder with the MeteoInfo classpath:
+#   jython -m unittest discover -s test
+#-----------------------------------------------------
+import math
+import unittest
+from mipylib import minum
+from mipylib.regrid import Regridder
+
+class RegridderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.regridder = Regridder([0., 1.], [0., 1.], [0.5, 0.25], [0.5])
+
+    def test_values(self):
+        r = self.regridder(minum.array([1., 2., 3., 4.]).reshape(2, 2))
+        self.assertEqual(r.shape, [1, 2])
+        self.assertAlmostEqual(r[0, 0], 2.5)
+        self.assertAlmostEqual(r[0, 1], 2.25)
+
+    def test_missing(self):
+        # The missing source points are skipped and the valid weights renormalized
+        a = minum.array([1., minum.nan, 3., -9999.]).reshape(2, 2)
+        r = self.regridder(a, -9999.)
+        self.assertAlmostEqual(r[0, 0], 2.)
+        self.assertAlmostEqual(r[0, 1], (0.375 * 1 + 0.375 * 3) / 0.75)
+        r = self.regridder(minum.array([minum.nan] * 4).reshape(2, 2))
+        self.assertTrue(math.isnan(r[0, 0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,8 @@ import org.meteoinfo.console.JConsole;
 import java.awt.BorderLayout;
 import java.awt.Color;
 import java.awt.Dimension;
+import java.awt.event.ActionEvent;
+import java.awt.event.ActionListener;
 import java.io.ByteArrayInputStream;
 import java.io.File;
 import java.io.IOException;
@@ -19,8 +21,12 @@ import java.util.Locale;
 import java.util.logging.Level;
 import java.util.logging.Logger;
 import javax.swing.ImageIcon;
+import javax.swing.JButton;
+import javax.swing.JPanel;
+import javax.swing.JProgressBar;
 import javax.swing.JTextPane;
 import javax.swing.SwingWorker;
+import javax.swing.Timer;
 import org.meteoinfo.chart.ChartPanel;
 import org.python.core.Py;
 
@@ -33,6 +39,10 @@ public class ConsoleDockable extends DefaultSingleCDockable {
     private String startupPath;
     private FrmMain parent;
     private PythonInteractiveInterpreter interp;
+    private final JProgressBar progressBar;
+    private final JButton cancelButton;
+    private volatile int progress = -1;
+    private volatile String progressMessage = null;
 
     public ConsoleDockable(FrmMain parent, String startupPath, String id, String title, CAction... actions) {
         super(id, title, actions);
@@ -47,6 +57,77 @@ public class ConsoleDockable extends DefaultSingleCDockable {
         this.initializeConsole(console, parent.getCurrentFolder());
 
         this.getContentPane().add(console, BorderLayout.CENTER);
+
+        //Execution status bar: progress of the mipylib operations and the cancel button
+        progressBar = new JProgressBar(0, 100);
+        progressBar.setStringPainted(true);
+        progressBar.setVisible(false);
+        cancelButton = new JButton("Cancel");
+        cancelButton.setEnabled(false);
+        cancelButton.addActionListener(new ActionListener() {
+            @Override
+            public void actionPerformed(ActionEvent e) {
+                interp.cancel();
+            }
+        });
+        JPanel statusPanel = new JPanel(new BorderLayout());
+        statusPanel.add(progressBar, BorderLayout.CENTER);
+        statusPanel.add(cancelButton, BorderLayout.EAST);
+        this.getContentPane().add(statusPanel, BorderLayout.SOUTH);
+        new Timer(200, new ActionListener() {
+            @Override
+            public void actionPerformed(ActionEvent e) {
+                updateStatus();
+            }
+        }).start();
+    }
+
+    /**
+     * Update the execution status bar
+     */
+    private void updateStatus() {
+        boolean executing = this.interp.isExecuting();
+        if (!executing) {
+            this.progress = -1;
+        }
+        this.cancelButton.setEnabled(executing);
+        int p = this.progress;
+        if (p < 0) {
+            this.progressBar.setVisible(false);
+        } else {
+            this.progressBar.setValue(p);
+            String msg = this.progressMessage;
+            this.progressBar.setString(msg == null ? p + "%" : msg + " " + p + "%");
+            this.progressBar.setVisible(true);
+        }
+    }
+
+    /**
+     * Set the progress of the current execution, called by mipylib from the executing
+     * thread
+     *
+     * @param percent Progress percent
+     * @param message Progress message
+     */
+    public void setProgress(int percent, String message) {
+        this.progressMessage = message;
+        this.progress = percent;
+    }
+
+    /**
+     * Get if the current execution is cancelled
+     *
+     * @return Boolean
+     */
+    public boolean isCancelled() {
+        return this.interp.isCancelled();
+    }
+
+    /**
+     * Cancel the current execution
+     */
+    public void cancel() {
+        this.interp.cancel();
     }
 
     /**
@@ -79,6 +160,7 @@ public class ConsoleDockable extends DefaultSingleCDockable {
         //this.setCursor(Cursor.getPredefinedCursor(Cursor.WAIT_CURSOR));
         try {
             interp.set("milapp", parent);
+            interp.set("miconsole", this);
             interp.exec("import sys");
             interp.exec("import os");
             interp.exec("import datetime");
@@ -107,6 +189,8 @@ public class ConsoleDockable extends DefaultSingleCDockable {
             interp.exec("mipylib.miplot.isinteractive = True");
             interp.exec("mipylib.miplot.milapp1 = milapp");
             interp.exec("mipylib.minum.currentfolder = '" + currentPath + "'");
+            interp.exec("import mipylib.miprogress");
+            interp.exec("mipylib.miprogress.sethooks(miconsole.setProgress, miconsole.isCancelled)");
         } catch (Exception e) {
             e.printStackTrace();
         }
@@ -150,34 +234,63 @@ public class ConsoleDockable extends DefaultSingleCDockable {
     }
 
     /**
-     * Run a command line
+     * Run a command line in a background thread, the execution can be cancelled
      *
      * @param command Command line
      */
-    public void run(String command) {
+    public void run(final String command) {
         this.interp.console.println(command);
         //this.interp.exec(command);
-        try {
-            this.interp.exec(command);
-        } catch (Exception e) {
-        } finally {
-            this.interp.out.print(">>> ");
-            interp.exec("mipylib.miplot.isinteractive = True");
-        }
+        SwingWorker worker = new SwingWorker<String, String>() {
+            @Override
+            protected String doInBackground() throws Exception {
+                interp.beginExec();
+                try {
+                    interp.exec(command);
+                } catch (Exception e) {
+                } finally {
+                    try {
+                        interp.exec("mipylib.miplot.isinteractive = True");
+                    } finally {
+                        interp.endExec();
+                    }
+                    interp.out.print(">>> ");
+                }
+                return "";
+            }
+        };
+        worker.execute();
     }
 
     /**
-     * Run a command line
+     * Run a command line in a background thread, the execution can be cancelled
      *
      * @param command Command line
      */
-    public void exec(String command) {
+    public void exec(final String command) {
         this.interp.console.println("run script...");
         //this.interp.console.error(this.interp.err);
-        this.interp.exec(command);
-        //this.interp.push(command);
-        this.interp.out.print(">>> ");
-        interp.exec("mipylib.miplot.isinteractive = True");
+        SwingWorker worker = new SwingWorker<String, String>() {
+            @Override
+            protected String doInBackground() throws Exception {
+                interp.beginExec();
+                try {
+                    interp.exec(command);
+                    //interp.push(command);
+                } catch (Exception e) {
+                    e.printStackTrace();
+                } finally {
+                    try {
+                        interp.exec("mipylib.miplot.isinteractive = True");
+                    } finally {
+                        interp.endExec();
+                    }
+                    interp.out.print(">>> ");
+                }
+                return "";
+            }
+        };
+        worker.execute();
     }
 
     /**
@@ -284,6 +397,8 @@ public class ConsoleDockable extends DefaultSingleCDockable {
                 System.setErr(printStream);
 
                 String encoding = "utf-8";
+                //The interactive switches are in the same execution as the script
+                interp.beginExec();
                 try {
                     interp.exec("mipylib.miplot.isinteractive = False");
                     interp.exec("clf()");
@@ -295,6 +410,8 @@ public class ConsoleDockable extends DefaultSingleCDockable {
                     interp.console.setStyle(Color.black);
                     //interp.console.setForeground(Color.black);
                     interp.exec("mipylib.miplot.isinteractive = True");
+                } finally {
+                    interp.endExec();
                 }
 
                 //String encoding = EncodingUtil.findEncoding(code);                
@@ -11,6 +11,7 @@ import java.io.IOException;
 import java.io.InputStream;
 import java.io.PrintStream;
 import java.io.Reader;
+import java.util.concurrent.locks.ReentrantLock;
 import javax.swing.event.EventListenerList;
 import org.meteoinfo.laboratory.event.ConsoleExecEvent;
 import org.meteoinfo.laboratory.event.IConsoleExecListener;
@@ -27,6 +28,9 @@ public class PythonInteractiveInterpreter extends InteractiveConsole implements
     transient PrintStream err;
     JConsole console;
     private final EventListenerList listeners = new EventListenerList();
+    private volatile Thread execThread = null;
+    private volatile boolean cancelled = false;
+    private final ReentrantLock execLock = new ReentrantLock(true);
 
     public PythonInteractiveInterpreter(JConsole console) {
         super();
@@ -84,7 +88,13 @@ public class PythonInteractiveInterpreter extends InteractiveConsole implements
                     line = "";
                 }
 
-                boolean retVal = push(line);
+                boolean retVal;
+                this.beginExec();
+                try {
+                    retVal = push(line);
+                } finally {
+                    this.endExec();
+                }
 
                 if (retVal) {
                     out.print(ps2);                    
@@ -101,11 +111,86 @@ public class PythonInteractiveInterpreter extends InteractiveConsole implements
     @Override
     public void execfile(InputStream s){
         this.cflags.source_is_utf8 = false;
-        super.execfile(s);
-        this.cflags.source_is_utf8 = true;
+        this.beginExec();
+        try {
+            super.execfile(s);
+        } finally {
+            this.endExec();
+            this.cflags.source_is_utf8 = true;
+        }
         this.fireConsoleExecEvent();
     }
 
+    /**
+     * Mark the start of a user code execution in the current thread. Executions are
+     * serialized, the call waits until the running execution of another thread ends, so
+     * the execution thread and cancellation of an execution are not overwritten. A nested
+     * call in the executing thread only joins the running execution
+     */
+    public void beginExec() {
+        this.execLock.lock();
+        if (this.execLock.getHoldCount() > 1) {
+            return;
+        }
+        this.cancelled = false;
+        Thread.interrupted();
+        this.execThread = Thread.currentThread();
+    }
+
+    /**
+     * Mark the end of a user code execution, the interrupted status set by cancellation
+     * is cleared and the next waiting execution is started
+     */
+    public void endExec() {
+        if (this.execLock.getHoldCount() > 1) {
+            this.execLock.unlock();
+            return;
+        }
+        try {
+            this.execThread = null;
+            Thread.interrupted();
+            if (this.cancelled) {
+                this.cancelled = false;
+                this.console.print("Execution cancelled\n", Color.red);
+            }
+        } finally {
+            this.execLock.unlock();
+        }
+    }
+
+    /**
+     * Get if user code is executing
+     *
+     * @return Boolean
+     */
+    public boolean isExecuting() {
+        return this.execThread != null;
+    }
+
+    /**
+     * Get if the current execution is cancelled
+     *
+     * @return Boolean
+     */
+    public boolean isCancelled() {
+        return this.cancelled;
+    }
+
+    /**
+     * Cancel the current execution. The executing thread is interrupted, and the loops of
+     * mipylib check the cancellation between their steps. Note that the interruption
+     * closes a NIO file channel in use by the thread (ClosedByInterruptException), the
+     * memory-mapped arrays of mipylib reopen their closed channel on the next access, other
+     * channels opened by user code have to be reopened
+     */
+    public void cancel() {
+        Thread t = this.execThread;
+        if (t != null) {
+            this.cancelled = true;
+            t.interrupt();
+        }
+    }
+
     public void addConsoleExecListener(IConsoleExecListener listener) {
         this.listeners.add(IConsoleExecListener.class, listener);
     }